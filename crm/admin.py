@@ -26,6 +26,8 @@ from .models import (
     AccountingEntry,
     AccountingMonthlyTarget,
     BDMonthlyTarget,
+    LLMResponseCache,
+    RequestProfileWindow,
     SalesCommission,
 )
 
@@ -469,3 +471,35 @@ class EmailInboxConfigAdmin(admin.ModelAdmin):
     list_display = ("label", "username", "imap_host", "imap_port", "use_ssl", "is_enabled", "updated_at")
     list_filter = ("label", "use_ssl", "is_enabled")
     search_fields = ("username", "imap_host")
+
+
+# -------------------------
+# Request profiling
+# -------------------------
+
+@admin.register(RequestProfileWindow)
+class RequestProfileWindowAdmin(admin.ModelAdmin):
+    list_display = ("window_start", "view_name", "worker", "request_count", "max_ms", "max_queries", "duplicate_queries")
+    list_filter = ("window_start",)
+    search_fields = ("view_name", "worker")
+    readonly_fields = [field.name for field in RequestProfileWindow._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LLMResponseCache)
+class LLMResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ("feature", "model_name", "status", "hit_count", "prompt_tokens", "completion_tokens", "last_used_at", "expires_at")
+    list_filter = ("status", "feature")
+    search_fields = ("key", "feature")
+    readonly_fields = [field.name for field in LLMResponseCache._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
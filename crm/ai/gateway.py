@@ -0,0 +1,517 @@
+# crm/ai/gateway.py
+"""
+Single entry point for LLM chat calls.
+
+``chat`` answers inline; ``submit`` queues the call on Celery and returns a
+placeholder the page polls through ``result_for``. Both share a response cache
+keyed by a hash of model, messages and options, coalesce identical concurrent
+prompts, and log latency and token usage into AISystemLog.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import IntegrityError, OperationalError, ProgrammingError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from crm.models import LLMResponseCache
+from crm.utils.activity_log import log_activity
+
+try:
+    from openai import OpenAI
+except Exception:
+    OpenAI = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class LLMNotConfigured(LLMError):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+@dataclass
+class LLMResult:
+    key: str
+    status: str
+    text: str = ""
+    error: str = ""
+    cached: bool = False
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    latency_ms: int | None = None
+
+    @property
+    def ready(self):
+        return self.status == LLMResponseCache.STATUS_READY
+
+    @property
+    def pending(self):
+        return self.status == LLMResponseCache.STATUS_PENDING
+
+
+class OpenAIBackend:
+    provider = "openai"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._client_key = None
+
+    def _api_key(self):
+        return (_setting("OPENAI_API_KEY", "") or "").strip()
+
+    def unavailable_reason(self):
+        if not self._api_key():
+            return "OPENAI_API_KEY is missing in settings."
+        if OpenAI is None:
+            return "OpenAI library is not installed on server."
+        return ""
+
+    def available(self):
+        return not self.unavailable_reason()
+
+    def client(self):
+        """Client reused across calls; rebuilt when the API key changes."""
+        api_key = self._api_key()
+        with self._lock:
+            if self._client is None or self._client_key != api_key:
+                self._client = OpenAI(api_key=api_key, timeout=float(_setting("CRM_LLM_TIMEOUT_SECONDS", 60)))
+                self._client_key = api_key
+            return self._client
+
+    def complete(self, *, model, messages, max_tokens=None, temperature=None):
+        options = {}
+        if max_tokens:
+            options["max_tokens"] = max_tokens
+        if temperature is not None:
+            options["temperature"] = temperature
+        response = self.client().chat.completions.create(model=model, messages=messages, **options)
+        usage = getattr(response, "usage", None)
+        return Completion(
+            text=(response.choices[0].message.content or "").strip(),
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+        )
+
+
+class StubBackend:
+    """Offline backend for tests and local runs: echoes the last message and records every call."""
+
+    provider = "local"
+
+    def __init__(self):
+        self.calls = []
+
+    def unavailable_reason(self):
+        return ""
+
+    def available(self):
+        return True
+
+    def complete(self, *, model, messages, max_tokens=None, temperature=None):
+        self.calls.append({"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature})
+        last = str(messages[-1].get("content", "")) if messages else ""
+        text = f"[stub {model}] {' '.join(last.split())[:200]}"
+        return Completion(
+            text=text,
+            prompt_tokens=sum(len(str(message.get("content", "")).split()) for message in messages),
+            completion_tokens=len(text.split()),
+        )
+
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    name = (_setting("CRM_LLM_BACKEND", "openai") or "openai").strip().lower()
+    if name not in BACKENDS:
+        raise LLMNotConfigured(f"Unknown CRM_LLM_BACKEND {name!r}.")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def llm_available():
+    try:
+        return get_backend().available()
+    except LLMNotConfigured:
+        return False
+
+
+def default_model():
+    return (_setting("CRM_LLM_MODEL", "") or "gpt-4o-mini").strip()
+
+
+def _request(messages, model=None, max_tokens=None, temperature=None):
+    return {
+        "model": (model or default_model()).strip(),
+        "messages": [{"role": message["role"], "content": str(message.get("content") or "")} for message in messages],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+
+
+def request_key(request):
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_ttl(cache_ttl):
+    if cache_ttl is None:
+        cache_ttl = _setting("CRM_LLM_CACHE_TTL_SECONDS", 3600)
+    return max(0, int(cache_ttl or 0))
+
+
+def _user_or_none(user):
+    return user if getattr(user, "is_authenticated", False) else None
+
+
+def _log_call(*, user, feature, provider, model, level, message, latency_ms=None, completion=None, error=None, detail=""):
+    error_detail = str(error)[:2000] if error else ""
+    if detail:
+        error_detail = f"{error_detail}\nMETA: {detail}" if error_detail else detail
+    try:
+        log_activity(
+            user=_user_or_none(user),
+            feature=(feature or "llm")[:80],
+            provider=provider,
+            model_name=model[:80],
+            level=level,
+            message=message,
+            error_type=error.__class__.__name__ if error else "",
+            error_detail=error_detail[:5000],
+            latency_ms=latency_ms,
+            prompt_tokens=getattr(completion, "prompt_tokens", None),
+            completion_tokens=getattr(completion, "completion_tokens", None),
+        )
+    except (OperationalError, ProgrammingError):
+        logger.warning("AI system log write failed", exc_info=True)
+
+
+def _result_from_row(row, cached):
+    return LLMResult(
+        key=row.key,
+        status=row.status,
+        text=row.text,
+        error=row.error,
+        cached=cached,
+        prompt_tokens=row.prompt_tokens,
+        completion_tokens=row.completion_tokens,
+        latency_ms=row.latency_ms,
+    )
+
+
+def _cached_result(key, now):
+    try:
+        row = LLMResponseCache.objects.filter(
+            key=key,
+            status=LLMResponseCache.STATUS_READY,
+            expires_at__gt=now,
+        ).first()
+        if row is None:
+            return None
+        LLMResponseCache.objects.filter(pk=row.pk).update(hit_count=F("hit_count") + 1, last_used_at=now)
+    except (OperationalError, ProgrammingError):
+        return None
+    return _result_from_row(row, cached=True)
+
+
+def evict_llm_cache(now=None):
+    """Drop expired answers, then the least recently used ones past ``CRM_LLM_CACHE_MAX_ENTRIES``."""
+    now = now or timezone.now()
+    deleted, _ = LLMResponseCache.objects.filter(expires_at__lte=now).delete()
+    limit = max(1, int(_setting("CRM_LLM_CACHE_MAX_ENTRIES", 2000)))
+    overflow = list(LLMResponseCache.objects.order_by("-last_used_at", "-pk").values_list("pk", flat=True)[limit:])
+    if overflow:
+        deleted += LLMResponseCache.objects.filter(pk__in=overflow).delete()[0]
+    return deleted
+
+
+def _store(key, request, feature, result, ttl):
+    now = timezone.now()
+    try:
+        LLMResponseCache.objects.update_or_create(
+            key=key,
+            defaults={
+                "feature": (feature or "")[:80],
+                "model_name": request["model"][:80],
+                "status": LLMResponseCache.STATUS_READY,
+                "text": result.text,
+                "error": "",
+                "prompt_tokens": result.prompt_tokens,
+                "completion_tokens": result.completion_tokens,
+                "latency_ms": result.latency_ms,
+                "created_at": now,
+                "last_used_at": now,
+                "expires_at": now + timedelta(seconds=ttl),
+            },
+        )
+        evict_llm_cache(now)
+    except (OperationalError, ProgrammingError, IntegrityError):
+        logger.warning("LLM response cache write failed", exc_info=True)
+
+
+def _execute(key, request, *, feature, user, ttl, log_detail):
+    backend = get_backend()
+    reason = backend.unavailable_reason()
+    if reason:
+        error = LLMNotConfigured(reason)
+        _log_call(
+            user=user,
+            feature=feature,
+            provider=backend.provider,
+            model=request["model"],
+            level="error",
+            message="LLM backend is not configured",
+            error=error,
+            detail=log_detail,
+        )
+        raise error
+
+    started = time.monotonic()
+    try:
+        completion = backend.complete(**request)
+    except Exception as exc:
+        _log_call(
+            user=user,
+            feature=feature,
+            provider=backend.provider,
+            model=request["model"],
+            level="error",
+            message="LLM call failed",
+            latency_ms=int((time.monotonic() - started) * 1000),
+            error=exc,
+            detail=log_detail,
+        )
+        raise LLMError(str(exc)) from exc
+
+    latency_ms = int((time.monotonic() - started) * 1000)
+    _log_call(
+        user=user,
+        feature=feature,
+        provider=backend.provider,
+        model=request["model"],
+        level="info",
+        message="LLM call success",
+        latency_ms=latency_ms,
+        completion=completion,
+        detail=log_detail,
+    )
+    result = LLMResult(
+        key=key,
+        status=LLMResponseCache.STATUS_READY,
+        text=completion.text,
+        prompt_tokens=completion.prompt_tokens,
+        completion_tokens=completion.completion_tokens,
+        latency_ms=latency_ms,
+    )
+    if ttl:
+        _store(key, request, feature, result, ttl)
+    return result
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def chat(messages, *, feature, user=None, model=None, max_tokens=None, temperature=None, cache_ttl=None, log_detail=""):
+    """
+    Answer ``messages`` now. Cached answers are reused for ``cache_ttl`` seconds
+    (``0`` disables the cache); identical prompts already running in this
+    process wait for that call instead of starting their own.
+    """
+    request = _request(messages, model, max_tokens, temperature)
+    key = request_key(request)
+    ttl = _cache_ttl(cache_ttl)
+    if ttl:
+        cached = _cached_result(key, timezone.now())
+        if cached is not None:
+            return cached
+
+    with _in_flight_lock:
+        flight = _in_flight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[key] = _InFlight()
+
+    if not leader:
+        if not flight.done.wait(float(_setting("CRM_LLM_TIMEOUT_SECONDS", 60))):
+            raise LLMError("Timed out waiting for an identical LLM request.")
+        if flight.error is not None:
+            raise flight.error
+        return replace(flight.result, cached=True)
+
+    try:
+        flight.result = _execute(key, request, feature=feature, user=user, ttl=ttl, log_detail=log_detail)
+        return flight.result
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+        flight.done.set()
+
+
+def chat_text(messages, **options):
+    return chat(messages, **options).text
+
+
+def _pending_timeout():
+    return timedelta(seconds=max(1, int(_setting("CRM_LLM_PENDING_TIMEOUT_SECONDS", 300))))
+
+
+def _enqueue(key, payload):
+    try:
+        from crm.tasks import run_llm_request_task
+
+        run_llm_request_task.apply_async(args=[key, payload], retry=False)
+    except Exception as exc:
+        logger.exception("LLM background request could not be queued", extra={"llm_key": key})
+        LLMResponseCache.objects.filter(key=key, status=LLMResponseCache.STATUS_PENDING).update(
+            status=LLMResponseCache.STATUS_FAILED,
+            error=f"Queue unavailable: {exc}"[:255],
+        )
+
+
+def submit(messages, *, feature, user=None, model=None, max_tokens=None, temperature=None, cache_ttl=None):
+    """
+    Cached answer when there is one; otherwise queue the call on Celery and
+    return a pending result whose ``key`` the page polls with ``result_for``.
+    Only one task runs per key until it finishes or goes stale.
+    """
+    request = _request(messages, model, max_tokens, temperature)
+    key = request_key(request)
+    ttl = _cache_ttl(cache_ttl) or _cache_ttl(None) or 3600
+    now = timezone.now()
+    pending = LLMResult(key=key, status=LLMResponseCache.STATUS_PENDING)
+
+    try:
+        row = LLMResponseCache.objects.filter(key=key).first()
+        if row is not None and row.status == LLMResponseCache.STATUS_READY and row.expires_at > now:
+            LLMResponseCache.objects.filter(pk=row.pk).update(hit_count=F("hit_count") + 1, last_used_at=now)
+            return _result_from_row(row, cached=True)
+        if row is not None and row.status == LLMResponseCache.STATUS_PENDING and row.created_at > now - _pending_timeout():
+            return pending
+
+        claim = {
+            "feature": (feature or "")[:80],
+            "model_name": request["model"][:80],
+            "status": LLMResponseCache.STATUS_PENDING,
+            "text": "",
+            "error": "",
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+        }
+        if row is None:
+            try:
+                with transaction.atomic():
+                    LLMResponseCache.objects.create(key=key, **claim)
+            except IntegrityError:
+                return pending
+        elif not LLMResponseCache.objects.filter(pk=row.pk, status=row.status, created_at=row.created_at).update(**claim):
+            return pending
+    except (OperationalError, ProgrammingError) as exc:
+        return LLMResult(key=key, status=LLMResponseCache.STATUS_FAILED, error=str(exc)[:255])
+
+    payload = {
+        "request": request,
+        "feature": feature,
+        "user_id": getattr(_user_or_none(user), "pk", None),
+        "cache_ttl": ttl,
+    }
+    transaction.on_commit(lambda: _enqueue(key, payload))
+    return pending
+
+
+def run_submitted(key, payload):
+    """Celery side of ``submit``: run the call and leave the answer or the error on the cache row."""
+    user_id = payload.get("user_id")
+    user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    request = payload["request"]
+    try:
+        chat(
+            request["messages"],
+            feature=payload.get("feature") or "llm",
+            user=user,
+            model=request["model"],
+            max_tokens=request.get("max_tokens"),
+            temperature=request.get("temperature"),
+            cache_ttl=payload.get("cache_ttl"),
+        )
+    except LLMError as exc:
+        LLMResponseCache.objects.filter(key=key).update(
+            status=LLMResponseCache.STATUS_FAILED,
+            error=str(exc)[:255],
+            last_used_at=timezone.now(),
+        )
+        return {"key": key, "status": LLMResponseCache.STATUS_FAILED, "error": str(exc)}
+    return {"key": key, "status": LLMResponseCache.STATUS_READY, "error": ""}
+
+
+def _result_token_salt(user):
+    return f"crm.ai.result:{getattr(_user_or_none(user), 'pk', '')}"
+
+
+def result_token(key, user):
+    """Poll token for ``key`` that only ``user`` can redeem with ``result_for_token``."""
+    return signing.dumps(key, salt=_result_token_salt(user))
+
+
+def result_for_token(token, user):
+    """``result_for`` the key signed into ``token``; ``None`` when it was issued to someone else."""
+    try:
+        key = signing.loads(token, salt=_result_token_salt(user))
+    except signing.BadSignature:
+        return None
+    return result_for(key)
+
+
+def result_for(key):
+    """Current state of a submitted request, or ``None`` for an unknown or evicted key."""
+    row = LLMResponseCache.objects.filter(key=key).first()
+    if row is None:
+        return None
+    result = _result_from_row(row, cached=row.status == LLMResponseCache.STATUS_READY)
+    if result.pending and row.created_at <= timezone.now() - _pending_timeout():
+        return replace(result, status=LLMResponseCache.STATUS_FAILED, error="The AI request timed out.")
+    return result
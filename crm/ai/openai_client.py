@@ -1,14 +1,13 @@
 # crm/ai/openai_client.py
 
 import json
-import time
 from django.conf import settings
 try:
     from openai import OpenAI
 except Exception:
     OpenAI = None
 
-from crm.utils.activity_log import log_activity
+from crm.ai.gateway import LLMError, LLMNotConfigured, chat
 
 class OpenAIConfigError(ValueError):
     pass
@@ -22,38 +21,10 @@ class OpenAIServiceError(RuntimeError):
     pass
 
 
-_client = None
-_client_key = None
-
-
-def _get_api_key():
-    return (getattr(settings, "OPENAI_API_KEY", "") or "").strip()
-
-
 def _get_model_name():
     return (getattr(settings, "OPENAI_MODEL", "") or "gpt-4.1-mini").strip()
 
 
-def get_client():
-    """
-    Returns a cached OpenAI client.
-    If the API key changes, rebuild the client.
-    """
-    global _client, _client_key
-
-    api_key = _get_api_key()
-    if not api_key:
-        return None
-    if OpenAI is None:
-        return None
-
-    if _client is None or _client_key != api_key:
-        _client = OpenAI(api_key=api_key)
-        _client_key = api_key
-
-    return _client
-
-
 def _safe_json(meta):
     if not meta:
         return ""
@@ -63,80 +34,18 @@ def _safe_json(meta):
         return ""
 
 
-def _extract_text(resp):
-    """
-    Tries common response shapes and returns text.
-    """
-    if resp is None:
-        return ""
-
-    text = (getattr(resp, "output_text", "") or "").strip()
-    if text:
-        return text
-
-    # Fallback if output_text is not present
-    try:
-        output = getattr(resp, "output", None)
-        if not output:
-            return ""
-        parts = []
-        for item in output:
-            content = getattr(item, "content", None)
-            if not content:
-                continue
-            for c in content:
-                t = getattr(c, "text", None)
-                if t:
-                    parts.append(t)
-        return "\n".join(parts).strip()
-    except Exception:
-        return ""
-
-
 def ask_openai(*, user=None, prompt_text="", meta=None, feature="openai_answer"):
     """
     Returns plain text answer.
-    Logs success and error into AISystemLog using crm.utils.activity_log.log_activity
+    The call goes through crm.ai.gateway, which logs success and error into AISystemLog.
     """
     prompt_text = (prompt_text or "").strip()
     if not prompt_text:
         raise ValueError("Prompt is empty")
 
-    api_key = _get_api_key()
-    if not api_key:
-        log_activity(
-            user=user,
-            feature=feature,
-            provider="openai",
-            model_name=_get_model_name(),
-            level="error",
-            message="OPENAI_API_KEY is missing",
-        )
-        raise OpenAIConfigError("OPENAI_API_KEY is missing in settings")
-
-    model = _get_model_name()
-    start = time.time()
-
-    client = get_client()
-    if client is None:
-        log_activity(
-            user=user,
-            feature=feature,
-            provider="openai",
-            model_name=model,
-            level="error",
-            message="OpenAI client could not be created",
-        )
-        if OpenAI is None:
-            raise OpenAILibraryMissingError("OpenAI library is not installed on server")
-        raise OpenAIConfigError("OpenAI client could not be created")
-
-    meta_text = _safe_json(meta)
-
     try:
-        resp = client.responses.create(
-            model=model,
-            input=[
+        result = chat(
+            [
                 {
                     "role": "system",
                     "content": (
@@ -148,36 +57,16 @@ def ask_openai(*, user=None, prompt_text="", meta=None, feature="openai_answer")
                 },
                 {"role": "user", "content": prompt_text},
             ],
-        )
-
-        text = _extract_text(resp)
-        latency_ms = int((time.time() - start) * 1000)
-
-        log_activity(
-            user=user,
             feature=feature,
-            provider="openai",
-            model_name=model,
-            level="info",
-            message="OpenAI answer success",
-            error_detail=meta_text,
-            latency_ms=latency_ms,
-        )
-
-        return text or "No answer was returned."
-
-    except Exception as e:
-        latency_ms = int((time.time() - start) * 1000)
-
-        log_activity(
             user=user,
-            feature=feature,
-            provider="openai",
-            model_name=model,
-            level="error",
-            message="OpenAI answer failed",
-            error_type=e.__class__.__name__,
-            error_detail=(str(e)[:2000] + ("\nMETA: " + meta_text if meta_text else ""))[:5000],
-            latency_ms=latency_ms,
+            model=_get_model_name(),
+            log_detail=_safe_json(meta),
         )
+    except LLMNotConfigured as e:
+        if OpenAI is None and (getattr(settings, "OPENAI_API_KEY", "") or "").strip():
+            raise OpenAILibraryMissingError("OpenAI library is not installed on server") from e
+        raise OpenAIConfigError(str(e)) from e
+    except LLMError as e:
         raise OpenAIServiceError(str(e)) from e
+
+    return result.text or "No answer was returned."
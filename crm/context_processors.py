@@ -1,9 +1,9 @@
 from django.db.utils import OperationalError, ProgrammingError
 from django.db.models import Count, Q, Window
-from django.core.cache import cache
 from django.contrib.contenttypes.models import ContentType
 
 from crm.services.operations_notifications import (
+    HEADER_CACHE,
     notification_priority_order,
     prepare_notification_display,
     visible_notifications,
@@ -17,8 +17,7 @@ def operations_header(request):
     if not user or not getattr(user, "is_authenticated", False):
         return {"crm_header_notifications": [], "crm_header_unread_count": 0}
     route_name = getattr(getattr(request, "resolver_match", None), "url_name", "")
-    cache_key = f"crm-header-unread:{user.pk}"
-    cached = cache.get(cache_key)
+    cached = HEADER_CACHE.get("payload", scope=user.pk)
     if isinstance(cached, dict):
         return cached
     if route_name == "quick_costing_detail":
@@ -54,7 +53,7 @@ def operations_header(request):
             ],
             "crm_header_unread_count": unread_count,
         }
-        cache.set(cache_key, payload, 60)
+        HEADER_CACHE.set("payload", payload, scope=user.pk)
         return payload
     except (OperationalError, ProgrammingError):
         return {"crm_header_notifications": [], "crm_header_unread_count": 0}
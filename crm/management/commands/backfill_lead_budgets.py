@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from crm.models import Lead
+from crm.services.lead_budget import apply_lead_budget_fields
+
+
+class Command(BaseCommand):
+    help = "Parse free-text lead budgets into the numeric budget_min/budget_max/budget_currency columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="Report how many leads would be updated without saving.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of leads written per bulk update.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = bool(options.get("dry_run"))
+        batch_size = max(1, int(options.get("batch_size") or 500))
+
+        qs = Lead.objects.only("id", "budget", "budget_min", "budget_max", "budget_currency").order_by("id")
+        pending = []
+        checked = 0
+        updated = 0
+
+        for lead in qs.iterator(chunk_size=batch_size):
+            checked += 1
+            if not apply_lead_budget_fields(lead):
+                continue
+            updated += 1
+            if dry_run:
+                continue
+            pending.append(lead)
+            if len(pending) >= batch_size:
+                Lead.objects.bulk_update(pending, ["budget_min", "budget_max", "budget_currency"])
+                pending = []
+
+        if pending and not dry_run:
+            Lead.objects.bulk_update(pending, ["budget_min", "budget_max", "budget_currency"])
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(f"Dry run: {updated} leads would be updated out of {checked} checked.")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Updated {updated} leads out of {checked} checked."))
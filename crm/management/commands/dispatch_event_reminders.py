@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from crm.services.calendar_notifications import dispatch_due_event_reminders
+
+
+class Command(BaseCommand):
+    help = "Send due calendar reminder emails (the beat task runs this every minute)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Reminders per SMTP connection.")
+
+    def handle(self, *args, **options):
+        result = dispatch_due_event_reminders(batch_size=options.get("batch_size"))
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        self.stdout.write(self.style.SUCCESS(f"Calendar reminders sent: {result['sent']}, failed: {result['failed']}"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from crm.services.search_index import SEARCH_INDEX_MODELS, rebuild_search_index, search_fts_available
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CRM search index for leads, customers, opportunities and production orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="models",
+            default=[],
+            help="Limit the rebuild to one model label (e.g. crm.lead). Repeat for several.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of documents written per bulk insert.",
+        )
+
+    def handle(self, *args, **options):
+        labels = [label.strip().lower() for label in options.get("models") or [] if label.strip()]
+        unknown = [label for label in labels if label not in SEARCH_INDEX_MODELS]
+        if unknown:
+            raise CommandError(
+                f"Unknown model label(s): {', '.join(unknown)}. Choose from {', '.join(SEARCH_INDEX_MODELS)}."
+            )
+
+        counts = rebuild_search_index(labels=labels or None, batch_size=max(1, int(options.get("batch_size") or 500)))
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count} document(s)")
+        engine = "SQLite FTS5" if search_fts_available() else "document table fallback"
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({engine})."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from crm.services.ledger_balances import rebuild_period_balances, refresh_dirty_periods
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly ledger balances behind the P&L, balance sheet, cash flow, budget and KPI dashboards."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dirty-only",
+            action="store_true",
+            help="Only refresh months saved to since their last refresh.",
+        )
+        parser.add_argument(
+            "--include-closed",
+            action="store_true",
+            help="Also rebuild frozen months of closed accounting periods.",
+        )
+
+    def handle(self, *args, **options):
+        if options["dirty_only"]:
+            result = refresh_dirty_periods()
+        else:
+            result = rebuild_period_balances(force=options["include_closed"])
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Ledger balances refreshed for {result['periods']} month(s): {result['balances']} bucket(s)")
+        )
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from crm.services.kpi_rollups import KPI_FAMILIES, refresh_dirty_kpi_rollups, refresh_kpi_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily KPI rollups behind the CEO dashboard, briefing and executive advisor."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Trailing days to rebuild (default CRM_KPI_ROLLUP_NIGHTLY_DAYS).",
+        )
+        parser.add_argument(
+            "--family",
+            action="append",
+            choices=KPI_FAMILIES,
+            help="Limit the rebuild to one metric family; repeat for several.",
+        )
+
+    def handle(self, *args, **options):
+        days = max(1, options.get("days") or getattr(settings, "CRM_KPI_ROLLUP_NIGHTLY_DAYS", 400))
+        today = timezone.localdate()
+        result = refresh_kpi_rollups(today - timedelta(days=days - 1), today, options.get("family"))
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        refreshed = ", ".join(f"{key}={count}" for key, count in sorted(result["refreshed"].items()))
+        self.stdout.write(self.style.SUCCESS(f"KPI rollups rebuilt for {result['days']} day(s): {refreshed}"))
+
+        result = refresh_dirty_kpi_rollups()
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        self.stdout.write(self.style.SUCCESS(f"KPI rollup dirty days refreshed: {result['days']}"))
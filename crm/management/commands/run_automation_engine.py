@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from crm.services.automation_engine import process_automation_dirty_records, sync_automation_engine
+
+
+class Command(BaseCommand):
+    help = "Evaluate queued automation dirty records, or run the full date-driven sweep with --sweep."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sweep",
+            action="store_true",
+            default=False,
+            help="Re-evaluate every automation rule across the whole database (nightly job).",
+        )
+
+    def handle(self, *args, **options):
+        if options.get("sweep"):
+            result = sync_automation_engine()
+            if result["error"]:
+                raise RuntimeError(result["error"])
+            self.stdout.write(self.style.SUCCESS(f"Automation sweep active tasks: {result['created']}"))
+
+        result = process_automation_dirty_records()
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        processed = ", ".join(f"{key}={count}" for key, count in sorted(result["processed"].items())) or "none"
+        self.stdout.write(self.style.SUCCESS(f"Automation dirty records processed: {processed}"))
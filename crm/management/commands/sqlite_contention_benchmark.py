@@ -0,0 +1,126 @@
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from iconic_site.sqlite_tuning import sqlite_pragmas
+
+
+# Django's stock SQLite setup: rollback journal, 5 s timeout, deferred transactions.
+DEFAULT_PROFILE = {"pragmas": [], "timeout": 5.0, "begin": "BEGIN"}
+
+
+def _tuned_profile():
+    options = settings.DATABASES["default"].get("OPTIONS") or {}
+    if not options.get("init_command"):
+        options = {"init_command": ";".join(sqlite_pragmas()), "timeout": 20.0, "transaction_mode": "IMMEDIATE"}
+    return {
+        "pragmas": [statement for statement in options["init_command"].split(";") if statement.strip()],
+        "timeout": float(options.get("timeout") or 5.0),
+        "begin": f"BEGIN {options.get('transaction_mode') or ''}".strip(),
+    }
+
+
+def _writer(path, profile, writes, hold_ms, start_at):
+    """
+    One writer process: read-then-write transactions like a Django
+    get_or_create or counter update. Returns per-transaction wait in ms
+    and the number of transactions that failed on a lock.
+    """
+    connection = sqlite3.connect(path, timeout=profile["timeout"], isolation_level=None)
+    for statement in profile["pragmas"]:
+        connection.execute(statement)
+    while time.time() < start_at:
+        time.sleep(0.001)
+    waits = []
+    failures = 0
+    for _ in range(writes):
+        started = time.perf_counter()
+        try:
+            connection.execute(profile["begin"])
+            connection.execute("SELECT COUNT(*) FROM bench_rows").fetchone()
+            connection.execute("INSERT INTO bench_rows (payload) VALUES (?)", ("x" * 200,))
+            if hold_ms:
+                time.sleep(hold_ms / 1000)
+            connection.execute("COMMIT")
+            waits.append((time.perf_counter() - started) * 1000)
+        except sqlite3.OperationalError:
+            failures += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+    connection.close()
+    return waits, failures
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_benchmark(profile, *, writers, writes, hold_ms):
+    with tempfile.TemporaryDirectory(prefix="sqlite-bench-") as directory:
+        path = str(Path(directory) / "bench.sqlite3")
+        setup = sqlite3.connect(path)
+        for statement in profile["pragmas"]:
+            setup.execute(statement)
+        setup.execute("CREATE TABLE bench_rows (id INTEGER PRIMARY KEY, payload TEXT)")
+        setup.commit()
+        setup.close()
+
+        start_at = time.time() + 0.5
+        started = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(writers) as pool:
+            results = pool.starmap(_writer, [(path, profile, writes, hold_ms, start_at)] * writers)
+        elapsed = time.perf_counter() - started - 0.5
+
+    waits = [wait for worker_waits, _ in results for wait in worker_waits]
+    failures = sum(worker_failures for _, worker_failures in results)
+    return {
+        "transactions": len(waits),
+        "failures": failures,
+        "per_second": round(len(waits) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": _percentile(waits, 0.5),
+        "p95_ms": _percentile(waits, 0.95),
+        "p99_ms": _percentile(waits, 0.99),
+        "max_ms": max(waits) if waits else None,
+    }
+
+
+class Command(BaseCommand):
+    help = "Run concurrent SQLite writer processes with stock and tuned settings and report lock-wait percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8, help="Concurrent writer processes.")
+        parser.add_argument("--writes", type=int, default=200, help="Transactions per writer.")
+        parser.add_argument("--hold-ms", type=float, default=1.0, help="Time each transaction holds the write lock.")
+        parser.add_argument(
+            "--profile",
+            choices=("default", "tuned", "both"),
+            default="both",
+            help="Settings to benchmark (default both).",
+        )
+
+    def handle(self, *args, **options):
+        profiles = {"default": DEFAULT_PROFILE, "tuned": _tuned_profile()}
+        names = ("default", "tuned") if options["profile"] == "both" else (options["profile"],)
+        for name in names:
+            result = run_benchmark(
+                profiles[name],
+                writers=max(1, options["writers"]),
+                writes=max(1, options["writes"]),
+                hold_ms=max(0.0, options["hold_ms"]),
+            )
+            timings = ", ".join(
+                f"{key}={result[key]:.1f}" if result[key] is not None else f"{key}=n/a"
+                for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+            )
+            self.stdout.write(
+                f"{name}: {result['transactions']} committed, {result['failures']} lock failures, "
+                f"{result['per_second']} tx/s, {timings}"
+            )
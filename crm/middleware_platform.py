@@ -1,8 +1,13 @@
+import logging
 from time import perf_counter
 
 from django.db import connection
 
-from crm.services.platform_tools import descriptor_from_request, save_request_performance, track_recent_record
+from crm.services.platform_tools import descriptor_from_request, track_recent_record
+from crm.services.request_profiling import QueryProfile, collector, profiling_enabled
+
+
+logger = logging.getLogger(__name__)
 
 
 class CRMPlatformMiddleware:
@@ -10,11 +15,10 @@ class CRMPlatformMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        started = perf_counter()
-        before_queries = len(connection.queries)
-        response = self.get_response(request)
-        query_count = len(connection.queries) - before_queries if connection.queries_logged else None
-        save_request_performance(request.path, (perf_counter() - started) * 1000, query_count)
+        if profiling_enabled():
+            response = self._profiled_response(request)
+        else:
+            response = self.get_response(request)
 
         user = getattr(request, "user", None)
         if (
@@ -29,3 +33,20 @@ class CRMPlatformMiddleware:
                 # Record history is optional and must never break a business page.
                 pass
         return response
+
+    def _profiled_response(self, request):
+        queries = QueryProfile()
+        started = perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed_ms = (perf_counter() - started) * 1000
+        try:
+            match = getattr(request, "resolver_match", None)
+            collector.record(getattr(match, "view_name", None), elapsed_ms, queries, response.status_code)
+            # Never write profiling rows inside a request's (or a test's) transaction.
+            if collector.flush_due() and not connection.in_atomic_block:
+                collector.flush()
+        except Exception:
+            # Profiling is diagnostics only and must never break a business page.
+            logger.warning("Request profiling failed", exc_info=True)
+        return response
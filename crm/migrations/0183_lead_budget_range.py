@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0182_invoice_opportunity_link'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='budget_currency',
+            field=models.CharField(blank=True, default='', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='budget_max',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='budget_min',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=14, null=True),
+        ),
+    ]
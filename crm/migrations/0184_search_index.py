@@ -0,0 +1,175 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:22
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+FTS_TABLE = "crm_search_fts"
+DOCUMENT_TABLE = "crm_searchdocument"
+
+INDEX_FIELDS = {
+    "crm.customer": ("Customer", (), ("customer_code", "account_brand", "contact_name", "email", "phone")),
+    "crm.lead": (
+        "Lead",
+        (),
+        (
+            "lead_id",
+            "account_brand",
+            "contact_name",
+            "email",
+            "phone",
+            "notes",
+            "company_website",
+            "website",
+            "instagram_handle",
+            "linkedin_url",
+            "primary_product_type",
+            "product_interest",
+            "product_category",
+            "order_quantity",
+            "source_channel",
+            "outbound_status",
+        ),
+    ),
+    "crm.opportunity": (
+        "Opportunity",
+        ("lead", "customer"),
+        (
+            "opportunity_id",
+            "lead__lead_id",
+            "lead__account_brand",
+            "lead__email",
+            "lead__phone",
+            "customer__account_brand",
+        ),
+    ),
+    "crm.productionorder": (
+        "ProductionOrder",
+        ("customer",),
+        (
+            "order_code",
+            "purchase_order_number",
+            "title",
+            "client_name_snapshot",
+            "brand_name_snapshot",
+            "product_name_snapshot",
+            "customer__account_brand",
+        ),
+    ),
+}
+
+
+def _purchase_order_number(order):
+    code = str(order.order_code or "").strip()
+    if not code:
+        return ""
+    if code.upper().startswith("PO-"):
+        return code
+    index = 0
+    while index < len(code) and code[index].isalpha():
+        index += 1
+    digit_start = index
+    while index < len(code) and code[index].isdigit():
+        index += 1
+    timestamp_digits = code[digit_start:index]
+    if len(timestamp_digits) >= 6:
+        friendly = f"PO-{timestamp_digits[-6:]}"
+    elif len(code) <= 10:
+        friendly = code
+    else:
+        friendly = f"PO-{code[-6:]}"
+    return f"{friendly}-{int(order.pk):03d}" if order.pk else friendly
+
+
+def _resolve(record, path):
+    if path == "purchase_order_number":
+        return _purchase_order_number(record)
+    value = record
+    for part in path.split("__"):
+        if value is None:
+            return ""
+        value = getattr(value, part, None)
+    return "" if value is None else str(value).strip()
+
+
+def create_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"model_label UNINDEXED, body, content='{DOCUMENT_TABLE}', content_rowid='id', tokenize='trigram')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5/trigram: search falls back to the document table.
+        return
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, model_label, body) VALUES (new.id, new.model_label, new.body); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, model_label, body) "
+        f"VALUES ('delete', old.id, old.model_label, old.body); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, model_label, body) "
+        f"VALUES ('delete', old.id, old.model_label, old.body); "
+        f"INSERT INTO {FTS_TABLE}(rowid, model_label, body) VALUES (new.id, new.model_label, new.body); END"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for suffix in ("ai", "ad", "au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def backfill_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model("crm", "SearchDocument")
+    total = 0
+    for label, (model_name, related, paths) in INDEX_FIELDS.items():
+        model = apps.get_model("crm", model_name)
+        pending = []
+        for record in model.objects.select_related(*related).order_by("pk").iterator(chunk_size=500):
+            body = "\n".join(value for value in (_resolve(record, path) for path in paths) if value)
+            pending.append(SearchDocument(model_label=label, object_id=record.pk, body=body))
+            if len(pending) >= 500:
+                SearchDocument.objects.bulk_create(pending)
+                total += len(pending)
+                pending = []
+        if pending:
+            SearchDocument.objects.bulk_create(pending)
+            total += len(pending)
+    if total:
+        print(f"Search index backfill: {total} document(s).")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0183_lead_budget_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=60)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('body', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('model_label', 'object_id'),
+                'constraints': [models.UniqueConstraint(fields=('model_label', 'object_id'), name='crm_search_document_record')],
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
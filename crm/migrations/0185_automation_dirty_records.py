@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0184_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutomationDirtyRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(choices=[('invoice', 'Invoice'), ('production', 'Production Order'), ('production_stage', 'Production Stage'), ('inventory', 'Inventory Item'), ('lifecycle', 'Order Lifecycle')], max_length=30)),
+                ('record_id', models.PositiveBigIntegerField()),
+                ('queued_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['queued_at', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('record_type', 'record_id'), name='crm_automation_dirty_record')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:19
+
+from django.db import migrations, models
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _website_key(value):
+    website = _text(value).lower()
+    if not website:
+        return ""
+    for prefix in ("https://", "http://"):
+        if website.startswith(prefix):
+            website = website[len(prefix) :]
+            break
+    if website.startswith("www."):
+        website = website[4:]
+    return website.rstrip("/")[:255]
+
+
+def _lower_key(value):
+    return _text(value).lower()[:255]
+
+
+def backfill_lead_identity_keys(apps, schema_editor):
+    Lead = apps.get_model("crm", "Lead")
+    pending = []
+    updated = 0
+    for lead in Lead.objects.only("id", "website", "company_website", "email").iterator(chunk_size=500):
+        lead.website_key = _website_key(lead.website)
+        lead.company_website_key = _website_key(lead.company_website)
+        lead.email_key = _lower_key(lead.email)
+        if not (lead.website_key or lead.company_website_key or lead.email_key):
+            continue
+        pending.append(lead)
+        if len(pending) >= 500:
+            Lead.objects.bulk_update(pending, ["website_key", "company_website_key", "email_key"])
+            updated += len(pending)
+            pending = []
+    if pending:
+        Lead.objects.bulk_update(pending, ["website_key", "company_website_key", "email_key"])
+        updated += len(pending)
+    print(f"Lead identity key backfill: {updated} lead(s) updated.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0185_automation_dirty_records'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='company_website_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='website_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_lead_identity_keys, migrations.RunPython.noop),
+    ]
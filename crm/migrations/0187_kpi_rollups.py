@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:45
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0186_lead_identity_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KpiRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('side', models.CharField(blank=True, default='', max_length=10)),
+                ('metric', models.CharField(max_length=60)),
+                ('dimension', models.CharField(blank=True, default='', max_length=120)),
+                ('value', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18)),
+            ],
+            options={
+                'ordering': ['date', 'metric', 'side', 'dimension'],
+                'indexes': [models.Index(fields=['metric', 'date'], name='crm_kpiroll_metric_48b458_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'side', 'metric', 'dimension'), name='crm_kpi_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='KpiRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('family', models.CharField(max_length=30)),
+                ('date', models.DateField()),
+                ('refreshed_at', models.DateTimeField()),
+                ('dirty_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['family', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('family', 'date'), name='crm_kpi_rollup_day_unique')],
+            },
+        ),
+    ]
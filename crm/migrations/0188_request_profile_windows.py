@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0187_kpi_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfileWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField()),
+                ('worker', models.CharField(max_length=80)),
+                ('view_name', models.CharField(max_length=200)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('total_queries', models.PositiveIntegerField(default=0)),
+                ('max_queries', models.PositiveIntegerField(default=0)),
+                ('total_query_ms', models.FloatField(default=0)),
+                ('duplicate_queries', models.PositiveIntegerField(default=0)),
+                ('latency_histogram', models.JSONField(blank=True, default=list)),
+                ('query_histogram', models.JSONField(blank=True, default=list)),
+                ('repeated_queries', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-window_start', 'view_name'],
+                'indexes': [models.Index(fields=['window_start'], name='crm_request_window__8adc33_idx')],
+                'constraints': [models.UniqueConstraint(fields=('window_start', 'worker', 'view_name'), name='crm_request_profile_window_unique')],
+            },
+        ),
+    ]
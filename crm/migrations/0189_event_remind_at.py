@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:27
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_event_remind_at(apps, schema_editor):
+    Event = apps.get_model("crm", "Event")
+    pending = []
+    updated = 0
+    events = (
+        Event.objects.filter(reminder_minutes_before__isnull=False, reminder_sent=False)
+        .exclude(assigned_to_email__isnull=True)
+        .exclude(assigned_to_email="")
+        .only("id", "start_datetime", "reminder_minutes_before")
+    )
+    for event in events.iterator(chunk_size=500):
+        if not event.start_datetime:
+            continue
+        event.remind_at = event.start_datetime - timedelta(minutes=event.reminder_minutes_before)
+        pending.append(event)
+        if len(pending) >= 500:
+            Event.objects.bulk_update(pending, ["remind_at"])
+            updated += len(pending)
+            pending = []
+    if pending:
+        Event.objects.bulk_update(pending, ["remind_at"])
+        updated += len(pending)
+    print(f"Event reminder backfill: {updated} event(s) updated.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0188_request_profile_windows'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='remind_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='reminder_claim_token',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='reminder_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['reminder_sent', 'remind_at'], name='crm_event_reminder_due_idx'),
+        ),
+        migrations.RunPython(backfill_event_remind_at, migrations.RunPython.noop),
+    ]
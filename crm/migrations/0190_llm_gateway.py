@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+AI_SYSTEM_LOG_TOKEN_COLUMNS = ("prompt_tokens", "completion_tokens")
+
+
+def add_ai_system_log_token_columns(apps, schema_editor):
+    # AISystemLog is unmanaged, so its new columns are added here, and only where missing.
+    table = "crm_aisystemlog"
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return
+        existing = {column.name for column in connection.introspection.get_table_description(cursor, table)}
+    AISystemLog = apps.get_model("crm", "AISystemLog")
+    added = []
+    for name in AI_SYSTEM_LOG_TOKEN_COLUMNS:
+        if name in existing:
+            continue
+        field = models.IntegerField(null=True, blank=True)
+        field.set_attributes_from_name(name)
+        schema_editor.add_field(AISystemLog, field)
+        added.append(name)
+    print(f"AI system log token columns added: {', '.join(added) or 'none'}.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0189_event_remind_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMResponseCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('feature', models.CharField(blank=True, default='', max_length=80)),
+                ('model_name', models.CharField(blank=True, default='', max_length=80)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('text', models.TextField(blank=True, default='')),
+                ('error', models.CharField(blank=True, default='', max_length=255)),
+                ('prompt_tokens', models.IntegerField(blank=True, null=True)),
+                ('completion_tokens', models.IntegerField(blank=True, null=True)),
+                ('latency_ms', models.IntegerField(blank=True, null=True)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+                'indexes': [models.Index(fields=['expires_at'], name='crm_llmresp_expires_4b1099_idx'), models.Index(fields=['last_used_at'], name='crm_llmresp_last_us_423fd3_idx')],
+            },
+        ),
+        migrations.RunPython(add_ai_system_log_token_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0190_llm_gateway'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailboxSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=30)),
+                ('mailbox', models.CharField(blank=True, default='', max_length=150)),
+                ('folder', models.CharField(default='INBOX', max_length=120)),
+                ('uid_validity', models.BigIntegerField(blank=True, null=True)),
+                ('last_uid', models.BigIntegerField(default=0)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('label', 'mailbox', 'folder'),
+                'constraints': [models.UniqueConstraint(fields=('label', 'mailbox', 'folder'), name='uniq_mailbox_sync_state')],
+            },
+        ),
+    ]
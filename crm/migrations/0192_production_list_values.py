@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:15
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_production_list_values(apps, schema_editor):
+    # The derivation only reads plain order/stage/shipment attributes, so the
+    # historical models can go through the same function the app uses.
+    from crm.services.production_list_fields import production_list_values
+
+    ProductionOrder = apps.get_model("crm", "ProductionOrder")
+    ProductionStage = apps.get_model("crm", "ProductionStage")
+    Shipment = apps.get_model("crm", "Shipment")
+    today = timezone.localdate()
+    counts = Counter()
+
+    for order in ProductionOrder.objects.all().iterator():
+        stages = list(ProductionStage.objects.filter(order_id=order.pk))
+        shipments = list(Shipment.objects.filter(order_id=order.pk))
+        values = production_list_values(order, stages, shipments, today)
+        ProductionOrder.objects.filter(pk=order.pk).update(**values)
+        counts[values["priority_reason"]] += 1
+
+    print("Production list values backfill:", dict(sorted(counts.items())))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0191_mailbox_sync_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionorder',
+            name='has_delay',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='has_delivered_shipment',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='has_late_shipment',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='has_shipments',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(db_index=True, default=2),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='priority_reason',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='shipment_pending',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='stages_percent_done',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_production_list_values, migrations.RunPython.noop),
+    ]
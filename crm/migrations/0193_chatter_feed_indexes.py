@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0192_production_list_values'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['status', 'display_name'], name='crm_employee_mention_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadcomment',
+            index=models.Index(fields=['-created_at', '-id'], name='crm_comment_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadcomment',
+            index=models.Index(condition=models.Q(('opportunity__isnull', True), ('production__isnull', True)), fields=['-created_at', '-id'], name='crm_comment_lead_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadcomment',
+            index=models.Index(condition=models.Q(('opportunity__isnull', False)), fields=['-created_at', '-id'], name='crm_comment_opp_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadcomment',
+            index=models.Index(condition=models.Q(('production__isnull', False)), fields=['-created_at', '-id'], name='crm_comment_prod_feed_idx'),
+        ),
+    ]
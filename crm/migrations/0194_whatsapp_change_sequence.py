@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0193_chatter_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppChangeSequence',
+            fields=[
+                ('key', models.CharField(default='inbox', max_length=30, primary_key=True, serialize=False)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='whatsappmessage',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='whatsappthread',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0194_whatsapp_change_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostingCalculationSnapshot',
+            fields=[
+                ('costing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calc_snapshot', serialize=False, to='crm.costingheader')),
+                ('values', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
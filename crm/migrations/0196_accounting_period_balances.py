@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:23
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0195_costing_calculation_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountingPeriodState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('side', models.CharField(blank=True, default='', max_length=2)),
+                ('refreshed_at', models.DateTimeField()),
+                ('dirty_at', models.DateTimeField(blank=True, null=True)),
+                ('frozen_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['month', 'side'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'side'), name='crm_accounting_period_state_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountingPeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('side', models.CharField(blank=True, default='', max_length=2)),
+                ('direction', models.CharField(blank=True, default='', max_length=3)),
+                ('main_type', models.CharField(blank=True, default='', max_length=30)),
+                ('sub_type', models.CharField(blank=True, default='', max_length=80)),
+                ('currency', models.CharField(blank=True, default='', max_length=3)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('amount_original', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18)),
+                ('amount_cad', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18)),
+                ('amount_bdt', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='crm.customer')),
+            ],
+            options={
+                'ordering': ['month', 'side', 'direction', 'main_type', 'sub_type', 'currency'],
+                'indexes': [models.Index(fields=['month', 'side'], name='crm_account_month_4391f5_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 import uuid
+from datetime import timedelta
 
 from django.db import IntegrityError, models, transaction
 from django.db.utils import OperationalError, ProgrammingError
@@ -16,10 +17,14 @@ from .models_platform import (
     RecentSearch,
     RecentlyViewedRecord,
     SavedFilter,
+    SearchDocument,
     UserDashboardPreference,
 )
 from .models_employee import EmployeeIdSequence, EmployeeProfile
+from .services.audit_snapshot import AuditSnapshotMixin
 from .services.costing_currency import CurrencyConversionError, convert_currency
+from .services import identity_keys
+from .services.lead_budget import apply_lead_budget_fields
 
 class BDMonthlyTarget(models.Model):
     year = models.PositiveIntegerField()
@@ -160,6 +165,8 @@ class AISystemLog(models.Model):
     error_detail = models.TextField(blank=True, default="")
 
     latency_ms = models.IntegerField(null=True, blank=True)
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ("-created_at",)
@@ -446,7 +453,7 @@ def lead_product_interest_choices():
 # Lead model
 # ----------------------------
 
-class Lead(models.Model):
+class Lead(AuditSnapshotMixin, models.Model):
     MARKET_CHOICES = [
         ("BD", "Bangladesh"),
         ("CA", "Canada"),
@@ -505,6 +512,9 @@ class Lead(models.Model):
     )
     order_quantity = models.CharField(max_length=100, blank=True)
     budget = models.CharField(max_length=100, blank=True)
+    budget_min = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, db_index=True)
+    budget_max = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, db_index=True)
+    budget_currency = models.CharField(max_length=3, blank=True, default="")
     preferred_contact_time = models.CharField(max_length=100, blank=True)
 
     attachment = models.FileField(upload_to="lead_files/", null=True, blank=True)
@@ -610,6 +620,17 @@ class Lead(models.Model):
     first_touch_channel = models.CharField(max_length=120, blank=True, default="")
     last_touch_channel = models.CharField(max_length=120, blank=True, default="")
 
+    # Normalized duplicate-matching keys, kept in sync by save().
+    website_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    company_website_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    email_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
+
+    IDENTITY_KEY_SOURCES = {
+        "website_key": ("website", identity_keys.website_key),
+        "company_website_key": ("company_website", identity_keys.website_key),
+        "email_key": ("email", identity_keys.email_key),
+    }
+
     def save(self, *args, **kwargs):
         if not self.lead_id:
             self.lead_id = generate_lead_id(source=self.source, lead_type=self.lead_type)
@@ -632,6 +653,15 @@ class Lead(models.Model):
         if self.next_followup and not self.next_follow_up_date:
             self.next_follow_up_date = self.next_followup
 
+        budget_changed = apply_lead_budget_fields(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "budget" in update_fields and budget_changed:
+            kwargs["update_fields"] = update_fields = list(dict.fromkeys([*update_fields, *budget_changed]))
+
+        keys_changed = identity_keys.apply_identity_keys(self, self.IDENTITY_KEY_SOURCES)
+        if update_fields is not None and keys_changed:
+            kwargs["update_fields"] = list(dict.fromkeys([*update_fields, *keys_changed]))
+
         super().save(*args, **kwargs)
 
     def compute_fit_score(self):
@@ -761,7 +791,7 @@ class ProductReferenceImage(models.Model):
 # Customer model
 # ----------------------------
 
-class Customer(models.Model):
+class Customer(AuditSnapshotMixin, models.Model):
     customer_code = models.CharField(max_length=50, unique=True, blank=True)
 
     account_brand = models.CharField(max_length=200, blank=True, default="")
@@ -922,6 +952,24 @@ class LeadComment(models.Model):
 
     class Meta:
         ordering = ["-pinned", "-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="crm_comment_feed_idx"),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="crm_comment_lead_feed_idx",
+                condition=models.Q(opportunity__isnull=True, production__isnull=True),
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="crm_comment_opp_feed_idx",
+                condition=models.Q(opportunity__isnull=False),
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="crm_comment_prod_feed_idx",
+                condition=models.Q(production__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.author}: {self.content[:40]}"
@@ -1138,13 +1186,51 @@ class LeadResearchJob(models.Model):
         return f"Lead research {self.pk} ({self.status})"
 
 
+class ExportJob(models.Model):
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("xlsx", "Excel"),
+    ]
+
+    kind = models.CharField(max_length=60)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="export_jobs",
+    )
+    # Name of the finished file inside EXPORT_DIR, which is kept outside MEDIA_ROOT.
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    row_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Export {self.kind} {self.pk} ({self.status})"
+
+
 
 
 # -----------------------------------
 # Opportunity and related models
 # -----------------------------------
 
-class Opportunity(models.Model):
+class Opportunity(AuditSnapshotMixin, models.Model):
     ORDER_CURRENCY_CHOICES = [
         ("CAD", "CAD"),
         ("USD", "USD"),
@@ -1821,7 +1907,7 @@ class CostSheetSimple(models.Model):
         super().save(*args, **kwargs)
 
 
-class CostingHeader(models.Model):
+class CostingHeader(AuditSnapshotMixin, models.Model):
     QUOTATION_STATUS_DRAFT = "draft"
     QUOTATION_STATUS_APPROVED = "approved"
     QUOTATION_STATUS_REJECTED = "rejected"
@@ -1995,7 +2081,7 @@ class CostingHeader(models.Model):
         super().save(*args, **kwargs)
 
 
-class QuickCosting(models.Model):
+class QuickCosting(AuditSnapshotMixin, models.Model):
     DETAILED_PER_PIECE_COST_FIELDS = (
         "making_cost_per_piece",
         "print_embroidery_cost_per_piece",
@@ -2513,6 +2599,22 @@ class CostingSMV(models.Model):
         return f"SMV {self.costing_id}"
 
 
+class CostingCalculationSnapshot(models.Model):
+    """Stored costing totals for list, dashboard and report pages; dropped whenever the inputs change."""
+
+    costing = models.OneToOneField(
+        CostingHeader,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="calc_snapshot",
+    )
+    values = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Costing snapshot {self.costing_id}"
+
+
 class CostingAuditLog(models.Model):
     ACTION_CHOICES = [
         ("created", "Created"),
@@ -3459,6 +3561,11 @@ class Event(models.Model):
         help_text="Minutes before to send reminder",
     )
     reminder_sent = models.BooleanField(default=False)
+    # start_datetime - reminder_minutes_before, kept in step by save() so the
+    # reminder dispatcher can use an indexed range query.
+    remind_at = models.DateTimeField(blank=True, null=True, editable=False)
+    reminder_claim_token = models.CharField(max_length=32, blank=True, default="", editable=False)
+    reminder_claimed_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     # AI summary
     ai_note = models.TextField(
@@ -3477,12 +3584,29 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    REMINDER_SOURCE_FIELDS = {"start_datetime", "reminder_minutes_before", "assigned_to_email"}
+
     class Meta:
         ordering = ["start_datetime", "title"]
+        indexes = [
+            models.Index(fields=["reminder_sent", "remind_at"], name="crm_event_reminder_due_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def compute_remind_at(self):
+        if self.reminder_minutes_before is None or not self.start_datetime or not (self.assigned_to_email or "").strip():
+            return None
+        return self.start_datetime - timedelta(minutes=self.reminder_minutes_before)
+
+    def save(self, *args, **kwargs):
+        self.remind_at = self.compute_remind_at()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.REMINDER_SOURCE_FIELDS.intersection(update_fields):
+            kwargs["update_fields"] = {*update_fields, "remind_at"}
+        super().save(*args, **kwargs)
+
     @property
     def is_overdue(self):
         if not self.start_datetime:
@@ -3597,7 +3721,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 
-class ProductionOrder(models.Model):
+class ProductionOrder(AuditSnapshotMixin, models.Model):
     """
     One work order for your factory.
     Stores basic info, style details, fabric, cost and remake.
@@ -3898,6 +4022,17 @@ class ProductionOrder(models.Model):
         related_name="archived_production_orders",
     )
 
+    # production list values, kept current by
+    # crm.services.production_list_fields
+    stages_percent_done = models.PositiveSmallIntegerField(default=0)
+    has_delay = models.BooleanField(default=False, db_index=True)
+    has_late_shipment = models.BooleanField(default=False)
+    shipment_pending = models.BooleanField(default=False)
+    has_shipments = models.BooleanField(default=False)
+    has_delivered_shipment = models.BooleanField(default=False)
+    priority_rank = models.PositiveSmallIntegerField(default=2, db_index=True)
+    priority_reason = models.CharField(max_length=40, blank=True, default="")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -4254,7 +4389,20 @@ from django.db import models
 from django.utils import timezone
 
 
-class Shipment(models.Model):
+def _sync_production_order_after_child_save(child):
+    from .services.production_list_fields import refresh_production_list_values
+    from .services.production_operational_status import sync_operational_status
+
+    order = child.order
+    previous_status = order.operational_status
+    sync_operational_status(order)
+    # A status change saves the order, and its post_save receiver refreshes
+    # the list values; only refresh here when that did not happen.
+    if order.operational_status == previous_status and not getattr(child, "_skip_production_list_refresh", False):
+        refresh_production_list_values(order)
+
+
+class Shipment(AuditSnapshotMixin, models.Model):
     CARRIER_CHOICES = [
         ("fedex", "FedEx"),
         ("dhl", "DHL"),
@@ -4421,9 +4569,7 @@ class Shipment(models.Model):
         super().save(*args, **kwargs)
 
         if self.order_id:
-            from .services.production_operational_status import sync_operational_status
-
-            sync_operational_status(self.order)
+            _sync_production_order_after_child_save(self)
 
 
 class OrderLifecycle(models.Model):
@@ -4706,7 +4852,200 @@ class AutomationTask(models.Model):
         return self.title
 
 
-class Invoice(models.Model):
+class AutomationDirtyRecord(models.Model):
+    """Queue of records changed since the automation engine last evaluated them."""
+
+    RECORD_INVOICE = "invoice"
+    RECORD_PRODUCTION = "production"
+    RECORD_PRODUCTION_STAGE = "production_stage"
+    RECORD_INVENTORY = "inventory"
+    RECORD_LIFECYCLE = "lifecycle"
+    RECORD_TYPE_CHOICES = [
+        (RECORD_INVOICE, "Invoice"),
+        (RECORD_PRODUCTION, "Production Order"),
+        (RECORD_PRODUCTION_STAGE, "Production Stage"),
+        (RECORD_INVENTORY, "Inventory Item"),
+        (RECORD_LIFECYCLE, "Order Lifecycle"),
+    ]
+
+    record_type = models.CharField(max_length=30, choices=RECORD_TYPE_CHOICES)
+    record_id = models.PositiveBigIntegerField()
+    queued_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["queued_at", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["record_type", "record_id"], name="crm_automation_dirty_record"),
+        ]
+
+    def __str__(self):
+        return f"{self.record_type}:{self.record_id}"
+
+
+class KpiRollup(models.Model):
+    """Daily KPI value, e.g. leads created per source or accounting inflow per side and currency."""
+
+    date = models.DateField()
+    side = models.CharField(max_length=10, blank=True, default="")
+    metric = models.CharField(max_length=60)
+    dimension = models.CharField(max_length=120, blank=True, default="")
+    value = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        ordering = ["date", "metric", "side", "dimension"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "side", "metric", "dimension"], name="crm_kpi_rollup_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["metric", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.metric} {self.side}/{self.dimension}={self.value}"
+
+
+class KpiRollupDay(models.Model):
+    """Refresh state of one metric family for one day; a save after ``refreshed_at`` sets ``dirty_at``."""
+
+    family = models.CharField(max_length=30)
+    date = models.DateField()
+    refreshed_at = models.DateTimeField()
+    dirty_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["family", "date"]
+        constraints = [
+            models.UniqueConstraint(fields=["family", "date"], name="crm_kpi_rollup_day_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.family}:{self.date}"
+
+
+class AccountingPeriodBalance(models.Model):
+    """Non-cancelled accounting entries of one month summed per ledger bucket, at their stored rates."""
+
+    month = models.DateField()
+    side = models.CharField(max_length=2, blank=True, default="")
+    direction = models.CharField(max_length=3, blank=True, default="")
+    main_type = models.CharField(max_length=30, blank=True, default="")
+    sub_type = models.CharField(max_length=80, blank=True, default="")
+    currency = models.CharField(max_length=3, blank=True, default="")
+    # The entry's customer, or its production order's when the entry has none.
+    customer = models.ForeignKey(
+        "Customer",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    entry_count = models.PositiveIntegerField(default=0)
+    amount_original = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0"))
+    amount_cad = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0"))
+    amount_bdt = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        ordering = ["month", "side", "direction", "main_type", "sub_type", "currency"]
+        indexes = [
+            models.Index(fields=["month", "side"]),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.side} {self.direction} {self.main_type}/{self.sub_type} {self.currency}={self.amount_original}"
+
+
+class AccountingPeriodState(models.Model):
+    """Refresh state of one month and side of the period balances; ``frozen_at`` is set while the month is closed."""
+
+    month = models.DateField()
+    side = models.CharField(max_length=2, blank=True, default="")
+    refreshed_at = models.DateTimeField()
+    dirty_at = models.DateTimeField(null=True, blank=True)
+    frozen_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["month", "side"]
+        constraints = [
+            models.UniqueConstraint(fields=["month", "side"], name="crm_accounting_period_state_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.side}"
+
+
+class RequestProfileWindow(models.Model):
+    """Request timings for one view in one worker process over one window; each worker writes only its own rows."""
+
+    window_start = models.DateTimeField()
+    worker = models.CharField(max_length=80)
+    view_name = models.CharField(max_length=200)
+    request_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    total_queries = models.PositiveIntegerField(default=0)
+    max_queries = models.PositiveIntegerField(default=0)
+    total_query_ms = models.FloatField(default=0)
+    duplicate_queries = models.PositiveIntegerField(default=0)
+    latency_histogram = models.JSONField(default=list, blank=True)
+    query_histogram = models.JSONField(default=list, blank=True)
+    repeated_queries = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-window_start", "view_name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["window_start", "worker", "view_name"],
+                name="crm_request_profile_window_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["window_start"]),
+        ]
+
+    def __str__(self):
+        return f"{self.view_name} @ {self.window_start:%Y-%m-%d %H:%M} ({self.worker})"
+
+
+class LLMResponseCache(models.Model):
+    """One LLM answer keyed by a hash of model, messages and options; shared by web and Celery workers."""
+
+    STATUS_PENDING = "pending"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_READY, "Ready"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    key = models.CharField(max_length=64, unique=True)
+    feature = models.CharField(max_length=80, blank=True, default="")
+    model_name = models.CharField(max_length=80, blank=True, default="")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    text = models.TextField(blank=True, default="")
+    error = models.CharField(max_length=255, blank=True, default="")
+    prompt_tokens = models.IntegerField(null=True, blank=True)
+    completion_tokens = models.IntegerField(null=True, blank=True)
+    latency_ms = models.IntegerField(null=True, blank=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-last_used_at"]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+            models.Index(fields=["last_used_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.feature or 'llm'} {self.key[:12]} ({self.status})"
+
+
+class Invoice(AuditSnapshotMixin, models.Model):
     STATUS_CHOICES = [
         ("draft", "Draft"),
         ("sent", "Sent to client"),
@@ -5041,7 +5380,7 @@ class InvoiceAudit(models.Model):
         return f"{self.invoice_id} {self.action}"
 
 
-class InvoicePayment(models.Model):
+class InvoicePayment(AuditSnapshotMixin, models.Model):
     METHOD_CHOICES = [
         ("bank", "Bank transfer"),
         ("cash", "Cash"),
@@ -5378,9 +5717,7 @@ class ProductionStage(models.Model):
         super().save(*args, **kwargs)
 
         if self.order_id:
-            from .services.production_operational_status import sync_operational_status
-
-            sync_operational_status(self.order)
+            _sync_production_order_after_child_save(self)
 
 
 # default stages for every new production order
@@ -5409,12 +5746,15 @@ def create_default_stages(sender, instance, created, **kwargs):
         return
 
     for key, label, color in DEFAULT_PRODUCTION_STAGES:
-        ProductionStage.objects.create(
+        stage = ProductionStage(
             order=instance,
             stage_key=key,
             display_name=label,
             color_tag=color,
         )
+        # the order's post_save receiver refreshes list values once all stages exist
+        stage._skip_production_list_refresh = True
+        stage.save(force_insert=True)
 
 from decimal import Decimal
 from django.db import models
@@ -5832,7 +6172,7 @@ from django.conf import settings
 from django.db import models
 
 
-class AccountingEntry(models.Model):
+class AccountingEntry(AuditSnapshotMixin, models.Model):
     SIDE_CA = "CA"
     SIDE_BD = "BD"
 
@@ -6019,7 +6359,7 @@ class AccountingMonthlyTarget(models.Model):
 
 
 
-from .models_email import EmailThread, EmailMessage
+from .models_email import EmailThread, EmailMessage, MailboxSyncState
 from .models_email_outbox import OutboundEmailLog
 from .models_email_config import EmailInboxConfig
 from .models_access import UserAccess
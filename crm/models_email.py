@@ -88,4 +88,24 @@ class EmailMessage(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.from_email} {self.subject[:50]}"
\ No newline at end of file
+        return f"{self.from_email} {self.subject[:50]}"
+
+class MailboxSyncState(models.Model):
+    """IMAP high-water mark for one mailbox folder; UIDs only stay valid while ``uid_validity`` is unchanged."""
+
+    label = models.CharField(max_length=30)
+    mailbox = models.CharField(max_length=150, blank=True, default="")
+    folder = models.CharField(max_length=120, default="INBOX")
+    uid_validity = models.BigIntegerField(null=True, blank=True)
+    last_uid = models.BigIntegerField(default=0)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("label", "mailbox", "folder")
+        constraints = [
+            models.UniqueConstraint(fields=["label", "mailbox", "folder"], name="uniq_mailbox_sync_state")
+        ]
+
+    def __str__(self):
+        return f"{self.label} {self.mailbox}/{self.folder} uid>{self.last_uid}"
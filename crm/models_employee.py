@@ -1,13 +1,14 @@
 from django.conf import settings
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
 from django.db.models.deletion import ProtectedError
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 
+from crm.services.shared_cache import CacheNamespace
 
-EMPLOYEE_IDENTITY_CACHE_KEY = "crm-employee-identity-index:v1"
+
+EMPLOYEE_IDENTITY_CACHE = CacheNamespace("employee-identity", timeout=300)
 
 
 class EmployeeIdSequence(models.Model):
@@ -119,6 +120,10 @@ class EmployeeProfile(models.Model):
 
     class Meta:
         ordering = ("display_name", "user__username")
+        indexes = [
+            # mention lookups and the chatter mention directory
+            models.Index(fields=["status", "display_name"], name="crm_employee_mention_idx"),
+        ]
         permissions = [
             ("manage_employee_profiles", "Can manage employee profiles and roles"),
             ("view_all_sales_profiles", "Can view all salesperson profiles"),
@@ -158,7 +163,7 @@ class EmployeeProfile(models.Model):
         if allocated_employee_id and kwargs.get("update_fields") is not None:
             kwargs["update_fields"] = set(kwargs["update_fields"]) | {"employee_id"}
         super().save(*args, **kwargs)
-        cache.delete(EMPLOYEE_IDENTITY_CACHE_KEY)
+        EMPLOYEE_IDENTITY_CACHE.invalidate()
 
     @property
     def full_name(self):
@@ -197,7 +202,7 @@ class EmployeeProfile(models.Model):
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def ensure_employee_profile(sender, instance, created, **kwargs):
-    cache.delete(EMPLOYEE_IDENTITY_CACHE_KEY)
+    EMPLOYEE_IDENTITY_CACHE.invalidate()
     if created:
         EmployeeProfile.objects.get_or_create(
             user=instance,
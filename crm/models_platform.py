@@ -184,3 +184,21 @@ class CRMSetting(models.Model):
 
     def __str__(self):
         return f"{self.category}: {self.label}"
+
+
+class SearchDocument(models.Model):
+    """Flattened searchable text for one CRM record; mirrored into SQLite FTS5 when available."""
+
+    model_label = models.CharField(max_length=60)
+    object_id = models.PositiveBigIntegerField()
+    body = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("model_label", "object_id")
+        constraints = [
+            models.UniqueConstraint(fields=("model_label", "object_id"), name="crm_search_document_record"),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}:{self.object_id}"
@@ -1,11 +1,45 @@
 # crm/models_whatsapp.py
 import re
 
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 
-class WhatsAppThread(models.Model):
+class WhatsAppChangeSequence(models.Model):
+    """Inbox-wide counter stamped on threads and messages whenever they change."""
+
+    key = models.CharField(max_length=30, primary_key=True, default="inbox")
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def current(cls) -> int:
+        return cls.objects.filter(key="inbox").values_list("last_value", flat=True).first() or 0
+
+    @classmethod
+    def next_value(cls) -> int:
+        # Callers hold the row lock until their own write commits, so a reader
+        # never sees a higher value land before a lower one.
+        sequence, _created = cls.objects.select_for_update().get_or_create(key="inbox")
+        sequence.last_value += 1
+        sequence.save(update_fields=["last_value"])
+        return sequence.last_value
+
+
+class WhatsAppChangeStampMixin(models.Model):
+    change_seq = models.PositiveBigIntegerField(default=0, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"change_seq"}
+        with transaction.atomic():
+            self.change_seq = WhatsAppChangeSequence.next_value()
+            super().save(*args, **kwargs)
+
+
+class WhatsAppThread(WhatsAppChangeStampMixin):
     lead = models.ForeignKey(
         "crm.Lead",
         null=True,
@@ -52,7 +86,7 @@ class WhatsAppThread(models.Model):
         return digits or (self.wa_phone or "")
 
 
-class WhatsAppMessage(models.Model):
+class WhatsAppMessage(WhatsAppChangeStampMixin):
     STATUS_CHOICES = [
         ("pending", "Pending"),
         ("sent", "Sent"),
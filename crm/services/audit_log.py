@@ -1,4 +1,5 @@
 import logging
+import threading
 
 from django.db import transaction
 from django.db.utils import OperationalError, ProgrammingError
@@ -6,19 +7,11 @@ from django.urls import NoReverseMatch, reverse
 
 from crm.audit_context import get_current_actor
 from crm.models import CRMAuditLog
+from crm.services.audit_snapshot import model_snapshot
 
 
 logger = logging.getLogger(__name__)
 
-EXCLUDED_FIELDS = {
-    "created_at",
-    "updated_at",
-    "created_date",
-    "updated_date",
-    "last_login",
-}
-SENSITIVE_PARTS = ("password", "secret", "token", "credential", "api_key")
-
 MODEL_CONFIG = {
     "Customer": ("customers", "customer_detail"),
     "Lead": ("leads", "lead_detail"),
@@ -50,27 +43,6 @@ def is_tracked_model(sender):
     return sender.__name__ in MODEL_CONFIG
 
 
-def _safe_value(value):
-    if value is None:
-        return ""
-    text = str(value)
-    return text[:4000]
-
-
-def _field_allowed(field_name):
-    lowered = field_name.lower()
-    return field_name not in EXCLUDED_FIELDS and not any(part in lowered for part in SENSITIVE_PARTS)
-
-
-def model_snapshot(instance):
-    snapshot = {}
-    for field in instance._meta.concrete_fields:
-        if not _field_allowed(field.name):
-            continue
-        snapshot[field.name] = _safe_value(getattr(instance, field.attname, None))
-    return snapshot
-
-
 def record_label(instance):
     if instance.__class__.__name__ == "InvoicePayment":
         invoice_number = getattr(getattr(instance, "invoice", None), "invoice_number", "")
@@ -113,15 +85,63 @@ def _action_for_change(instance, field_name, old_value, new_value):
     return CRMAuditLog.ACTION_UPDATED
 
 
+AUDIT_WRITE_BATCH_SIZE = 500
+
+# Rows queued inside a transaction are buffered per savepoint scope and written
+# with one bulk_create when it commits; rows from a rolled-back savepoint are
+# dropped together with its on_commit hooks.
+_pending_audit = threading.local()
+
+
 def _write_rows(rows):
     try:
-        CRMAuditLog.objects.bulk_create(rows)
+        CRMAuditLog.objects.bulk_create(rows, batch_size=AUDIT_WRITE_BATCH_SIZE)
     except (OperationalError, ProgrammingError):
         logger.warning("CRM audit table is not available; record save was preserved")
     except Exception:
         logger.exception("CRM audit write failed; record save was preserved")
 
 
+class _AuditBatch:
+    def __init__(self, hooks):
+        self.hooks = hooks
+        self.rows = []
+
+    def flush(self):
+        rows, self.rows = self.rows, []
+        if rows:
+            _write_rows(rows)
+
+
+def _audit_buffers():
+    buffers = getattr(_pending_audit, "buffers", None)
+    if buffers is None:
+        buffers = _pending_audit.buffers = {}
+    return buffers
+
+
+def queue_audit_rows(rows, using=None):
+    """Write ``rows`` once the current transaction commits, batched with the rest of it."""
+    if not rows:
+        return
+    connection = transaction.get_connection(using)
+    buffers = _audit_buffers()
+    # Django swaps in a fresh on_commit list on every commit and rollback, so a
+    # batch tied to an older list belongs to a scope that has already ended.
+    for key in [key for key, batch in buffers.items() if batch.hooks is not connection.run_on_commit]:
+        del buffers[key]
+    if not connection.in_atomic_block:
+        _write_rows(rows)
+        return
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    batch = buffers.get(key)
+    if batch is None:
+        batch = buffers[key] = _AuditBatch(connection.run_on_commit)
+    batch.rows.extend(rows)
+    # The flush is idempotent; registering it per call keeps a hook after the last row.
+    transaction.on_commit(batch.flush, using=connection.alias)
+
+
 def schedule_audit(instance, *, created=False, before=None, deleted=False):
     config = MODEL_CONFIG.get(instance.__class__.__name__)
     if not config or not instance.pk:
@@ -164,9 +184,20 @@ def schedule_audit(instance, *, created=False, before=None, deleted=False):
                 **common,
             )
         ]
+    elif before is None:
+        # Nothing was captured to diff against: record that it changed, not a
+        # field history that would show every value as changed from blank.
+        rows = [
+            CRMAuditLog(
+                action_type=CRMAuditLog.ACTION_UPDATED,
+                field_name="",
+                previous_value="",
+                new_value="",
+                **common,
+            )
+        ]
     else:
         after = model_snapshot(instance)
-        before = before or {}
         rows = []
         for field_name, new_value in after.items():
             old_value = before.get(field_name, "")
@@ -184,4 +215,4 @@ def schedule_audit(instance, *, created=False, before=None, deleted=False):
         if not rows:
             return
 
-    transaction.on_commit(lambda audit_rows=rows: _write_rows(audit_rows))
+    queue_audit_rows(rows)
@@ -0,0 +1,76 @@
+import copy
+
+
+EXCLUDED_FIELDS = {
+    "created_at",
+    "updated_at",
+    "created_date",
+    "updated_date",
+    "last_login",
+}
+SENSITIVE_PARTS = ("password", "secret", "token", "credential", "api_key")
+
+LOADED_VALUES_ATTR = "_crm_audit_loaded"
+
+
+def _safe_value(value):
+    if value is None:
+        return ""
+    text = str(value)
+    return text[:4000]
+
+
+def _field_allowed(field_name):
+    lowered = field_name.lower()
+    return field_name not in EXCLUDED_FIELDS and not any(part in lowered for part in SENSITIVE_PARTS)
+
+
+def model_snapshot(instance):
+    snapshot = {}
+    deferred = instance.get_deferred_fields()
+    for field in instance._meta.concrete_fields:
+        if not _field_allowed(field.name) or field.attname in deferred:
+            continue
+        snapshot[field.name] = _safe_value(getattr(instance, field.attname, None))
+    return snapshot
+
+
+def capture_loaded_values(instance, fields=None):
+    """Remember the raw values of loaded fields; ``fields`` limits the refresh to those names."""
+    loaded = dict(instance.__dict__.get(LOADED_VALUES_ATTR) or {}) if fields is not None else {}
+    for field in instance._meta.concrete_fields:
+        if fields is not None and field.name not in fields and field.attname not in fields:
+            continue
+        if field.attname not in instance.__dict__ or not _field_allowed(field.name):
+            continue
+        value = instance.__dict__[field.attname]
+        # JSON fields can be mutated in place before save; keep our own copy.
+        loaded[field.name] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    instance.__dict__[LOADED_VALUES_ATTR] = loaded
+
+
+def loaded_snapshot(instance):
+    """Audit snapshot of the values captured at load time, or ``None`` if nothing was captured."""
+    loaded = instance.__dict__.get(LOADED_VALUES_ATTR)
+    if loaded is None:
+        return None
+    return {name: _safe_value(value) for name, value in loaded.items()}
+
+
+def loaded_value(instance, field_name, default=None):
+    """Raw value ``field_name`` had when the instance was loaded."""
+    return (instance.__dict__.get(LOADED_VALUES_ATTR) or {}).get(field_name, default)
+
+
+class AuditSnapshotMixin:
+    """Capture field values as loaded so audit diffs need no SELECT before each save."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        capture_loaded_values(instance)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        capture_loaded_values(self, fields)
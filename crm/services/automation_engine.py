@@ -1,14 +1,14 @@
 from datetime import timedelta
 
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F, Q
 from django.db.utils import OperationalError, ProgrammingError
 from django.urls import NoReverseMatch, reverse
 from django.utils import timezone
 
 from crm.models import (
+    AutomationDirtyRecord,
     AutomationNotification,
     AutomationRule,
     AutomationTask,
@@ -119,7 +119,15 @@ DEFAULT_AUTOMATION_RULES = [
     },
 ]
 
-AUTOMATION_DASHBOARD_SYNC_TIMEOUT = 300
+AUTOMATION_DIRTY_INVOICE = AutomationDirtyRecord.RECORD_INVOICE
+AUTOMATION_DIRTY_PRODUCTION = AutomationDirtyRecord.RECORD_PRODUCTION
+AUTOMATION_DIRTY_PRODUCTION_STAGE = AutomationDirtyRecord.RECORD_PRODUCTION_STAGE
+AUTOMATION_DIRTY_INVENTORY = AutomationDirtyRecord.RECORD_INVENTORY
+AUTOMATION_DIRTY_LIFECYCLE = AutomationDirtyRecord.RECORD_LIFECYCLE
+AUTOMATION_DIRTY_BATCH_SIZE = 200
+
+PRODUCTION_COMPLETED_STATUSES = ["done", "closed_won", "closed_lost"]
+SHIPMENT_SHIPPED_STATUSES = ["shipped", "out_for_delivery", "delivered"]
 
 
 def _safe_reverse(name, *args):
@@ -266,6 +274,299 @@ def _enabled(rule):
     return bool(rule and rule.enabled)
 
 
+def _decimal_value(value):
+    return value if value is not None else 0
+
+
+def _invoice_open(invoice):
+    return invoice.status not in {"paid", "cancelled"} and _decimal_value(invoice.total_amount) > _decimal_value(
+        invoice.paid_amount
+    )
+
+
+# ---------------------------------------------------------------------------
+# Per-record rule actions. Both the nightly sweep and the incremental dirty
+# record evaluator call these, so a rule's task wording lives in one place.
+# ---------------------------------------------------------------------------
+
+
+def _invoice_due_soon_task(rule, invoice, today, created_by=None):
+    key = f"crm-auto:invoice_due_soon:{invoice.pk}"
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Invoice due soon",
+        message=f"{invoice.invoice_number} is due on {invoice.due_date}.",
+        priority="high",
+        record=invoice,
+        record_label=_invoice_label(invoice),
+        target_url=_safe_reverse("invoice_view", invoice.pk),
+        task_title="Call customer about invoice due soon",
+        task_description=f"Follow up before {invoice.invoice_number} reaches due date.",
+        task_due_date=invoice.due_date,
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _invoice_overdue_task(rule, invoice, today, created_by=None):
+    key = f"crm-auto:invoice_overdue:{invoice.pk}"
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Invoice overdue",
+        message=f"{invoice.invoice_number} is overdue and still has an open balance.",
+        priority="critical",
+        record=invoice,
+        record_label=_invoice_label(invoice),
+        target_url=_safe_reverse("invoice_view", invoice.pk),
+        task_title="Call customer about overdue invoice",
+        task_description=f"Collect or update payment status for {invoice.invoice_number}.",
+        task_due_date=today,
+        task_priority="urgent",
+        created_by=created_by,
+    )
+    return key
+
+
+def _partial_payment_stalled_task(rule, invoice, today, created_by=None):
+    key = f"crm-auto:partial_payment_stalled:{invoice.pk}"
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Partial payment stalled",
+        message=f"{invoice.invoice_number} has a partial payment with no recent update.",
+        priority="high",
+        record=invoice,
+        record_label=_invoice_label(invoice),
+        target_url=_safe_reverse("invoice_view", invoice.pk),
+        task_title="Follow up stalled partial payment",
+        task_description=f"Confirm next payment date for {invoice.invoice_number}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _production_delayed_task(rule, order, today, created_by=None):
+    key = f"crm-auto:production_delayed:{order.pk}"
+    label = _production_label(order)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Production delayed",
+        message=f"{label} is past the bulk deadline.",
+        priority="critical",
+        record=order,
+        record_label=label,
+        target_url=_safe_reverse("production_detail", order.pk),
+        task_title="Review delayed production order",
+        task_description=f"Check blockers and update timeline for {label}.",
+        task_due_date=today,
+        task_priority="urgent",
+        created_by=created_by,
+    )
+    return key
+
+
+def _qc_delayed_task(rule, stage, today, created_by=None):
+    order = stage.order
+    key = f"crm-auto:qc_delayed:{stage.pk}"
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="QC delayed",
+        message=f"QC is past planned end for {_production_label(order)}.",
+        priority="high",
+        record=stage,
+        record_label=f"{_production_label(order)} - QC",
+        target_url=_safe_reverse("production_detail", order.pk),
+        task_title="Review delayed QC stage",
+        task_description=f"Update QC status and notes for {_production_label(order)}.",
+        task_due_date=today,
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _shipment_pending_task(rule, order, today, created_by=None):
+    key = f"crm-auto:shipment_pending:{order.pk}"
+    label = _production_label(order)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Shipment pending",
+        message=f"{label} is complete but has no shipped shipment record.",
+        priority="high",
+        record=order,
+        record_label=label,
+        target_url=_safe_reverse("production_detail", order.pk),
+        task_title="Create shipment for completed order",
+        task_description=f"Create or update shipment for {label}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _low_stock_task(rule, item, today, created_by=None):
+    key = f"crm-auto:low_stock:{item.pk}"
+    label = _inventory_label(item)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Low stock",
+        message=f"{label} is at or below reorder level.",
+        priority="high",
+        record=item,
+        record_label=label,
+        target_url=_safe_reverse("inventory_detail", item.pk),
+        task_title=f"Order {label}",
+        task_description=f"Review reorder quantity for {label}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _critical_stock_task(rule, item, today, created_by=None):
+    key = f"crm-auto:critical_stock:{item.pk}"
+    label = _inventory_label(item)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Critical stock",
+        message=f"{label} is at critical stock level.",
+        priority="critical",
+        record=item,
+        record_label=label,
+        target_url=_safe_reverse("inventory_detail", item.pk),
+        task_title=f"Urgent stock review for {label}",
+        task_description=f"Confirm availability and reorder plan for {label}.",
+        task_due_date=today,
+        task_priority="urgent",
+        created_by=created_by,
+    )
+    return key
+
+
+def _high_waste_task(rule, item, today, created_by=None):
+    waste_total = (item.waste_quantity or 0) + (item.damaged_quantity or 0)
+    key = f"crm-auto:high_waste:{item.pk}"
+    label = _inventory_label(item)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="High waste",
+        message=f"{label} has recorded waste or damaged material ({waste_total}).",
+        priority="high",
+        record=item,
+        record_label=label,
+        target_url=_safe_reverse("inventory_detail", item.pk),
+        task_title=f"Review waste for {label}",
+        task_description=f"Check damaged/waste usage and update production notes for {label}.",
+        task_due_date=today + timedelta(days=2),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _quotation_waiting_task(rule, lifecycle, today, created_by=None):
+    key = f"crm-auto:quotation_waiting_approval:{lifecycle.pk}"
+    label = _lifecycle_label(lifecycle)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Quotation waiting approval",
+        message=f"{label} has been in quotation stage for more than 3 days.",
+        priority="high",
+        record=lifecycle,
+        record_label=label,
+        target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
+        task_title="Follow up quotation",
+        task_description=f"Review quotation approval status for {label}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _lifecycle_payment_task(rule, lifecycle, today, created_by=None):
+    key = f"crm-auto:lifecycle_invoice_waiting_payment:{lifecycle.pk}"
+    label = _lifecycle_label(lifecycle)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Invoice waiting payment",
+        message=f"{label} has an open payment balance.",
+        priority="high",
+        record=lifecycle,
+        record_label=label,
+        target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
+        task_title="Follow up invoice payment",
+        task_description=f"Confirm payment plan for {label}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _production_waiting_update_task(rule, lifecycle, today, created_by=None):
+    key = f"crm-auto:production_waiting_update:{lifecycle.pk}"
+    label = _lifecycle_label(lifecycle)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Production waiting update",
+        message=f"{label} production has not been updated in 7 days.",
+        priority="high",
+        record=lifecycle,
+        record_label=label,
+        target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
+        task_title="Update production status",
+        task_description=f"Add latest production update for {label}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+def _shipment_tracking_task(rule, lifecycle, today, created_by=None):
+    key = f"crm-auto:shipment_waiting_tracking:{lifecycle.pk}"
+    label = _lifecycle_label(lifecycle)
+    _upsert_notification(
+        rule=rule,
+        source_key=key,
+        title="Shipment waiting tracking",
+        message=f"{label} is in shipping stage without tracking information.",
+        priority="high",
+        record=lifecycle,
+        record_label=label,
+        target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
+        task_title="Add shipment tracking",
+        task_description=f"Add courier and tracking number for {label}.",
+        task_due_date=today + timedelta(days=1),
+        task_priority="high",
+        created_by=created_by,
+    )
+    return key
+
+
+# ---------------------------------------------------------------------------
+# Full sweep: date-driven rules (overdue, stalled, waiting N days) only change
+# when the calendar moves, so these run from the nightly beat task.
+# ---------------------------------------------------------------------------
+
+
 def _sync_invoice_rules(rules, today, created_by=None):
     active_keys = set()
     if Invoice is None:
@@ -283,24 +584,7 @@ def _sync_invoice_rules(rules, today, created_by=None):
             .order_by("due_date", "-total_amount")[:40]
         )
         for invoice in qs:
-            key = f"crm-auto:invoice_due_soon:{invoice.pk}"
-            active_keys.add(key)
-            label = _invoice_label(invoice)
-            _upsert_notification(
-                rule=due_soon_rule,
-                source_key=key,
-                title="Invoice due soon",
-                message=f"{invoice.invoice_number} is due on {invoice.due_date}.",
-                priority="high",
-                record=invoice,
-                record_label=label,
-                target_url=_safe_reverse("invoice_view", invoice.pk),
-                task_title="Call customer about invoice due soon",
-                task_description=f"Follow up before {invoice.invoice_number} reaches due date.",
-                task_due_date=invoice.due_date,
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_invoice_due_soon_task(due_soon_rule, invoice, today, created_by))
 
     if _enabled(overdue_rule):
         qs = (
@@ -310,24 +594,7 @@ def _sync_invoice_rules(rules, today, created_by=None):
             .order_by("due_date", "-total_amount")[:60]
         )
         for invoice in qs:
-            key = f"crm-auto:invoice_overdue:{invoice.pk}"
-            active_keys.add(key)
-            label = _invoice_label(invoice)
-            _upsert_notification(
-                rule=overdue_rule,
-                source_key=key,
-                title="Invoice overdue",
-                message=f"{invoice.invoice_number} is overdue and still has an open balance.",
-                priority="critical",
-                record=invoice,
-                record_label=label,
-                target_url=_safe_reverse("invoice_view", invoice.pk),
-                task_title="Call customer about overdue invoice",
-                task_description=f"Collect or update payment status for {invoice.invoice_number}.",
-                task_due_date=today,
-                task_priority="urgent",
-                created_by=created_by,
-            )
+            active_keys.add(_invoice_overdue_task(overdue_rule, invoice, today, created_by))
 
     if _enabled(stalled_rule):
         stalled_before = today - timedelta(days=7)
@@ -338,58 +605,23 @@ def _sync_invoice_rules(rules, today, created_by=None):
             .order_by("updated_at", "due_date")[:40]
         )
         for invoice in qs:
-            key = f"crm-auto:partial_payment_stalled:{invoice.pk}"
-            active_keys.add(key)
-            label = _invoice_label(invoice)
-            _upsert_notification(
-                rule=stalled_rule,
-                source_key=key,
-                title="Partial payment stalled",
-                message=f"{invoice.invoice_number} has a partial payment with no recent update.",
-                priority="high",
-                record=invoice,
-                record_label=label,
-                target_url=_safe_reverse("invoice_view", invoice.pk),
-                task_title="Follow up stalled partial payment",
-                task_description=f"Confirm next payment date for {invoice.invoice_number}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_partial_payment_stalled_task(stalled_rule, invoice, today, created_by))
     return active_keys
 
 
 def _sync_production_rules(rules, today, created_by=None):
     active_keys = set()
-    completed = ["done", "closed_won", "closed_lost"]
 
     delayed_rule = rules.get("Production Delayed")
     if _enabled(delayed_rule):
         qs = (
             ProductionOrder.objects.select_related("customer")
-            .exclude(status__in=completed)
+            .exclude(status__in=PRODUCTION_COMPLETED_STATUSES)
             .filter(bulk_deadline__lt=today)
             .order_by("bulk_deadline", "-updated_at")[:60]
         )
         for order in qs:
-            key = f"crm-auto:production_delayed:{order.pk}"
-            active_keys.add(key)
-            label = _production_label(order)
-            _upsert_notification(
-                rule=delayed_rule,
-                source_key=key,
-                title="Production delayed",
-                message=f"{label} is past the bulk deadline.",
-                priority="critical",
-                record=order,
-                record_label=label,
-                target_url=_safe_reverse("production_detail", order.pk),
-                task_title="Review delayed production order",
-                task_description=f"Check blockers and update timeline for {label}.",
-                task_due_date=today,
-                task_priority="urgent",
-                created_by=created_by,
-            )
+            active_keys.add(_production_delayed_task(delayed_rule, order, today, created_by))
 
     qc_rule = rules.get("QC Delayed")
     if _enabled(qc_rule):
@@ -400,54 +632,19 @@ def _sync_production_rules(rules, today, created_by=None):
             .order_by("planned_end", "-updated_at")[:40]
         )
         for stage in qs:
-            order = stage.order
-            key = f"crm-auto:qc_delayed:{stage.pk}"
-            active_keys.add(key)
-            label = f"{_production_label(order)} - QC"
-            _upsert_notification(
-                rule=qc_rule,
-                source_key=key,
-                title="QC delayed",
-                message=f"QC is past planned end for {_production_label(order)}.",
-                priority="high",
-                record=stage,
-                record_label=label,
-                target_url=_safe_reverse("production_detail", order.pk),
-                task_title="Review delayed QC stage",
-                task_description=f"Update QC status and notes for {_production_label(order)}.",
-                task_due_date=today,
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_qc_delayed_task(qc_rule, stage, today, created_by))
 
     shipment_rule = rules.get("Shipment Pending")
     if _enabled(shipment_rule):
         qs = (
             ProductionOrder.objects.select_related("customer")
             .filter(status__in=["done", "closed_won"])
-            .exclude(shipments__status__in=["shipped", "out_for_delivery", "delivered"])
+            .exclude(shipments__status__in=SHIPMENT_SHIPPED_STATUSES)
             .distinct()
             .order_by("-updated_at")[:50]
         )
         for order in qs:
-            key = f"crm-auto:shipment_pending:{order.pk}"
-            active_keys.add(key)
-            label = _production_label(order)
-            _upsert_notification(
-                rule=shipment_rule,
-                source_key=key,
-                title="Shipment pending",
-                message=f"{label} is complete but has no shipped shipment record.",
-                priority="high",
-                record=order,
-                record_label=label,
-                target_url=_safe_reverse("production_detail", order.pk),
-                task_title="Create shipment for completed order",
-                task_description=f"Create or update shipment for {label}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_shipment_pending_task(shipment_rule, order, today, created_by))
     return active_keys
 
 
@@ -464,24 +661,7 @@ def _sync_inventory_rules(rules, today, created_by=None):
             .order_by("quantity", "name")[:60]
         )
         for item in qs:
-            key = f"crm-auto:low_stock:{item.pk}"
-            active_keys.add(key)
-            label = _inventory_label(item)
-            _upsert_notification(
-                rule=low_rule,
-                source_key=key,
-                title="Low stock",
-                message=f"{label} is at or below reorder level.",
-                priority="high",
-                record=item,
-                record_label=label,
-                target_url=_safe_reverse("inventory_detail", item.pk),
-                task_title=f"Order {label}",
-                task_description=f"Review reorder quantity for {label}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_low_stock_task(low_rule, item, today, created_by))
 
     if _enabled(critical_rule):
         qs = (
@@ -490,24 +670,7 @@ def _sync_inventory_rules(rules, today, created_by=None):
             .order_by("quantity", "name")[:60]
         )
         for item in qs:
-            key = f"crm-auto:critical_stock:{item.pk}"
-            active_keys.add(key)
-            label = _inventory_label(item)
-            _upsert_notification(
-                rule=critical_rule,
-                source_key=key,
-                title="Critical stock",
-                message=f"{label} is at critical stock level.",
-                priority="critical",
-                record=item,
-                record_label=label,
-                target_url=_safe_reverse("inventory_detail", item.pk),
-                task_title=f"Urgent stock review for {label}",
-                task_description=f"Confirm availability and reorder plan for {label}.",
-                task_due_date=today,
-                task_priority="urgent",
-                created_by=created_by,
-            )
+            active_keys.add(_critical_stock_task(critical_rule, item, today, created_by))
 
     if _enabled(waste_rule):
         qs = (
@@ -516,25 +679,7 @@ def _sync_inventory_rules(rules, today, created_by=None):
             .order_by("-waste_quantity", "-damaged_quantity", "name")[:40]
         )
         for item in qs:
-            waste_total = (item.waste_quantity or 0) + (item.damaged_quantity or 0)
-            key = f"crm-auto:high_waste:{item.pk}"
-            active_keys.add(key)
-            label = _inventory_label(item)
-            _upsert_notification(
-                rule=waste_rule,
-                source_key=key,
-                title="High waste",
-                message=f"{label} has recorded waste or damaged material ({waste_total}).",
-                priority="high",
-                record=item,
-                record_label=label,
-                target_url=_safe_reverse("inventory_detail", item.pk),
-                task_title=f"Review waste for {label}",
-                task_description=f"Check damaged/waste usage and update production notes for {label}.",
-                task_due_date=today + timedelta(days=2),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_high_waste_task(waste_rule, item, today, created_by))
     return active_keys
 
 
@@ -553,24 +698,7 @@ def _sync_lifecycle_rules(rules, today, created_by=None):
             .order_by("updated_at")[:40]
         )
         for lifecycle in lifecycle_qs:
-            key = f"crm-auto:quotation_waiting_approval:{lifecycle.pk}"
-            active_keys.add(key)
-            label = _lifecycle_label(lifecycle)
-            _upsert_notification(
-                rule=quote_rule,
-                source_key=key,
-                title="Quotation waiting approval",
-                message=f"{label} has been in quotation stage for more than 3 days.",
-                priority="high",
-                record=lifecycle,
-                record_label=label,
-                target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
-                task_title="Follow up quotation",
-                task_description=f"Review quotation approval status for {label}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_quotation_waiting_task(quote_rule, lifecycle, today, created_by))
 
     if _enabled(payment_rule):
         lifecycle_qs = (
@@ -580,52 +708,18 @@ def _sync_lifecycle_rules(rules, today, created_by=None):
             .order_by("invoice__due_date", "-updated_at")[:60]
         )
         for lifecycle in lifecycle_qs:
-            key = f"crm-auto:lifecycle_invoice_waiting_payment:{lifecycle.pk}"
-            active_keys.add(key)
-            label = _lifecycle_label(lifecycle)
-            _upsert_notification(
-                rule=payment_rule,
-                source_key=key,
-                title="Invoice waiting payment",
-                message=f"{label} has an open payment balance.",
-                priority="high",
-                record=lifecycle,
-                record_label=label,
-                target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
-                task_title="Follow up invoice payment",
-                task_description=f"Confirm payment plan for {label}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_lifecycle_payment_task(payment_rule, lifecycle, today, created_by))
 
     if _enabled(production_rule):
         stale_at = timezone.now() - timedelta(days=7)
         lifecycle_qs = (
             OrderLifecycle.objects.select_related("production_order", "customer")
             .filter(status="production", production_order__updated_at__lte=stale_at)
-            .exclude(production_order__status__in=["done", "closed_won", "closed_lost"])
+            .exclude(production_order__status__in=PRODUCTION_COMPLETED_STATUSES)
             .order_by("production_order__updated_at")[:40]
         )
         for lifecycle in lifecycle_qs:
-            key = f"crm-auto:production_waiting_update:{lifecycle.pk}"
-            active_keys.add(key)
-            label = _lifecycle_label(lifecycle)
-            _upsert_notification(
-                rule=production_rule,
-                source_key=key,
-                title="Production waiting update",
-                message=f"{label} production has not been updated in 7 days.",
-                priority="high",
-                record=lifecycle,
-                record_label=label,
-                target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
-                task_title="Update production status",
-                task_description=f"Add latest production update for {label}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_production_waiting_update_task(production_rule, lifecycle, today, created_by))
 
     if _enabled(tracking_rule):
         lifecycle_qs = (
@@ -635,28 +729,12 @@ def _sync_lifecycle_rules(rules, today, created_by=None):
             .order_by("-updated_at")[:40]
         )
         for lifecycle in lifecycle_qs:
-            key = f"crm-auto:shipment_waiting_tracking:{lifecycle.pk}"
-            active_keys.add(key)
-            label = _lifecycle_label(lifecycle)
-            _upsert_notification(
-                rule=tracking_rule,
-                source_key=key,
-                title="Shipment waiting tracking",
-                message=f"{label} is in shipping stage without tracking information.",
-                priority="high",
-                record=lifecycle,
-                record_label=label,
-                target_url=_safe_reverse("order_lifecycle_detail", lifecycle.pk),
-                task_title="Add shipment tracking",
-                task_description=f"Add courier and tracking number for {label}.",
-                task_due_date=today + timedelta(days=1),
-                task_priority="high",
-                created_by=created_by,
-            )
+            active_keys.add(_shipment_tracking_task(tracking_rule, lifecycle, today, created_by))
     return active_keys
 
 
 def sync_automation_engine(created_by=None):
+    """Full sweep over every rule; scheduled nightly rather than run per page view."""
     today = timezone.localdate()
     try:
         rules = _ensure_default_rules(created_by=created_by)
@@ -675,6 +753,223 @@ def sync_automation_engine(created_by=None):
         return {"created": 0, "error": str(exc)}
 
 
+# ---------------------------------------------------------------------------
+# Incremental evaluation: model signals mark records dirty, a Celery task
+# evaluates only those records against the event-driven rules.
+# ---------------------------------------------------------------------------
+
+
+def _evaluate_invoices(rules, ids, today, created_by=None):
+    active_keys = set()
+    if Invoice is None:
+        return active_keys
+    due_soon_rule = rules.get("Invoice Due Soon")
+    overdue_rule = rules.get("Invoice Overdue")
+    for invoice in Invoice.objects.select_related("customer").filter(pk__in=ids):
+        if not _invoice_open(invoice) or not invoice.due_date:
+            continue
+        if _enabled(due_soon_rule) and today <= invoice.due_date <= today + timedelta(days=3):
+            active_keys.add(_invoice_due_soon_task(due_soon_rule, invoice, today, created_by))
+        if _enabled(overdue_rule) and invoice.due_date < today:
+            active_keys.add(_invoice_overdue_task(overdue_rule, invoice, today, created_by))
+    return active_keys
+
+
+def _evaluate_production_orders(rules, ids, today, created_by=None):
+    active_keys = set()
+    delayed_rule = rules.get("Production Delayed")
+    shipment_rule = rules.get("Shipment Pending")
+    orders = ProductionOrder.objects.select_related("customer").filter(pk__in=ids)
+    shipped_order_ids = set()
+    if _enabled(shipment_rule):
+        shipped_order_ids = set(
+            ProductionOrder.objects.filter(pk__in=ids, shipments__status__in=SHIPMENT_SHIPPED_STATUSES).values_list(
+                "pk", flat=True
+            )
+        )
+    for order in orders:
+        if (
+            _enabled(delayed_rule)
+            and order.status not in PRODUCTION_COMPLETED_STATUSES
+            and order.bulk_deadline
+            and order.bulk_deadline < today
+        ):
+            active_keys.add(_production_delayed_task(delayed_rule, order, today, created_by))
+        if _enabled(shipment_rule) and order.status in {"done", "closed_won"} and order.pk not in shipped_order_ids:
+            active_keys.add(_shipment_pending_task(shipment_rule, order, today, created_by))
+    return active_keys
+
+
+def _evaluate_production_stages(rules, ids, today, created_by=None):
+    active_keys = set()
+    qc_rule = rules.get("QC Delayed")
+    if not _enabled(qc_rule):
+        return active_keys
+    stages = (
+        ProductionStage.objects.select_related("order", "order__customer")
+        .filter(pk__in=ids, stage_key="qc", planned_end__lt=today)
+        .exclude(status="done")
+    )
+    for stage in stages:
+        active_keys.add(_qc_delayed_task(qc_rule, stage, today, created_by))
+    return active_keys
+
+
+def _evaluate_inventory_items(rules, ids, today, created_by=None):
+    active_keys = set()
+    low_rule = rules.get("Low Stock")
+    critical_rule = rules.get("Critical Stock")
+    waste_rule = rules.get("High Waste")
+    for item in InventoryItem.objects.filter(pk__in=ids, is_active=True):
+        quantity = _decimal_value(item.quantity)
+        if _enabled(low_rule) and (
+            quantity <= _decimal_value(item.reorder_level)
+            or (not item.reorder_level and quantity <= _decimal_value(item.min_level))
+        ):
+            active_keys.add(_low_stock_task(low_rule, item, today, created_by))
+        if _enabled(critical_rule) and (
+            quantity < 0
+            or quantity <= _decimal_value(item.minimum_stock)
+            or (not item.minimum_stock and quantity <= _decimal_value(item.min_level))
+        ):
+            active_keys.add(_critical_stock_task(critical_rule, item, today, created_by))
+        if _enabled(waste_rule) and ((item.waste_quantity or 0) > 0 or (item.damaged_quantity or 0) > 0):
+            active_keys.add(_high_waste_task(waste_rule, item, today, created_by))
+    return active_keys
+
+
+def _evaluate_lifecycles(rules, ids, today, created_by=None):
+    active_keys = set()
+    payment_rule = rules.get("Invoice Waiting Payment")
+    tracking_rule = rules.get("Shipment Waiting Tracking")
+    lifecycles = OrderLifecycle.objects.select_related(
+        "invoice",
+        "invoice__customer",
+        "shipping_record",
+        "production_order",
+        "quotation",
+        "customer",
+    ).filter(pk__in=ids)
+    for lifecycle in lifecycles:
+        invoice = lifecycle.invoice
+        if (
+            _enabled(payment_rule)
+            and invoice is not None
+            and lifecycle.status not in {"completed", "cancelled"}
+            and _decimal_value(invoice.total_amount) > _decimal_value(invoice.paid_amount)
+        ):
+            active_keys.add(_lifecycle_payment_task(payment_rule, lifecycle, today, created_by))
+        shipment = lifecycle.shipping_record
+        if (
+            _enabled(tracking_rule)
+            and lifecycle.status == "shipping"
+            and (shipment is None or not shipment.tracking_number)
+        ):
+            active_keys.add(_shipment_tracking_task(tracking_rule, lifecycle, today, created_by))
+    return active_keys
+
+
+AUTOMATION_RECORD_EVALUATORS = {
+    AUTOMATION_DIRTY_INVOICE: _evaluate_invoices,
+    AUTOMATION_DIRTY_PRODUCTION: _evaluate_production_orders,
+    AUTOMATION_DIRTY_PRODUCTION_STAGE: _evaluate_production_stages,
+    AUTOMATION_DIRTY_INVENTORY: _evaluate_inventory_items,
+    AUTOMATION_DIRTY_LIFECYCLE: _evaluate_lifecycles,
+}
+
+# Source-key rule names each evaluator owns. Time-based rules on the same
+# records (partial payment, quotation/production waits) stay with the nightly
+# sync, so their notifications are never resolved by an incremental pass.
+AUTOMATION_RECORD_RULE_KEYS = {
+    AUTOMATION_DIRTY_INVOICE: ("invoice_due_soon", "invoice_overdue"),
+    AUTOMATION_DIRTY_PRODUCTION: ("production_delayed", "shipment_pending"),
+    AUTOMATION_DIRTY_PRODUCTION_STAGE: ("qc_delayed",),
+    AUTOMATION_DIRTY_INVENTORY: ("low_stock", "critical_stock", "high_waste"),
+    AUTOMATION_DIRTY_LIFECYCLE: ("lifecycle_invoice_waiting_payment", "shipment_waiting_tracking"),
+}
+
+
+def mark_automation_dirty(record_type, record_ids):
+    """Queue records for the next engine pass.
+
+    Only a row insert happens on the write path; the Celery beat task drains
+    the queue, so a missing broker never blocks a save.
+    """
+    record_ids = {int(record_id) for record_id in record_ids or [] if record_id}
+    if not record_ids or record_type not in AUTOMATION_RECORD_EVALUATORS:
+        return 0
+    try:
+        AutomationDirtyRecord.objects.bulk_create(
+            [AutomationDirtyRecord(record_type=record_type, record_id=record_id) for record_id in record_ids],
+            ignore_conflicts=True,
+        )
+    except (OperationalError, ProgrammingError):
+        return 0
+    return len(record_ids)
+
+
+def _expand_dependent_lifecycles(ids_by_type):
+    """Lifecycle rules read invoice/production state, so re-check lifecycles linked to them."""
+    invoice_ids = ids_by_type.get(AUTOMATION_DIRTY_INVOICE) or set()
+    production_ids = ids_by_type.get(AUTOMATION_DIRTY_PRODUCTION) or set()
+    if not invoice_ids and not production_ids:
+        return
+    lifecycle_ids = OrderLifecycle.objects.filter(
+        Q(invoice_id__in=invoice_ids) | Q(production_order_id__in=production_ids)
+    ).values_list("pk", flat=True)
+    ids_by_type.setdefault(AUTOMATION_DIRTY_LIFECYCLE, set()).update(lifecycle_ids)
+
+
+def _resolve_cleared_notifications(record_type, ids, active_keys, now):
+    """Resolve notifications for evaluated records whose condition no longer holds."""
+    stale_keys = {
+        f"crm-auto:{rule_key}:{record_id}"
+        for rule_key in AUTOMATION_RECORD_RULE_KEYS.get(record_type, ())
+        for record_id in ids
+    } - set(active_keys or ())
+    if not stale_keys:
+        return 0
+    return AutomationNotification.objects.filter(source_key__in=stale_keys, is_resolved=False).update(
+        is_resolved=True, resolved_at=now
+    )
+
+
+def process_automation_dirty_records(batch_size=AUTOMATION_DIRTY_BATCH_SIZE, created_by=None):
+    """Evaluate queued dirty records; returns counts per record type."""
+    today = timezone.localdate()
+    processed = {}
+    try:
+        rules = _ensure_default_rules(created_by=created_by)
+        while True:
+            batch = list(
+                AutomationDirtyRecord.objects.order_by("queued_at", "id").values_list("id", "record_type", "record_id")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+            ids_by_type = {}
+            for _row_id, record_type, record_id in batch:
+                ids_by_type.setdefault(record_type, set()).add(record_id)
+            # Claim and evaluate together: if evaluation raises, the deletes roll
+            # back and the records are picked up again on the next pass.
+            with transaction.atomic():
+                AutomationDirtyRecord.objects.filter(pk__in=[row[0] for row in batch]).delete()
+                _expand_dependent_lifecycles(ids_by_type)
+                for record_type, ids in ids_by_type.items():
+                    evaluator = AUTOMATION_RECORD_EVALUATORS.get(record_type)
+                    if evaluator:
+                        active_keys = evaluator(rules, ids, today, created_by=created_by)
+                        _resolve_cleared_notifications(record_type, ids, active_keys, timezone.now())
+            for record_type, ids in ids_by_type.items():
+                processed[record_type] = processed.get(record_type, 0) + len(ids)
+            if len(batch) < batch_size:
+                break
+        return {"processed": processed, "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"processed": processed, "error": str(exc)}
+
+
 def _access_flags(user):
     flags = {
         "invoice": False,
@@ -721,7 +1016,8 @@ def _priority_rank_expression():
     )
 
 
-def automation_dashboard_context(user, *, sync=True, limit=12):
+def automation_dashboard_context(user, *, limit=12):
+    """Read-only dashboard payload; rule evaluation runs in Celery, never in the request."""
     visible_rule_types = _visible_rule_types(user)
     empty_context = {
         "automation_notifications": [],
@@ -737,19 +1033,6 @@ def automation_dashboard_context(user, *, sync=True, limit=12):
     if not visible_rule_types:
         return empty_context
 
-    if sync:
-        sync_key = f"crm:automation-dashboard-sync:{timezone.localdate().isoformat()}"
-        if cache.add(sync_key, True, timeout=AUTOMATION_DASHBOARD_SYNC_TIMEOUT):
-            try:
-                result = sync_automation_engine(
-                    created_by=user if getattr(user, "is_authenticated", False) else None
-                )
-            except Exception:
-                cache.delete(sync_key)
-                raise
-            if result.get("error"):
-                cache.delete(sync_key)
-
     try:
         notifications_qs = (
             AutomationNotification.objects.filter(is_resolved=False, rule_type__in=visible_rule_types)
@@ -1,11 +1,15 @@
 import logging
 import re
 import threading
+import uuid
+from datetime import timedelta
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMessage, get_connection
 from django.core.validators import validate_email
+from django.db import OperationalError, ProgrammingError
+from django.db.models import Q
 from django.utils import timezone
 
 from crm.models import Event
@@ -201,3 +205,90 @@ def queue_calendar_invite_email(event_id, *, action="created"):
     )
     worker.start()
     return True
+
+
+def build_event_reminder_email(event, from_email):
+    return EmailMessage(
+        f"Reminder: {event.title}",
+        f"Event starts at {timezone.localtime(event.start_datetime)}.\n\nNote: {event.note or ''}",
+        from_email,
+        [event.assigned_to_email],
+    )
+
+
+def _unclaimed_reminder_q(now):
+    timeout = int(getattr(settings, "CALENDAR_REMINDER_CLAIM_TIMEOUT_SECONDS", 600))
+    return Q(reminder_claim_token="") | Q(reminder_claimed_at__lt=now - timedelta(seconds=timeout))
+
+
+def dispatch_due_event_reminders(now=None, batch_size=None):
+    """Send due reminders in batches over one SMTP connection.
+
+    Rows are claimed with a conditional UPDATE before sending, so concurrent
+    dispatchers never pick the same event. Failed sends release their claim
+    and are retried on the next run while the event has not started.
+    """
+    now = now or timezone.now()
+    batch_size = max(1, int(batch_size or getattr(settings, "CALENDAR_REMINDER_BATCH_SIZE", 50)))
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+    try:
+        timeout = int(getattr(settings, "CALENDAR_EMAIL_TIMEOUT", getattr(settings, "EMAIL_TIMEOUT", 8)) or 8)
+    except (TypeError, ValueError):
+        timeout = 8
+
+    sent = failed = 0
+    attempted = set()
+    try:
+        while True:
+            candidate_ids = list(
+                Event.objects.filter(reminder_sent=False, remind_at__lte=now, start_datetime__gte=now)
+                .filter(_unclaimed_reminder_q(now))
+                .exclude(pk__in=attempted)
+                .order_by("remind_at", "pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not candidate_ids:
+                break
+            attempted.update(candidate_ids)
+            token = uuid.uuid4().hex
+            Event.objects.filter(_unclaimed_reminder_q(now), pk__in=candidate_ids, reminder_sent=False).update(
+                reminder_claim_token=token,
+                reminder_claimed_at=now,
+            )
+            events = list(
+                Event.objects.filter(reminder_claim_token=token).only(
+                    "pk", "title", "note", "start_datetime", "assigned_to_email"
+                )
+            )
+            sent_ids, failed_ids = [], []
+            if events:
+                try:
+                    with get_connection(timeout=timeout) as connection:
+                        for event in events:
+                            try:
+                                connection.send_messages([build_event_reminder_email(event, from_email)])
+                            except Exception:
+                                logger.warning("Calendar reminder email failed", extra={"event_id": event.pk}, exc_info=True)
+                                failed_ids.append(event.pk)
+                            else:
+                                sent_ids.append(event.pk)
+                except Exception:
+                    # Could not open the SMTP connection: release the whole batch.
+                    logger.exception("Calendar reminder connection failed")
+                    failed_ids = [event.pk for event in events if event.pk not in sent_ids]
+                Event.objects.filter(pk__in=sent_ids, reminder_claim_token=token).update(
+                    reminder_sent=True,
+                    reminder_claim_token="",
+                    reminder_claimed_at=None,
+                )
+                Event.objects.filter(pk__in=failed_ids, reminder_claim_token=token).update(
+                    reminder_claim_token="",
+                    reminder_claimed_at=None,
+                )
+                sent += len(sent_ids)
+                failed += len(failed_ids)
+            if len(candidate_ids) < batch_size:
+                break
+        return {"sent": sent, "failed": failed, "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"sent": sent, "failed": failed, "error": str(exc)}
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from django.db.models import Q
+
+from crm.services.chatter_permissions import visible_chatter_comments
+
+
+CHATTER_FEED_PAGE_SIZE = 30
+CHATTER_SOURCES = ("lead", "opportunity", "production")
+
+# Each source filter matches the condition of a partial index on LeadComment,
+# so every feed variant walks an index in (created_at, id) order.
+CHATTER_SOURCE_FILTERS = {
+    "lead": Q(opportunity__isnull=True, production__isnull=True),
+    "opportunity": Q(opportunity__isnull=False),
+    "production": Q(production__isnull=False),
+}
+
+
+def encode_chatter_cursor(comment):
+    return f"{comment.created_at.isoformat()}~{comment.pk}"
+
+
+def decode_chatter_cursor(value):
+    """Return ``(created_at, id)`` for a cursor string, or None when it is not one."""
+    created_at, _, pk = (value or "").rpartition("~")
+    if not created_at or not pk.isdigit():
+        return None
+    try:
+        return datetime.fromisoformat(created_at), int(pk)
+    except ValueError:
+        return None
+
+
+def chatter_feed_queryset(user, source="all"):
+    comments = visible_chatter_comments(user)
+    if source in CHATTER_SOURCE_FILTERS:
+        comments = comments.filter(CHATTER_SOURCE_FILTERS[source])
+    return comments.order_by("-created_at", "-id")
+
+
+def chatter_feed_page(user, source="all", cursor=None, limit=CHATTER_FEED_PAGE_SIZE):
+    """
+    One page of the chatter feed, newest first, starting after ``cursor``.
+
+    Keyset pagination keeps every page the same cost however deep the reader
+    scrolls; the returned ``next_cursor`` is empty on the last page.
+    """
+    comments = chatter_feed_queryset(user, source)
+    position = decode_chatter_cursor(cursor)
+    if position:
+        created_at, pk = position
+        comments = comments.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    rows = list(comments[: limit + 1])
+    page = rows[:limit]
+    return {
+        "comments": page,
+        "next_cursor": encode_chatter_cursor(page[-1]) if len(rows) > limit else "",
+    }
@@ -4,7 +4,6 @@ import re
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
 from django.db.models import Case, IntegerField, Q, Value, When
 from django.urls import reverse
 
@@ -12,6 +11,7 @@ from crm.models import AutomationNotification
 from crm.models import EmployeeProfile
 from crm.services.chatter_permissions import can_receive_chatter_context
 from crm.services.employee_profiles import employee_display_name
+from crm.services.operations_notifications import HEADER_CACHE
 from crm.services.operations_permissions import (
     OPERATIONS_ROLES,
 )
@@ -138,7 +138,7 @@ def notify_chatter_mentions(comment, actor):
         ]
         AutomationNotification.objects.bulk_create(rows, ignore_conflicts=True)
         for user in allowed:
-            cache.delete(f"crm-header-unread:{user.pk}")
+            HEADER_CACHE.invalidate(scope=user.pk)
         return len(rows)
     except Exception:
         logger.exception("Chatter mention notification failed for comment %s", comment.pk)
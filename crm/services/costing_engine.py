@@ -1,6 +1,9 @@
 from decimal import Decimal, ROUND_HALF_UP
 
+from django.db.models import QuerySet, prefetch_related_objects
+
 from crm.models import (
+    CostingCalculationSnapshot,
     CostingHeader,
     CostingLineItem,
     CostingSMV,
@@ -23,6 +26,29 @@ CATEGORY_GROUPS = {
     "other": "other",
 }
 
+# Totals kept in CostingCalculationSnapshot; enough for list, dashboard and report rows.
+SNAPSHOT_FIELDS = (
+    "fabric_base",
+    "sewing_trim_base",
+    "packaging_trim_base",
+    "trims_base",
+    "other_base",
+    "labor_cost_per_piece",
+    "fabric_finance",
+    "trims_finance",
+    "shipping_cost_order",
+    "shipping_cost_per_piece",
+    "total_cost_per_piece",
+    "fob_per_piece",
+    "profit_per_piece",
+    "margin_percent",
+    "final_offer_fob_per_piece",
+    "total_cost_order",
+    "total_sales_order",
+    "total_profit_order",
+    "total_final_offer_order",
+)
+
 
 def _to_decimal(value):
     if value is None:
@@ -344,6 +370,70 @@ def compute_costing(costing_or_id):
     }
 
 
+def compute_costings(costings):
+    """
+    Full calculation for many headers at once.
+
+    Line items and SMV rows are loaded for the whole batch up front, so the
+    cost stays at a fixed number of queries however many headers are passed.
+    """
+    if isinstance(costings, QuerySet):
+        headers = list(
+            costings.select_related("opportunity", "customer", "smv").prefetch_related("line_items")
+        )
+    else:
+        headers = list(costings)
+        prefetch_related_objects(headers, "line_items", "smv")
+    return [compute_costing(header) for header in headers]
+
+
+def _snapshot_for(costing):
+    try:
+        return costing.calc_snapshot
+    except CostingCalculationSnapshot.DoesNotExist:
+        return None
+
+
+def _snapshot_is_current(costing, snapshot):
+    return bool(snapshot) and snapshot.values.get("header_updated_at") == str(costing.updated_at)
+
+
+def _summary_from_values(costing, values):
+    summary = {key: _to_decimal(values.get(key)) for key in SNAPSHOT_FIELDS}
+    summary["costing"] = costing
+    summary["order_quantity"] = int(costing.order_quantity or 0)
+    summary["display"] = {key: _round_display(summary[key]) for key in SNAPSHOT_FIELDS}
+    return summary
+
+
+def costing_summaries(costings):
+    """
+    Totals, margins and FOB per piece for each header in ``costings``.
+
+    Reads CostingCalculationSnapshot rows and recomputes, in one batch, only
+    the headers whose snapshot is missing or older than the header. Returns
+    dicts with the SNAPSHOT_FIELDS keys plus ``costing``, ``order_quantity``
+    and ``display``, in queryset order.
+    """
+    headers = list(costings.select_related("calc_snapshot"))
+    stale = [header for header in headers if not _snapshot_is_current(header, _snapshot_for(header))]
+    fresh_values = {}
+    if stale:
+        for calc in compute_costings(stale):
+            values = {key: str(calc[key]) for key in SNAPSHOT_FIELDS}
+            values["header_updated_at"] = str(calc["costing"].updated_at)
+            fresh_values[calc["costing"].pk] = values
+        CostingCalculationSnapshot.objects.filter(pk__in=list(fresh_values)).delete()
+        CostingCalculationSnapshot.objects.bulk_create(
+            [CostingCalculationSnapshot(costing_id=pk, values=values) for pk, values in fresh_values.items()],
+            ignore_conflicts=True,
+        )
+    return [
+        _summary_from_values(header, fresh_values.get(header.pk) or header.calc_snapshot.values)
+        for header in headers
+    ]
+
+
 def validate_costing(costing, calc):
     errors = []
     warnings = []
@@ -1,57 +1,13 @@
-import email
-import imaplib
 import re
 from email.header import decode_header
-from email.utils import parseaddr, parsedate_to_datetime
+from email.utils import parseaddr
 
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
-from crm.models import InboundEmail, MailboxSyncState, Lead, EmailLeadLink
-
-
-def _decode_header(value: str) -> str:
-    if not value:
-        return ""
-    parts = decode_header(value)
-    out = []
-    for text, enc in parts:
-        if isinstance(text, bytes):
-            try:
-                out.append(text.decode(enc or "utf-8", errors="ignore"))
-            except Exception:
-                out.append(text.decode("utf-8", errors="ignore"))
-        else:
-            out.append(str(text))
-    return "".join(out).strip()
-
-
-def _get_text_body(msg) -> str:
-    if msg.is_multipart():
-        best = ""
-        for part in msg.walk():
-            ctype = (part.get_content_type() or "").lower()
-            disp = (part.get("Content-Disposition") or "").lower()
-            if "attachment" in disp:
-                continue
-
-            payload = part.get_payload(decode=True) or b""
-            charset = part.get_content_charset() or "utf-8"
-
-            if ctype == "text/plain":
-                return payload.decode(charset, errors="ignore").strip()
-
-            if ctype == "text/html" and not best:
-                html = payload.decode(charset, errors="ignore")
-                best = re.sub(r"<[^>]+>", " ", html)
-                best = re.sub(r"\s+", " ", best).strip()
-
-        return best.strip()
-
-    payload = msg.get_payload(decode=True) or b""
-    charset = msg.get_content_charset() or "utf-8"
-    return payload.decode(charset, errors="ignore").strip()
+from crm.models import EmailInboxConfig, EmailMessage, EmailThread, Lead
+from crm.services.imap_sync import sync_imap_mailbox
 
 
 def looks_like_lead(subject: str, body: str) -> bool:
@@ -180,162 +136,535 @@ def parse_lead_from_email(subject: str, body: str, from_email: str, from_name: s
     return data
 
 
-def _find_or_create_lead(from_email: str, from_name: str, subject: str, body: str, default_source: str) -> Lead:
-    from_email = (from_email or "").strip().lower()
-    lead = None
+FORM_FIELD_ALIASES = {
+    "name": ["name", "contact name"],
+    "email": ["email", "email address", "e mail"],
+    "phone": ["phone", "phone number", "tel", "telephone"],
+    "company": ["company", "company name", "business name", "brand name", "account or brand", "account brand"],
+    "brand_stage": ["brand stage", "stage"],
+    "product_interest": ["products looking for", "product interest", "products", "items", "product"],
+    "order_quantity": ["order quantity", "quantity", "qty"],
+    "preferred_time": ["preferred time our agent can call you", "preferred time", "call time", "preferred contact time"],
+    "preferred_date": ["preferred date our agent can call you", "preferred date", "call date"],
+    "notes": ["additional notes", "message", "notes", "additional note"],
+}
+
+FORM_SUBJECT_RE = re.compile(r"(?i)\bnew\s*form\s*entry\b")
+FORM_BODY_RE = re.compile(r"(?i)\bnew\s*website\s*form\s*submission\b")
+
+
+def _norm_enc(enc: str) -> str:
+    e = (enc or "").strip().lower()
+    if not e:
+        return "utf-8"
+    if e in ["windows-874", "windows874"]:
+        return "cp874"
+    if e in ["utf8", "utf-8"]:
+        return "utf-8"
+    return e
+
+
+def _safe_decode_bytes(b: bytes, enc: str) -> str:
+    if b is None:
+        return ""
+    use_enc = _norm_enc(enc)
+    try:
+        return b.decode(use_enc, errors="ignore")
+    except Exception:
+        try:
+            return b.decode("utf-8", errors="ignore")
+        except Exception:
+            try:
+                return b.decode("latin-1", errors="ignore")
+            except Exception:
+                return ""
 
-    if from_email:
-        lead = Lead.objects.filter(email__iexact=from_email).first()
-        if lead:
-            return lead
 
-    parsed = parse_lead_from_email(subject, body, from_email, from_name)
+def _decode(value) -> str:
+    if not value:
+        return ""
+    parts = decode_header(value)
+    out = []
+    for part, enc in parts:
+        if isinstance(part, bytes):
+            out.append(_safe_decode_bytes(part, enc or "utf-8"))
+        else:
+            out.append(str(part))
+    return "".join(out).strip()
 
-    lead = Lead.objects.create(
-        account_brand=parsed["account_brand"] or "Unknown",
-        contact_name=parsed["contact_name"] or "Unknown",
-        email=parsed["email"] or "",
-        phone=parsed["phone"] or "",
-
-        contact2_name=parsed["contact2_name"] or "",
-        email2=parsed["email2"] or "",
-        phone2=parsed["phone2"] or "",
-
-        company_website=parsed["company_website"] or "",
-        country=parsed["country"] or "",
-        city=parsed["city"] or "",
-        product_interest=parsed["product_interest"] or "",
-        order_quantity=parsed["order_quantity"] or "",
-        budget=parsed["budget"] or "",
-        preferred_contact_time=parsed["preferred_contact_time"] or "",
-
-        source=default_source,
-        lead_type="Startup / New Brand",
-        lead_status="New",
-        priority="Medium",
 
-        notes=parsed["notes"] or "",
-    )
-    return lead
+def _parse_addr(header_value: str):
+    name, addr = parseaddr(header_value or "")
+    name = _decode(name).strip()
+    addr = (addr or "").strip().lower()
+    return name, addr
 
 
-def sync_mailbox(mailbox_key: str) -> dict:
-    cfg = settings.EMAIL_SYNC.get(mailbox_key)
-    if not cfg:
-        return {"ok": False, "error": "Missing mailbox config"}
+def _get_text_and_html(msg):
+    text = ""
+    html = ""
 
-    label = cfg["label"]
-    host = cfg["imap_host"]
-    port = int(cfg.get("imap_port", 993))
-    user = cfg["username"]
-    pw = cfg["password"]
-    use_ssl = bool(cfg.get("use_ssl", True))
+    if msg.is_multipart():
+        for part in msg.walk():
+            ctype = (part.get_content_type() or "").lower()
+            disp = str(part.get("Content-Disposition") or "").lower()
+            if "attachment" in disp:
+                continue
 
-    state, _ = MailboxSyncState.objects.get_or_create(mailbox_label=label)
-    last_uid = int(state.last_uid or 0)
+            payload = part.get_payload(decode=True) or b""
+            charset = part.get_content_charset() or "utf-8"
+            decoded = _safe_decode_bytes(payload, charset)
+
+            if ctype == "text/plain" and not text:
+                text = decoded
+            elif ctype == "text/html" and not html:
+                html = decoded
+    else:
+        payload = msg.get_payload(decode=True) or b""
+        charset = msg.get_content_charset() or "utf-8"
+        decoded = _safe_decode_bytes(payload, charset)
+        if (msg.get_content_type() or "").lower() == "text/html":
+            html = decoded
+        else:
+            text = decoded
+
+    return (text or "").strip(), (html or "").strip()
+
+
+def _html_to_text(html: str) -> str:
+    h = html or ""
+    h = re.sub(r"(?is)<(script|style).*?>.*?</\1>", " ", h)
+    h = re.sub(r"(?i)<br\s*/?>", "\n", h)
+    h = re.sub(r"(?i)</p\s*>", "\n", h)
+    h = re.sub(r"(?i)</div\s*>", "\n", h)
+    h = re.sub(r"(?i)</li\s*>", "\n", h)
+    h = re.sub(r"(?i)</ol\s*>", "\n", h)
+    h = re.sub(r"(?i)</ul\s*>", "\n", h)
+    h = re.sub(r"(?s)<.*?>", " ", h)
+
+    h = h.replace("&nbsp;", " ")
+    h = h.replace("&amp;", "&")
+    h = h.replace("&lt;", "<")
+    h = h.replace("&gt;", ">")
+    h = h.replace("&#39;", "'")
+    h = h.replace("&quot;", '"')
+
+    h = re.sub(r"[ \t]+", " ", h)
+    h = re.sub(r"\n\s*\n+", "\n\n", h)
+    return h.strip()
+
+
+def _extract_email_from_anywhere(text: str) -> str:
+    m = re.search(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", text or "", re.I)
+    return (m.group(1) if m else "").strip().lower()
+
+
+def _clean_value(v: str) -> str:
+    v = (v or "").strip()
+    v = re.sub(r"(?i)^mailto:\s*", "", v).strip()
+    v = re.sub(r"[<>\"']", "", v).strip()
+    return v
+
+
+def _is_placeholder_value(v: str) -> bool:
+    x = (v or "").strip().lower()
+    if not x:
+        return True
+    bad = {
+        "name",
+        "contact name",
+        "contact_name",
+        "email",
+        "email address",
+        "phone",
+        "phone number",
+        "account_brand",
+        "account or brand",
+        "company",
+        "company name",
+        "brand",
+        "notes",
+        "additional notes",
+        "message",
+        "brand stage",
+        "products looking for",
+        "order quantity",
+        "preferred time",
+        "preferred contact time",
+        "upload design",
+    }
+    return x in bad
 
-    imap = imaplib.IMAP4_SSL(host, port) if use_ssl else imaplib.IMAP4(host, port)
-    imap.login(user, pw)
-    imap.select("INBOX")
 
-    typ, data = imap.uid("search", None, f"(UID {last_uid + 1}:*)")
-    if typ != "OK":
-        imap.logout()
-        return {"ok": False, "error": "IMAP search failed"}
+def _clean_parsed_value(v: str) -> str:
+    v = _clean_value(v or "")
+    if _is_placeholder_value(v):
+        return ""
+    return v
 
-    uids = [x for x in (data[0] or b"").split() if x]
-    created = 0
-    flagged = 0
-    linked = 0
-    max_uid_seen = last_uid
 
-    for uid_b in uids:
-        uid = int(uid_b)
-        if uid > max_uid_seen:
-            max_uid_seen = uid
+def _extract_form_entry_number(subject: str) -> str:
+    s = subject or ""
+    m = re.search(r"(?i)\blead\s*id\s*[:#]?\s*(\d+)\b", s)
+    if m:
+        return m.group(1)
 
-        typ, msgdata = imap.uid("fetch", uid_b, "(RFC822)")
-        if typ != "OK" or not msgdata or not msgdata[0]:
-            continue
+    m = re.search(r"#\s*(\d+)\b", s)
+    if m:
+        return m.group(1)
 
-        raw = msgdata[0][1]
-        msg = email.message_from_bytes(raw)
+    return ""
 
-        message_id = (msg.get("Message-ID") or "").strip()
-        subject = _decode_header(msg.get("Subject") or "")
-        from_name, from_email = parseaddr(msg.get("From") or "")
-        from_name = _decode_header(from_name)
-        to_email = parseaddr(msg.get("To") or "")[1]
 
-        body = _get_text_body(msg)
+def _is_form_entry(subject: str, body_text: str, body_html: str) -> bool:
+    s = (subject or "")
+    t = (body_text or "")
+    h = (body_html or "")
 
-        dt = None
-        try:
-            dt = parsedate_to_datetime(msg.get("Date")) if msg.get("Date") else None
-        except Exception:
-            dt = None
-        if dt and timezone.is_naive(dt):
-            dt = timezone.make_aware(dt)
-        received_at = dt or timezone.now()
+    # Strong signals
+    if FORM_SUBJECT_RE.search(s) or FORM_BODY_RE.search(t) or FORM_BODY_RE.search(h):
+        return True
 
-        try:
-            with transaction.atomic():
-                obj, is_new = InboundEmail.objects.get_or_create(
-                    mailbox_label=label,
-                    uid=uid,
-                    defaults={
-                        "from_email": (from_email or "").lower(),
-                        "from_name": from_name or "",
-                        "to_email": (to_email or "").lower(),
-                        "subject": subject[:255],
-                        "body_text": body,
-                        "received_at": received_at,
-                        "message_id": message_id[:255],
-                    },
-                )
-                if not is_new:
-                    continue
-
-                created += 1
-
-                if label == "lead":
-                    if obj.from_email:
-                        lead = _find_or_create_lead(
-                            from_email=obj.from_email,
-                            from_name=obj.from_name,
-                            subject=obj.subject,
-                            body=obj.body_text,
-                            default_source="Email Campaign",
-                        )
-                        EmailLeadLink.objects.get_or_create(email=obj, lead=lead)
-                        linked += 1
-
-                if label == "info":
-                    if looks_like_lead(obj.subject, obj.body_text):
-                        flagged += 1
-                        if obj.from_email:
-                            lead = _find_or_create_lead(
-                                from_email=obj.from_email,
-                                from_name=obj.from_name,
-                                subject=obj.subject,
-                                body=obj.body_text,
-                                default_source="Email Campaign",
-                            )
-                            EmailLeadLink.objects.get_or_create(email=obj, lead=lead)
-                            linked += 1
+    # Fallback signals
+    text = (s + "\n" + t + "\n" + h).lower()
+    form_signals = [
+        "you have a new website form submission",
+        "new website form submission",
+        "new form entry",
+        "website form submission",
+    ]
+    field_signals = [
+        "email address",
+        "phone",
+        "brand stage",
+        "products looking for",
+        "order quantity",
+        "additional notes",
+        "name",
+    ]
 
-        except Exception:
-            continue
+    has_form_signal = any(x in text for x in form_signals)
+    has_field_signal = any(x in text for x in field_signals)
+
+    return has_form_signal and has_field_signal
+
+
+def _parse_form_fields(body_text: str, body_html: str) -> dict:
+    src = (body_text or "").strip()
+    if not src and body_html:
+        src = _html_to_text(body_html)
+
+    src = (src or "").replace("\r", "")
+    lines = [ln.strip() for ln in src.split("\n") if ln.strip()]
+
+    def find_after_any_label(alias_list):
+        alias_list = [a.lower() for a in alias_list]
+
+        def is_label_line(line_low: str, alias: str) -> bool:
+            clean = line_low.strip()
+            clean2 = clean.replace(" :", ":")
+            if clean == alias:
+                return True
+            if clean2.startswith(alias + ":"):
+                return True
+            return False
+
+        for i, ln in enumerate(lines):
+            low = ln.lower()
+
+            matched = None
+            for a in alias_list:
+                if is_label_line(low, a):
+                    matched = a
+                    break
+            if not matched:
+                continue
+
+            if ":" in ln:
+                right = ln.split(":", 1)[1].strip()
+                right = _clean_parsed_value(right)
+                if right:
+                    return right
+
+            if i + 1 < len(lines):
+                return _clean_parsed_value(lines[i + 1].strip())
+
+        return ""
+
+    name = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["name"]))
+    email_addr = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["email"]))
+    phone = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["phone"]))
+    company = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["company"]))
+
+    brand_stage = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["brand_stage"]))
+    product_interest = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["product_interest"]))
+    order_quantity = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["order_quantity"]))
+    preferred_time = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["preferred_time"]))
+    preferred_date = _clean_parsed_value(find_after_any_label(FORM_FIELD_ALIASES["preferred_date"]))
+
+    notes_main = find_after_any_label(FORM_FIELD_ALIASES["notes"])
+    notes_main = _clean_value(notes_main)
+
+    if not email_addr:
+        email_addr = _clean_parsed_value(_extract_email_from_anywhere(src))
+    email_addr = _clean_parsed_value(_extract_email_from_anywhere(email_addr) or email_addr)
+
+    extra = []
+    if brand_stage:
+        extra.append(f"Brand Stage: {brand_stage}")
+    if product_interest:
+        extra.append(f"Products Looking For: {product_interest}")
+    if order_quantity:
+        extra.append(f"Order Quantity: {order_quantity}")
+    if preferred_date:
+        extra.append(f"Preferred Date: {preferred_date}")
+    if preferred_time:
+        extra.append(f"Preferred Time: {preferred_time}")
+
+    notes_out = (notes_main or "").strip()
+    if extra:
+        extra_block = "\n".join(extra).strip()
+        if notes_out:
+            notes_out = (notes_out + "\n\n" + extra_block).strip()
+        else:
+            notes_out = extra_block
+
+    return {
+        "contact_name": (name or "")[:200],
+        "email": (email_addr or "")[:255],
+        "phone": (phone or "")[:50],
+        "account_brand": (company or "")[:200],
+        "product_interest": (product_interest or "")[:200],
+        "order_quantity": (order_quantity or "")[:100],
+        "preferred_contact_time": (preferred_time or "")[:100],
+        "notes": notes_out,
+    }
+
+
+def _pick_non_empty(current: str, new: str) -> str:
+    if (current or "").strip():
+        return current
+    return (new or "").strip()
+
+
+def _append_notes(existing: str, extra: str) -> str:
+    e = (existing or "").strip()
+    x = (extra or "").strip()
+    if not x:
+        return e
+    if not e:
+        return x
+    if x in e:
+        return e
+    return (e + "\n\n" + x).strip()
 
-    state.last_uid = max_uid_seen
-    state.save(update_fields=["last_uid", "updated_at"])
-    imap.logout()
 
+def _create_or_update_lead_from_form(parsed: dict, entry_no: str = ""):
+    email_addr = (parsed.get("email") or "").strip().lower()
+    name = (parsed.get("contact_name") or "").strip()
+    brand = (parsed.get("account_brand") or "").strip()
+
+    if not email_addr:
+        return None, "skipped_no_email"
+
+    lead = Lead.objects.filter(email__iexact=email_addr).first()
+
+    desired_lead_id = ""
+    if entry_no:
+        desired_lead_id = f"L{entry_no}".strip()
+
+    if lead:
+        if desired_lead_id:
+            clash = Lead.objects.filter(lead_id=desired_lead_id).exclude(id=lead.id).exists()
+            if not clash:
+                lead.lead_id = desired_lead_id
+
+        lead.account_brand = _pick_non_empty(getattr(lead, "account_brand", ""), brand)
+        lead.contact_name = _pick_non_empty(getattr(lead, "contact_name", ""), name)
+        lead.phone = _pick_non_empty(getattr(lead, "phone", ""), parsed.get("phone", ""))
+
+        if hasattr(lead, "product_interest"):
+            lead.product_interest = _pick_non_empty(getattr(lead, "product_interest", ""), parsed.get("product_interest", ""))
+
+        if hasattr(lead, "order_quantity"):
+            lead.order_quantity = _pick_non_empty(getattr(lead, "order_quantity", ""), parsed.get("order_quantity", ""))
+
+        lead.notes = _append_notes(getattr(lead, "notes", ""), parsed.get("notes", ""))
+        lead.save()
+        return lead, "updated_existing"
+
+    candidate_id = desired_lead_id or None
+    if candidate_id and Lead.objects.filter(lead_id=candidate_id).exists():
+        candidate_id = None
+
+    lead = Lead.objects.create(
+        lead_id=candidate_id,
+        market="CA",
+        account_brand=brand,
+        contact_name=name,
+        email=email_addr,
+        phone=(parsed.get("phone", "") or "").strip(),
+        source="Website Inquiry",
+        lead_type="Startup / New Brand",
+        lead_status="New",
+        priority="Medium",
+        notes=(parsed.get("notes", "") or "").strip(),
+    )
+
+    return lead, "created_new"
+
+
+def _thread_subject_key(subject: str) -> str:
+    s = (subject or "").strip()
+    if not s:
+        return ""
+    m = re.search(r"(?i)(new form entry\s*#\s*\d+)", s)
+    if m:
+        return m.group(1).strip()
+    s2 = re.sub(r"(?i)^(re|fw|fwd)\s*:\s*", "", s).strip()
+    return s2[:255]
+
+
+class InboxMessageStore:
+    """Stores IMAP messages of one mailbox as EmailThread/EmailMessage rows and turns form entries into leads."""
+
+    def __init__(self, label, mailbox, *, backfill=False, write=None):
+        self.label = label
+        self.mailbox = mailbox
+        self.backfill = backfill
+        self.write = write
+
+    def known_uids(self, uids):
+        return set(
+            EmailMessage.objects.filter(
+                thread__label=self.label,
+                thread__mailbox=self.mailbox,
+                imap_uid__in=uids,
+            ).values_list("imap_uid", flat=True)
+        )
+
+    def save(self, uid_str, msg):
+        """Returns True when a new EmailMessage was created."""
+        label = self.label
+        subject = _decode(msg.get("Subject"))
+        from_full = _decode(msg.get("From"))
+        reply_to_full = _decode(msg.get("Reply-To"))
+        to_full = _decode(msg.get("To"))
+
+        from_name, from_email = _parse_addr(from_full)
+        rt_name, rt_email = _parse_addr(reply_to_full)
+
+        body_text, body_html = _get_text_and_html(msg)
+        if (not body_text) and body_html:
+            body_text = _html_to_text(body_html)
+
+        is_form = _is_form_entry(subject, body_text, body_html)
+        parsed = _parse_form_fields(body_text, body_html) if is_form else {}
+        entry_no = _extract_form_entry_number(subject) if is_form else ""
+
+        if is_form:
+            if parsed.get("email"):
+                from_email = parsed["email"]
+            elif rt_email:
+                from_email = rt_email
+                from_name = rt_name or from_name
+
+            if parsed.get("contact_name"):
+                from_name = parsed["contact_name"]
+
+        subject_key = _thread_subject_key(subject)
+
+        thread, _ = EmailThread.objects.get_or_create(
+            label=label,
+            mailbox=self.mailbox,
+            subject=subject_key[:255],
+            defaults={
+                "from_email": (from_email or "")[:255],
+                "from_name": (from_name or "")[:255],
+                "last_message_at": timezone.now(),
+            },
+        )
+
+        existing = EmailMessage.objects.filter(thread=thread, imap_uid=uid_str).first()
+        if existing and not self.backfill:
+            return False
+
+        if existing and self.backfill:
+            changed = False
+
+            if (not (existing.body_text or "").strip()) and (body_text or "").strip():
+                existing.body_text = body_text
+                changed = True
+            if (not (existing.body_html or "").strip()) and (body_html or "").strip():
+                existing.body_html = body_html
+                changed = True
+
+            if is_form:
+                if not existing.is_form_entry:
+                    existing.is_form_entry = True
+                    changed = True
+                if not existing.is_lead_candidate:
+                    existing.is_lead_candidate = True
+                    changed = True
+
+            if changed:
+                existing.save()
+
+            if is_form and parsed:
+                _create_or_update_lead_from_form(parsed, entry_no)
+
+            return False
+
+        with transaction.atomic():
+            EmailMessage.objects.create(
+                thread=thread,
+                imap_uid=uid_str,
+                subject=(subject or "")[:255],
+                from_email=(from_email or "")[:255],
+                from_name=(from_name or "")[:255],
+                to_email=(to_full or "")[:255],
+                body_text=body_text,
+                body_html=body_html,
+                is_form_entry=is_form,
+                is_lead_candidate=is_form,
+            )
+
+            if is_form and parsed:
+                lead, status = _create_or_update_lead_from_form(parsed, entry_no)
+                if entry_no and self.write:
+                    self.write(f"Form entry #{entry_no}: lead {status}")
+
+        thread.last_message_at = timezone.now()
+        thread.from_email = (from_email or "")[:255]
+        thread.from_name = (from_name or "")[:255]
+        thread.save(update_fields=["last_message_at", "from_email", "from_name"])
+        return True
+
+
+def inbox_config(label):
+    """IMAP settings for an enabled EmailInboxConfig row, in the shape sync_imap_mailbox expects."""
+    obj = EmailInboxConfig.objects.filter(label=label, is_enabled=True).first()
+    if not obj:
+        return None
     return {
-        "ok": True,
-        "mailbox": label,
-        "created": created,
-        "linked": linked,
-        "flagged": flagged,
-        "last_uid": max_uid_seen,
-    }
\ No newline at end of file
+        "label": label,
+        "imap_host": (obj.imap_host or "").strip(),
+        "imap_port": int(obj.imap_port or 993),
+        "username": (obj.username or "").strip(),
+        "password": (obj.password or "").strip(),
+        "use_ssl": bool(getattr(obj, "use_ssl", True)),
+    }
+
+
+def sync_inbox(config, *, limit=200, backfill=False, write=None):
+    store = InboxMessageStore(config["label"], (config.get("username") or "").strip(), backfill=backfill, write=write)
+    return sync_imap_mailbox(config, store, limit=limit, rescan=backfill)
+
+
+def sync_mailbox(mailbox_key: str) -> dict:
+    cfg = settings.EMAIL_SYNC.get(mailbox_key)
+    if not cfg:
+        return {"ok": False, "error": "Missing mailbox config"}
+    if not (cfg.get("imap_host") and cfg.get("username") and cfg.get("password")):
+        return {"ok": False, "error": "Missing host or user or password"}
+    return sync_inbox(cfg)
@@ -6,15 +6,15 @@ resolution, so keeping this dependency-free avoids a circular import while
 providing one reusable resolver for lists, dashboards, reports, and search.
 """
 
-from django.core.cache import cache
 from django.db.models import Q
 
 from crm.models import EmployeeProfile
-from crm.models_employee import EMPLOYEE_IDENTITY_CACHE_KEY
+from crm.models_employee import EMPLOYEE_IDENTITY_CACHE
+from crm.services.shared_cache import CacheNamespace
 
 
-IDENTITY_CACHE_KEY = EMPLOYEE_IDENTITY_CACHE_KEY
-IDENTITY_CACHE_SECONDS = 300
+# Display name per user, scoped so one profile edit only drops that user's entry.
+EMPLOYEE_DISPLAY_CACHE = CacheNamespace("employee-display", timeout=300)
 
 
 def normalize_employee_identity(value):
@@ -93,7 +93,7 @@ def build_employee_identity_index(profiles):
 
 def get_employee_identity_index(*, force_refresh=False):
     if not force_refresh:
-        cached = cache.get(IDENTITY_CACHE_KEY)
+        cached = EMPLOYEE_IDENTITY_CACHE.get("index")
         if cached is not None:
             return cached
     profiles = list(
@@ -109,12 +109,12 @@ def get_employee_identity_index(*, force_refresh=False):
         )
     )
     index = build_employee_identity_index(profiles)
-    cache.set(IDENTITY_CACHE_KEY, index, IDENTITY_CACHE_SECONDS)
+    EMPLOYEE_IDENTITY_CACHE.set("index", index)
     return index
 
 
 def clear_employee_identity_cache():
-    cache.delete(IDENTITY_CACHE_KEY)
+    EMPLOYEE_IDENTITY_CACHE.invalidate()
 
 
 def resolve_employee_identity(*, user_id=None, profile_id=None, assigned_user=None, owner_text="", index=None):
@@ -1,10 +1,9 @@
 from django.contrib.auth.models import Group
-from django.core.cache import cache
 from django.db import transaction
 from django.urls import reverse
 
 from crm.models import CRMAuditLog
-from crm.services.employee_identity import canonical_employee_name
+from crm.services.employee_identity import EMPLOYEE_DISPLAY_CACHE, canonical_employee_name
 from crm.services.operations_permissions import (
     ROLE_ADMIN,
     ROLE_CEO,
@@ -25,13 +24,12 @@ def employee_display_name(user):
         profile_full_name = cached_profile.full_name
     else:
         profile_full_name = ""
-        cache_key = f"crm-employee-display:{user.pk}"
-        display_name = cache.get(cache_key)
+        display_name = EMPLOYEE_DISPLAY_CACHE.get("name", scope=user.pk)
         if display_name is None:
             from crm.models import EmployeeProfile
 
             display_name = EmployeeProfile.objects.filter(user_id=user.pk).values_list("display_name", flat=True).first() or ""
-            cache.set(cache_key, display_name, 300)
+            EMPLOYEE_DISPLAY_CACHE.set("name", display_name, scope=user.pk)
     return canonical_employee_name(
         profile_display_name=display_name,
         profile_full_name=profile_full_name,
@@ -0,0 +1,282 @@
+"""
+Streaming CSV and XLSX exports.
+
+CSV responses are written a chunk of rows at a time while the rows are read
+from the database. XLSX files are built with openpyxl's write-only mode and
+spooled to a temporary file, so memory stays flat however many rows there
+are. Ranges above CRM_EXPORT_BACKGROUND_ROWS are written by a Celery job into
+EXPORT_DIR, and the user downloads the file from the job page. Finished jobs
+and their files are purged after CRM_EXPORT_RETENTION_DAYS.
+"""
+
+import csv
+import logging
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# run_export_job_task's hard time_limit: a job processing for longer than this
+# lost its worker and will never finish.
+EXPORT_JOB_TIME_LIMIT = timedelta(seconds=1800)
+
+# Job kind -> builder(params) returning (filename stem, sheet title, headers, rows).
+EXPORT_BUILDERS = {
+    "accounting_entries": "crm.views_accounting.accounting_entries_export",
+    "audit_log": "crm.views_operations.audit_log_export",
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_chunks(headers, rows, chunk_rows=500):
+    """Yield CSV text in blocks of ``chunk_rows`` rows."""
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(headers)] if headers else []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= chunk_rows:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def csv_response(filename, headers, rows) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(csv_chunks(headers, rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def queryset_rows(queryset, to_row, chunk_size=2000):
+    """Rows for ``queryset`` read in chunks instead of caching every instance."""
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield to_row(obj)
+
+
+def spool_xlsx(sheets, handle=None):
+    """
+    Write ``sheets`` (title, rows) to ``handle`` as a write-only workbook.
+
+    Without a handle the workbook goes to a temporary file, which is returned
+    rewound and is removed once closed.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    if handle is None:
+        handle = tempfile.TemporaryFile()
+    workbook.save(handle)
+    handle.seek(0)
+    return handle
+
+
+def xlsx_response(filename, sheets) -> FileResponse:
+    return xlsx_file_response(spool_xlsx(sheets), filename)
+
+
+def xlsx_file_response(handle, filename) -> FileResponse:
+    return FileResponse(handle, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(export_format, filename_stem, sheet_title, headers, rows):
+    if export_format == "xlsx":
+        return xlsx_response(f"{filename_stem}.xlsx", [(sheet_title, with_headers(headers, rows))])
+    return csv_response(f"{filename_stem}.csv", headers, rows)
+
+
+def with_headers(headers, rows):
+    yield headers
+    yield from rows
+
+
+def needs_background_export(queryset) -> bool:
+    threshold = int(getattr(settings, "CRM_EXPORT_BACKGROUND_ROWS", 20000) or 0)
+    return threshold > 0 and queryset.count() > threshold
+
+
+def export_dir() -> Path:
+    return Path(getattr(settings, "EXPORT_DIR", "") or Path(settings.BASE_DIR) / "exports")
+
+
+def _pending_export(kind, export_format, params, user):
+    """The user's queued or running job for the same export, if there is one."""
+    from crm.models import ExportJob
+
+    if not user or not user.is_authenticated:
+        return None
+    pending = ExportJob.objects.filter(
+        Q(status="queued") | Q(status="processing", started_at__gte=timezone.now() - EXPORT_JOB_TIME_LIMIT),
+        created_by=user,
+        kind=kind,
+        export_format=export_format,
+    ).order_by("-created_at")
+    return next((job for job in pending if job.params == params), None)
+
+
+def queue_export(kind, export_format, params, user=None):
+    """
+    Create an ExportJob and hand it to Celery once the row is committed.
+
+    A user asking again for an export that is still queued or running gets
+    that job back instead of a second copy.
+    """
+    from crm.models import ExportJob
+
+    job = _pending_export(kind, export_format, params, user)
+    if job is not None:
+        return job
+    job = ExportJob.objects.create(
+        kind=kind,
+        export_format=export_format,
+        params=params,
+        created_by=user if user and user.is_authenticated else None,
+    )
+    transaction.on_commit(lambda: _enqueue(job.pk))
+    return job
+
+
+def queue_export_redirect(request, kind, export_format):
+    """Queue ``kind`` with the request's filters and send the user to the job page."""
+    params = {key: value for key, value in request.GET.items() if key != "export"}
+    job = queue_export(kind, export_format, params, request.user)
+    messages.info(request, "This export is large, so it is being prepared in the background. Download it here when it is ready.")
+    return redirect("export_job_detail", pk=job.pk)
+
+
+def _enqueue(job_id):
+    from crm.models import ExportJob
+
+    try:
+        from crm.tasks import run_export_job_task
+
+        run_export_job_task.apply_async(args=[job_id], retry=False)
+    except Exception as exc:
+        logger.exception("Export job could not be queued", extra={"export_job": job_id})
+        ExportJob.objects.filter(pk=job_id, status="queued").update(
+            status="failed",
+            error_message=f"Queue unavailable: {exc}",
+            finished_at=timezone.now(),
+        )
+
+
+def _counted(rows, counter):
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def run_export_job(job_id):
+    """Write a queued export to EXPORT_DIR. Returns {"rows", "error"}."""
+    from crm.models import ExportJob
+
+    claimed = ExportJob.objects.filter(pk=job_id, status="queued").update(status="processing", started_at=timezone.now())
+    if not claimed:
+        return {"rows": 0, "error": "not_queued"}
+    job = ExportJob.objects.get(pk=job_id)
+    counter = [0]
+    tmp_name = ""
+    try:
+        builder = import_string(EXPORT_BUILDERS[job.kind])
+        filename_stem, sheet_title, headers, rows = builder(job.params or {})
+        rows = _counted(rows, counter)
+        extension = "xlsx" if job.export_format == "xlsx" else "csv"
+        folder = export_dir()
+        folder.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        if extension == "xlsx":
+            with os.fdopen(fd, "wb") as handle:
+                spool_xlsx([(sheet_title, with_headers(headers, rows))], handle)
+        else:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as handle:
+                for chunk in csv_chunks(headers, rows):
+                    handle.write(chunk)
+        path = folder / f"{job.pk}-{filename_stem}.{extension}"
+        os.replace(tmp_name, path)
+    except Exception as exc:
+        logger.exception("Export job failed", extra={"export_job": job_id})
+        if tmp_name:
+            Path(tmp_name).unlink(missing_ok=True)
+        ExportJob.objects.filter(pk=job_id).update(
+            status="failed",
+            row_count=counter[0],
+            error_message=str(exc),
+            finished_at=timezone.now(),
+        )
+        return {"rows": counter[0], "error": str(exc)}
+
+    ExportJob.objects.filter(pk=job_id).update(
+        status="done",
+        file_name=path.name,
+        row_count=counter[0],
+        finished_at=timezone.now(),
+    )
+    return {"rows": counter[0], "error": ""}
+
+
+def export_file_path(job):
+    if not job.file_name:
+        return None
+    path = export_dir() / job.file_name
+    return path if path.is_file() else None
+
+
+def purge_old_exports(now=None):
+    """
+    Delete finished export jobs older than CRM_EXPORT_RETENTION_DAYS with their
+    files, plus any file in EXPORT_DIR that old no job still points at, such as
+    temporary files left by a crashed worker. Jobs still processing past
+    EXPORT_JOB_TIME_LIMIT are failed first, finishing when the limit ran out,
+    so they age out like any other failed job. Returns
+    {"jobs", "files", "stale", "error"}.
+    """
+    from crm.models import ExportJob
+
+    now = now or timezone.now()
+    stale = ExportJob.objects.filter(status="processing", started_at__lt=now - EXPORT_JOB_TIME_LIMIT).update(
+        status="failed",
+        error_message="The export worker stopped before the file was written.",
+        finished_at=F("started_at") + EXPORT_JOB_TIME_LIMIT,
+    )
+    days = max(1, int(getattr(settings, "CRM_EXPORT_RETENTION_DAYS", 7)))
+    cutoff = now - timedelta(days=days)
+    expired = ExportJob.objects.filter(status__in=["done", "failed"], finished_at__lt=cutoff)
+    folder = export_dir()
+    files = 0
+    for file_name in expired.exclude(file_name="").values_list("file_name", flat=True):
+        path = folder / file_name
+        if path.is_file():
+            path.unlink(missing_ok=True)
+            files += 1
+    jobs = expired.delete()[0]
+
+    if folder.is_dir():
+        kept = set(ExportJob.objects.exclude(file_name="").values_list("file_name", flat=True))
+        for path in folder.iterdir():
+            try:
+                if path.is_file() and path.name not in kept and path.stat().st_mtime < cutoff.timestamp():
+                    path.unlink(missing_ok=True)
+                    files += 1
+            except OSError:
+                logger.warning("Old export file could not be removed", extra={"path": str(path)}, exc_info=True)
+    return {"jobs": jobs, "files": files, "stale": stale, "error": ""}
@@ -0,0 +1,40 @@
+IDENTITY_KEY_MAX_LENGTH = 255
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def website_key(value):
+    """``https://www.Brand.com/`` and ``brand.com`` share the key ``brand.com``."""
+    website = _text(value).lower()
+    if not website:
+        return ""
+    for prefix in ("https://", "http://"):
+        if website.startswith(prefix):
+            website = website[len(prefix) :]
+            break
+    if website.startswith("www."):
+        website = website[4:]
+    return website.rstrip("/")[:IDENTITY_KEY_MAX_LENGTH]
+
+
+def email_key(value):
+    return _text(value).lower()[:IDENTITY_KEY_MAX_LENGTH]
+
+
+def company_name_key(value):
+    return _text(value).lower()[:IDENTITY_KEY_MAX_LENGTH]
+
+
+def apply_identity_keys(instance, sources):
+    """Sync persisted ``*_key`` columns from ``{key_field: (source_field, normalizer)}``; return changed fields."""
+    changed = []
+    for key_field, (source_field, normalizer) in sources.items():
+        value = normalizer(getattr(instance, source_field, ""))
+        if getattr(instance, key_field) != value:
+            setattr(instance, key_field, value)
+            changed.append(key_field)
+    return changed
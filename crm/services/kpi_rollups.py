@@ -0,0 +1,409 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db import OperationalError, ProgrammingError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from crm.models import AccountingEntry, KpiRollup, KpiRollupDay, Lead, Opportunity
+from crm.services.costing_currency import (
+    CurrencyConversionError,
+    convert_currency,
+    normalize_finance_currency,
+)
+from crm.services.pipeline import active_lead_queryset, active_opportunity_queryset
+
+
+KPI_FAMILY_LEADS = "leads"
+KPI_FAMILY_OPPORTUNITIES = "opportunities"
+KPI_FAMILY_ACCOUNTING = "accounting"
+KPI_FAMILY_MARKETING = "marketing"
+KPI_FAMILIES = (KPI_FAMILY_LEADS, KPI_FAMILY_OPPORTUNITIES, KPI_FAMILY_ACCOUNTING, KPI_FAMILY_MARKETING)
+
+METRIC_ACTIVE_LEADS = "leads.active_created"
+METRIC_LEADS = "leads.created"
+METRIC_ACTIVE_OPPORTUNITIES = "opportunities.active_created"
+METRIC_OPPORTUNITIES = "opportunities.created"
+METRIC_ACCOUNTING_IN = "accounting.in"
+METRIC_ACCOUNTING_OUT = "accounting.out"
+
+# Accounting rows are kept per side and currency bucket so the CAD value can be
+# rebuilt with whatever CAD->BDT rate the reader is using.
+DIMENSION_CAD = "CAD"
+DIMENSION_BDT = "BDT"
+DIMENSION_BDT_STORED = "BDT@stored"
+
+MARKETING_SOURCES = (
+    (
+        "WebsiteTrafficDaily",
+        (
+            ("marketing.website_visitors", "visitors"),
+            ("marketing.website_sessions", "sessions"),
+            ("marketing.website_page_views", "page_views"),
+            ("marketing.website_conversions", "conversions"),
+        ),
+    ),
+    (
+        "SeoQueryDaily",
+        (
+            ("marketing.search_clicks", "clicks"),
+            ("marketing.search_impressions", "impressions"),
+        ),
+    ),
+    (
+        "AccountMetricDaily",
+        (
+            ("marketing.social_engagement", "engagement_total"),
+            ("marketing.social_reach", "reach"),
+            ("marketing.social_views", "views"),
+        ),
+    ),
+)
+
+KPI_ROLLUP_BATCH_SIZE = 500
+KPI_DIRTY_BATCH_DAYS = 400
+
+
+def _date_span(start, end):
+    if not start or not end or start > end:
+        return []
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def _date_q(field, dates):
+    """OR of ``__range`` lookups over the contiguous runs in ``dates``."""
+    ordered = sorted(set(dates))
+    query = Q()
+    run_start = previous = None
+    for day in ordered + [None]:
+        if run_start is not None and (day is None or day != previous + timedelta(days=1)):
+            query |= Q(**{f"{field}__range": (run_start, previous)})
+            run_start = None
+        if day is not None and run_start is None:
+            run_start = day
+        previous = day
+    return query
+
+
+def _clean_day_q():
+    return Q(dirty_at__isnull=True) | Q(dirty_at__lt=F("refreshed_at"))
+
+
+def _add(rows, day, side, metric, dimension, value):
+    if day is None or not value:
+        return
+    key = (day, side or "", metric, (dimension or "")[:120])
+    rows[key] = rows.get(key, Decimal("0")) + Decimal(value)
+
+
+def _compute_leads(dates):
+    rows = {}
+    date_filter = _date_q("created_date", dates)
+    for row in (
+        active_lead_queryset().filter(date_filter).values("created_date", "source").annotate(count=Count("id")).order_by()
+    ):
+        _add(rows, row["created_date"], "", METRIC_ACTIVE_LEADS, row["source"], row["count"])
+    for row in Lead.objects.filter(date_filter).values("created_date").annotate(count=Count("id")).order_by():
+        _add(rows, row["created_date"], "", METRIC_LEADS, "", row["count"])
+    return rows
+
+
+def _compute_opportunities(dates):
+    rows = {}
+    date_filter = _date_q("created_date", dates)
+    for row in active_opportunity_queryset().filter(date_filter).values("created_date").annotate(count=Count("id")).order_by():
+        _add(rows, row["created_date"], "", METRIC_ACTIVE_OPPORTUNITIES, "", row["count"])
+    for row in Opportunity.objects.filter(date_filter).values("created_date").annotate(count=Count("id")).order_by():
+        _add(rows, row["created_date"], "", METRIC_OPPORTUNITIES, "", row["count"])
+    return rows
+
+
+def kpi_accounting_queryset():
+    """Accounting entries counted as revenue/expense on the executive dashboards."""
+    return AccountingEntry.objects.exclude(main_type="TRANSFER").exclude(status__iexact="CANCELLED")
+
+
+def _stored_amount_cad(entry):
+    try:
+        return convert_currency(
+            entry.amount_original,
+            entry.currency,
+            "CAD",
+            stored_rate_to_cad=entry.rate_to_cad,
+        )
+    except CurrencyConversionError:
+        return Decimal("0")
+
+
+def _compute_accounting(dates):
+    rows = {}
+    entries = (
+        kpi_accounting_queryset()
+        .filter(_date_q("date", dates))
+        .order_by()
+        .only("date", "side", "direction", "currency", "amount_original", "rate_to_cad")
+    )
+    for entry in entries.iterator():
+        metric = {"IN": METRIC_ACCOUNTING_IN, "OUT": METRIC_ACCOUNTING_OUT}.get((entry.direction or "").upper().strip())
+        if not metric:
+            continue
+        if normalize_finance_currency(entry.currency) == "BDT":
+            _add(rows, entry.date, entry.side, metric, DIMENSION_BDT, entry.amount_original or 0)
+            _add(rows, entry.date, entry.side, metric, DIMENSION_BDT_STORED, _stored_amount_cad(entry))
+        else:
+            _add(rows, entry.date, entry.side, metric, DIMENSION_CAD, _stored_amount_cad(entry))
+    return rows
+
+
+def _optional_model(model_name):
+    try:
+        return apps.get_model("marketing", model_name)
+    except LookupError:
+        return None
+
+
+def _compute_marketing(dates):
+    rows = {}
+    for model_name, metrics in MARKETING_SOURCES:
+        model = _optional_model(model_name)
+        if model is None:
+            continue
+        sums = {f"value_{index}": Sum(field) for index, (_metric, field) in enumerate(metrics)}
+        try:
+            grouped = list(model.objects.filter(_date_q("date", dates)).values("date").annotate(**sums).order_by())
+        except (OperationalError, ProgrammingError):
+            continue
+        for row in grouped:
+            for index, (metric, _field) in enumerate(metrics):
+                _add(rows, row["date"], "", metric, "", row[f"value_{index}"])
+    return rows
+
+
+KPI_FAMILY_COMPUTERS = {
+    KPI_FAMILY_LEADS: _compute_leads,
+    KPI_FAMILY_OPPORTUNITIES: _compute_opportunities,
+    KPI_FAMILY_ACCOUNTING: _compute_accounting,
+    KPI_FAMILY_MARKETING: _compute_marketing,
+}
+
+
+def compute_kpi_rows(family, dates):
+    """Live KPI values for ``dates``: ``{(date, side, metric, dimension): Decimal}``."""
+    dates = [day for day in dates or [] if day]
+    if not dates:
+        return {}
+    return KPI_FAMILY_COMPUTERS[family](dates)
+
+
+def _refresh_family(family, dates):
+    # Taken before reading so a save that lands mid-refresh stays dirty.
+    started = timezone.now()
+    rows = compute_kpi_rows(family, dates)
+    with transaction.atomic():
+        KpiRollup.objects.filter(_date_q("date", dates), metric__startswith=f"{family}.").delete()
+        KpiRollup.objects.bulk_create(
+            [
+                KpiRollup(date=day, side=side, metric=metric, dimension=dimension, value=value)
+                for (day, side, metric, dimension), value in rows.items()
+            ],
+            batch_size=KPI_ROLLUP_BATCH_SIZE,
+        )
+        KpiRollupDay.objects.bulk_create(
+            [KpiRollupDay(family=family, date=day, refreshed_at=started) for day in sorted(set(dates))],
+            batch_size=KPI_ROLLUP_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["family", "date"],
+            update_fields=["refreshed_at"],
+        )
+    return len(rows)
+
+
+def refresh_kpi_rollups(start, end, families=None):
+    """Recompute rollups for ``start``..``end``; returns row counts per family."""
+    dates = _date_span(start, end)
+    refreshed = {}
+    try:
+        for family in families or KPI_FAMILIES:
+            refreshed[family] = _refresh_family(family, dates) if dates else 0
+        return {"refreshed": refreshed, "days": len(dates), "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"refreshed": refreshed, "days": len(dates), "error": str(exc)}
+
+
+def refresh_dirty_kpi_rollups(batch_days=KPI_DIRTY_BATCH_DAYS):
+    """Recompute days marked dirty since their last refresh."""
+    refreshed = {}
+    try:
+        dirty = list(
+            KpiRollupDay.objects.filter(dirty_at__isnull=False, dirty_at__gte=F("refreshed_at"))
+            .order_by("family", "date")
+            .values_list("family", "date")[:batch_days]
+        )
+        dates_by_family = defaultdict(list)
+        for family, day in dirty:
+            dates_by_family[family].append(day)
+        for family, dates in dates_by_family.items():
+            if family in KPI_FAMILY_COMPUTERS:
+                refreshed[family] = _refresh_family(family, dates)
+        return {"refreshed": refreshed, "days": len(dirty), "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"refreshed": refreshed, "days": 0, "error": str(exc)}
+
+
+def refresh_recent_kpi_rollups(days=None):
+    """Hourly pass: dirty days plus the trailing window that syncs and new records touch most."""
+    days = max(1, int(days or getattr(settings, "CRM_KPI_ROLLUP_RECENT_DAYS", 3)))
+    result = refresh_dirty_kpi_rollups()
+    today = timezone.localdate()
+    recent = refresh_kpi_rollups(today - timedelta(days=days - 1), today)
+    return {
+        "dirty": result["refreshed"],
+        "recent": recent["refreshed"],
+        "error": result["error"] or recent["error"],
+    }
+
+
+def mark_kpi_dirty(family, dates=(), date_queryset=None):
+    """Flag refreshed days so readers compute them live until the next refresh.
+
+    ``date_queryset`` is a one-column ``values()`` queryset of dates, used when
+    the day belongs to a related record. Days never refreshed are already
+    computed live, so nothing is inserted.
+    """
+    dates = {day for day in dates if day}
+    if not dates and date_queryset is None:
+        return 0
+    day_filter = Q(date__in=dates)
+    if date_queryset is not None:
+        day_filter |= Q(date__in=date_queryset)
+    try:
+        return KpiRollupDay.objects.filter(day_filter, family=family).update(dirty_at=timezone.now())
+    except (OperationalError, ProgrammingError):
+        return 0
+
+
+def schedule_kpi_dirty(family, dates=(), date_queryset=None):
+    """Mark days dirty once the saving transaction commits, so a concurrent refresh can't miss the change."""
+    dates = tuple(day for day in dates if day)
+    if dates or date_queryset is not None:
+        transaction.on_commit(lambda: mark_kpi_dirty(family, dates, date_queryset))
+
+
+def bdt_amount_cad(bdt_total, stored_cad_total, cad_to_bdt=None):
+    """CAD value of summed BDT amounts, following ``convert_currency`` rate rules."""
+    rate = Decimal(str(cad_to_bdt or 0))
+    if rate > 1:
+        return convert_currency(bdt_total, "BDT", "CAD", bdt_per_cad=rate)
+    if rate <= 0:
+        return stored_cad_total
+    return Decimal("0")
+
+
+def _cad_from_dimensions(totals, cad_to_bdt):
+    return totals.get(DIMENSION_CAD, Decimal("0")) + bdt_amount_cad(
+        totals.get(DIMENSION_BDT, Decimal("0")),
+        totals.get(DIMENSION_BDT_STORED, Decimal("0")),
+        cad_to_bdt,
+    )
+
+
+def _clean_dates(family, start, end):
+    try:
+        return set(
+            KpiRollupDay.objects.filter(_clean_day_q(), family=family, date__range=(start, end)).values_list(
+                "date", flat=True
+            )
+        )
+    except (OperationalError, ProgrammingError):
+        return set()
+
+
+class KpiSnapshot:
+    """KPI values for a date window, read from rollups.
+
+    Days that were never refreshed, or were saved to since, are computed live,
+    so results always match the source tables.
+    """
+
+    def __init__(self, families, start, end):
+        self.start = start
+        self.end = end
+        self.rows = defaultdict(list)
+        for family in families:
+            self._load(family)
+
+    def _load(self, family):
+        clean = _clean_dates(family, self.start, self.end)
+        if clean:
+            stored = KpiRollup.objects.filter(
+                metric__startswith=f"{family}.", date__range=(self.start, self.end)
+            ).values_list("date", "side", "metric", "dimension", "value")
+            for day, side, metric, dimension, value in stored:
+                if day in clean:
+                    self.rows[metric].append((day, side, dimension, value))
+        live = [day for day in _date_span(self.start, self.end) if day not in clean]
+        for (day, side, metric, dimension), value in compute_kpi_rows(family, live).items():
+            self.rows[metric].append((day, side, dimension, value))
+
+    def _select(self, metric, start=None, end=None, side=""):
+        for day, row_side, dimension, value in self.rows.get(metric, []):
+            if (start and day < start) or (end and day > end) or (side and row_side != side):
+                continue
+            yield day, dimension, value
+
+    def total(self, metric, start=None, end=None, side=""):
+        return sum((value for _day, _dimension, value in self._select(metric, start, end, side)), Decimal("0"))
+
+    def count(self, metric, start=None, end=None, side=""):
+        return int(self.total(metric, start, end, side))
+
+    def by_dimension(self, metric, start=None, end=None, side=""):
+        totals = defaultdict(lambda: Decimal("0"))
+        for _day, dimension, value in self._select(metric, start, end, side):
+            totals[dimension] += value
+        return dict(totals)
+
+    def by_month(self, metric, start=None, end=None, side=""):
+        totals = defaultdict(lambda: Decimal("0"))
+        for day, _dimension, value in self._select(metric, start, end, side):
+            totals[day.replace(day=1)] += value
+        return dict(totals)
+
+    def amount_cad(self, metric, start=None, end=None, side="", cad_to_bdt=None):
+        return _cad_from_dimensions(self.by_dimension(metric, start, end, side), cad_to_bdt)
+
+    def amount_cad_by_month(self, metric, start=None, end=None, side="", cad_to_bdt=None):
+        months = defaultdict(lambda: defaultdict(lambda: Decimal("0")))
+        for day, dimension, value in self._select(metric, start, end, side):
+            months[day.replace(day=1)][dimension] += value
+        return {month: _cad_from_dimensions(totals, cad_to_bdt) for month, totals in months.items()}
+
+
+def accounting_balance_cad(end, side="", cad_to_bdt=None):
+    """
+    Accounting inflow less outflow up to ``end`` in CAD.
+
+    Summed from the monthly ledger period balances, so only the edge month and
+    months not yet refreshed are read from entries however long the ledger is.
+    """
+    from crm.services.ledger_balances import period_buckets
+
+    totals = {
+        METRIC_ACCOUNTING_IN: defaultdict(lambda: Decimal("0")),
+        METRIC_ACCOUNTING_OUT: defaultdict(lambda: Decimal("0")),
+    }
+    for bucket in period_buckets(None, end, side=side, exclude_transfer=True):
+        metric = {"IN": METRIC_ACCOUNTING_IN, "OUT": METRIC_ACCOUNTING_OUT}.get(bucket["direction"].upper().strip())
+        if not metric:
+            continue
+        if normalize_finance_currency(bucket["currency"]) == "BDT":
+            totals[metric][DIMENSION_BDT] += bucket["amount_original"]
+            totals[metric][DIMENSION_BDT_STORED] += bucket["amount_cad"]
+        else:
+            totals[metric][DIMENSION_CAD] += bucket["amount_cad"]
+    return _cad_from_dimensions(totals[METRIC_ACCOUNTING_IN], cad_to_bdt) - _cad_from_dimensions(
+        totals[METRIC_ACCOUNTING_OUT], cad_to_bdt
+    )
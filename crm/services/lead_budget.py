@@ -0,0 +1,98 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+
+BUDGET_CURRENCY_MARKERS = (
+    ("BDT", ("bdt", "tk", "taka", "৳")),
+    ("CAD", ("cad", "c$", "ca$")),
+    ("EUR", ("eur", "€")),
+    ("GBP", ("gbp", "£")),
+    ("USD", ("usd", "us$", "$")),
+)
+
+# A budget is free text typed by sales ("$5k-10k", "USD 2,500", "15000 tk").
+# Numbers may carry a k/m suffix; the first and last amounts become the range.
+_BUDGET_AMOUNT_RE = re.compile(r"(-?\d+(?:\.\d+)?)(?:\s*([km])(?![a-z]))?", re.IGNORECASE)
+_BUDGET_MULTIPLIERS = {"k": Decimal("1000"), "m": Decimal("1000000")}
+_BUDGET_MAX_DIGITS = Decimal("10000000000000")
+
+
+def _budget_currency(text):
+    lowered = text.lower()
+    for code, markers in BUDGET_CURRENCY_MARKERS:
+        for marker in markers:
+            if marker.isalpha():
+                if re.search(rf"(?<![a-z]){re.escape(marker)}(?![a-z])", lowered):
+                    return code
+            elif marker in lowered:
+                return code
+    return ""
+
+
+def _budget_amounts(text):
+    cleaned = text.replace(",", "")
+    amounts = []
+    for match in _BUDGET_AMOUNT_RE.finditer(cleaned):
+        number, suffix = match.groups()
+        # "5000-10000" is a range, not a negative second amount.
+        if number.startswith("-") and amounts:
+            number = number[1:]
+        try:
+            amount = Decimal(number)
+        except InvalidOperation:
+            continue
+        if suffix:
+            amount *= _BUDGET_MULTIPLIERS[suffix.lower()]
+        if abs(amount) >= _BUDGET_MAX_DIGITS:
+            continue
+        amounts.append(amount.quantize(Decimal("0.01")))
+    return amounts
+
+
+def parse_budget_amount(raw_value):
+    """First amount in ``raw_value`` read the same way as budget text ("5k" is 5000)."""
+    amounts = _budget_amounts(str(raw_value or "").strip())
+    return amounts[0] if amounts else None
+
+
+def parse_budget_range(raw_value):
+    """Return ``(budget_min, budget_max, currency)`` parsed from budget text."""
+    if raw_value is None:
+        return None, None, ""
+    text = str(raw_value).strip()
+    if not text:
+        return None, None, ""
+    amounts = _budget_amounts(text)
+    if not amounts:
+        return None, None, _budget_currency(text)
+    budget_min = min(amounts[0], amounts[-1])
+    budget_max = max(amounts[0], amounts[-1])
+    return budget_min, budget_max, _budget_currency(text)
+
+
+def apply_lead_budget_fields(lead):
+    """Sync the normalized budget columns from ``lead.budget``; return changed field names."""
+    budget_min, budget_max, currency = parse_budget_range(getattr(lead, "budget", ""))
+    changed = []
+    if lead.budget_min != budget_min:
+        lead.budget_min = budget_min
+        changed.append("budget_min")
+    if lead.budget_max != budget_max:
+        lead.budget_max = budget_max
+        changed.append("budget_max")
+    if (lead.budget_currency or "") != currency:
+        lead.budget_currency = currency
+        changed.append("budget_currency")
+    return changed
+
+
+def lead_budget_range_q(value_min=None, value_max=None):
+    """Leads whose parsed budget range overlaps ``[value_min, value_max]``."""
+    condition = Q(budget_min__isnull=False)
+    if value_min is not None:
+        condition &= Q(budget_max__gte=value_min)
+    if value_max is not None:
+        condition &= Q(budget_min__lte=value_max)
+    return condition
@@ -0,0 +1,383 @@
+"""
+Monthly ledger balances behind the accounting dashboards.
+
+AccountingPeriodBalance holds non-cancelled accounting entries summed per
+month, side, direction, main type, sub type, currency and customer, in the
+original currency and in CAD and BDT at each entry's stored rates.
+AccountingPeriodState tracks every month and side: saving or deleting an
+entry marks its month dirty in the same transaction and refreshes it once
+the transaction commits, and readers sum entries live for months that are
+not clean. Writes that skip signals (bulk_create, queryset update) are
+picked up by the nightly rebuild. Closing a month rebuilds and freezes it;
+a frozen month keeps its balances until it is reopened.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import OperationalError, ProgrammingError, transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+
+from crm.models import (
+    AccountingEntry,
+    AccountingMonthClose,
+    AccountingMonthLock,
+    AccountingPeriodBalance,
+    AccountingPeriodState,
+)
+from crm.services.costing_currency import CurrencyConversionError, convert_currency, normalize_finance_currency
+from crm.services.kpi_rollups import bdt_amount_cad
+
+
+LEDGER_BALANCE_BATCH_SIZE = 500
+LEDGER_SIDES = ("CA", "BD")
+
+_pending = threading.local()
+
+
+def ledger_entries():
+    """Entries the period balances cover."""
+    return AccountingEntry.objects.exclude(status__iexact="CANCELLED")
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(month):
+    return date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+
+
+def _month_runs(months):
+    """``(first, end)`` pairs, ``end`` exclusive, over the contiguous runs in ``months``."""
+    runs = []
+    for month in sorted(set(months)):
+        if runs and runs[-1][1] == month:
+            runs[-1][1] = next_month(month)
+        else:
+            runs.append([month, next_month(month)])
+    return runs
+
+
+def _entry_q(periods):
+    by_side = defaultdict(list)
+    for month, side in periods:
+        by_side[side].append(month)
+    query = Q(pk__in=[])
+    for side, months in by_side.items():
+        for first, end in _month_runs(months):
+            query |= Q(side=side, date__gte=first, date__lt=end)
+    return query
+
+
+def _period_q(periods, prefix=""):
+    by_side = defaultdict(set)
+    for month, side in periods:
+        by_side[side].add(month)
+    query = Q(pk__in=[])
+    for side, months in by_side.items():
+        query |= Q(**{f"{prefix}side": side, f"{prefix}month__in": sorted(months)})
+    return query
+
+
+def _stored_amount(amount, currency, target, rate_to_cad, rate_to_bdt):
+    try:
+        return convert_currency(
+            amount or Decimal("0"),
+            currency,
+            target,
+            stored_rate_to_cad=rate_to_cad,
+            stored_rate_to_bdt=rate_to_bdt,
+        )
+    except CurrencyConversionError:
+        return Decimal("0")
+
+
+def sum_entries(entries):
+    """Sum an entry queryset into ``{bucket key: [count, original, cad, bdt]}``."""
+    totals = {}
+    rows = entries.order_by().values_list(
+        "date",
+        "side",
+        "direction",
+        "main_type",
+        "sub_type",
+        "currency",
+        "customer_id",
+        "production_order__customer_id",
+        "amount_original",
+        "rate_to_cad",
+        "rate_to_bdt",
+    )
+    for day, side, direction, main_type, sub_type, currency, customer_id, order_customer_id, amount, rate_to_cad, rate_to_bdt in rows.iterator():
+        key = (
+            month_start(day),
+            side or "",
+            direction or "",
+            main_type or "",
+            sub_type or "",
+            currency or "",
+            customer_id or order_customer_id,
+        )
+        bucket = totals.setdefault(key, [0, Decimal("0"), Decimal("0"), Decimal("0")])
+        bucket[0] += 1
+        bucket[1] += amount or Decimal("0")
+        bucket[2] += _stored_amount(amount, currency, "CAD", rate_to_cad, rate_to_bdt)
+        bucket[3] += _stored_amount(amount, currency, "BDT", rate_to_cad, rate_to_bdt)
+    return totals
+
+
+def _frozen_periods(periods):
+    if not periods:
+        return set()
+    return set(
+        AccountingPeriodState.objects.filter(_period_q(periods), frozen_at__isnull=False).values_list("month", "side")
+    )
+
+
+def refresh_periods(periods, force=False):
+    """Recompute balances for ``(month, side)`` pairs; frozen ones are skipped unless ``force``."""
+    periods = {(month_start(month), side or "") for month, side in periods if month}
+    if not force:
+        periods -= _frozen_periods(periods)
+    if not periods:
+        return 0
+    # Taken before reading so a save that lands mid-refresh stays dirty.
+    started = timezone.now()
+    totals = sum_entries(ledger_entries().filter(_entry_q(periods)))
+    with transaction.atomic():
+        AccountingPeriodBalance.objects.filter(_period_q(periods)).delete()
+        AccountingPeriodBalance.objects.bulk_create(
+            [
+                AccountingPeriodBalance(
+                    month=month,
+                    side=side,
+                    direction=direction,
+                    main_type=main_type,
+                    sub_type=sub_type,
+                    currency=currency,
+                    customer_id=customer_id,
+                    entry_count=count,
+                    amount_original=original,
+                    amount_cad=cad,
+                    amount_bdt=bdt,
+                )
+                for (month, side, direction, main_type, sub_type, currency, customer_id), (count, original, cad, bdt) in totals.items()
+            ],
+            batch_size=LEDGER_BALANCE_BATCH_SIZE,
+        )
+        AccountingPeriodState.objects.bulk_create(
+            [AccountingPeriodState(month=month, side=side, refreshed_at=started) for month, side in sorted(periods)],
+            batch_size=LEDGER_BALANCE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["month", "side"],
+            update_fields=["refreshed_at"],
+        )
+    return len(totals)
+
+
+def _all_periods():
+    span = ledger_entries().aggregate(first=Min("date"), last=Max("date"))
+    through = month_start(max(filter(None, [span["last"], timezone.localdate()])))
+    months = []
+    month = month_start(span["first"]) if span["first"] else through
+    while month <= through:
+        months.append(month)
+        month = next_month(month)
+    sides = set(LEDGER_SIDES) | set(ledger_entries().order_by().values_list("side", flat=True).distinct())
+    return {(month, side or "") for month in months for side in sides}
+
+
+def rebuild_period_balances(force=False):
+    """Recompute every month from the first entry on; frozen months only with ``force``."""
+    periods = _all_periods()
+    try:
+        return {"balances": refresh_periods(periods, force=force), "periods": len(periods), "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"balances": 0, "periods": len(periods), "error": str(exc)}
+
+
+def refresh_dirty_periods():
+    """Recompute months marked dirty since their last refresh."""
+    try:
+        dirty = set(
+            AccountingPeriodState.objects.filter(
+                dirty_at__isnull=False, dirty_at__gte=F("refreshed_at"), frozen_at__isnull=True
+            ).values_list("month", "side")
+        )
+        return {"balances": refresh_periods(dirty), "periods": len(dirty), "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"balances": 0, "periods": 0, "error": str(exc)}
+
+
+def mark_periods_dirty(periods):
+    """Flag refreshed, unfrozen months so readers sum their entries live until the next refresh."""
+    periods = {(month_start(month), side or "") for month, side in periods if month}
+    if not periods:
+        return 0
+    try:
+        return AccountingPeriodState.objects.filter(_period_q(periods), frozen_at__isnull=True).update(
+            dirty_at=timezone.now()
+        )
+    except (OperationalError, ProgrammingError):
+        return 0
+
+
+def _refresh_pending():
+    periods = getattr(_pending, "periods", None) or set()
+    _pending.periods = set()
+    if periods:
+        try:
+            refresh_periods(periods)
+        except (OperationalError, ProgrammingError):
+            pass
+
+
+def schedule_period_refresh(periods):
+    """Mark months dirty now and refresh them once the saving transaction commits.
+
+    Saves in one transaction share a single refresh; a rolled-back
+    transaction's months are refreshed with the next commit, which is harmless.
+    """
+    periods = {(month_start(month), side or "") for month, side in periods if month}
+    if not periods:
+        return
+    mark_periods_dirty(periods)
+    if not hasattr(_pending, "periods"):
+        _pending.periods = set()
+    _pending.periods |= periods
+    transaction.on_commit(_refresh_pending, robust=True)
+
+
+def _closed_sides(month):
+    """Sides closed for ``month``; ``None`` means every side."""
+    if AccountingMonthLock.objects.filter(year=month.year, month=month.month, is_closed=True).exists():
+        return None
+    sides = set(
+        AccountingMonthClose.objects.filter(year=month.year, month=month.month, is_closed=True).values_list(
+            "side", flat=True
+        )
+    )
+    return None if "ALL" in sides else sides
+
+
+def sync_month_freeze(year, month):
+    """Freeze the sides of a month that are closed and release the ones that were reopened."""
+    first = date(year, month, 1)
+    end = next_month(first)
+    sides = (
+        set(LEDGER_SIDES)
+        | set(AccountingPeriodState.objects.filter(month=first).values_list("side", flat=True))
+        | set(ledger_entries().filter(date__gte=first, date__lt=end).order_by().values_list("side", flat=True).distinct())
+    )
+    closed = _closed_sides(first)
+    closed = sides if closed is None else closed & sides
+    frozen = {side for _month, side in _frozen_periods({(first, side) for side in sides})}
+
+    to_freeze = {(first, side) for side in closed - frozen}
+    to_release = {(first, side) for side in frozen - closed}
+    with transaction.atomic():
+        if to_freeze:
+            # Rebuild first so the frozen figures are exactly what the month closed with.
+            refresh_periods(to_freeze, force=True)
+            AccountingPeriodState.objects.filter(_period_q(to_freeze)).update(frozen_at=timezone.now(), dirty_at=None)
+        if to_release:
+            AccountingPeriodState.objects.filter(_period_q(to_release)).update(frozen_at=None)
+            refresh_periods(to_release)
+    return {"frozen": len(to_freeze), "released": len(to_release)}
+
+
+def _usable_state_q():
+    return Q(frozen_at__isnull=False) | Q(dirty_at__isnull=True) | Q(dirty_at__lt=F("refreshed_at"))
+
+
+def period_buckets(start=None, end=None, *, side="", currency="", exclude_transfer=False):
+    """Ledger buckets for entries dated ``start``..``end``; either bound may be ``None``.
+
+    Whole months that are clean or frozen come from the balance table; partial
+    edge months and months not yet refreshed are summed from entries.
+    Returns dicts with the bucket key fields and ``entry_count``,
+    ``amount_original``, ``amount_cad`` and ``amount_bdt``.
+    """
+    entries = ledger_entries()
+    balances = AccountingPeriodBalance.objects.all()
+    states = AccountingPeriodState.objects.filter(_usable_state_q())
+    if side:
+        entries = entries.filter(side=side)
+        balances = balances.filter(side=side)
+        states = states.filter(side=side)
+    if currency:
+        entries = entries.filter(currency=currency)
+        balances = balances.filter(currency=currency)
+    if exclude_transfer:
+        entries = entries.exclude(main_type="TRANSFER")
+        balances = balances.exclude(main_type="TRANSFER")
+    if start:
+        entries = entries.filter(date__gte=start)
+        states = states.filter(month__gte=start if start.day == 1 else next_month(start))
+    if end:
+        entries = entries.filter(date__lte=end)
+        following = end + timedelta(days=1)
+        states = states.filter(month__lt=following if following.day == 1 else month_start(end))
+
+    buckets = {}
+    try:
+        usable = set(states.values_list("month", "side"))
+    except (OperationalError, ProgrammingError):
+        usable = set()
+    if usable:
+        stored = balances.filter(_period_q(usable))
+        for row in stored.values_list(
+            "month",
+            "side",
+            "direction",
+            "main_type",
+            "sub_type",
+            "currency",
+            "customer_id",
+            "entry_count",
+            "amount_original",
+            "amount_cad",
+            "amount_bdt",
+        ):
+            _merge(buckets, row[:7], row[7:])
+        entries = entries.exclude(_entry_q(usable))
+    for key, values in sum_entries(entries).items():
+        _merge(buckets, key, values)
+    return [
+        {
+            "month": month,
+            "side": bucket_side,
+            "direction": direction,
+            "main_type": main_type,
+            "sub_type": sub_type,
+            "currency": bucket_currency,
+            "customer_id": customer_id,
+            "entry_count": count,
+            "amount_original": original,
+            "amount_cad": cad,
+            "amount_bdt": bdt,
+        }
+        for (month, bucket_side, direction, main_type, sub_type, bucket_currency, customer_id), (count, original, cad, bdt) in sorted(
+            buckets.items(), key=lambda item: tuple("" if part is None else str(part) for part in item[0])
+        )
+    ]
+
+
+def _merge(buckets, key, values):
+    current = buckets.get(key)
+    if current is None:
+        buckets[key] = list(values)
+        return
+    for index, value in enumerate(values):
+        current[index] += value or 0
+
+
+def bucket_amount_cad(bucket, cad_to_bdt=None):
+    """CAD value of a bucket; BDT is converted at ``cad_to_bdt`` like the per-entry dashboards do."""
+    if normalize_finance_currency(bucket["currency"]) == "BDT":
+        return bdt_amount_cad(bucket["amount_original"], bucket["amount_cad"], cad_to_bdt)
+    return bucket["amount_cad"]
@@ -26,9 +26,12 @@ from crm.services.operations_permissions import (
     scope_sales_leads,
     scope_sales_opportunities,
 )
+from crm.services.shared_cache import CacheNamespace
 
 
 logger = logging.getLogger(__name__)
+# Header bell payload, one scope per user.
+HEADER_CACHE = CacheNamespace("header-unread", timeout=60)
 PERIODIC_SOURCE_PREFIXES = (
     "operations:sample_due:",
     "operations:production_overdue:",
@@ -122,7 +125,7 @@ def _combined_recipient_rows(*, users=(), roles=(), exclude_user=None):
 def _clear_header_cache(user_ids):
     for user_id in set(user_ids):
         if user_id:
-            cache.delete(f"crm-header-unread:{user_id}")
+            HEADER_CACHE.invalidate(scope=user_id)
 
 
 def create_operations_notification(
@@ -1,11 +1,12 @@
 from decimal import Decimal
 
-from django.db.models import Exists, OuterRef, Q
+from django.db.models import Exists, OuterRef, Q, prefetch_related_objects
 from django.urls import reverse
 
 from crm.models import CostingHeader, Customer, EmployeeProfile, Invoice, Lead, Opportunity, ProductionOrder
 from crm.services.costing_currency import format_finance_money
 from crm.services.employee_identity import employee_profile_ids_matching
+from crm.services.search_index import order_by_search_rank, search_index_q
 from crm.services.operations_permissions import (
     ROLE_CEO,
     ROLE_ADMIN,
@@ -50,13 +51,11 @@ def search_operations_records(user, query, *, limit=10, include_opportunities=Tr
     groups = []
 
     if can_access_operations_module(user, "customers"):
-        rows = Customer.objects.filter(is_archived=False).filter(
-            Q(customer_code__icontains=query)
-            | Q(account_brand__icontains=query)
-            | Q(contact_name__icontains=query)
-            | Q(email__icontains=query)
-            | Q(phone__icontains=query)
-        ).order_by("account_brand", "id")[:limit]
+        rows = order_by_search_rank(
+            Customer.objects.filter(search_index_q(Customer, query), is_archived=False),
+            query,
+            limit,
+        )
         groups.append(("Customers", [
             {
                 "type": "Customer",
@@ -71,18 +70,16 @@ def search_operations_records(user, query, *, limit=10, include_opportunities=Tr
         ]))
 
     if can_access_operations_module(user, "leads"):
-        rows = scope_sales_leads(
-            Lead.objects.annotate(
-                search_has_opportunity=Exists(Opportunity.objects.filter(lead_id=OuterRef("pk")))
-            ).filter(
-                Q(lead_id__icontains=query)
-                | Q(account_brand__icontains=query)
-                | Q(contact_name__icontains=query)
-                | Q(email__icontains=query)
-                | Q(phone__icontains=query)
+        rows = order_by_search_rank(
+            scope_sales_leads(
+                Lead.objects.annotate(
+                    search_has_opportunity=Exists(Opportunity.objects.filter(lead_id=OuterRef("pk")))
+                ).filter(search_index_q(Lead, query)),
+                user,
             ),
-            user,
-        ).order_by("-created_date", "-id")[:limit]
+            query,
+            limit,
+        )
         groups.append(("Leads", [
             {
                 "type": "Lead",
@@ -103,19 +100,16 @@ def search_operations_records(user, query, *, limit=10, include_opportunities=Tr
         ]))
 
     if include_opportunities and can_access_operations_module(user, "opportunities"):
-        rows = scope_sales_opportunities(
-            Opportunity.objects.select_related("lead", "customer")
-            .annotate(search_has_production=Exists(ProductionOrder.objects.filter(opportunity_id=OuterRef("pk"))))
-            .filter(
-                Q(opportunity_id__icontains=query)
-                | Q(lead__lead_id__icontains=query)
-                | Q(lead__account_brand__icontains=query)
-                | Q(lead__email__icontains=query)
-                | Q(lead__phone__icontains=query)
-                | Q(customer__account_brand__icontains=query)
+        rows = order_by_search_rank(
+            scope_sales_opportunities(
+                Opportunity.objects.select_related("lead", "customer")
+                .annotate(search_has_production=Exists(ProductionOrder.objects.filter(opportunity_id=OuterRef("pk"))))
+                .filter(search_index_q(Opportunity, query)),
+                user,
             ),
-            user,
-        ).order_by("-updated_at", "-id")[:limit]
+            query,
+            limit,
+        )
         groups.append(("Opportunities", [
             {
                 "type": "Opportunity",
@@ -168,14 +162,17 @@ def search_operations_records(user, query, *, limit=10, include_opportunities=Tr
         ]))
 
     if can_access_operations_module(user, "production"):
-        rows = ProductionOrder.objects.select_related("customer").prefetch_related("stages", "shipments").filter(
-            ProductionOrder.identifier_search_query(query)
-            | Q(title__icontains=query)
-            | Q(client_name_snapshot__icontains=query)
-            | Q(brand_name_snapshot__icontains=query)
-            | Q(product_name_snapshot__icontains=query)
-            | Q(customer__account_brand__icontains=query)
-        ).order_by("-updated_at", "-id")[:limit]
+        production_match = search_index_q(ProductionOrder, query)
+        if query.upper().startswith("PO-"):
+            # "PO-260101-5" style numbers are matched against order_code + pk, not the stored text.
+            production_match |= ProductionOrder.identifier_search_query(query)
+        rows = order_by_search_rank(
+            ProductionOrder.objects.select_related("customer").filter(production_match),
+            query,
+            limit,
+        )
+        rows = list(rows)
+        prefetch_related_objects(rows, "stages", "shipments")
         groups.append(("Production", [
             {
                 "type": "Production Order",
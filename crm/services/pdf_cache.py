@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+_IMAGE_READERS = OrderedDict()
+
+
+def pdf_fingerprint(*parts) -> str:
+    """Stable hash of the values a PDF is drawn from; any change gives a new cache entry."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def pdf_cache_dir() -> Path:
+    return Path(getattr(settings, "PDF_CACHE_DIR", "") or Path(settings.BASE_DIR) / "pdf_cache")
+
+
+def _cache_path(kind: str, object_id, fingerprint: str) -> Path:
+    return pdf_cache_dir() / kind / f"{object_id}-{fingerprint}.pdf"
+
+
+def cached_pdf(kind: str, object_id, fingerprint: str, render) -> bytes:
+    """
+    Return the PDF for ``fingerprint`` from disk, calling ``render()`` only on a miss.
+
+    A fresh render replaces older files for the same record, so the cache
+    holds one PDF per record and kind.
+    """
+    path = _cache_path(kind, object_id, fingerprint)
+    try:
+        return path.read_bytes()
+    except OSError:
+        pass
+
+    data = render()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for stale in path.parent.glob(f"{object_id}-*.pdf"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+    except OSError:
+        logger.warning("PDF cache write failed", extra={"kind": kind, "object_id": object_id}, exc_info=True)
+    return data
+
+
+def image_reader(path):
+    """
+    ReportLab ImageReader for ``path``, decoded once per process.
+
+    Keyed on the file's modification time so a replaced logo or product
+    image is picked up without a restart. At most PDF_IMAGE_READER_CACHE_SIZE
+    readers are kept, least recently used first out. Returns None when
+    unreadable.
+    """
+    if not path:
+        return None
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _IMAGE_READERS.get(path)
+    if cached and cached[0] == mtime:
+        _IMAGE_READERS.move_to_end(path)
+        return cached[1]
+    try:
+        from reportlab.lib.utils import ImageReader
+
+        reader = ImageReader(path)
+    except Exception:
+        return None
+    _IMAGE_READERS[path] = (mtime, reader)
+    _IMAGE_READERS.move_to_end(path)
+    limit = max(int(getattr(settings, "PDF_IMAGE_READER_CACHE_SIZE", 64)), 0)
+    while len(_IMAGE_READERS) > limit:
+        _IMAGE_READERS.popitem(last=False)
+    return reader
+
+
+def file_stamp(path) -> str:
+    """Path plus modification time, for fingerprints of PDFs that embed the file."""
+    if not path:
+        return ""
+    try:
+        return f"{path}:{os.path.getmtime(path)}"
+    except OSError:
+        return ""
+
+
+def pdf_response(data: bytes, filename: str) -> HttpResponse:
+    response = HttpResponse(data, content_type="application/pdf")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
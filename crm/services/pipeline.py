@@ -1,11 +1,12 @@
 from collections import defaultdict
 from decimal import Decimal
+from types import SimpleNamespace
 
 from django.db import models
-from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Sum, When
 from django.db.models.functions import Coalesce
 
-from crm.models import CostingHeader, Opportunity, QuickCosting
+from crm.models import CostingHeader, Lead, Opportunity, ProductionOrder, QuickCosting
 from crm.services.costing_currency import currency_summary_rows
 
 
@@ -19,6 +20,8 @@ PIPELINE_QUICK_COSTING_STATUSES = (
     QuickCosting.STATUS_SHIPPED,
     QuickCosting.STATUS_CLOSED,
 )
+LEAD_LOST_OUTBOUND_STATUSES = {"Bad Fit", "Archived"}
+LEAD_CONVERTED_OUTBOUND_STATUSES = {"Converted to Opportunity"}
 
 
 def open_pipeline_queryset(queryset=None):
@@ -30,6 +33,46 @@ def open_pipeline_queryset(queryset=None):
     )
 
 
+def opportunity_has_production_subquery():
+    return ProductionOrder.objects.filter(opportunity_id=OuterRef("pk"), is_archived=False)
+
+
+def with_opportunity_production_flag(qs, annotation_name="list_has_production"):
+    return qs.annotate(**{annotation_name: Exists(opportunity_has_production_subquery())})
+
+
+def active_opportunity_list_queryset(qs, production_flag="list_has_production"):
+    if production_flag not in getattr(qs, "query", SimpleNamespace(annotations={})).annotations:
+        qs = with_opportunity_production_flag(qs, production_flag)
+    return (
+        open_pipeline_queryset(qs)
+        .filter(**{production_flag: False})
+        .exclude(stage="Production")
+    )
+
+
+def active_opportunity_queryset():
+    """Open pipeline opportunities that have not moved into production (dashboard KPI scope)."""
+    return active_opportunity_list_queryset(Opportunity.objects.all())
+
+
+def active_lead_queryset():
+    """Leads still being worked: not archived, converted, lost, or attached to an opportunity."""
+    return (
+        Lead.objects.filter(is_archived=False)
+        .annotate(
+            visibility_has_opportunity=Exists(
+                Opportunity.objects.filter(lead_id=OuterRef("pk"))
+            )
+        )
+        .exclude(
+            Q(lead_status__in=["Converted", "Lost", "Unqualified"])
+            | Q(outbound_status__in=LEAD_LOST_OUTBOUND_STATUSES | LEAD_CONVERTED_OUTBOUND_STATUSES)
+            | Q(visibility_has_opportunity=True)
+        )
+    )
+
+
 def with_pipeline_value(queryset, annotation_name="pipeline_value"):
     """Annotate opportunities with the one display value used by pipeline surfaces."""
     revenue_expression = models.ExpressionWrapper(
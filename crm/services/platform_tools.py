@@ -1,8 +1,6 @@
 from dataclasses import dataclass
-from time import perf_counter
 
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
 from django.db import transaction
 from django.db.models import F
 from django.urls import NoReverseMatch, reverse
@@ -31,6 +29,7 @@ from crm.services.operations_permissions import (
     scope_sales_leads,
     scope_sales_opportunities,
 )
+from crm.services.request_profiling import request_profile_summary
 
 
 @dataclass(frozen=True)
@@ -245,22 +244,11 @@ def set_record_archived(user, record_type, object_id, archived):
     return descriptor
 
 
-def save_request_performance(path, elapsed_ms, query_count):
-    key = "crm:request-performance"
-    samples = cache.get(key, [])
-    samples.append({"path": path[:180], "elapsed_ms": round(elapsed_ms, 2), "query_count": query_count, "at": timezone.now().isoformat()})
-    cache.set(key, samples[-100:], 86400)
-
-
 def request_performance_summary():
-    samples = cache.get("crm:request-performance", [])
-    if not samples:
-        return {"sample_count": 0, "average_response_ms": None, "average_query_count": None, "slowest": []}
-    elapsed = [sample["elapsed_ms"] for sample in samples]
-    queries = [sample["query_count"] for sample in samples if sample["query_count"] is not None]
+    summary = request_profile_summary(hours=24, limit=5)
     return {
-        "sample_count": len(samples),
-        "average_response_ms": round(sum(elapsed) / len(elapsed), 2),
-        "average_query_count": round(sum(queries) / len(queries), 2) if queries else None,
-        "slowest": sorted(samples, key=lambda sample: sample["elapsed_ms"], reverse=True)[:5],
+        "sample_count": summary["request_count"],
+        "average_response_ms": summary["average_response_ms"],
+        "average_query_count": summary["average_query_count"],
+        "slowest": summary["slowest_views"],
     }
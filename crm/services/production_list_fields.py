@@ -0,0 +1,228 @@
+from datetime import timedelta
+
+from django.db import OperationalError, ProgrammingError
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from crm.models import ProductionOrder, ProductionStage, Shipment
+from crm.services.production_operational_status import (
+    OPERATIONAL_ACTIVE_STATUSES,
+    OPERATIONAL_FINISHED_STATUSES,
+    OPERATIONAL_STATUS_CANCELLED,
+    OPERATIONAL_STATUS_PLANNING,
+    OPERATIONAL_STATUS_READY_TO_SHIP,
+    OPERATIONAL_STATUS_SAMPLE_SENT,
+    OPERATIONAL_STATUS_SHIPPED,
+    OPERATIONAL_STATUS_VALUES,
+    derive_production_operational_status,
+)
+
+
+# Stored on ProductionOrder so the production list can filter, count and
+# paginate in SQL. Stage/shipment saves refresh one order; the nightly task
+# catches values that only change because the date rolled over.
+LIST_VALUE_FIELDS = (
+    "operational_status",
+    "stages_percent_done",
+    "has_delay",
+    "has_late_shipment",
+    "shipment_pending",
+    "has_shipments",
+    "has_delivered_shipment",
+    "priority_rank",
+    "priority_reason",
+)
+
+# Order fields the list values are derived from.
+ORDER_INPUT_FIELDS = frozenset(
+    {"status", "operational_status", "bulk_deadline", "production_order_type"}
+)
+
+PRIORITY_RANKS = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+PRIORITY_BADGES = {
+    "Cancelled": ("low", "neutral"),
+    "Completed": ("low", "good"),
+    "Delayed": ("urgent", "risk"),
+    "Ready to ship": ("high", "warning"),
+    "Sample approval": ("high", "warning"),
+    "Deadline close": ("urgent", "risk"),
+    "On hold": ("high", "warning"),
+    "Shipment pending": ("high", "warning"),
+    "Due this week": ("high", "warning"),
+    "Planning": ("normal", "neutral"),
+    "On track": ("normal", "neutral"),
+}
+
+COMPLETED_ORDER_STATUSES = {"done", "completed", "closed_won"}
+STAGE_STARTED_STATUSES = {"in_progress", "hold", "delay", "done"}
+SHIPMENT_CLOSED_STATUSES = {"delivered", "cancelled"}
+
+REFRESH_CHUNK_SIZE = 500
+
+
+def priority_badge(reason):
+    key, tone = PRIORITY_BADGES.get(reason, PRIORITY_BADGES["On track"])
+    return {"key": key, "label": key.title(), "tone": tone, "reason": reason}
+
+
+def stored_priority_badge(order):
+    return priority_badge(order.priority_reason or "On track")
+
+
+def production_priority(order, percent_done, has_delay, late_shipment, shipment_pending, today, operational_status=None):
+    return priority_badge(
+        _priority_reason(
+            order, percent_done, has_delay, late_shipment, shipment_pending, today, operational_status
+        )
+    )
+
+
+def _priority_reason(order, percent_done, has_delay, late_shipment, shipment_pending, today, operational_status):
+    if operational_status == OPERATIONAL_STATUS_CANCELLED:
+        return "Cancelled"
+    if operational_status == OPERATIONAL_STATUS_SHIPPED:
+        return "Completed"
+    if not operational_status and order.status in COMPLETED_ORDER_STATUSES:
+        return "Completed"
+
+    deadline = getattr(order, "bulk_deadline", None)
+    if has_delay or late_shipment:
+        return "Delayed"
+    if operational_status == OPERATIONAL_STATUS_READY_TO_SHIP:
+        return "Ready to ship"
+    if operational_status == OPERATIONAL_STATUS_SAMPLE_SENT:
+        return "Sample approval"
+    if deadline and deadline <= today + timedelta(days=2):
+        return "Deadline close"
+    if not operational_status and order.status == "hold":
+        return "On hold"
+    if shipment_pending:
+        return "Shipment pending"
+    if deadline and deadline <= today + timedelta(days=7):
+        return "Due this week"
+    if percent_done == 0 and (operational_status == OPERATIONAL_STATUS_PLANNING or order.status == "planning"):
+        return "Planning"
+    return "On track"
+
+
+def production_list_values(order, stages, shipments, today):
+    """Derive the stored list fields from an order and its loaded stages/shipments."""
+    operational_status = order.operational_status
+    if operational_status not in OPERATIONAL_STATUS_VALUES:
+        operational_status = derive_production_operational_status(order)
+
+    total_stages = len(stages)
+    done_count = len([stage for stage in stages if stage.status == "done"])
+    percent_done = int((done_count / total_stages) * 100) if total_stages else 0
+
+    bulk_overdue = bool(
+        order.bulk_deadline
+        and today > order.bulk_deadline
+        and operational_status not in OPERATIONAL_FINISHED_STATUSES
+    )
+    stage_delay = any(
+        stage.status == "delay"
+        or (stage.status != "done" and stage.planned_end and today > stage.planned_end)
+        for stage in stages
+    )
+    late_shipment = any(
+        shipment.ship_date
+        and shipment.ship_date < today
+        and shipment.status not in SHIPMENT_CLOSED_STATUSES
+        for shipment in shipments
+    )
+    has_delay = bulk_overdue or stage_delay
+    shipping_started = any(
+        stage.stage_key == "shipping" and stage.status in STAGE_STARTED_STATUSES
+        for stage in stages
+    )
+    shipment_pending = (
+        not shipments
+        and operational_status in OPERATIONAL_ACTIVE_STATUSES
+        and (percent_done >= 80 or shipping_started)
+    )
+    reason = _priority_reason(
+        order, percent_done, has_delay, late_shipment, shipment_pending, today, operational_status
+    )
+    return {
+        "operational_status": operational_status,
+        "stages_percent_done": percent_done,
+        "has_delay": has_delay,
+        "has_late_shipment": late_shipment,
+        "shipment_pending": shipment_pending,
+        "has_shipments": bool(shipments),
+        "has_delivered_shipment": any(shipment.status == "delivered" for shipment in shipments),
+        "priority_rank": PRIORITY_RANKS[PRIORITY_BADGES[reason][0]],
+        "priority_reason": reason,
+    }
+
+
+def _changed_values(order, values):
+    return {
+        field: value
+        for field, value in values.items()
+        if getattr(order, field) != value
+    }
+
+
+def refresh_production_list_values(order, today=None):
+    """
+    Recompute one order's stored list fields and write the ones that changed.
+
+    Uses a queryset update so the write does not re-enter save(), audit
+    snapshots or the post_save receivers that call this.
+    """
+    if order is None or not getattr(order, "pk", None):
+        return {}
+    today = today or timezone.localdate()
+    stages = list(ProductionStage.objects.filter(order_id=order.pk))
+    shipments = list(Shipment.objects.filter(order_id=order.pk))
+    changed = _changed_values(order, production_list_values(order, stages, shipments, today))
+    if changed:
+        ProductionOrder.objects.filter(pk=order.pk).update(**changed)
+        for field, value in changed.items():
+            setattr(order, field, value)
+    return changed
+
+
+def refresh_all_production_list_values(today=None, chunk_size=REFRESH_CHUNK_SIZE):
+    """Nightly pass: recompute every order so date-based flags follow the calendar."""
+    today = today or timezone.localdate()
+    checked = 0
+    updated = 0
+    last_pk = 0
+    try:
+        while True:
+            orders = list(
+                ProductionOrder.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .prefetch_related(
+                    Prefetch("stages", queryset=ProductionStage.objects.order_by()),
+                    Prefetch("shipments", queryset=Shipment.objects.order_by()),
+                )[:chunk_size]
+            )
+            if not orders:
+                break
+            changed_orders = []
+            changed_fields = set()
+            for order in orders:
+                changed = _changed_values(
+                    order,
+                    production_list_values(
+                        order, list(order.stages.all()), list(order.shipments.all()), today
+                    ),
+                )
+                if changed:
+                    for field, value in changed.items():
+                        setattr(order, field, value)
+                    changed_orders.append(order)
+                    changed_fields.update(changed)
+            if changed_orders:
+                ProductionOrder.objects.bulk_update(changed_orders, sorted(changed_fields))
+            checked += len(orders)
+            updated += len(changed_orders)
+            last_pk = orders[-1].pk
+        return {"checked": checked, "updated": updated, "error": ""}
+    except (OperationalError, ProgrammingError) as exc:
+        return {"checked": checked, "updated": updated, "error": str(exc)}
@@ -0,0 +1,326 @@
+import logging
+import os
+import re
+import socket
+import threading
+from collections import Counter
+from datetime import timedelta
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from django.db import OperationalError, ProgrammingError
+from django.db.models import IntegerField, Max, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from crm.models import RequestProfileWindow
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets; the final bucket counts everything above.
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (5, 10, 25, 50, 100, 250)
+REPEATED_QUERIES_PER_VIEW = 10
+SQL_SAMPLE_LENGTH = 500
+
+_IN_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def profiling_enabled():
+    return bool(_setting("CRM_REQUEST_PROFILING_ENABLED", True))
+
+
+def query_shape(sql):
+    """SQL with placeholder lists collapsed, so the same lookup with different ids compares equal."""
+    return _WHITESPACE_RE.sub(" ", _IN_LIST_RE.sub("(%s, ...)", str(sql or ""))).strip()
+
+
+def _bucket_index(value, buckets):
+    for index, upper in enumerate(buckets):
+        if value <= upper:
+            return index
+    return len(buckets)
+
+
+class QueryProfile:
+    """``connection.execute_wrapper`` hook counting the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes = Counter()
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total_ms += (perf_counter() - started) * 1000
+            self.count += 1
+            shape = query_shape(sql)
+            self.shapes[shape] += 1
+            try:
+                self.statements[(shape, repr(params))] += 1
+            except Exception:
+                pass
+
+    @property
+    def duplicate_count(self):
+        """Executions of a statement already run with the same parameters."""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def repeated_shapes(self, threshold):
+        """Query shapes run at least ``threshold`` times: the usual N+1 signature."""
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+class ViewProfile:
+    def __init__(self):
+        self.request_count = 0
+        self.error_count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_queries = 0
+        self.max_queries = 0
+        self.total_query_ms = 0.0
+        self.duplicate_queries = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.query_histogram = [0] * (len(QUERY_BUCKETS) + 1)
+        self.repeated_queries = {}
+
+    def add(self, elapsed_ms, queries, status_code, threshold):
+        self.request_count += 1
+        if status_code >= 500:
+            self.error_count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.total_queries += queries.count
+        self.max_queries = max(self.max_queries, queries.count)
+        self.total_query_ms += queries.total_ms
+        self.duplicate_queries += queries.duplicate_count
+        self.latency_histogram[_bucket_index(elapsed_ms, LATENCY_BUCKETS_MS)] += 1
+        self.query_histogram[_bucket_index(queries.count, QUERY_BUCKETS)] += 1
+        for shape, repeats in queries.repeated_shapes(threshold).items():
+            key = shape[:SQL_SAMPLE_LENGTH]
+            row = self.repeated_queries.setdefault(key, {"requests": 0, "max_repeats": 0})
+            row["requests"] += 1
+            row["max_repeats"] = max(row["max_repeats"], repeats)
+        if len(self.repeated_queries) > REPEATED_QUERIES_PER_VIEW:
+            ranked = sorted(
+                self.repeated_queries.items(),
+                key=lambda item: (item[1]["requests"], item[1]["max_repeats"]),
+                reverse=True,
+            )
+            self.repeated_queries = dict(ranked[:REPEATED_QUERIES_PER_VIEW])
+
+    def field_values(self):
+        return {
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "total_ms": round(self.total_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "total_queries": self.total_queries,
+            "max_queries": self.max_queries,
+            "total_query_ms": round(self.total_query_ms, 3),
+            "duplicate_queries": self.duplicate_queries,
+            "latency_histogram": list(self.latency_histogram),
+            "query_histogram": list(self.query_histogram),
+            "repeated_queries": {sql: dict(row) for sql, row in self.repeated_queries.items()},
+        }
+
+
+PROFILE_FIELDS = tuple(ViewProfile().field_values()) + ("updated_at",)
+
+
+def _window_start(now=None):
+    now = now or timezone.now()
+    minutes = max(1, int(_setting("CRM_REQUEST_PROFILING_WINDOW_MINUTES", 60)))
+    start = now.replace(second=0, microsecond=0)
+    return start - timedelta(minutes=(start.hour * 60 + start.minute) % minutes)
+
+
+class RequestProfileCollector:
+    """Per-process aggregates; ``flush`` writes this worker's rows with absolute values, so it never races."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._dirty = set()
+        self._last_flush = monotonic()
+        self._last_prune_window = None
+
+    def record(self, view_name, elapsed_ms, queries, status_code):
+        key = (_window_start(), (view_name or "unresolved")[:200])
+        threshold = max(2, int(_setting("CRM_REQUEST_PROFILING_REPEAT_THRESHOLD", 5)))
+        with self._lock:
+            profile = self._views.get(key)
+            if profile is None:
+                profile = self._views[key] = ViewProfile()
+            profile.add(elapsed_ms, queries, status_code, threshold)
+            self._dirty.add(key)
+
+    def flush_due(self):
+        return monotonic() - self._last_flush >= float(_setting("CRM_REQUEST_PROFILING_FLUSH_SECONDS", 60))
+
+    def flush(self):
+        """Write changed windows to the database; returns the number of rows written."""
+        current = _window_start()
+        now = timezone.now()
+        worker = f"{socket.gethostname()}:{os.getpid()}"[:80]
+        with self._lock:
+            self._last_flush = monotonic()
+            rows = [
+                RequestProfileWindow(
+                    window_start=window_start,
+                    worker=worker,
+                    view_name=view_name,
+                    updated_at=now,
+                    **self._views[(window_start, view_name)].field_values(),
+                )
+                for window_start, view_name in self._dirty
+            ]
+            dirty, self._dirty = self._dirty, set()
+            # Earlier windows are complete once written.
+            self._views = {key: profile for key, profile in self._views.items() if key[0] >= current}
+        try:
+            if rows:
+                RequestProfileWindow.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["window_start", "worker", "view_name"],
+                    update_fields=list(PROFILE_FIELDS),
+                )
+            if self._last_prune_window != current:
+                self._last_prune_window = current
+                retention = timedelta(hours=max(1, int(_setting("CRM_REQUEST_PROFILING_RETENTION_HOURS", 72))))
+                RequestProfileWindow.objects.filter(window_start__lt=now - retention).delete()
+        except (OperationalError, ProgrammingError):
+            with self._lock:
+                self._dirty |= {key for key in dirty if key in self._views}
+            logger.warning("Request profile flush failed; keeping samples for the next flush.", exc_info=True)
+            return 0
+        return len(rows)
+
+
+collector = RequestProfileCollector()
+
+
+def _histogram_rows(counts, buckets):
+    labels = [f"≤{upper}" for upper in buckets] + [f">{buckets[-1]}"]
+    return [{"label": label, "count": count} for label, count in zip(labels, counts)]
+
+
+def _histogram_percentile(counts, buckets, percentile):
+    """Upper bound of the bucket holding ``percentile``; ``None`` past the last bucket bound."""
+    total = sum(counts)
+    if not total:
+        return None
+    target = total * percentile
+    running = 0
+    for index, count in enumerate(counts):
+        running += count
+        if running >= target:
+            return buckets[index] if index < len(buckets) else None
+    return None
+
+
+def _histogram_sums(field, buckets):
+    return {
+        f"{field}_{index}": Coalesce(Sum(Cast(KT(f"{field}__{index}"), IntegerField())), 0)
+        for index in range(len(buckets) + 1)
+    }
+
+
+def request_profile_summary(hours=24, limit=20):
+    """Slowest views and repeated-query offenders across all workers for the last ``hours``."""
+    since = timezone.now() - timedelta(hours=hours)
+    windows = RequestProfileWindow.objects.filter(window_start__gte=_window_start(since)).order_by()
+    latency_sums = _histogram_sums("latency_histogram", LATENCY_BUCKETS_MS)
+    query_sums = _histogram_sums("query_histogram", QUERY_BUCKETS)
+    try:
+        grouped = list(
+            windows.values("view_name").annotate(
+                requests=Sum("request_count"),
+                errors=Sum("error_count"),
+                total_ms=Sum("total_ms"),
+                max_ms=Max("max_ms"),
+                total_queries=Sum("total_queries"),
+                max_queries=Max("max_queries"),
+                total_query_ms=Sum("total_query_ms"),
+                duplicate_queries=Sum("duplicate_queries"),
+                **latency_sums,
+                **query_sums,
+            )
+        )
+        # Repeated-query samples are keyed by SQL text, so only windows that have any are merged here.
+        repeated_windows = list(windows.exclude(repeated_queries={}).values_list("view_name", "repeated_queries"))
+    except (OperationalError, ProgrammingError):
+        grouped = []
+        repeated_windows = []
+    views = {}
+    for row in grouped:
+        views[row["view_name"]] = {
+            **row,
+            "latency_counts": [row[name] for name in latency_sums],
+            "query_counts": [row[name] for name in query_sums],
+            "repeated": {},
+        }
+    for view_name, repeated in repeated_windows:
+        view = views.get(view_name)
+        if view is None:
+            continue
+        for sql, row in (repeated or {}).items():
+            merged = view["repeated"].setdefault(sql, {"requests": 0, "max_repeats": 0})
+            merged["requests"] += int(row.get("requests") or 0)
+            merged["max_repeats"] = max(merged["max_repeats"], int(row.get("max_repeats") or 0))
+
+    view_rows = []
+    repeated_rows = []
+    for view in views.values():
+        requests = view["requests"] or 1
+        view_rows.append(
+            {
+                "view_name": view["view_name"],
+                "requests": view["requests"],
+                "errors": view["errors"],
+                "average_ms": round(view["total_ms"] / requests, 2),
+                "max_ms": round(view["max_ms"], 2),
+                "p50_ms": _histogram_percentile(view["latency_counts"], LATENCY_BUCKETS_MS, 0.5),
+                "p95_ms": _histogram_percentile(view["latency_counts"], LATENCY_BUCKETS_MS, 0.95),
+                "average_queries": round(view["total_queries"] / requests, 2),
+                "max_queries": view["max_queries"],
+                "average_query_ms": round(view["total_query_ms"] / requests, 2),
+                "duplicate_queries_per_request": round(view["duplicate_queries"] / requests, 2),
+                "latency_histogram": _histogram_rows(view["latency_counts"], LATENCY_BUCKETS_MS),
+                "query_histogram": _histogram_rows(view["query_counts"], QUERY_BUCKETS),
+            }
+        )
+        for sql, row in view["repeated"].items():
+            repeated_rows.append({"view_name": view["view_name"], "sql": sql, **row})
+
+    request_count = sum(view["requests"] for view in views.values())
+    return {
+        "since": since.isoformat(),
+        "request_count": request_count,
+        "average_response_ms": (
+            round(sum(view["total_ms"] for view in views.values()) / request_count, 2) if request_count else None
+        ),
+        "average_query_count": (
+            round(sum(view["total_queries"] for view in views.values()) / request_count, 2) if request_count else None
+        ),
+        "slowest_views": sorted(view_rows, key=lambda row: row["average_ms"], reverse=True)[:limit],
+        "query_heavy_views": sorted(view_rows, key=lambda row: row["average_queries"], reverse=True)[:limit],
+        "repeated_queries": sorted(
+            repeated_rows,
+            key=lambda row: (row["requests"] * row["max_repeats"], row["max_repeats"]),
+            reverse=True,
+        )[:limit],
+    }
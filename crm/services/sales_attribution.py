@@ -11,7 +11,6 @@ from urllib.parse import urlencode
 
 from django.urls import reverse
 from django.db import models
-from django.core.cache import cache
 from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, Max, OuterRef, Q, Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
@@ -32,6 +31,7 @@ from crm.models import (
     Shipment,
 )
 from crm.services.employee_identity import (
+    EMPLOYEE_DISPLAY_CACHE,
     build_employee_identity_index,
     canonical_employee_name,
     employee_lead_ownership_q,
@@ -590,7 +590,10 @@ def _cached_identity(user, *, index=None):
         user_full_name=user.get_full_name(),
         username=user.get_username(),
     )
-    cache.set(f"crm-employee-display:{user.pk}", profile.display_name or "", 300)
+    display_name = profile.display_name or ""
+    # Prime the shared entry only when it differs, so report loops do not write once per row.
+    if EMPLOYEE_DISPLAY_CACHE.get("name", scope=user.pk) != display_name:
+        EMPLOYEE_DISPLAY_CACHE.set("name", display_name, scope=user.pk)
     return {
         "profile_id": profile.pk,
         "user_id": user.pk,
@@ -0,0 +1,274 @@
+from django.db import DatabaseError, connections, router
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from crm.models import Customer, Lead, Opportunity, ProductionOrder, SearchDocument
+
+
+SEARCH_FTS_TABLE = "crm_search_fts"
+# FTS5 trigram matching needs at least three characters; shorter queries use
+# a LIKE scan over the compact document table instead of the source tables.
+SEARCH_FTS_MIN_QUERY_LENGTH = 3
+
+# Field paths flattened into each record's search document. Related paths
+# ("lead__email") are resolved through the instance, so opportunities and
+# production orders must be re-indexed when their lead/customer changes.
+SEARCH_INDEX_FIELDS = {
+    "crm.customer": (
+        "customer_code",
+        "account_brand",
+        "contact_name",
+        "email",
+        "phone",
+    ),
+    "crm.lead": (
+        "lead_id",
+        "account_brand",
+        "contact_name",
+        "email",
+        "phone",
+        "notes",
+        "company_website",
+        "website",
+        "instagram_handle",
+        "linkedin_url",
+        "primary_product_type",
+        "product_interest",
+        "product_category",
+        "order_quantity",
+        "source_channel",
+        "outbound_status",
+    ),
+    "crm.opportunity": (
+        "opportunity_id",
+        "lead__lead_id",
+        "lead__account_brand",
+        "lead__email",
+        "lead__phone",
+        "customer__account_brand",
+    ),
+    "crm.productionorder": (
+        "order_code",
+        "purchase_order_number",
+        "title",
+        "client_name_snapshot",
+        "brand_name_snapshot",
+        "product_name_snapshot",
+        "customer__account_brand",
+    ),
+}
+
+SEARCH_INDEX_MODELS = {
+    "crm.customer": Customer,
+    "crm.lead": Lead,
+    "crm.opportunity": Opportunity,
+    "crm.productionorder": ProductionOrder,
+}
+
+SEARCH_INDEX_SELECT_RELATED = {
+    "crm.opportunity": ("lead", "customer"),
+    "crm.productionorder": ("customer",),
+}
+
+_fts_available_by_alias = {}
+
+
+def search_model_label(model):
+    return model._meta.label_lower
+
+
+def is_search_indexed_model(model):
+    return search_model_label(model) in SEARCH_INDEX_FIELDS
+
+
+def _resolve_path(instance, path):
+    value = instance
+    for part in path.split("__"):
+        if value is None:
+            return ""
+        value = getattr(value, part, None)
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def search_document_body(instance):
+    paths = SEARCH_INDEX_FIELDS.get(search_model_label(type(instance)), ())
+    # Newlines keep a single-line query from matching across two fields.
+    return "\n".join(value for value in (_resolve_path(instance, path) for path in paths) if value)
+
+
+def search_fts_available(using=None):
+    using = using or router.db_for_read(SearchDocument)
+    if using in _fts_available_by_alias:
+        return _fts_available_by_alias[using]
+    connection = connections[using]
+    available = False
+    if connection.vendor == "sqlite":
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [SEARCH_FTS_TABLE],
+                )
+                available = cursor.fetchone() is not None
+        except DatabaseError:
+            available = False
+    _fts_available_by_alias[using] = available
+    return available
+
+
+def reset_search_fts_cache():
+    _fts_available_by_alias.clear()
+
+
+def _fts_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _use_fts(query):
+    return len(query) >= SEARCH_FTS_MIN_QUERY_LENGTH and search_fts_available()
+
+
+def index_instance(instance):
+    label = search_model_label(type(instance))
+    if label not in SEARCH_INDEX_FIELDS or not instance.pk:
+        return
+    body = search_document_body(instance)
+    updated = SearchDocument.objects.filter(model_label=label, object_id=instance.pk).update(body=body)
+    if not updated:
+        SearchDocument.objects.create(model_label=label, object_id=instance.pk, body=body)
+
+
+def remove_instance(instance):
+    label = search_model_label(type(instance))
+    if label not in SEARCH_INDEX_FIELDS or instance.pk is None:
+        return
+    SearchDocument.objects.filter(model_label=label, object_id=instance.pk).delete()
+
+
+def reindex_related(instance):
+    """Refresh documents that embed text from ``instance`` (lead/customer names, emails)."""
+    if isinstance(instance, Lead):
+        dependents = [Opportunity.objects.filter(lead_id=instance.pk)]
+    elif isinstance(instance, Customer):
+        dependents = [
+            Opportunity.objects.filter(customer_id=instance.pk),
+            ProductionOrder.objects.filter(customer_id=instance.pk),
+        ]
+    else:
+        return
+    for queryset in dependents:
+        label = search_model_label(queryset.model)
+        related = SEARCH_INDEX_SELECT_RELATED.get(label, ())
+        for record in queryset.select_related(*related):
+            index_instance(record)
+
+
+def rebuild_search_index(labels=None, batch_size=500):
+    """Rebuild search documents from scratch; returns ``{label: indexed_count}``."""
+    counts = {}
+    for label, model in SEARCH_INDEX_MODELS.items():
+        if labels and label not in labels:
+            continue
+        SearchDocument.objects.filter(model_label=label).delete()
+        related = SEARCH_INDEX_SELECT_RELATED.get(label, ())
+        pending = []
+        total = 0
+        for record in model.objects.select_related(*related).order_by("pk").iterator(chunk_size=batch_size):
+            pending.append(
+                SearchDocument(model_label=label, object_id=record.pk, body=search_document_body(record))
+            )
+            if len(pending) >= batch_size:
+                SearchDocument.objects.bulk_create(pending, batch_size=batch_size)
+                total += len(pending)
+                pending = []
+        if pending:
+            SearchDocument.objects.bulk_create(pending, batch_size=batch_size)
+            total += len(pending)
+        counts[label] = total
+    if search_fts_available():
+        optimize_search_fts()
+    return counts
+
+
+def optimize_search_fts():
+    with connections[router.db_for_write(SearchDocument)].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}) VALUES ('optimize')")
+
+
+def search_index_q(model, query, field="pk"):
+    """Lazy ``field__in`` subquery selecting records whose document contains ``query``."""
+    query = (query or "").strip()
+    label = search_model_label(model)
+    if not query:
+        return Q()
+    if _use_fts(query):
+        subquery = RawSQL(
+            f"SELECT d.object_id FROM {SEARCH_FTS_TABLE} f "
+            f"JOIN {SearchDocument._meta.db_table} d ON d.id = f.rowid "
+            f"WHERE {SEARCH_FTS_TABLE} MATCH %s AND d.model_label = %s",
+            [f"body : {_fts_phrase(query)}", label],
+        )
+        return Q(**{f"{field}__in": subquery})
+    return Q(
+        **{
+            f"{field}__in": SearchDocument.objects.filter(model_label=label, body__icontains=query).values(
+                "object_id"
+            )
+        }
+    )
+
+
+def search_record_ids(model, query, limit=None):
+    """Record ids matching ``query``, best match first (bm25 rank on SQLite FTS5)."""
+    query = (query or "").strip()
+    if not query:
+        return []
+    label = search_model_label(model)
+    if _use_fts(query):
+        sql = (
+            f"SELECT d.object_id FROM {SEARCH_FTS_TABLE} f "
+            f"JOIN {SearchDocument._meta.db_table} d ON d.id = f.rowid "
+            f"WHERE {SEARCH_FTS_TABLE} MATCH %s AND d.model_label = %s "
+            f"ORDER BY bm25({SEARCH_FTS_TABLE}), d.object_id DESC"
+        )
+        params = [f"body : {_fts_phrase(query)}", label]
+        if limit:
+            sql += " LIMIT %s"
+            params.append(int(limit))
+        with connections[router.db_for_read(SearchDocument)].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+    rows = SearchDocument.objects.filter(model_label=label, body__icontains=query).order_by("-object_id")
+    if limit:
+        rows = rows[:limit]
+    return list(rows.values_list("object_id", flat=True))
+
+
+def order_by_search_rank(queryset, query, limit=None):
+    """
+    ``queryset`` ordered best match first, in SQL.
+
+    On SQLite FTS5 each row is ranked by bm25 through its search document, so
+    scope and archive filters already on ``queryset`` apply before the limit.
+    Rows without a matching document (e.g. identifier matches) sort last.
+    """
+    query = (query or "").strip()
+    model = queryset.model
+    if query and _use_fts(query):
+        quote = connections[queryset.db].ops.quote_name
+        outer_pk = f"{quote(model._meta.db_table)}.{quote(model._meta.pk.column)}"
+        # CROSS JOIN keeps SQLite on the (model_label, object_id) index first,
+        # so each row is one rowid lookup in the FTS table rather than a full MATCH scan.
+        rank = RawSQL(
+            f"(SELECT bm25({SEARCH_FTS_TABLE}) FROM {SearchDocument._meta.db_table} d "
+            f"CROSS JOIN {SEARCH_FTS_TABLE} ON {SEARCH_FTS_TABLE}.rowid = d.id "
+            f"WHERE d.model_label = %s AND d.object_id = {outer_pk} AND {SEARCH_FTS_TABLE} MATCH %s)",
+            [search_model_label(model), f"body : {_fts_phrase(query)}"],
+            output_field=FloatField(),
+        )
+        queryset = queryset.annotate(search_rank=rank).order_by(F("search_rank").asc(nulls_last=True), "-pk")
+    else:
+        queryset = queryset.order_by("-pk")
+    return queryset[:limit] if limit else queryset
@@ -0,0 +1,195 @@
+"""
+Two-level cache for values every worker would otherwise rebuild on its own.
+
+L1 is a small per-process dict with a short TTL; L2 is the ``default``
+Django cache, which is Redis when CACHE_REDIS_URL is set and otherwise a
+file cache shared by every process on the host. Each namespace (optionally
+split into scopes, e.g. one per user) has a version counter in L2 that is
+part of every key, so ``invalidate`` makes the old entries unreachable for
+all processes. Each process keeps its copy of a version for
+CRM_CACHE_VERSION_L1_SECONDS, so an L1 hit costs no L2 round trip and an
+invalidation from another process shows up within that window.
+
+Versions and hit counts are bumped with ``cache.incr``, which is atomic on
+Redis. The file cache's ``incr`` is a read then a write, so concurrent bumps
+can collapse into one: a version still changes, but hit counts may come out
+low. Multi-host deployments need Redis for both.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+L1_MAX_ENTRIES = 512
+STATS_FLUSH_SECONDS = 60
+STAT_FIELDS = ("l1_hits", "l2_hits", "misses")
+
+_MISSING = object()
+_namespaces = {}
+_local = OrderedDict()
+_versions = {}
+_pending_stats = Counter()
+_lock = threading.Lock()
+_next_flush = 0.0
+
+
+def _l1_seconds():
+    return float(getattr(settings, "CRM_CACHE_L1_SECONDS", 5))
+
+
+def _version_seconds():
+    return float(getattr(settings, "CRM_CACHE_VERSION_L1_SECONDS", 1))
+
+
+def _incr(key, delta, initial):
+    """Increment an L2 counter, creating it with ``initial`` when missing."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, initial, None):
+            return initial
+        return cache.incr(key, delta)
+
+
+def _count(namespace, field):
+    with _lock:
+        _pending_stats[(namespace, field)] += 1
+    if time.monotonic() >= _next_flush:
+        flush_stats()
+
+
+def flush_stats():
+    """Add this process's hit counts to the shared per-namespace totals."""
+    global _next_flush
+    with _lock:
+        _next_flush = time.monotonic() + STATS_FLUSH_SECONDS
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+    try:
+        for (namespace, field), count in pending.items():
+            _incr(f"crm-cache-stats:{namespace}:{field}", count, count)
+    except Exception:
+        logger.warning("Shared cache stats flush failed", exc_info=True)
+
+
+class CacheNamespace:
+    """A group of cache entries that is invalidated together."""
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        _namespaces[name] = self
+
+    def _version_key(self, scope):
+        return f"crm-cache-ns:{self.name}" if scope is None else f"crm-cache-ns:{self.name}:{scope}"
+
+    def _remember_version(self, key, version):
+        with _lock:
+            _versions[key] = (time.monotonic() + _version_seconds(), version)
+
+    def _version(self, scope):
+        key = self._version_key(scope)
+        with _lock:
+            entry = _versions.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        version = cache.get(key)
+        if version is None:
+            # A nanosecond stamp keeps a counter recreated after eviction or
+            # cache.clear() from reusing a version some L1 still holds.
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        self._remember_version(key, version)
+        return version
+
+    def _key(self, key, scope):
+        return f"crm-cache:{self.name}:{scope}:{self._version(scope)}:{key}"
+
+    def _remember(self, full_key, value):
+        with _lock:
+            _local[full_key] = (time.monotonic() + _l1_seconds(), value)
+            _local.move_to_end(full_key)
+            while len(_local) > L1_MAX_ENTRIES:
+                _local.popitem(last=False)
+
+    def get(self, key, default=None, scope=None):
+        try:
+            full_key = self._key(key, scope)
+            with _lock:
+                entry = _local.get(full_key)
+            if entry and entry[0] > time.monotonic():
+                _count(self.name, "l1_hits")
+                return entry[1]
+            value = cache.get(full_key, _MISSING)
+        except Exception:
+            logger.warning("Shared cache read failed", extra={"namespace": self.name}, exc_info=True)
+            value = _MISSING
+        if value is _MISSING:
+            _count(self.name, "misses")
+            return default
+        _count(self.name, "l2_hits")
+        self._remember(full_key, value)
+        return value
+
+    def set(self, key, value, scope=None):
+        try:
+            full_key = self._key(key, scope)
+            cache.set(full_key, value, self.timeout)
+        except Exception:
+            logger.warning("Shared cache write failed", extra={"namespace": self.name}, exc_info=True)
+            return
+        self._remember(full_key, value)
+
+    def get_or_set(self, key, build, scope=None):
+        value = self.get(key, _MISSING, scope=scope)
+        if value is _MISSING:
+            value = build()
+            self.set(key, value, scope=scope)
+        return value
+
+    def invalidate(self, scope=None):
+        """Bump the version so every process stops seeing the current entries."""
+        key = self._version_key(scope)
+        try:
+            self._remember_version(key, _incr(key, 1, time.time_ns()))
+        except Exception:
+            logger.warning("Shared cache invalidation failed", extra={"namespace": self.name}, exc_info=True)
+
+
+def clear_local():
+    """Drop this process's L1 entries and versions; L2 and other processes are untouched."""
+    with _lock:
+        _local.clear()
+        _versions.clear()
+
+
+def namespace_stats():
+    """Lookups and hit rate per namespace, summed over every process that flushed."""
+    flush_stats()
+    names = sorted(_namespaces)
+    keys = [f"crm-cache-stats:{name}:{field}" for name in names for field in STAT_FIELDS]
+    try:
+        totals = cache.get_many(keys)
+    except Exception:
+        totals = {}
+    rows = []
+    for name in names:
+        counts = {field: int(totals.get(f"crm-cache-stats:{name}:{field}") or 0) for field in STAT_FIELDS}
+        lookups = sum(counts.values())
+        hits = counts["l1_hits"] + counts["l2_hits"]
+        rows.append(
+            {
+                "namespace": name,
+                **counts,
+                "lookups": lookups,
+                "hit_rate": round(hits * 100 / lookups, 1) if lookups else None,
+            }
+        )
+    return rows
@@ -1,10 +1,51 @@
+from django.conf import settings
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from crm.models import CostingHeader, LeadComment, LeadTask, OpportunityTask, ProductionOrder, QuickCosting
+from crm.models import (
+    AccountingEntry,
+    AccountingMonthClose,
+    AccountingMonthLock,
+    AutomationDirtyRecord,
+    CostingCalculationSnapshot,
+    CostingHeader,
+    CostingLineItem,
+    CostingSMV,
+    Customer,
+    InventoryItem,
+    Invoice,
+    InvoicePayment,
+    Lead,
+    LeadComment,
+    LeadTask,
+    Opportunity,
+    OpportunityTask,
+    OrderLifecycle,
+    ProductionOrder,
+    ProductionStage,
+    QuickCosting,
+    Shipment,
+)
 from crm.services.audit_log import is_tracked_model, model_snapshot, schedule_audit
+from crm.services.audit_snapshot import capture_loaded_values, loaded_snapshot, loaded_value
+from crm.services.automation_engine import mark_automation_dirty
+from crm.services.kpi_rollups import (
+    KPI_FAMILY_ACCOUNTING,
+    KPI_FAMILY_LEADS,
+    KPI_FAMILY_OPPORTUNITIES,
+    schedule_kpi_dirty,
+)
+from crm.services.ledger_balances import schedule_period_refresh, sync_month_freeze
+from crm.services.production_list_fields import ORDER_INPUT_FIELDS, refresh_production_list_values
+from crm.services.search_index import (
+    SEARCH_INDEX_FIELDS,
+    index_instance,
+    reindex_related,
+    remove_instance,
+    search_model_label,
+)
 from crm.audit_context import get_current_actor
 from crm.services.employee_profiles import employee_audit
 
@@ -39,22 +80,30 @@ def audit_employee_password_change(sender, instance, created=False, raw=False, *
 def capture_audit_before_save(sender, instance, raw=False, **kwargs):
     if raw or not is_tracked_model(sender) or not getattr(instance, "pk", None):
         return
-    try:
-        previous = sender.objects.filter(pk=instance.pk).first()
-        instance._crm_audit_before = model_snapshot(previous) if previous else {}
-    except Exception:
-        instance._crm_audit_before = {}
+    # Values captured when the instance was loaded (or last saved) replace the
+    # old per-save SELECT; the query is only an opt-in fallback for instances
+    # built by hand with an existing pk.
+    before = loaded_snapshot(instance)
+    if before is None and getattr(settings, "CRM_AUDIT_FALLBACK_QUERY", False):
+        try:
+            previous = sender.objects.filter(pk=instance.pk).first()
+            before = model_snapshot(previous) if previous else {}
+        except Exception:
+            before = {}
+    # None means no before-state is known; schedule_audit then skips the field diff.
+    instance._crm_audit_before = before
 
 
 @receiver(post_save)
-def audit_after_save(sender, instance, created=False, raw=False, **kwargs):
+def audit_after_save(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
     if raw or not is_tracked_model(sender):
         return
     schedule_audit(
         instance,
         created=created,
-        before=getattr(instance, "_crm_audit_before", {}),
+        before=getattr(instance, "_crm_audit_before", None),
     )
+    capture_loaded_values(instance, update_fields)
 
 
 @receiver(post_delete)
@@ -67,7 +116,7 @@ def audit_after_delete(sender, instance, **kwargs):
 def notify_ceo_on_quotation_submission(sender, instance, created=False, raw=False, **kwargs):
     if raw or created or not instance.quotation_number:
         return
-    before = getattr(instance, "_crm_audit_before", {})
+    before = getattr(instance, "_crm_audit_before", None) or {}
     is_initial_submission = before.get("quotation_number") != instance.quotation_number
     is_resubmission = (
         before.get("quotation_status") == CostingHeader.QUOTATION_STATUS_REJECTED
@@ -115,7 +164,7 @@ def notify_quotation_status_decision(sender, instance, created=False, raw=False,
         CostingHeader.QUOTATION_STATUS_REJECTED,
     }:
         return
-    before = getattr(instance, "_crm_audit_before", {})
+    before = getattr(instance, "_crm_audit_before", None) or {}
     if before.get("quotation_status") == instance.quotation_status:
         return
 
@@ -136,6 +185,21 @@ def notify_quotation_status_decision(sender, instance, created=False, raw=False,
     transaction.on_commit(emit, robust=True)
 
 
+@receiver(post_save, sender=CostingHeader)
+@receiver(post_save, sender=CostingLineItem)
+@receiver(post_delete, sender=CostingLineItem)
+@receiver(post_save, sender=CostingSMV)
+@receiver(post_delete, sender=CostingSMV)
+def drop_costing_calculation_snapshot(sender, instance, created=False, **kwargs):
+    if sender is CostingHeader:
+        if created:
+            return
+        costing_id = instance.pk
+    else:
+        costing_id = instance.costing_id
+    CostingCalculationSnapshot.objects.filter(costing_id=costing_id).delete()
+
+
 @receiver(post_save, sender=QuickCosting)
 def notify_ceo_on_quick_costing_submission(sender, instance, created=False, raw=False, **kwargs):
     if (
@@ -145,7 +209,7 @@ def notify_ceo_on_quick_costing_submission(sender, instance, created=False, raw=
         or not instance.approval_submitted_at
     ):
         return
-    before = getattr(instance, "_crm_audit_before", {})
+    before = getattr(instance, "_crm_audit_before", None) or {}
     if before.get("approval_submitted_at") == str(instance.approval_submitted_at):
         return
 
@@ -168,7 +232,7 @@ def notify_quick_costing_decision(sender, instance, created=False, raw=False, **
         or instance.status not in {QuickCosting.STATUS_APPROVED, QuickCosting.STATUS_REJECTED}
     ):
         return
-    before = getattr(instance, "_crm_audit_before", {})
+    before = getattr(instance, "_crm_audit_before", None) or {}
     if before.get("status") == instance.status:
         return
     decision = "approved" if instance.status == QuickCosting.STATUS_APPROVED else "rejected"
@@ -240,3 +304,165 @@ def notify_record_owner_on_comment(sender, instance, created=False, raw=False, *
             notify_comment_added(comment)
 
     transaction.on_commit(emit, robust=True)
+
+
+def _search_fields_touched(sender, update_fields):
+    if update_fields is None:
+        return True
+    paths = SEARCH_INDEX_FIELDS.get(search_model_label(sender), ())
+    roots = {path.split("__", 1)[0] for path in paths}
+    if "purchase_order_number" in roots:
+        roots.add("order_code")
+    return bool(roots & set(update_fields))
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Lead)
+@receiver(post_save, sender=Opportunity)
+@receiver(post_save, sender=ProductionOrder)
+def update_search_index(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or not _search_fields_touched(sender, update_fields):
+        return
+    # Same transaction as the record write, so a rollback also drops the document.
+    index_instance(instance)
+    if not created:
+        reindex_related(instance)
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Lead)
+@receiver(post_delete, sender=Opportunity)
+@receiver(post_delete, sender=ProductionOrder)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_instance(instance)
+
+
+_AUTOMATION_DIRTY_TARGETS = {
+    Invoice: (AutomationDirtyRecord.RECORD_INVOICE, "pk"),
+    InvoicePayment: (AutomationDirtyRecord.RECORD_INVOICE, "invoice_id"),
+    ProductionOrder: (AutomationDirtyRecord.RECORD_PRODUCTION, "pk"),
+    ProductionStage: (AutomationDirtyRecord.RECORD_PRODUCTION_STAGE, "pk"),
+    Shipment: (AutomationDirtyRecord.RECORD_PRODUCTION, "order_id"),
+    InventoryItem: (AutomationDirtyRecord.RECORD_INVENTORY, "pk"),
+    OrderLifecycle: (AutomationDirtyRecord.RECORD_LIFECYCLE, "pk"),
+}
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=InvoicePayment)
+@receiver(post_save, sender=ProductionOrder)
+@receiver(post_save, sender=ProductionStage)
+@receiver(post_save, sender=Shipment)
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_save, sender=OrderLifecycle)
+@receiver(post_delete, sender=InvoicePayment)
+@receiver(post_delete, sender=Shipment)
+def queue_automation_evaluation(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_type, attr = _AUTOMATION_DIRTY_TARGETS[sender]
+    mark_automation_dirty(record_type, [getattr(instance, attr, None)])
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def mark_lead_kpis_dirty(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_kpi_dirty(KPI_FAMILY_LEADS, [instance.created_date])
+
+
+@receiver(post_save, sender=Opportunity)
+@receiver(post_delete, sender=Opportunity)
+def mark_opportunity_kpis_dirty(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_kpi_dirty(KPI_FAMILY_OPPORTUNITIES, [instance.created_date])
+    # An opportunity takes its lead out of the active lead counts.
+    lead_ids = {instance.lead_id, loaded_value(instance, "lead")} - {None}
+    if lead_ids:
+        schedule_kpi_dirty(
+            KPI_FAMILY_LEADS,
+            date_queryset=Lead.objects.filter(pk__in=lead_ids).values("created_date"),
+        )
+
+
+@receiver(post_save, sender=ProductionOrder)
+@receiver(post_delete, sender=ProductionOrder)
+def mark_production_opportunity_kpis_dirty(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Opportunities with live production drop out of the active opportunity counts.
+    opportunity_ids = {instance.opportunity_id, loaded_value(instance, "opportunity")} - {None}
+    if opportunity_ids:
+        schedule_kpi_dirty(
+            KPI_FAMILY_OPPORTUNITIES,
+            date_queryset=Opportunity.objects.filter(pk__in=opportunity_ids).values("created_date"),
+        )
+
+
+@receiver(post_save, sender=AccountingEntry)
+@receiver(post_delete, sender=AccountingEntry)
+def mark_accounting_kpis_dirty(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_kpi_dirty(KPI_FAMILY_ACCOUNTING, [instance.date, loaded_value(instance, "date")])
+
+
+@receiver(pre_save, sender=AccountingEntry)
+def capture_accounting_period_before_save(sender, instance, raw=False, **kwargs):
+    # Read before audit_after_save re-captures the loaded values as the saved ones.
+    instance._ledger_period_before = (loaded_value(instance, "date"), loaded_value(instance, "side"))
+
+
+@receiver(post_save, sender=AccountingEntry)
+@receiver(post_delete, sender=AccountingEntry)
+def refresh_accounting_period_balances(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_ledger_period_before", None) or (
+        loaded_value(instance, "date"),
+        loaded_value(instance, "side"),
+    )
+    schedule_period_refresh([(instance.date, instance.side), previous])
+
+
+@receiver(post_save, sender=ProductionOrder)
+def refresh_order_customer_period_balances(sender, instance, created=False, raw=False, **kwargs):
+    # Entries without a customer of their own are bucketed under the order's customer.
+    if raw or created or loaded_value(instance, "customer", instance.customer_id) == instance.customer_id:
+        return
+    schedule_period_refresh(
+        AccountingEntry.objects.filter(production_order=instance, customer__isnull=True)
+        .order_by()
+        .values_list("date", "side")
+        .distinct()
+    )
+
+
+@receiver(post_save, sender=AccountingMonthLock)
+@receiver(post_delete, sender=AccountingMonthLock)
+@receiver(post_save, sender=AccountingMonthClose)
+@receiver(post_delete, sender=AccountingMonthClose)
+def sync_accounting_period_freeze(sender, instance, raw=False, **kwargs):
+    if raw or not instance.year or instance.month not in range(1, 13):
+        return
+    sync_month_freeze(instance.year, instance.month)
+
+
+@receiver(post_save, sender=ProductionOrder)
+def refresh_production_order_list_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not ORDER_INPUT_FIELDS & set(update_fields):
+        return
+    refresh_production_list_values(instance)
+
+
+@receiver(post_delete, sender=ProductionStage)
+@receiver(post_delete, sender=Shipment)
+def refresh_list_values_after_child_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the order cascades here; there is no order left to refresh.
+    if isinstance(origin, ProductionOrder) or getattr(origin, "model", None) is ProductionOrder:
+        return
+    refresh_production_list_values(ProductionOrder.objects.filter(pk=instance.order_id).first())
@@ -147,3 +147,133 @@ def send_shipment_notification_async(self, shipment_id, status_key=None, force=F
 @shared_task(**_shipment_notification_task_options())
 def send_shipment_status_notification(self, shipment_id, status_key=None, force=False):
     return _send_shipment_notification(self, shipment_id, status_key=status_key, force=force)
+
+
+@shared_task(bind=True, soft_time_limit=240, time_limit=300)
+def process_automation_dirty_records_task(self):
+    from crm.services.automation_engine import process_automation_dirty_records
+
+    close_old_connections()
+    result = process_automation_dirty_records()
+    if result["error"]:
+        logger.warning("Automation dirty record processing failed: %s", result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=1500, time_limit=1800)
+def automation_nightly_sweep_task(self):
+    from crm.services.automation_engine import process_automation_dirty_records, sync_automation_engine
+
+    close_old_connections()
+    result = sync_automation_engine()
+    if result["error"]:
+        logger.warning("Automation nightly sweep failed: %s", result["error"])
+    process_automation_dirty_records()
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=240, time_limit=300)
+def refresh_kpi_rollups_task(self):
+    from crm.services.kpi_rollups import refresh_recent_kpi_rollups
+
+    close_old_connections()
+    result = refresh_recent_kpi_rollups()
+    if result["error"]:
+        logger.warning("KPI rollup refresh failed: %s", result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=1500, time_limit=1800)
+def kpi_rollups_nightly_task(self):
+    from datetime import timedelta
+
+    from crm.services.kpi_rollups import refresh_kpi_rollups
+
+    close_old_connections()
+    today = timezone.localdate()
+    days = max(1, int(getattr(settings, "CRM_KPI_ROLLUP_NIGHTLY_DAYS", 400)))
+    result = refresh_kpi_rollups(today - timedelta(days=days - 1), today)
+    if result["error"]:
+        logger.warning("KPI rollup nightly rebuild failed: %s", result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=1500, time_limit=1800)
+def accounting_balances_nightly_task(self):
+    from crm.services.ledger_balances import rebuild_period_balances
+
+    close_old_connections()
+    # Picks up entries written without signals (bulk_create, queryset update).
+    result = rebuild_period_balances()
+    if result["error"]:
+        logger.warning("Accounting period balance rebuild failed: %s", result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=1500, time_limit=1800)
+def refresh_production_list_values_task(self):
+    from crm.services.production_list_fields import refresh_all_production_list_values
+
+    close_old_connections()
+    result = refresh_all_production_list_values()
+    if result["error"]:
+        logger.warning("Production list value refresh failed: %s", result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=120, time_limit=150)
+def prerender_invoice_pdf_task(self, invoice_id):
+    from crm.models import Invoice
+    from crm.views_invoice import invoice_pdf_bytes
+
+    close_old_connections()
+    inv = Invoice.objects.filter(pk=invoice_id).first()
+    if inv is None:
+        return {"rendered": False, "error": "missing_invoice"}
+    try:
+        invoice_pdf_bytes(inv)
+    except ImportError as exc:
+        logger.warning("Invoice PDF pre-render failed: %s", exc)
+        return {"rendered": False, "error": str(exc)}
+    return {"rendered": True, "error": ""}
+
+
+@shared_task(bind=True, soft_time_limit=1500, time_limit=1800)
+def run_export_job_task(self, job_id):
+    from crm.services.exports import run_export_job
+
+    close_old_connections()
+    result = run_export_job(job_id)
+    if result["error"]:
+        logger.warning("Export job %s failed: %s", job_id, result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=240, time_limit=300)
+def purge_old_exports_task(self):
+    from crm.services.exports import purge_old_exports
+
+    close_old_connections()
+    return purge_old_exports()
+
+
+@shared_task(bind=True, soft_time_limit=240, time_limit=300)
+def dispatch_event_reminders_task(self):
+    from crm.services.calendar_notifications import dispatch_due_event_reminders
+
+    close_old_connections()
+    result = dispatch_due_event_reminders()
+    if result["error"]:
+        logger.warning("Calendar reminder dispatch failed: %s", result["error"])
+    return result
+
+
+@shared_task(bind=True, soft_time_limit=120, time_limit=150)
+def run_llm_request_task(self, key, payload):
+    from crm.ai.gateway import run_submitted
+
+    close_old_connections()
+    result = run_submitted(key, payload)
+    if result["error"]:
+        logger.warning("Background LLM request %s failed: %s", key, result["error"])
+    return result
@@ -0,0 +1,115 @@
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from crm.models import CRMAuditLog, Customer, Lead
+from crm.services.audit_log import queue_audit_rows
+from crm.signals import capture_audit_before_save
+
+
+class AuditSnapshotOnLoadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lead = Lead.objects.create(lead_id="LEAD-AUDIT-1", account_brand="Audit Brand", lead_status="New")
+
+    def _lead_selects(self, queries):
+        table = Lead._meta.db_table
+        return [q["sql"] for q in queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"]]
+
+    def test_save_diffs_against_loaded_values_without_reselecting(self):
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.account_brand = "Renamed Brand"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                lead.save()
+
+        self.assertEqual(self._lead_selects(ctx.captured_queries), [])
+        row = CRMAuditLog.objects.get(record_id=str(lead.pk), field_name="account_brand")
+        self.assertEqual(row.previous_value, "Audit Brand")
+        self.assertEqual(row.new_value, "Renamed Brand")
+
+    def test_second_save_diffs_against_previous_save(self):
+        lead = Lead.objects.get(pk=self.lead.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            lead.account_brand = "First"
+            lead.save()
+            lead.account_brand = "Second"
+            lead.save()
+
+        values = list(
+            CRMAuditLog.objects.filter(record_id=str(lead.pk), field_name="account_brand")
+            .order_by("id")
+            .values_list("previous_value", "new_value")
+        )
+        self.assertEqual(values, [("Audit Brand", "First"), ("First", "Second")])
+
+    def test_deferred_fields_loaded_later_are_not_reported_as_changes(self):
+        lead = Lead.objects.only("id", "lead_status").get(pk=self.lead.pk)
+        lead.lead_status = "Contacted"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lead.save(update_fields=["lead_status"])
+
+        fields = set(CRMAuditLog.objects.filter(record_id=str(lead.pk)).values_list("field_name", flat=True))
+        self.assertEqual(fields, {"lead_status"})
+
+    def test_instance_without_snapshot_uses_fallback_only_when_enabled(self):
+        unloaded = Lead(pk=self.lead.pk, lead_id="LEAD-AUDIT-1", account_brand="Audit Brand", lead_status="Won")
+
+        with self.assertNumQueries(0):
+            capture_audit_before_save(Lead, unloaded)
+        self.assertIsNone(unloaded._crm_audit_before)
+
+        with override_settings(CRM_AUDIT_FALLBACK_QUERY=True), self.assertNumQueries(1):
+            capture_audit_before_save(Lead, unloaded)
+        self.assertEqual(unloaded._crm_audit_before["lead_status"], "New")
+
+
+    def test_save_without_before_state_logs_one_update_row(self):
+        unloaded = Lead(pk=self.lead.pk, lead_id="LEAD-AUDIT-1", account_brand="Audit Brand", lead_status="Won")
+        CRMAuditLog.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unloaded.save()
+
+        rows = list(CRMAuditLog.objects.filter(record_id=str(self.lead.pk)).values_list("action_type", "field_name"))
+        self.assertEqual(rows, [(CRMAuditLog.ACTION_UPDATED, "")])
+
+class BatchedAuditWriterTests(TestCase):
+    def test_rows_are_written_with_one_insert_per_transaction(self):
+        customers = [Customer.objects.create(account_brand=f"Batch {index}") for index in range(3)]
+        table = CRMAuditLog._meta.db_table
+
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                for customer in customers:
+                    customer.account_brand = f"{customer.account_brand} updated"
+                    customer.save()
+
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith(f'INSERT INTO "{table}"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            CRMAuditLog.objects.filter(module="customers", field_name="account_brand").count(),
+            3,
+        )
+
+    def test_rows_queued_in_rolled_back_savepoint_are_dropped(self):
+        customer = Customer.objects.create(account_brand="Savepoint")
+        common = {"module": "customers", "record_id": str(customer.pk), "field_name": "account_brand"}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_audit_rows([CRMAuditLog(action_type=CRMAuditLog.ACTION_UPDATED, new_value="kept", **common)])
+            try:
+                with transaction.atomic():
+                    queue_audit_rows(
+                        [CRMAuditLog(action_type=CRMAuditLog.ACTION_UPDATED, new_value="dropped", **common)]
+                    )
+                    raise RuntimeError("roll back")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(
+            list(CRMAuditLog.objects.filter(**common).values_list("new_value", flat=True)),
+            ["kept"],
+        )
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from crm.models import (
+    AutomationDirtyRecord,
+    AutomationNotification,
+    AutomationTask,
+    Customer,
+    InventoryItem,
+    Invoice,
+    InvoicePayment,
+    OrderLifecycle,
+)
+from crm.services.automation_engine import mark_automation_dirty, process_automation_dirty_records
+
+
+class IncrementalAutomationEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(account_brand="Automation Client")
+
+    def test_model_saves_queue_dirty_records_without_evaluating_in_request(self):
+        item = InventoryItem.objects.create(name="Rib Fabric", quantity=Decimal("2"), reorder_level=Decimal("5"))
+
+        self.assertTrue(
+            AutomationDirtyRecord.objects.filter(
+                record_type=AutomationDirtyRecord.RECORD_INVENTORY,
+                record_id=item.pk,
+            ).exists()
+        )
+        self.assertFalse(AutomationTask.objects.exists())
+
+        item.quantity = Decimal("1")
+        item.save()
+        self.assertEqual(AutomationDirtyRecord.objects.count(), 1)
+
+    def test_processing_evaluates_only_dirty_records_and_drains_queue(self):
+        today = timezone.localdate()
+        low = InventoryItem.objects.create(name="Low Item", quantity=Decimal("1"), reorder_level=Decimal("5"))
+        invoice = Invoice.objects.create(
+            invoice_number="INV-AUTO-1",
+            customer=self.customer,
+            currency="CAD",
+            total_amount=Decimal("100.00"),
+            paid_amount=Decimal("0"),
+            status="sent",
+            due_date=today - timedelta(days=2),
+        )
+        lifecycle = OrderLifecycle.objects.create(customer=self.customer, invoice=invoice, status="invoice")
+        AutomationDirtyRecord.objects.all().delete()
+        mark_automation_dirty(AutomationDirtyRecord.RECORD_INVOICE, [invoice.pk])
+
+        result = process_automation_dirty_records()
+
+        self.assertEqual(result["error"], "")
+        self.assertFalse(AutomationDirtyRecord.objects.exists())
+        keys = set(AutomationTask.objects.values_list("source_key", flat=True))
+        self.assertIn(f"task:crm-auto:invoice_overdue:{invoice.pk}", keys)
+        self.assertIn(f"task:crm-auto:lifecycle_invoice_waiting_payment:{lifecycle.pk}", keys)
+        self.assertNotIn(f"task:crm-auto:low_stock:{low.pk}", keys)
+
+    def test_failed_evaluation_keeps_records_queued(self):
+        item = InventoryItem.objects.create(name="Retry Item", quantity=Decimal("1"), reorder_level=Decimal("5"))
+
+        with patch.dict(
+            "crm.services.automation_engine.AUTOMATION_RECORD_EVALUATORS",
+            {AutomationDirtyRecord.RECORD_INVENTORY: lambda *args, **kwargs: 1 / 0},
+        ):
+            with self.assertRaises(ZeroDivisionError):
+                process_automation_dirty_records()
+
+        self.assertTrue(
+            AutomationDirtyRecord.objects.filter(
+                record_type=AutomationDirtyRecord.RECORD_INVENTORY,
+                record_id=item.pk,
+            ).exists()
+        )
+
+    def test_payment_marks_parent_invoice_dirty(self):
+        invoice = Invoice.objects.create(
+            invoice_number="INV-AUTO-2",
+            customer=self.customer,
+            currency="CAD",
+            total_amount=Decimal("100.00"),
+            status="sent",
+        )
+        AutomationDirtyRecord.objects.all().delete()
+
+        InvoicePayment.objects.create(invoice=invoice, amount=Decimal("10.00"), currency="CAD", side="CA")
+
+        self.assertTrue(
+            AutomationDirtyRecord.objects.filter(
+                record_type=AutomationDirtyRecord.RECORD_INVOICE,
+                record_id=invoice.pk,
+            ).exists()
+        )
+
+    def test_processing_resolves_notifications_whose_condition_cleared(self):
+        item = InventoryItem.objects.create(name="Refilled Item", quantity=Decimal("20"), reorder_level=Decimal("5"))
+        cleared = AutomationNotification.objects.create(source_key=f"crm-auto:low_stock:{item.pk}", title="Low stock")
+        other = AutomationNotification.objects.create(source_key="crm-auto:low_stock:999999", title="Other item")
+
+        result = process_automation_dirty_records()
+
+        self.assertEqual(result["error"], "")
+        cleared.refresh_from_db()
+        other.refresh_from_db()
+        self.assertTrue(cleared.is_resolved)
+        self.assertIsNotNone(cleared.resolved_at)
+        self.assertFalse(other.is_resolved)
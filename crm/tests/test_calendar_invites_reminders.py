@@ -1,4 +1,5 @@
 from datetime import timedelta
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core import mail
@@ -7,6 +8,7 @@ from django.urls import reverse
 from django.utils import timezone
 
 from crm.models import Event
+from crm.services.calendar_notifications import dispatch_due_event_reminders
 
 
 @override_settings(
@@ -159,3 +161,68 @@ class CalendarInviteReminderTests(TestCase):
         response = self.client.get(reverse("calendar_list"))
         reminder_ids = [item.pk for item in response.context["upcoming_reminders"]]
         self.assertNotIn(event.pk, reminder_ids)
+
+    def _reminder_event(self, minutes_to_start=30, **fields):
+        return Event.objects.create(
+            title=fields.pop("title", "Trim Approval"),
+            start_datetime=timezone.now() + timedelta(minutes=minutes_to_start),
+            created_by=self.creator,
+            assigned_to_email="merchandiser@example.com",
+            reminder_minutes_before=60,
+            **fields,
+        )
+
+    def test_save_keeps_remind_at_in_step_with_start_and_reminder(self):
+        event = self._reminder_event(minutes_to_start=120)
+        self.assertEqual(event.remind_at, event.start_datetime - timedelta(minutes=60))
+
+        event.start_datetime += timedelta(hours=1)
+        event.save(update_fields=["start_datetime"])
+        event.refresh_from_db()
+        self.assertEqual(event.remind_at, event.start_datetime - timedelta(minutes=60))
+
+        event.assigned_to_email = ""
+        event.save()
+        event.refresh_from_db()
+        self.assertIsNone(event.remind_at)
+
+    def test_dispatcher_sends_due_reminders_once_and_calendar_page_sends_none(self):
+        due = self._reminder_event()
+        self._reminder_event(minutes_to_start=180, title="Later Meeting")
+        self._reminder_event(minutes_to_start=-5, title="Already Started")
+        self.client.force_login(self.creator)
+
+        self.client.get(reverse("calendar_list"))
+        self.assertEqual(len(mail.outbox), 0)
+
+        result = dispatch_due_event_reminders(batch_size=1)
+
+        self.assertEqual((result["sent"], result["failed"], result["error"]), (1, 0, ""))
+        self.assertEqual([message.subject for message in mail.outbox], ["Reminder: Trim Approval"])
+        self.assertEqual(mail.outbox[0].to, ["merchandiser@example.com"])
+        due.refresh_from_db()
+        self.assertTrue(due.reminder_sent)
+        self.assertEqual(due.reminder_claim_token, "")
+        self.assertEqual(dispatch_due_event_reminders()["sent"], 0)
+
+    def test_dispatcher_skips_rows_claimed_by_another_worker_until_the_claim_is_stale(self):
+        event = self._reminder_event()
+        Event.objects.filter(pk=event.pk).update(reminder_claim_token="other-worker", reminder_claimed_at=timezone.now())
+
+        self.assertEqual(dispatch_due_event_reminders()["sent"], 0)
+
+        Event.objects.filter(pk=event.pk).update(reminder_claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(dispatch_due_event_reminders()["sent"], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_send_releases_claim_for_the_next_run(self):
+        event = self._reminder_event()
+
+        with patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("smtp down")):
+            result = dispatch_due_event_reminders()
+
+        self.assertEqual((result["sent"], result["failed"]), (0, 1))
+        event.refresh_from_db()
+        self.assertFalse(event.reminder_sent)
+        self.assertEqual(event.reminder_claim_token, "")
+        self.assertEqual(dispatch_due_event_reminders()["sent"], 1)
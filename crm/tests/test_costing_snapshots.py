@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from crm.models import CostingCalculationSnapshot, CostingHeader, CostingLineItem, CostingSMV, Customer, Lead, Opportunity
+from crm.services.costing_engine import compute_costing, compute_costings, costing_summaries
+
+
+class CostingSnapshotTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(account_brand="Snapshot Brand")
+        self.opportunity = Opportunity.objects.create(
+            lead=Lead.objects.create(account_brand="Snapshot Brand"),
+            customer=self.customer,
+            opportunity_id="OPP-SNAP-1",
+        )
+
+    def _costing(self, unit_price="4"):
+        costing = CostingHeader.objects.create(
+            opportunity=self.opportunity,
+            customer=self.customer,
+            order_quantity=100,
+            currency="BDT",
+            target_margin_percent=Decimal("20"),
+        )
+        CostingLineItem.objects.create(
+            costing=costing,
+            category="fabric",
+            item_name="Jersey",
+            unit_price=Decimal(unit_price),
+            consumption_value=Decimal("1"),
+        )
+        CostingSMV.objects.create(costing=costing, machine_smv=Decimal("10"), cpm=Decimal("0.1"))
+        return costing
+
+    def _summaries(self):
+        return costing_summaries(CostingHeader.objects.select_related("customer", "opportunity").order_by("pk"))
+
+    def test_summaries_match_full_calculation_and_are_stored(self):
+        costing = self._costing()
+
+        summary = self._summaries()[0]
+        calc = compute_costing(costing.id)
+
+        for key in ("total_cost_per_piece", "fob_per_piece", "margin_percent", "total_profit_order"):
+            self.assertEqual(summary[key], calc[key])
+        self.assertEqual(summary["display"]["margin_percent"], calc["display"]["margin_percent"])
+        self.assertTrue(CostingCalculationSnapshot.objects.filter(costing=costing).exists())
+
+    def test_stored_snapshots_are_read_without_recomputing(self):
+        self._costing()
+        self._summaries()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._summaries()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_batch_query_count_does_not_grow_with_rows(self):
+        self._costing()
+        with CaptureQueriesContext(connection) as small:
+            compute_costings(CostingHeader.objects.all())
+        for price in ("5", "6", "7"):
+            self._costing(price)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(len(compute_costings(CostingHeader.objects.all())), 4)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_line_item_change_drops_the_snapshot(self):
+        costing = self._costing()
+        before = self._summaries()[0]["total_cost_per_piece"]
+
+        line = costing.line_items.get()
+        line.unit_price = Decimal("9")
+        line.save()
+        self.assertFalse(CostingCalculationSnapshot.objects.filter(costing=costing).exists())
+
+        self.assertGreater(self._summaries()[0]["total_cost_per_piece"], before)
+        line.delete()
+        self.assertFalse(CostingCalculationSnapshot.objects.filter(costing=costing).exists())
@@ -556,6 +556,50 @@ class ChatterMentionFeatureTests(TestCase):
         self.assertContains(response, "📌 Pinned")
         self.assertNotContains(response, "refat@example.com")
 
+    def _bulk_comments(self, count, **fields):
+        LeadComment.objects.bulk_create(
+            LeadComment(author="Refat", author_user=self.sender, content=f"Feed note {index}", **fields)
+            for index in range(count)
+        )
+
+    def test_chatter_feed_pages_by_cursor_without_gaps_or_repeats(self):
+        self._bulk_comments(35, lead=self.lead)
+        # identical timestamps make the id tiebreak decide the order
+        LeadComment.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        response = self.client.get(reverse("chatter_feed"), {"source": "lead"})
+        first_page = list(response.context["comments"])
+        self.assertEqual(len(first_page), 30)
+        self.assertTrue(response.context["next_cursor"])
+
+        more = self.client.get(
+            reverse("chatter_feed_more"),
+            {"source": "lead", "cursor": response.context["next_cursor"]},
+        )
+        self.assertEqual(more.status_code, 200)
+        self.assertEqual(more.json()["count"], 5)
+        self.assertEqual(more.json()["next_cursor"], "")
+        seen = {comment.content for comment in first_page}
+        for index in range(35):
+            if f"Feed note {index}" not in seen:
+                self.assertIn(f"Feed note {index}<", more.json()["html"])
+        self.assertEqual(len(seen), 30)
+
+        production = self.client.get(reverse("chatter_feed"), {"source": "opportunity"})
+        self.assertEqual(list(production.context["comments"]), [])
+        invalid = self.client.get(reverse("chatter_feed_more"), {"cursor": "not-a-cursor"})
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_chatter_feed_render_cost_does_not_grow_with_history(self):
+        self._bulk_comments(3, lead=self.lead)
+        self.client.get(reverse("chatter_feed"))
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("chatter_feed"))
+        self._bulk_comments(80, lead=self.lead)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("chatter_feed"))
+        self.assertEqual(len(response.context["comments"]), 30)
+        self.assertEqual(len(many), len(few))
+
     @patch("django.core.mail.send_mail")
     def test_new_mention_creates_one_crm_notification_and_no_email(self, send_mail):
         response = self.client.post(
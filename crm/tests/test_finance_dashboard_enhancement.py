@@ -160,6 +160,19 @@ class ExecutiveFinanceDashboardEnhancementTests(TestCase):
         ]
         self.assertEqual(len(exchange_rate_queries), 1)
 
+    def test_kpi_scorecard_loads_only_unpaid_payables(self):
+        before = self.client.get(reverse("kpi_scorecard_dashboard")).context["ap_row_count"]
+        AccountingEntry.objects.filter(direction="OUT", currency="CAD").update(status="Paid")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("kpi_scorecard_dashboard"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["ap_row_count"], before - 1)
+        self.assertTrue(
+            any("crm_accountingentry" in query["sql"] and "'PAID'" in query["sql"] for query in queries.captured_queries)
+        )
+
     def test_monthly_receivable_and_payable_rows_keep_currencies_separate(self):
         receivables = self.client.get(reverse("accounts_receivable_dashboard"))
         payables = self.client.get(reverse("accounts_payable_dashboard"))
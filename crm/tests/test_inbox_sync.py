@@ -0,0 +1,161 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from crm.models import EmailInboxConfig, EmailMessage, Lead, MailboxSyncState
+from crm.services.email_sync import InboxMessageStore, sync_mailbox
+from crm.services.imap_sync import sync_imap_mailbox
+
+
+def _raw(subject, body="Hello from a buyer.", sender="Buyer <buyer@example.com>"):
+    return (
+        f"Subject: {subject}\r\nFrom: {sender}\r\nTo: lead@example.com\r\n"
+        f"Content-Type: text/plain; charset=utf-8\r\n\r\n{body}\r\n"
+    ).encode("utf-8")
+
+
+class FakeIMAP:
+    def __init__(self, messages, uid_validity=7):
+        self.messages = dict(messages)
+        self.uid_validity = uid_validity
+        self.commands = []
+        self._untagged = {}
+
+    def select(self, folder, readonly=False):
+        self.commands.append(("SELECT", folder))
+        uid_next = max(self.messages, default=0) + 1
+        self._untagged = {"UIDVALIDITY": [str(self.uid_validity).encode()], "UIDNEXT": [str(uid_next).encode()]}
+        return "OK", [str(len(self.messages)).encode()]
+
+    def response(self, code):
+        return code, self._untagged.pop(code, [None])
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        if command == "SEARCH":
+            start = int(args[1].split()[1].split(":")[0])
+            uids = [uid for uid in sorted(self.messages) if uid >= start] or [max(self.messages)]
+            return "OK", [" ".join(str(uid) for uid in uids).encode()]
+        data = []
+        for seq, uid in enumerate(args[0].split(","), start=1):
+            raw = self.messages[int(uid)]
+            data.append((f"{seq} (BODY[]<0> {{{len(raw)}}}".encode(), raw))
+            data.append(f" UID {uid})".encode())
+        return "OK", data
+
+    def logout(self):
+        pass
+
+
+@override_settings(CRM_IMAP_FETCH_BATCH_SIZE=2)
+class InboxSyncTests(TestCase):
+    config = {
+        "label": "lead",
+        "imap_host": "imap.example.com",
+        "imap_port": 993,
+        "username": "lead@example.com",
+        "password": "secret",
+    }
+
+    def _sync(self, imap, **options):
+        store = InboxMessageStore("lead", "lead@example.com")
+        return sync_imap_mailbox(self.config, store, imap=imap, **options)
+
+    def test_first_sync_takes_newest_messages_in_batched_fetches(self):
+        imap = FakeIMAP({uid: _raw(f"Order {uid}") for uid in range(1, 6)})
+
+        result = self._sync(imap, limit=4)
+
+        self.assertEqual((result["fetched"], result["saved"], result["last_uid"]), (4, 4, 5))
+        self.assertEqual([command[0] for command in imap.commands], ["SELECT", "SEARCH", "FETCH", "FETCH"])
+        self.assertEqual(imap.commands[2][1:], ("2,3", "(UID BODY.PEEK[]<0.1000000>)"))
+        self.assertEqual(sorted(EmailMessage.objects.values_list("imap_uid", flat=True)), ["2", "3", "4", "5"])
+        state = MailboxSyncState.objects.get(label="lead", mailbox="lead@example.com")
+        self.assertEqual((state.uid_validity, state.last_uid), (7, 5))
+
+    def test_steady_state_sync_is_one_round_trip_and_new_mail_is_searched_from_the_high_water_mark(self):
+        EmailInboxConfig.objects.create(label="lead", **{k: v for k, v in self.config.items() if k != "label"})
+        imap = FakeIMAP({1: _raw("Order 1"), 2: _raw("Order 2")})
+
+        with patch("crm.services.imap_sync.open_imap", return_value=imap):
+            call_command("sync_inboxes", stdout=StringIO())
+            imap.commands.clear()
+            out = StringIO()
+            call_command("sync_inboxes", stdout=out)
+
+            self.assertEqual(imap.commands, [("SELECT", "INBOX")])
+            self.assertIn("0 new of 0 fetched, 0 failed, last UID 2, 1 IMAP round-trip(s)", out.getvalue())
+
+            imap.messages[3] = _raw("Order 3")
+            imap.commands.clear()
+            call_command("sync_inboxes", stdout=StringIO())
+
+        self.assertEqual(imap.commands[1], ("SEARCH", None, "UID 3:*"))
+        self.assertEqual(imap.commands[2][1], "3")
+        self.assertEqual(EmailMessage.objects.count(), 3)
+
+    def test_uidvalidity_change_rescans_without_refetching_stored_messages(self):
+        imap = FakeIMAP({1: _raw("Order 1"), 2: _raw("Order 2")})
+        self._sync(imap)
+
+        imap.uid_validity = 8
+        imap.messages[3] = _raw("Order 3")
+        imap.commands.clear()
+        result = self._sync(imap)
+
+        self.assertEqual(imap.commands[1], ("SEARCH", None, "UID 1:*"))
+        self.assertEqual(imap.commands[2][1], "3")
+        self.assertEqual((result["fetched"], result["saved"]), (1, 1))
+        self.assertEqual(MailboxSyncState.objects.get().uid_validity, 8)
+
+    def test_failed_save_holds_the_high_water_mark_below_that_message(self):
+        imap = FakeIMAP({uid: _raw(f"Order {uid}") for uid in range(1, 6)})
+        original_save = InboxMessageStore.save
+
+        def flaky_save(store, uid, message):
+            if uid == "2":
+                raise RuntimeError("database is locked")
+            return original_save(store, uid, message)
+
+        with patch.object(InboxMessageStore, "save", flaky_save):
+            result = self._sync(imap)
+
+        self.assertEqual((result["saved"], result["failed"], result["last_uid"]), (4, 1, 1))
+
+        imap.commands.clear()
+        result = self._sync(imap)
+
+        self.assertEqual(imap.commands[1], ("SEARCH", None, "UID 2:*"))
+        self.assertEqual(imap.commands[2][1], "2")
+        self.assertEqual((result["saved"], result["last_uid"]), (1, 5))
+
+    @override_settings(
+        EMAIL_SYNC={
+            "LEAD_INBOX": {
+                "label": "lead",
+                "imap_host": "imap.example.com",
+                "imap_port": 993,
+                "username": "lead@example.com",
+                "password": "secret",
+            }
+        }
+    )
+    def test_sync_mailbox_uses_the_same_engine_and_creates_form_leads(self):
+        form = _raw(
+            "New Form Entry #952",
+            body="You have a new website form submission\nName: Jane Roe\nEmail Address: jane@brand.example\nCompany Name: Brand Co",
+            sender="Website <forms@example.com>",
+        )
+        imap = FakeIMAP({10: form})
+
+        with patch("crm.services.imap_sync.open_imap", return_value=imap):
+            result = sync_mailbox("LEAD_INBOX")
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["saved"], 1)
+        message = EmailMessage.objects.get(imap_uid="10")
+        self.assertTrue(message.is_form_entry)
+        self.assertEqual(message.from_email, "jane@brand.example")
+        self.assertTrue(Lead.objects.filter(email="jane@brand.example", lead_id="L952").exists())
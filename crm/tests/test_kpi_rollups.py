@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from crm.models import AccountingEntry, KpiRollup, KpiRollupDay, Lead, Opportunity
+from crm.services.kpi_rollups import (
+    DIMENSION_BDT,
+    KPI_FAMILIES,
+    KPI_FAMILY_ACCOUNTING,
+    KPI_FAMILY_LEADS,
+    METRIC_ACCOUNTING_IN,
+    METRIC_ACCOUNTING_OUT,
+    METRIC_ACTIVE_LEADS,
+    METRIC_LEADS,
+    KpiSnapshot,
+    accounting_balance_cad,
+    refresh_dirty_kpi_rollups,
+    refresh_kpi_rollups,
+)
+from crm.services.ledger_balances import rebuild_period_balances
+
+
+class KpiRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.yesterday = cls.today - timedelta(days=1)
+        cls.lead = Lead.objects.create(account_brand="Rollup Brand", source="Website Inquiry")
+        Lead.objects.filter(pk=cls.lead.pk).update(created_date=cls.yesterday)
+        Lead.objects.create(account_brand="Referral Brand", source="Referral")
+        cls._entry(cls.yesterday, "IN", "CAD", "100.00")
+        cls._entry(cls.yesterday, "IN", "BDT", "9000.00", side="BD", rate_to_cad="90")
+        cls._entry(cls.today, "OUT", "CAD", "40.00")
+        cls._entry(cls.today, "IN", "CAD", "500.00", main_type="TRANSFER")
+
+    @classmethod
+    def _entry(cls, day, direction, currency, amount, side="CA", rate_to_cad="1", main_type="INCOME"):
+        return AccountingEntry.objects.create(
+            date=day,
+            side=side,
+            direction=direction,
+            main_type=main_type,
+            currency=currency,
+            amount_original=Decimal(amount),
+            rate_to_cad=Decimal(rate_to_cad),
+        )
+
+    def test_refresh_stores_daily_rows_that_match_live_values(self):
+        live = KpiSnapshot(KPI_FAMILIES, self.yesterday, self.today)
+
+        result = refresh_kpi_rollups(self.yesterday, self.today)
+
+        self.assertEqual(result["error"], "")
+        self.assertEqual(KpiRollupDay.objects.count(), 2 * len(KPI_FAMILIES))
+        self.assertEqual(
+            KpiRollup.objects.get(date=self.yesterday, side="BD", metric=METRIC_ACCOUNTING_IN, dimension=DIMENSION_BDT).value,
+            Decimal("9000.00"),
+        )
+        stored = KpiSnapshot(KPI_FAMILIES, self.yesterday, self.today)
+        with self.assertNumQueries(0):
+            self.assertEqual(stored.count(METRIC_LEADS), 2)
+            self.assertEqual(stored.by_dimension(METRIC_ACTIVE_LEADS), live.by_dimension(METRIC_ACTIVE_LEADS))
+            self.assertEqual(stored.amount_cad(METRIC_ACCOUNTING_IN), Decimal("200.00"))
+            self.assertEqual(stored.amount_cad(METRIC_ACCOUNTING_IN, cad_to_bdt=Decimal("100")), Decimal("190.00"))
+            self.assertEqual(stored.amount_cad(METRIC_ACCOUNTING_IN, side="CA"), Decimal("100.00"))
+            self.assertEqual(stored.amount_cad(METRIC_ACCOUNTING_OUT), Decimal("40.00"))
+
+    def test_saves_mark_refreshed_days_dirty_and_readers_fall_back_to_live_values(self):
+        refresh_kpi_rollups(self.yesterday, self.today, [KPI_FAMILY_LEADS, KPI_FAMILY_ACCOUNTING])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Opportunity.objects.create(lead=self.lead, stage="Prospecting")
+            self._entry(self.yesterday, "OUT", "CAD", "25.00")
+
+        dirty = set(KpiRollupDay.objects.filter(dirty_at__gte=timezone.now() - timedelta(minutes=1)).values_list("family", "date"))
+        self.assertIn((KPI_FAMILY_LEADS, self.yesterday), dirty)
+        self.assertIn((KPI_FAMILY_ACCOUNTING, self.yesterday), dirty)
+        snapshot = KpiSnapshot((KPI_FAMILY_LEADS, KPI_FAMILY_ACCOUNTING), self.yesterday, self.today)
+        self.assertEqual(snapshot.count(METRIC_ACTIVE_LEADS), 1)
+        self.assertEqual(snapshot.amount_cad(METRIC_ACCOUNTING_OUT), Decimal("65.00"))
+
+        result = refresh_dirty_kpi_rollups()
+
+        self.assertEqual(result["days"], 2)
+        self.assertFalse(KpiRollup.objects.filter(metric=METRIC_ACTIVE_LEADS, date=self.yesterday).exists())
+        self.assertEqual(
+            KpiRollup.objects.get(date=self.yesterday, side="CA", metric=METRIC_ACCOUNTING_OUT).value,
+            Decimal("25.00"),
+        )
+
+    def test_balance_combines_period_balances_with_unrefreshed_months(self):
+        self._entry(self.today - timedelta(days=30), "IN", "CAD", "10.00")
+        rebuild_period_balances()
+        self._entry(self.today - timedelta(days=400), "OUT", "CAD", "5.00")
+
+        self.assertEqual(accounting_balance_cad(self.today), Decimal("165.00"))
+        self.assertEqual(accounting_balance_cad(self.today, side="BD"), Decimal("100.00"))
+        self.assertEqual(accounting_balance_cad(self.today, side="BD", cad_to_bdt="120"), Decimal("75.00"))
+        self.assertEqual(accounting_balance_cad(self.today - timedelta(days=60)), Decimal("-5.00"))
+        self.assertEqual(accounting_balance_cad(self.today - timedelta(days=401)), Decimal("0"))
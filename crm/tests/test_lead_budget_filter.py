@@ -0,0 +1,83 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from crm.models import Lead
+from crm.services.lead_budget import parse_budget_range
+
+
+class LeadBudgetParsingTests(TestCase):
+    def test_parse_budget_range_handles_common_formats(self):
+        self.assertEqual(parse_budget_range("$5,000"), (Decimal("5000.00"), Decimal("5000.00"), "USD"))
+        self.assertEqual(parse_budget_range("5k - 10k CAD"), (Decimal("5000.00"), Decimal("10000.00"), "CAD"))
+        self.assertEqual(parse_budget_range("15000-20000 tk"), (Decimal("15000.00"), Decimal("20000.00"), "BDT"))
+        self.assertEqual(parse_budget_range("500pcs"), (Decimal("500.00"), Decimal("500.00"), ""))
+        self.assertEqual(parse_budget_range("to be confirmed"), (None, None, ""))
+        self.assertEqual(parse_budget_range(""), (None, None, ""))
+
+    def test_save_keeps_normalized_budget_in_sync(self):
+        lead = Lead.objects.create(account_brand="Budget Brand", budget="$2,500")
+        self.assertEqual(lead.budget_min, Decimal("2500.00"))
+        self.assertEqual(lead.budget_currency, "USD")
+
+        lead.budget = "3k-4k"
+        lead.save(update_fields=["budget"])
+        lead.refresh_from_db()
+        self.assertEqual(lead.budget_min, Decimal("3000.00"))
+        self.assertEqual(lead.budget_max, Decimal("4000.00"))
+        self.assertEqual(lead.budget_currency, "")
+
+    def test_backfill_command_populates_existing_rows(self):
+        lead = Lead.objects.create(account_brand="Legacy Budget", budget="7500 CAD")
+        Lead.objects.filter(pk=lead.pk).update(budget_min=None, budget_max=None, budget_currency="")
+
+        out = StringIO()
+        call_command("backfill_lead_budgets", stdout=out)
+
+        lead.refresh_from_db()
+        self.assertEqual(lead.budget_min, Decimal("7500.00"))
+        self.assertEqual(lead.budget_currency, "CAD")
+        self.assertIn("Updated 1 leads", out.getvalue())
+
+
+class LeadBudgetListFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            username="budget-filter-admin",
+            email="budget-filter@example.com",
+            password="test-pass",
+        )
+        cls.small = Lead.objects.create(lead_id="LEAD-BUDGET-S", account_brand="Small", budget="$900")
+        cls.ranged = Lead.objects.create(lead_id="LEAD-BUDGET-R", account_brand="Ranged", budget="4k-8k")
+        cls.large = Lead.objects.create(lead_id="LEAD-BUDGET-L", account_brand="Large", budget="25000")
+        cls.unknown = Lead.objects.create(lead_id="LEAD-BUDGET-U", account_brand="Unknown", budget="TBD")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_value_filters_run_as_queryset_and_match_overlapping_ranges(self):
+        response = self.client.get(
+            reverse("leads_list"),
+            {"view": "all", "archive": "all", "value_min": "5000", "value_max": "20000"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context["page_obj"]
+        self.assertNotIsInstance(page_obj.paginator.object_list, list)
+        ids = {lead.pk for lead in page_obj.object_list}
+        self.assertEqual(ids, {self.ranged.pk})
+        self.assertEqual(response.context["assignee_summary"][0]["count"], 1)
+
+    def test_value_filters_read_k_suffix_like_stored_budgets(self):
+        response = self.client.get(
+            reverse("leads_list"),
+            {"view": "all", "archive": "all", "value_min": "5k", "value_max": "20k"},
+        )
+
+        ids = {lead.pk for lead in response.context["page_obj"].object_list}
+        self.assertEqual(ids, {self.ranged.pk})
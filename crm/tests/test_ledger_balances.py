@@ -0,0 +1,143 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from crm.models import (
+    AccountingEntry,
+    AccountingMonthClose,
+    AccountingPeriodBalance,
+    AccountingPeriodState,
+    Customer,
+    ExchangeRate,
+)
+from crm.services.ledger_balances import mark_periods_dirty, period_buckets, rebuild_period_balances
+
+
+class LedgerBalanceTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(account_brand="Ledger Client", contact_name="Ledger Buyer")
+        ExchangeRate.objects.create(cad_to_bdt=Decimal("100"))
+
+    def _entry(self, day, direction, main_type, currency, amount, rate_to_cad="1", side="CA", **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return AccountingEntry.objects.create(
+                date=day,
+                side=side,
+                direction=direction,
+                main_type=main_type,
+                sub_type=extra.pop("sub_type", ""),
+                currency=currency,
+                amount_original=Decimal(amount),
+                rate_to_cad=Decimal(rate_to_cad),
+                customer=extra.pop("customer", self.customer),
+                **extra,
+            )
+
+    def _balance(self, month, **filters):
+        return AccountingPeriodBalance.objects.get(month=month, **filters)
+
+    def test_saving_and_deleting_entries_keep_their_month_current(self):
+        entry = self._entry(date(2026, 3, 5), "IN", "INCOME", "CAD", "100.00")
+        self._entry(date(2026, 3, 20), "IN", "INCOME", "CAD", "50.00")
+
+        balance = self._balance(date(2026, 3, 1), side="CA", direction="IN")
+        self.assertEqual((balance.entry_count, balance.amount_cad), (2, Decimal("150.00")))
+        self.assertEqual(balance.customer, self.customer)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.date = date(2026, 4, 2)
+            entry.save()
+        self.assertEqual(self._balance(date(2026, 3, 1), side="CA").amount_cad, Decimal("50.00"))
+        self.assertEqual(self._balance(date(2026, 4, 1), side="CA").amount_cad, Decimal("100.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertFalse(AccountingPeriodBalance.objects.filter(month=date(2026, 4, 1)).exists())
+
+    def test_buckets_match_entries_for_partial_and_unrefreshed_months(self):
+        self._entry(date(2026, 1, 10), "IN", "INCOME", "CAD", "100.00")
+        self._entry(date(2026, 2, 3), "IN", "INCOME", "BDT", "5000.00", rate_to_cad="80", side="BD")
+        self._entry(date(2026, 2, 25), "OUT", "EXPENSE", "CAD", "30.00", sub_type="Rent")
+        # Written without signals, so February is summed live once marked dirty.
+        AccountingEntry.objects.bulk_create(
+            [
+                AccountingEntry(
+                    date=date(2026, 2, 26),
+                    side="CA",
+                    direction="OUT",
+                    main_type="EXPENSE",
+                    currency="CAD",
+                    amount_original=Decimal("5.00"),
+                    amount_cad=Decimal("5.00"),
+                    rate_to_cad=Decimal("1"),
+                )
+            ]
+        )
+        mark_periods_dirty([(date(2026, 2, 1), "CA")])
+
+        buckets = period_buckets(date(2026, 1, 15), date(2026, 2, 28))
+        totals = {}
+        for bucket in buckets:
+            key = (bucket["direction"], bucket["currency"])
+            totals[key] = totals.get(key, Decimal("0")) + bucket["amount_original"]
+
+        self.assertEqual(
+            totals,
+            {("IN", "BDT"): Decimal("5000.00"), ("OUT", "CAD"): Decimal("35.00")},
+        )
+
+    def test_closed_month_keeps_its_balances_until_reopened(self):
+        self._entry(date(2026, 5, 4), "OUT", "COGS", "CAD", "40.00")
+        close = AccountingMonthClose.objects.create(year=2026, month=5, side="CA", is_closed=True)
+        self.assertIsNotNone(AccountingPeriodState.objects.get(month=date(2026, 5, 1), side="CA").frozen_at)
+
+        self._entry(date(2026, 5, 9), "OUT", "COGS", "CAD", "60.00")
+        self.assertEqual(self._balance(date(2026, 5, 1), side="CA").amount_cad, Decimal("40.00"))
+        self.assertEqual(rebuild_period_balances()["error"], "")
+        self.assertEqual(self._balance(date(2026, 5, 1), side="CA").amount_cad, Decimal("40.00"))
+
+        close.is_closed = False
+        close.save()
+        self.assertEqual(self._balance(date(2026, 5, 1), side="CA").amount_cad, Decimal("100.00"))
+
+    def test_dashboards_read_the_same_totals_from_balances(self):
+        user = get_user_model().objects.create_superuser(username="ledger-admin", email="ledger@example.com", password="pw")
+        self.client.force_login(user)
+        self._entry(date(2026, 6, 2), "IN", "INCOME", "CAD", "300.00")
+        self._entry(date(2026, 6, 8), "IN", "INCOME", "BDT", "10000.00", rate_to_cad="90", side="BD")
+        self._entry(date(2026, 6, 9), "OUT", "COGS", "USD", "50.00", rate_to_cad="1.40")
+        self._entry(date(2026, 7, 1), "OUT", "EXPENSE", "CAD", "20.00", sub_type="Rent")
+        self._entry(date(2026, 7, 1), "IN", "TRANSFER", "CAD", "999.00")
+        params = {"date_from": "2026-06-01", "date_to": "2026-07-31"}
+
+        with self.subTest("profit and loss"):
+            response = self.client.get(reverse("profit_loss_dashboard"), params)
+            self.assertEqual(response.context["total_revenue"], Decimal("400.00"))
+            self.assertEqual(response.context["total_cogs"], Decimal("70.00"))
+            self.assertEqual(response.context["operating_expenses"], Decimal("20.00"))
+            self.assertEqual(response.context["entry_count"], 4)
+            self.assertEqual(response.context["revenue_by_customer"][0]["label"], "Ledger Client")
+            self.assertEqual(
+                [(row["label"], row["amount"]) for row in response.context["opex_by_category"]], [("Rent", Decimal("20.00"))]
+            )
+
+        with self.subTest("balance sheet retained earnings"):
+            response = self.client.get(reverse("balance_sheet_dashboard"), {"date_from": "2026-07-01"})
+            self.assertEqual(response.context["retained_earnings"], Decimal("330.00"))
+
+        with self.subTest("cash flow opening balance"):
+            response = self.client.get(reverse("cash_flow_dashboard"), {"date_from": "2026-07-01"})
+            self.assertEqual(response.context["opening_cash_balance"], Decimal("330.00"))
+            self.assertEqual(response.context["opening_entry_count"], 3)
+
+        with self.subTest("budget vs actual"):
+            response = self.client.get(reverse("budget_vs_actual_dashboard"), {"year": "2026", "month": "6"})
+            self.assertEqual(response.context["actual_revenue"], Decimal("400.00"))
+            self.assertEqual(response.context["actual_expenses"], Decimal("70.00"))
+
+        with self.subTest("customer filter reads entries"):
+            response = self.client.get(reverse("profit_loss_dashboard"), {**params, "customer": str(self.customer.pk)})
+            self.assertEqual(response.context["total_revenue"], Decimal("400.00"))
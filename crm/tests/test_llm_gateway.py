@@ -0,0 +1,157 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from crm.ai import gateway
+from crm.models import AISystemLog, LLMResponseCache
+
+
+def _messages(prompt):
+    return [{"role": "system", "content": "You are terse."}, {"role": "user", "content": prompt}]
+
+
+@override_settings(CRM_LLM_BACKEND="stub", CRM_LLM_MODEL="stub-model", CRM_LLM_CACHE_TTL_SECONDS=600)
+class LLMGatewayTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("llm-user", password="test-pass")
+
+    def setUp(self):
+        self.backend = gateway.get_backend()
+        self.backend.calls.clear()
+
+    def test_chat_caches_by_prompt_hash_and_logs_tokens(self):
+        first = gateway.chat(_messages("Summarize fabric trends"), feature="test_feature", user=self.user)
+        second = gateway.chat(_messages("Summarize fabric trends"), feature="test_feature", user=self.user)
+        gateway.chat(_messages("Summarize fabric trends"), feature="test_feature", max_tokens=50)
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.text, first.text)
+        self.assertEqual(len(self.backend.calls), 2)
+        self.assertEqual(LLMResponseCache.objects.get(key=first.key).hit_count, 1)
+        log = AISystemLog.objects.filter(feature="test_feature", created_by=self.user).get()
+        self.assertEqual((log.provider, log.model_name, log.level), ("local", "stub-model", "info"))
+        self.assertEqual((log.prompt_tokens, log.completion_tokens), (first.prompt_tokens, first.completion_tokens))
+        self.assertGreater(log.prompt_tokens, 0)
+        self.assertIsNotNone(log.latency_ms)
+
+    def test_identical_concurrent_prompts_share_one_backend_call(self):
+        follower_waiting = threading.Event()
+        follower_results = []
+
+        class TrackedFlight(gateway._InFlight):
+            def __init__(self):
+                super().__init__()
+                wait = self.done.wait
+
+                def tracked_wait(timeout=None):
+                    follower_waiting.set()
+                    return wait(timeout)
+
+                self.done.wait = tracked_wait
+
+        original_complete = self.backend.complete
+
+        def slow_complete(**request):
+            follower = threading.Thread(
+                target=lambda: follower_results.append(gateway.chat(_messages("Same prompt"), feature="test", cache_ttl=0))
+            )
+            follower.start()
+            follower_waiting.wait(5)
+            self.follower = follower
+            return original_complete(**request)
+
+        with patch.object(gateway, "_InFlight", TrackedFlight), patch.object(self.backend, "complete", side_effect=slow_complete):
+            leader = gateway.chat(_messages("Same prompt"), feature="test", cache_ttl=0)
+            self.follower.join(5)
+
+        self.assertEqual(len(self.backend.calls), 1)
+        self.assertEqual(follower_results[0].text, leader.text)
+        self.assertTrue(follower_results[0].cached)
+        self.assertEqual(gateway._in_flight, {})
+
+    def test_followers_get_the_leaders_unexpected_error(self):
+        flight = gateway._InFlight()
+        gateway._in_flight[gateway.request_key(gateway._request(_messages("Broken"), None, None, None))] = flight
+        follower_errors = []
+
+        def follow():
+            try:
+                gateway.chat(_messages("Broken"), feature="test", cache_ttl=0)
+            except Exception as exc:
+                follower_errors.append(exc)
+
+        follower = threading.Thread(target=follow)
+        follower.start()
+        flight.error = RuntimeError("database is locked")
+        flight.done.set()
+        follower.join(5)
+        gateway._in_flight.clear()
+
+        self.assertIsInstance(follower_errors[0], RuntimeError)
+
+        flights = []
+
+        class RecordedFlight(gateway._InFlight):
+            def __init__(self):
+                super().__init__()
+                flights.append(self)
+
+        with (
+            patch.object(gateway, "_InFlight", RecordedFlight),
+            patch.object(gateway, "_execute", side_effect=RuntimeError("boom")),
+        ):
+            with self.assertRaises(RuntimeError):
+                gateway.chat(_messages("Broken"), feature="test", cache_ttl=0)
+        self.assertIsInstance(flights[0].error, RuntimeError)
+        self.assertEqual(gateway._in_flight, {})
+
+    def test_cache_evicts_least_recently_used_answers(self):
+        with override_settings(CRM_LLM_CACHE_MAX_ENTRIES=2):
+            oldest = gateway.chat(_messages("one"), feature="test")
+            gateway.chat(_messages("two"), feature="test")
+            gateway.chat(_messages("three"), feature="test")
+
+        self.assertEqual(LLMResponseCache.objects.count(), 2)
+        self.assertFalse(LLMResponseCache.objects.filter(key=oldest.key).exists())
+
+    def test_world_dashboard_queues_the_update_once_and_the_page_polls_for_it(self):
+        self.client.force_login(self.user)
+
+        with patch("crm.tasks.run_llm_request_task.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(reverse("world_dashboard"))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.get(reverse("world_dashboard"))
+
+        self.assertEqual(apply_async.call_count, 1)
+        self.assertEqual(self.backend.calls, [])
+        poll_url = response.context["ai_fashion_update_poll_url"]
+        self.assertEqual(self.client.get(poll_url).json()["status"], "pending")
+
+        key, payload = apply_async.call_args.kwargs["args"]
+        self.assertEqual(gateway.run_submitted(key, payload)["status"], "ready")
+
+        polled = self.client.get(poll_url).json()
+        self.assertEqual(polled["status"], "ready")
+        self.assertIn("daily update about global fashion", polled["text"])
+        response = self.client.get(reverse("world_dashboard"))
+        self.assertEqual(response.context["ai_fashion_update"], polled["text"])
+        self.assertEqual(response.context["ai_fashion_update_poll_url"], "")
+        self.assertEqual(len(self.backend.calls), 1)
+
+        other = get_user_model().objects.create_user("llm-other", password="test-pass")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(poll_url).status_code, 404)
+
+    def test_unconfigured_backend_raises_and_logs_the_error(self):
+        with override_settings(CRM_LLM_BACKEND="openai", OPENAI_API_KEY=""):
+            self.assertFalse(gateway.llm_available())
+            with self.assertRaises(gateway.LLMNotConfigured):
+                gateway.chat(_messages("hello"), feature="test_unconfigured")
+
+        self.assertEqual(AISystemLog.objects.get(feature="test_unconfigured").level, "error")
@@ -0,0 +1,129 @@
+from decimal import Decimal
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from crm import views, views_invoice
+from crm.models import Customer, InventoryItem, Invoice, ProductionOrder
+from crm.services import pdf_cache
+from crm.tasks import prerender_invoice_pdf_task
+
+
+class PdfCacheTests(TestCase):
+    def setUp(self):
+        self.cache_dir = TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        settings_override = override_settings(PDF_CACHE_DIR=Path(self.cache_dir.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_superuser(
+            username="pdf-cache-admin",
+            email="pdf-cache@example.com",
+            password="test-pass",
+        )
+        self.client.force_login(self.user)
+        self.invoice = Invoice.objects.create(
+            invoice_number="INV-PDF-CACHE",
+            currency="CAD",
+            subtotal=Decimal("100.00"),
+            total_amount=Decimal("100.00"),
+            status="draft",
+        )
+
+    def _cached_files(self, kind):
+        return sorted(path.name for path in (Path(self.cache_dir.name) / kind).glob("*.pdf"))
+
+    def test_repeat_invoice_download_is_served_from_disk(self):
+        url = reverse("invoice_pdf", args=[self.invoice.pk])
+        with mock.patch.object(views_invoice, "_render_invoice_pdf", wraps=views_invoice._render_invoice_pdf) as render:
+            first = self.client.get(url)
+            second = self.client.get(url)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first["Content-Type"], "application/pdf")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(len(self._cached_files("invoice")), 1)
+
+    def test_invoice_change_renders_a_new_pdf_and_drops_the_old_one(self):
+        url = reverse("invoice_pdf", args=[self.invoice.pk])
+        self.client.get(url)
+        before = self._cached_files("invoice")
+
+        self.invoice.notes = "Ship by sea freight."
+        self.invoice.save()
+        response = self.client.get(url)
+
+        self.assertIn(b"Ship by sea freight.", response.content)
+        after = self._cached_files("invoice")
+        self.assertEqual(len(after), 1)
+        self.assertNotEqual(before, after)
+
+    def test_customer_change_renders_a_new_invoice_pdf(self):
+        customer = Customer.objects.create(account_brand="Invoice Brand", city="Toronto")
+        self.invoice.customer = customer
+        self.invoice.save()
+        url = reverse("invoice_pdf", args=[self.invoice.pk])
+        self.client.get(url)
+
+        Customer.objects.filter(pk=customer.pk).update(address_line1="12 Harbour Street")
+        with mock.patch.object(views_invoice, "_render_invoice_pdf", wraps=views_invoice._render_invoice_pdf) as render:
+            self.client.get(url)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(len(self._cached_files("invoice")), 1)
+
+    def test_prerender_task_fills_the_cache(self):
+        result = prerender_invoice_pdf_task.apply(args=[self.invoice.pk]).get()
+
+        self.assertEqual(result, {"rendered": True, "error": ""})
+        with mock.patch.object(views_invoice, "_render_invoice_pdf") as render:
+            self.client.get(reverse("invoice_pdf", args=[self.invoice.pk]))
+        render.assert_not_called()
+
+    def test_production_pdfs_are_cached_per_order(self):
+        customer = Customer.objects.create(account_brand="Cache Brand", contact_name="Buyer", email="buyer@example.com")
+        order = ProductionOrder.objects.create(title="Cache order", customer=customer, qty_total=50)
+
+        for name, kind in (
+            ("production_order_sheet_pdf", "production_order_sheet"),
+            ("production_packing_list_pdf", "production_packing_list"),
+        ):
+            render_name = f"_render_{kind}_pdf"
+            with mock.patch.object(views, render_name, wraps=getattr(views, render_name)) as render:
+                first = self.client.get(reverse(name, args=[order.pk]))
+                self.client.get(reverse(name, args=[order.pk]))
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(len(self._cached_files(kind)), 1)
+
+    def test_inventory_pdf_caches_financial_and_restricted_variants_apart(self):
+        item = InventoryItem.objects.create(name="Cotton jersey", quantity=Decimal("12"), unit_cost=Decimal("4.50"))
+        response = self.client.get(reverse("inventory_detail_pdf", args=[item.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._cached_files("inventory_financials")), 1)
+        self.assertEqual(self._cached_files("inventory"), [])
+
+    @override_settings(PDF_IMAGE_READER_CACHE_SIZE=2)
+    def test_image_readers_are_capped_least_recently_used_first(self):
+        from PIL import Image
+
+        self.addCleanup(pdf_cache._IMAGE_READERS.clear)
+        pdf_cache._IMAGE_READERS.clear()
+        paths = []
+        for index in range(3):
+            path = str(Path(self.cache_dir.name) / f"logo-{index}.png")
+            Image.new("RGB", (2, 2)).save(path)
+            paths.append(path)
+
+        pdf_cache.image_reader(paths[0])
+        pdf_cache.image_reader(paths[1])
+        pdf_cache.image_reader(paths[0])
+        pdf_cache.image_reader(paths[2])
+
+        self.assertEqual(list(pdf_cache._IMAGE_READERS), [paths[0], paths[2]])
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from crm.models import Customer, ProductionOrder, Shipment
+from crm.services.production_list_fields import refresh_all_production_list_values
+from crm.views import production_list
+
+
+class ProductionListFieldsTests(TestCase):
+    def setUp(self):
+        self.ceo = get_user_model().objects.create_superuser(
+            username="production-list-ceo",
+            email="ceo@example.com",
+            password="test-pass",
+        )
+        self.customer = Customer.objects.create(
+            account_brand="List Client",
+            contact_name="List Buyer",
+            email="buyer@example.com",
+        )
+        self.today = timezone.localdate()
+
+    def _order(self, **overrides):
+        data = {"title": "List order", "customer": self.customer, "qty_total": 100}
+        data.update(overrides)
+        return ProductionOrder.objects.create(**data)
+
+    def _list(self, **params):
+        request = RequestFactory().get("/production/", params)
+        request.user = self.ceo
+        return production_list(request)
+
+    def test_new_order_stores_planning_values(self):
+        order = self._order()
+        order.refresh_from_db()
+
+        self.assertEqual(order.stages.count(), 9)
+        self.assertEqual(order.stages_percent_done, 0)
+        self.assertFalse(order.has_delay)
+        self.assertEqual(order.priority_reason, "Planning")
+
+    def test_stage_and_shipment_saves_refresh_list_values(self):
+        order = self._order()
+        for stage in order.stages.exclude(stage_key="shipping"):
+            stage.status = "done"
+            stage.save()
+        order.refresh_from_db()
+
+        self.assertEqual(order.stages_percent_done, 88)
+        self.assertEqual(order.operational_status, "ready_to_ship")
+        self.assertTrue(order.shipment_pending)
+        self.assertEqual(order.priority_reason, "Ready to ship")
+
+        shipment = Shipment.objects.create(order=order, customer=self.customer, status="delivered")
+        order.refresh_from_db()
+
+        self.assertTrue(order.has_shipments)
+        self.assertTrue(order.has_delivered_shipment)
+        self.assertFalse(order.shipment_pending)
+        self.assertEqual(order.priority_reason, "Completed")
+
+        shipment.delete()
+        order.refresh_from_db()
+
+        self.assertFalse(order.has_shipments)
+        self.assertFalse(order.has_delivered_shipment)
+
+    def test_nightly_refresh_flags_orders_that_became_overdue(self):
+        order = self._order(bulk_deadline=self.today + timedelta(days=1))
+        order.refresh_from_db()
+        self.assertFalse(order.has_delay)
+        self.assertEqual(order.priority_reason, "Deadline close")
+
+        result = refresh_all_production_list_values(today=self.today + timedelta(days=2))
+        order.refresh_from_db()
+
+        self.assertEqual(result, {"checked": 1, "updated": 1, "error": ""})
+        self.assertTrue(order.has_delay)
+        self.assertEqual(order.priority_reason, "Delayed")
+        self.assertEqual(order.priority_rank, 0)
+
+    def test_list_filters_and_kpis_use_stored_values(self):
+        delayed = self._order(title="Late order", bulk_deadline=self.today - timedelta(days=3))
+        self._order(title="On track order")
+        self.client.force_login(self.ceo)
+
+        response = self.client.get(reverse("production_list"), {"delayed": "delayed"})
+        self.assertEqual([row["order"] for row in response.context["orders_data"]], [delayed])
+        self.assertEqual(response.context["orders_data"][0]["priority"]["reason"], "Delayed")
+        self.assertEqual(response.context["total_active_orders_count"], 2)
+        self.assertEqual(response.context["delayed_operations_count"], 1)
+        self.assertEqual([row["order"] for row in response.context["urgent_orders"]], [delayed])
+
+        response = self.client.get(reverse("production_list"), {"priority": "normal"})
+        self.assertEqual(
+            [row["order"].title for row in response.context["orders_data"]],
+            ["On track order"],
+        )
+
+    def test_list_query_count_does_not_grow_with_orders(self):
+        for index in range(3):
+            self._order(title=f"Budget order {index}")
+        with CaptureQueriesContext(connection) as few_orders:
+            self.assertEqual(self._list().status_code, 200)
+
+        for index in range(20):
+            self._order(title=f"Budget order extra {index}")
+        with CaptureQueriesContext(connection) as many_orders:
+            self.assertEqual(self._list().status_code, 200)
+
+        self.assertEqual(len(many_orders), len(few_orders))
@@ -988,7 +988,7 @@ class QuickCostingTests(TestCase):
         )
         from openpyxl import load_workbook
 
-        workbook = load_workbook(BytesIO(response.content), read_only=True)
+        workbook = load_workbook(BytesIO(response.getvalue()), read_only=True)
         sheet = workbook.active
         labels = [row[0].value for row in sheet.iter_rows(min_col=1, max_col=1)]
         self.assertIn("Buyer Name", labels)
@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from crm.models import Lead, RequestProfileWindow
+from crm.services.request_profiling import QueryProfile, RequestProfileCollector, query_shape, request_profile_summary
+
+
+class RequestProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.ceo = User.objects.create_user("profile-ceo", password="test-pass")
+        cls.sales = User.objects.create_user("profile-sales", password="test-pass")
+        Group.objects.get_or_create(name="CEO")[0].user_set.add(cls.ceo)
+        Group.objects.get_or_create(name="Sales")[0].user_set.add(cls.sales)
+        cls.leads = [Lead.objects.create(account_brand=f"Profile Brand {index}") for index in range(3)]
+
+    def test_query_profile_counts_repeated_shapes_and_exact_duplicates(self):
+        queries = QueryProfile()
+        with connection.execute_wrapper(queries):
+            for lead in self.leads:
+                Lead.objects.filter(pk=lead.pk).exists()
+            Lead.objects.filter(pk=self.leads[0].pk).exists()
+            list(Lead.objects.filter(pk__in=[lead.pk for lead in self.leads]))
+
+        self.assertEqual(queries.count, 5)
+        self.assertEqual(queries.duplicate_count, 1)
+        self.assertEqual(list(queries.repeated_shapes(4).values()), [4])
+        self.assertEqual(query_shape('WHERE "id" IN (%s, %s,\n %s)'), 'WHERE "id" IN (%s, ...)')
+
+    def test_collector_flush_writes_worker_rows_that_are_rewritten_not_appended(self):
+        local = RequestProfileCollector()
+        queries = QueryProfile()
+        queries.count = 12
+        queries.shapes["SELECT 1"] = 6
+
+        with override_settings(CRM_REQUEST_PROFILING_REPEAT_THRESHOLD=5):
+            local.record("lead_detail", 120.0, queries, 200)
+            self.assertEqual(local.flush(), 1)
+            local.record("lead_detail", 30.0, QueryProfile(), 500)
+            self.assertEqual(local.flush(), 1)
+        self.assertEqual(local.flush(), 0)
+
+        row = RequestProfileWindow.objects.get(view_name="lead_detail")
+        self.assertEqual((row.request_count, row.error_count, row.max_queries), (2, 1, 12))
+        self.assertEqual(row.latency_histogram[1] + row.latency_histogram[3], 2)
+        self.assertEqual(row.repeated_queries, {"SELECT 1": {"requests": 1, "max_repeats": 6}})
+
+    def test_summary_aggregates_worker_windows(self):
+        for worker, elapsed in (("web-1", 40.0), ("web-2", 400.0)):
+            local = RequestProfileCollector()
+            queries = QueryProfile()
+            queries.count = 8
+            queries.shapes["SELECT 1"] = 6
+            local.record("lead_detail", elapsed, queries, 200)
+            with patch("crm.services.request_profiling.socket.gethostname", return_value=worker):
+                local.flush()
+
+        summary = request_profile_summary(hours=1)
+
+        view = summary["slowest_views"][0]
+        self.assertEqual((summary["request_count"], view["requests"], view["average_ms"]), (2, 2, 220.0))
+        self.assertEqual((view["max_ms"], view["average_queries"], view["p50_ms"]), (400.0, 8.0, 50))
+        self.assertEqual([row["count"] for row in view["query_histogram"]][:2], [0, 2])
+        self.assertEqual(summary["repeated_queries"][0]["requests"], 2)
+
+    def test_middleware_samples_feed_the_json_endpoint(self):
+        local = RequestProfileCollector()
+        self.client.force_login(self.ceo)
+        with patch("crm.middleware_platform.collector", local):
+            self.client.get(reverse("system_health"))
+        local.flush()
+
+        response = self.client.get(reverse("request_performance_json"), {"hours": 1})
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertIn("system_health", [row["view_name"] for row in payload["slowest_views"]])
+        self.assertEqual(payload["request_count"], 1)
+        self.assertEqual(self.client.get(reverse("request_performance")).status_code, 200)
+
+    def test_profiling_pages_are_ceo_only(self):
+        self.client.force_login(self.sales)
+
+        self.assertEqual(self.client.get(reverse("request_performance")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("request_performance_json")).status_code, 403)
@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from crm.models import Customer, KpiRollupDay, Lead, Opportunity, SearchDocument
+from crm.services.kpi_rollups import KPI_FAMILY_LEADS, refresh_kpi_rollups
+from crm.services.operations_search import search_operations_records
+from crm.services.search_index import search_fts_available, search_index_q, search_record_ids
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser(
+            username="search-index-admin",
+            email="search-index@example.com",
+            password="test-pass",
+        )
+        cls.customer = Customer.objects.create(account_brand="Northwind Apparel", email="buyer@northwind.test")
+        cls.lead = Lead.objects.create(
+            lead_id="LEAD-FTS-1",
+            account_brand="Lumen Activewear",
+            email="hello@lumen.test",
+            notes="Needs recycled polyester leggings",
+        )
+        cls.other = Lead.objects.create(lead_id="LEAD-FTS-2", account_brand="Harbor Knits")
+        cls.opportunity = Opportunity.objects.create(
+            lead=cls.lead,
+            customer=cls.customer,
+            opportunity_id="OPP-FTS-1",
+            stage="Prospecting",
+            is_open=True,
+        )
+
+    def test_saves_maintain_documents_and_fts_matches_substrings(self):
+        self.assertTrue(search_fts_available())
+        self.assertEqual(search_record_ids(Lead, "polyester leg"), [self.lead.pk])
+        self.assertEqual(search_record_ids(Lead, "umen.te"), [self.lead.pk])
+        self.assertEqual(list(Lead.objects.filter(search_index_q(Lead, "kn"))), [self.other])
+
+        self.other.notes = "Polyester fleece"
+        self.other.save()
+        self.assertEqual(set(search_record_ids(Lead, "polyester")), {self.lead.pk, self.other.pk})
+
+        self.other.delete()
+        self.assertFalse(SearchDocument.objects.filter(model_label="crm.lead", object_id=self.other.pk).exists())
+
+    def test_related_lead_changes_refresh_opportunity_documents(self):
+        self.assertEqual(search_record_ids(Opportunity, "Lumen"), [self.opportunity.pk])
+
+        self.lead.account_brand = "Solstice Sport"
+        self.lead.save()
+
+        self.assertEqual(search_record_ids(Opportunity, "Solstice"), [self.opportunity.pk])
+        self.assertEqual(search_record_ids(Opportunity, "Lumen Active"), [])
+
+    def test_list_and_global_search_use_index(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("leads_list"), {"q": "recycled", "view": "all", "archive": "all"})
+        self.assertEqual([lead.pk for lead in response.context["page_obj"].object_list], [self.lead.pk])
+
+        groups = dict(search_operations_records(self.user, "northwind"))
+        self.assertEqual([row["name"] for row in groups["Customers"]], ["Northwind Apparel"])
+        self.assertEqual([row["number"] for row in groups["Opportunities"]], ["OPP-FTS-1"])
+
+    def test_scope_filters_apply_before_the_result_limit(self):
+        # Documents for records this search cannot return outrank the visible customer.
+        SearchDocument.objects.bulk_create(
+            [SearchDocument(model_label="crm.customer", object_id=900000 + index, body="Northwind") for index in range(600)]
+        )
+
+        groups = dict(search_operations_records(self.user, "northwind"))
+
+        self.assertEqual([row["name"] for row in groups["Customers"]], ["Northwind Apparel"])
+
+    def test_rebuild_command_restores_missing_documents(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search_record_ids(Lead, "Lumen"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertEqual(search_record_ids(Lead, "Lumen"), [self.lead.pk])
+        self.assertIn("crm.lead: 2 document(s)", out.getvalue())
+
+    def test_bulk_lead_updates_refresh_documents_and_kpi_days(self):
+        outbound = Lead.objects.create(lead_id="LEAD-FTS-3", account_brand="Tidal Threads", lead_type="outbound")
+        refresh_kpi_rollups(outbound.created_date, outbound.created_date)
+        KpiRollupDay.objects.update(dirty_at=None)
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("lead_bulk_update"),
+                {"lead_ids": [outbound.pk], "bulk_action": "outbound_status", "outbound_status": "Meeting Booked"},
+            )
+        self.assertEqual(search_record_ids(Lead, "Meeting Booked"), [outbound.pk])
+        self.assertTrue(KpiRollupDay.objects.filter(family=KPI_FAMILY_LEADS, dirty_at__isnull=False).exists())
+
+        KpiRollupDay.objects.update(dirty_at=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("lead_bulk_update"), {"lead_ids": [outbound.pk], "bulk_action": "archive"})
+        self.assertEqual(search_record_ids(Lead, "Archived"), [outbound.pk])
+        self.assertTrue(KpiRollupDay.objects.filter(family=KPI_FAMILY_LEADS, dirty_at__isnull=False).exists())
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from crm.models import EmployeeProfile
+from crm.services import shared_cache
+from crm.services.employee_identity import get_employee_identity_index
+from crm.services.shared_cache import CacheNamespace, clear_local, namespace_stats
+
+
+class SharedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local()
+        self.namespace = CacheNamespace("test-shared", timeout=60)
+
+    def _stats(self):
+        return next(row for row in namespace_stats() if row["namespace"] == "test-shared")
+
+    def test_lookups_are_served_from_process_memory_then_the_shared_tier(self):
+        before = self._stats()
+        self.namespace.set("key", {"value": 1})
+        self.assertEqual(self.namespace.get("key"), {"value": 1})
+        clear_local()
+        self.assertEqual(self.namespace.get("key"), {"value": 1})
+        self.assertIsNone(self.namespace.get("other"))
+
+        after = self._stats()
+        self.assertEqual(after["l1_hits"] - before["l1_hits"], 1)
+        self.assertEqual(after["l2_hits"] - before["l2_hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertIsNotNone(after["hit_rate"])
+
+    def test_invalidate_hides_entries_other_processes_still_hold_in_memory(self):
+        self.namespace.set("key", "old")
+        self.namespace.set("key", "scoped", scope=7)
+        local_before = dict(shared_cache._local)
+
+        self.namespace.invalidate()
+
+        # The in-process copies are still there, but keyed by the old version.
+        self.assertEqual(dict(shared_cache._local), local_before)
+        self.assertIsNone(self.namespace.get("key"))
+        self.assertEqual(self.namespace.get("key", scope=7), "scoped")
+
+    def test_l1_hits_do_not_read_the_shared_tier(self):
+        self.namespace.set("key", "value")
+
+        with mock.patch.object(shared_cache.cache, "get", wraps=cache.get) as l2_get:
+            self.assertEqual(self.namespace.get("key"), "value")
+
+        l2_get.assert_not_called()
+
+    @override_settings(CRM_CACHE_VERSION_L1_SECONDS=0)
+    def test_clearing_the_shared_cache_also_retires_in_process_copies(self):
+        # Without a version window the process sees the cleared L2 right away.
+        self.namespace.set("key", "old")
+        cache.clear()
+
+        self.assertIsNone(self.namespace.get("key"))
+
+    def test_profile_change_refreshes_the_employee_identity_index(self):
+        user = get_user_model().objects.create_user(username="cache-person", password="test-pass")
+        profile = EmployeeProfile.objects.get(user=user)
+        get_employee_identity_index()
+
+        profile.display_name = "Renamed Person"
+        profile.save()
+
+        index = get_employee_identity_index()
+        self.assertEqual(index["by_user_id"][user.pk]["display_name"], "Renamed Person")
@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from iconic_site.sqlite_tuning import sqlite_options, sqlite_pragmas
+
+
+class SqliteTuningOptionsTests(SimpleTestCase):
+    def test_options_carry_pragmas_timeout_and_immediate_transactions(self):
+        options = sqlite_options(busy_timeout_ms=15000, mmap_size=1024, cache_size_kib=2048)
+
+        self.assertEqual(options["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(options["timeout"], 15)
+        self.assertEqual(
+            options["init_command"].split(";"),
+            [
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA synchronous=NORMAL",
+                "PRAGMA busy_timeout=15000",
+                "PRAGMA mmap_size=1024",
+                "PRAGMA cache_size=-2048",
+            ],
+        )
+
+    def test_unknown_modes_are_rejected(self):
+        with self.assertRaises(ValueError):
+            sqlite_pragmas(journal_mode="fast")
+        with self.assertRaises(ValueError):
+            sqlite_options(transaction_mode="eager")
+
+
+class SqliteTuningConnectionTests(TestCase):
+    def test_new_connections_run_the_configured_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_contention_benchmark_reports_both_profiles(self):
+        out = StringIO()
+        call_command("sqlite_contention_benchmark", writers=2, writes=5, hold_ms=0, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split(":")[0] for line in lines], ["default", "tuned"])
+        self.assertIn("10 committed, 0 lock failures", lines[1])
+        self.assertIn("p95_ms=", lines[1])
@@ -0,0 +1,119 @@
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from crm.models import AccountingEntry, CRMAuditLog, ExportJob
+from crm.services.exports import purge_old_exports, run_export_job
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(username="export-admin", email="export@example.com", password="pw")
+        self.client.force_login(self.user)
+        self.export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.export_dir.cleanup)
+        for day, amount in ((3, "10.00"), (9, "25.50")):
+            AccountingEntry.objects.create(
+                date=date(2026, 3, day),
+                side="CA",
+                direction="OUT",
+                main_type="EXPENSE",
+                currency="CAD",
+                amount_original=Decimal(amount),
+                rate_to_cad=Decimal("1"),
+                description=f"Supplies {day}",
+            )
+
+    def test_entry_exports_stream_csv_and_spool_xlsx(self):
+        csv_response = self.client.get(reverse("accounting_list_export_csv"), {"year": "2026"})
+        self.assertTrue(csv_response.streaming)
+        self.assertEqual(csv_response["Content-Type"], "text/csv")
+        lines = csv_response.getvalue().decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("Supplies 9", lines[1])
+
+        xlsx_response = self.client.get(reverse("accounting_list_export_xlsx"), {"year": "2026"})
+        self.assertTrue(xlsx_response.streaming)
+        self.assertIn('filename="accounting_entries.xlsx"', xlsx_response["Content-Disposition"])
+        rows = list(load_workbook(BytesIO(xlsx_response.getvalue()), read_only=True)["Entries"].values)
+        self.assertEqual([row[17] for row in rows[1:]], ["Supplies 9", "Supplies 3"])
+
+    def test_audit_csv_is_no_longer_capped(self):
+        CRMAuditLog.objects.bulk_create(
+            [CRMAuditLog(module="quotations", record_id=str(index), action_type="updated") for index in range(5001)]
+        )
+        response = self.client.get(reverse("crm_audit_log"), {"export": "csv"})
+        self.assertEqual(len(response.getvalue().decode().splitlines()), 5002)
+
+    def test_large_range_is_exported_by_a_background_job(self):
+        with (
+            override_settings(CRM_EXPORT_BACKGROUND_ROWS=1, EXPORT_DIR=self.export_dir.name),
+            patch("crm.tasks.run_export_job_task.apply_async", side_effect=lambda args, **kwargs: run_export_job(*args)),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(reverse("accounting_list_export_csv"), {"year": "2026"})
+            job = ExportJob.objects.get()
+            self.assertRedirects(response, reverse("export_job_detail", args=[job.pk]))
+
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.kind, job.row_count), ("done", "accounting_entries", 2))
+            self.assertEqual(job.params, {"year": "2026"})
+            self.assertContains(self.client.get(response.url), reverse("export_job_download", args=[job.pk]))
+
+            download = self.client.get(reverse("export_job_download", args=[job.pk]))
+            self.assertIn('filename="accounting_entries.csv"', download["Content-Disposition"])
+            self.assertIn("Supplies 3", download.getvalue().decode())
+
+            other = get_user_model().objects.create_user("export-other", password="pw")
+            self.client.force_login(other)
+            self.assertEqual(self.client.get(reverse("export_job_download", args=[job.pk])).status_code, 404)
+
+    def test_repeated_request_reuses_the_pending_job(self):
+        url = reverse("accounting_list_export_csv")
+        with (
+            override_settings(CRM_EXPORT_BACKGROUND_ROWS=1, EXPORT_DIR=self.export_dir.name),
+            patch("crm.tasks.run_export_job_task.apply_async") as enqueue,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                first = self.client.get(url, {"year": "2026"})
+                second = self.client.get(url, {"year": "2026"})
+                self.client.get(url, {"year": "2026", "month": "3"})
+
+        self.assertEqual(first.url, second.url)
+        self.assertEqual(ExportJob.objects.count(), 2)
+        self.assertEqual(enqueue.call_count, 2)
+
+    def test_retention_purges_old_jobs_and_their_files(self):
+        folder = self.export_dir.name
+        now = timezone.now()
+        old_finish = now - timedelta(days=8)
+        old = ExportJob.objects.create(kind="audit_log", status="done", file_name="1-old.csv", finished_at=old_finish)
+        recent = ExportJob.objects.create(kind="audit_log", status="done", file_name="2-recent.csv", finished_at=now)
+        running = ExportJob.objects.create(kind="audit_log", status="processing", started_at=now)
+        abandoned = ExportJob.objects.create(kind="audit_log", status="processing", started_at=now - timedelta(days=10))
+        stuck = ExportJob.objects.create(kind="audit_log", status="processing", started_at=now - timedelta(hours=2))
+        for name in ("1-old.csv", "2-recent.csv", "stale.tmp", "fresh.tmp"):
+            with open(os.path.join(folder, name), "w") as handle:
+                handle.write("x")
+        for name in ("1-old.csv", "2-recent.csv", "stale.tmp"):
+            os.utime(os.path.join(folder, name), (old_finish.timestamp(), old_finish.timestamp()))
+
+        with override_settings(EXPORT_DIR=folder, CRM_EXPORT_RETENTION_DAYS=7):
+            result = purge_old_exports(now)
+
+        self.assertEqual(result, {"jobs": 2, "files": 2, "stale": 2, "error": ""})
+        self.assertEqual(set(ExportJob.objects.values_list("pk", flat=True)), {recent.pk, running.pk, stuck.pk})
+        self.assertFalse(ExportJob.objects.filter(pk__in=[old.pk, abandoned.pk]).exists())
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, "failed")
+        self.assertEqual(ExportJob.objects.get(pk=running.pk).status, "processing")
+        self.assertEqual(sorted(os.listdir(folder)), ["2-recent.csv", "fresh.tmp"])
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from crm.models_whatsapp import WhatsAppChangeSequence, WhatsAppMessage, WhatsAppThread
+from crm.views_whatsapp import _process_infobip_payload
+
+
+@override_settings(WHATSAPP_ENABLED=True)
+class WhatsAppChangeFeedTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            username="wa-feed-admin",
+            email="wa-feed@example.com",
+            password="test-pass",
+        )
+        self.client.force_login(self.user)
+        self.thread = WhatsAppThread.objects.create(wa_phone="+16045550101", wa_name="Feed Buyer")
+        self.message = WhatsAppMessage.objects.create(thread=self.thread, direction="out", body="Hi", meta_id="m-1", status="sent")
+
+    def _changes(self, **params):
+        return self.client.get(reverse("wa_api_changes"), params).json()
+
+    def test_writes_stamp_an_increasing_change_sequence(self):
+        self.thread.refresh_from_db()
+        self.assertGreater(self.message.change_seq, self.thread.change_seq)
+        self.assertEqual(WhatsAppChangeSequence.current(), self.message.change_seq)
+
+        self.thread.save(update_fields=["wa_name"])
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.change_seq, WhatsAppChangeSequence.current())
+
+    def test_changes_return_only_rows_after_the_cursor(self):
+        cursor = WhatsAppChangeSequence.current()
+        other = WhatsAppThread.objects.create(wa_phone="+16045550102")
+
+        data = self._changes(since=cursor, thread=self.thread.pk)
+        self.assertEqual([row["id"] for row in data["threads"]], [other.pk])
+        self.assertEqual(data["messages"], [])
+        self.assertEqual(data["cursor"], WhatsAppChangeSequence.current())
+
+        idle = self._changes(since=data["cursor"], thread=self.thread.pk)
+        self.assertEqual((idle["threads"], idle["messages"]), ([], []))
+        self.assertEqual(idle["cursor"], data["cursor"])
+
+    def test_large_deltas_are_paged_without_skipping_rows(self):
+        cursor = WhatsAppChangeSequence.current()
+        for index in range(5):
+            WhatsAppMessage.objects.create(thread=self.thread, direction="in", body=f"Burst {index}", meta_id=f"burst-{index}")
+
+        seen = []
+        pages = 0
+        with patch("crm.views_whatsapp.WA_CHANGES_PAGE_SIZE", 2):
+            while True:
+                data = self._changes(since=cursor, thread=self.thread.pk)
+                pages += 1
+                seen.extend(row["body"] for row in data["messages"])
+                self.assertLessEqual(len(data["messages"]), 2)
+                cursor = data["cursor"]
+                if not data["has_more"]:
+                    break
+
+        self.assertEqual(seen, [f"Burst {index}" for index in range(5)])
+        self.assertEqual(pages, 3)
+        self.assertEqual(cursor, WhatsAppChangeSequence.current())
+
+    def test_provider_status_update_reaches_the_open_thread(self):
+        cursor = WhatsAppChangeSequence.current()
+        _process_infobip_payload({"results": [{"messageId": "m-1", "status": {"groupName": "DELIVERED"}}]})
+
+        data = self._changes(since=cursor, thread=self.thread.pk)
+        self.assertEqual([(row["id"], row["status"]) for row in data["messages"]], [(self.message.pk, "delivered")])
+
+    def test_json_endpoints_answer_304_until_the_inbox_changes(self):
+        url = reverse("wa_api_threads")
+        first = self.client.get(url)
+        etag = first["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        messages_url = reverse("wa_api_thread_messages", args=[self.thread.pk])
+        self.assertEqual(self.client.get(messages_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        WhatsAppMessage.objects.create(thread=self.thread, direction="in", body="New")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
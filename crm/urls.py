@@ -90,6 +90,8 @@ urlpatterns = [
     path("search/suggestions/", operations.global_search_suggestions, name="global_search_suggestions"),
     path("operations/queue/<slug:queue_key>/", operations.operations_queue, name="operations_queue"),
     path("audit-log/", operations.audit_log, name="crm_audit_log"),
+    path("exports/<int:pk>/", operations.export_job_detail, name="export_job_detail"),
+    path("exports/<int:pk>/download/", operations.export_job_download, name="export_job_download"),
     path("role-management/", operations.role_management, name="role_management"),
     path("employees/", people.employee_list, name="employee_list"),
     path("employees/new/", people.employee_create, name="employee_create"),
@@ -107,6 +109,8 @@ urlpatterns = [
     path("favorites/<slug:record_type>/<int:object_id>/toggle/", platform.favorite_toggle, name="favorite_toggle"),
     path("records/<slug:record_type>/<int:object_id>/archive/", platform.archive_record, name="archive_record"),
     path("system-health/", platform.system_health, name="system_health"),
+    path("system-health/requests/", platform.request_performance, name="request_performance"),
+    path("system-health/requests.json", platform.request_performance_json, name="request_performance_json"),
     path("settings/", platform.crm_settings, name="crm_settings"),
     path("ceo-dashboard/", ceo_perm(views.ceo_dashboard), name="ceo_dashboard"),
     path("ceo-dashboard/operations/", ceo_perm(views.ceo_operations_dashboard), name="ceo_operations_dashboard"),
@@ -122,6 +126,7 @@ urlpatterns = [
     path("ai/assistant/ask/", perm("can_ai", ai.ai_assistant_ask), name="ai_assistant_ask"),
     path("ai/health/", perm("can_ai", ai.ai_health_monitor), name="ai_health_monitor"),
     path("ai/system-status/", perm("can_ai", ai.ai_system_status), name="ai_system_status"),
+    path("ai/results/<str:token>.json", ai.ai_result_json, name="ai_result_json"),
 
     path("leads/", perm("can_leads", views.leads_list), name="leads_list"),
     path("leads/dashboard/", perm("can_leads", views.leads_dashboard), name="leads_dashboard"),
@@ -200,6 +205,7 @@ urlpatterns = [
     path("costing/guide/", costing_perm(costing.cost_sheet_guide), name="cost_sheet_guide"),
 
     path("chatter/", login_required(views.chatter_feed), name="chatter_feed"),
+    path("chatter/more/", login_required(views.chatter_feed_more), name="chatter_feed_more"),
     path("order-lifecycle/<int:pk>/", login_required(lifecycle.order_lifecycle_detail), name="order_lifecycle_detail"),
 
     path("customers/", perm("can_customers", views.customers_list), name="customers_list"),
@@ -394,6 +400,7 @@ if wa:
         path("whatsapp-api/<int:pk>/", wa_perm(wa.wa_thread), name="wa_api_thread"),
         path("whatsapp-api/<int:pk>/messages/", wa_perm(wa.wa_thread_messages_json), name="wa_api_thread_messages"),
         path("whatsapp-api/threads/", wa_perm(wa.wa_threads_json), name="wa_api_threads"),
+        path("whatsapp-api/changes/", wa_perm(wa.wa_changes), name="wa_api_changes"),
         path("whatsapp-api/media/<int:msg_id>/", wa_perm(wa.wa_media), name="wa_api_media"),
         path("whatsapp-api/<int:pk>/send/", wa_perm(wa.wa_send), name="wa_api_send"),
         path("whatsapp-api/<int:pk>/send-ai/", wa_perm(wa.wa_send_ai_draft), name="wa_api_send_ai_draft"),
@@ -12,6 +12,8 @@ def log_activity(
     error_type="",
     error_detail="",
     latency_ms=None,
+    prompt_tokens=None,
+    completion_tokens=None,
 ):
     """
     Central logger for all AI system activity.
@@ -33,4 +35,6 @@ def log_activity(
         error_type=error_type,
         error_detail=error_detail,
         latency_ms=latency_ms,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
     )
\ No newline at end of file
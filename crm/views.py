@@ -1,5 +1,6 @@
 # crm/views.py
 
+import io
 import json
 import logging
 import re
@@ -9,13 +10,10 @@ from datetime import timedelta, date
 from decimal import Decimal
 from types import SimpleNamespace
 from django.apps import apps
+from django.forms.models import model_to_dict
 from django.db.models import Count, Exists, F, Sum, Q, Max, OuterRef, Prefetch, Subquery, prefetch_related_objects
 from django.db import models
 from django.conf import settings
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.mail import send_mail
@@ -23,9 +21,10 @@ from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import transaction, IntegrityError, connection
 from django.db.utils import DataError, OperationalError, ProgrammingError
 from django.db.models import Case, Count, IntegerField, Q, When
-from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncYear
+from django.db.models.functions import Coalesce, TruncDate, TruncYear
 from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import NoReverseMatch, reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -34,6 +33,7 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from .models import Product, Fabric, Accessory, Trim, ThreadOption, InventoryItem, InventoryMovement, InventoryReorder, ProductionOrderMaterial
 
+from .ai.gateway import chat_text, llm_available, result_token, submit as submit_llm
 from .services.costing import build_variance_report, calculate_cost_sheet
 from .services.costing_currency import (
     CurrencyConversionError,
@@ -51,6 +51,8 @@ from .services.order_lifecycle import (
     lifecycle_currency,
     lifecycle_dashboard_metrics,
 )
+from .services.pdf_cache import cached_pdf, file_stamp, image_reader, pdf_fingerprint, pdf_response
+from .services.production_list_fields import PRIORITY_RANKS, production_priority, stored_priority_badge
 from .services.production_operational_status import (
     OPERATIONAL_ACTIVE_STATUSES,
     OPERATIONAL_FINISHED_STATUSES,
@@ -91,8 +93,30 @@ from .services.product_reference_images import (
 from .services.workflow_visibility import build_workflow_visibility_context
 from .services.automation_engine import automation_dashboard_context
 from .services.operations_dashboard import operations_dashboard_context
+from .services.kpi_rollups import (
+    KPI_FAMILIES,
+    KPI_FAMILY_ACCOUNTING,
+    KPI_FAMILY_LEADS,
+    KPI_FAMILY_MARKETING,
+    METRIC_ACCOUNTING_IN,
+    METRIC_ACCOUNTING_OUT,
+    METRIC_ACTIVE_LEADS,
+    METRIC_ACTIVE_OPPORTUNITIES,
+    METRIC_LEADS,
+    METRIC_OPPORTUNITIES,
+    KpiSnapshot,
+    accounting_balance_cad,
+    schedule_kpi_dirty,
+)
 from .services.pipeline import (
     CLOSED_PIPELINE_STAGES,
+    LEAD_CONVERTED_OUTBOUND_STATUSES as _LEAD_CONVERTED_OUTBOUND_STATUSES,
+    LEAD_LOST_OUTBOUND_STATUSES as _LEAD_LOST_OUTBOUND_STATUSES,
+    active_lead_queryset as _active_lead_queryset,
+    active_opportunity_list_queryset as _active_opportunity_list_queryset,
+    active_opportunity_queryset as _active_opportunity_queryset,
+    opportunity_has_production_subquery as _opportunity_has_production_subquery,
+    with_opportunity_production_flag as _with_opportunity_production_flag,
     open_pipeline_queryset,
     summarize_pipeline,
     with_pipeline_value,
@@ -125,6 +149,7 @@ from .services.local_sewing import (
 )
 from .services.audit_log import model_snapshot, schedule_audit
 from .services.platform_tools import can_manage_archives, dashboard_personalization
+from .services.chatter_feed import chatter_feed_page, decode_chatter_cursor
 from .services.chatter_mentions import notify_chatter_mentions
 from .services.chatter_permissions import (
     can_access_chatter_record,
@@ -290,14 +315,6 @@ from django.shortcuts import render
 
 logger = logging.getLogger(__name__)
 
-def _get_openai_client():
-    api_key = (getattr(settings, "OPENAI_API_KEY", "") or "").strip()
-    if not api_key or OpenAI is None:
-        return None
-    return OpenAI(api_key=api_key)
-
-client = _get_openai_client()
-
 # One fixed stage order used everywhere
 STAGE_FLOW_ORDER = [
     "development",
@@ -846,12 +863,13 @@ Answer in short clear bullet points that a sales person can use right now.
 """
 
     try:
-        resp = client.responses.create(
+        answer = chat_text(
+            [{"role": "user", "content": prompt}],
+            feature="lead_ai_overview",
+            user=request.user,
             model="gpt-4.1-mini",
-            input=prompt,
-            max_output_tokens=350,
+            max_tokens=350,
         )
-        answer = resp.output[0].content[0].text
         return JsonResponse({"ok": True, "text": answer})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -928,12 +946,13 @@ Keep the answer short.
 """
 
     try:
-        resp = client.responses.create(
+        answer = chat_text(
+            [{"role": "user", "content": prompt}],
+            feature="lead_ai_detail",
+            user=request.user,
             model="gpt-4.1-mini",
-            input=prompt,
-            max_output_tokens=350,
+            max_tokens=350,
         )
-        answer = resp.output[0].content[0].text
 
         LeadActivity.objects.create(
             lead=lead,
@@ -961,21 +980,12 @@ from django.utils.dateparse import parse_date
 from django.contrib.auth import get_user_model
 
 from .models import Lead, LEAD_STATUS_CHOICES, OUTBOUND_STATUS_CHOICES
+from .services.lead_budget import lead_budget_range_q, parse_budget_amount
+from .services.search_index import index_instance, search_index_q
 
 def _parse_money_value(raw_value):
-    if raw_value is None:
-        return None
-    s = str(raw_value).strip()
-    if not s:
-        return None
-    s = s.replace(",", "")
-    match = re.search(r"-?\d+(\.\d+)?", s)
-    if not match:
-        return None
-    try:
-        return Decimal(match.group())
-    except Exception:
-        return None
+    # Same parser as the stored budget range, so "5k" filters as 5000.
+    return parse_budget_amount(raw_value)
 
 LEAD_LIST_STATUS_CHOICES = [
     ("active", "Active"),
@@ -1005,8 +1015,6 @@ _LEAD_CONTACTED_OUTBOUND_STATUSES = {
     "Sample Discussion",
     "No Response",
 }
-_LEAD_LOST_OUTBOUND_STATUSES = {"Bad Fit", "Archived"}
-_LEAD_CONVERTED_OUTBOUND_STATUSES = {"Converted to Opportunity"}
 
 def _normalize_lead_list_status_filter(value):
     raw = (value or "").strip()
@@ -1428,24 +1436,7 @@ def leads_list(request):
         qs = qs.filter(lead_id__icontains=lead_id)
 
     if q:
-        qs = qs.filter(
-            Q(account_brand__icontains=q)
-            | Q(contact_name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(phone__icontains=q)
-            | Q(notes__icontains=q)
-            | Q(company_website__icontains=q)
-            | Q(website__icontains=q)
-            | Q(instagram_handle__icontains=q)
-            | Q(linkedin_url__icontains=q)
-            | Q(primary_product_type__icontains=q)
-            | Q(product_interest__icontains=q)
-            | Q(product_category__icontains=q)
-            | Q(order_quantity__icontains=q)
-            | Q(lead_id__icontains=q)
-            | Q(source_channel__icontains=q)
-            | Q(outbound_status__icontains=q)
-        )
+        qs = qs.filter(search_index_q(Lead, q))
 
     if market:
         qs = qs.filter(market__iexact=market)
@@ -1552,26 +1543,16 @@ def leads_list(request):
     elif archive_filter == "active":
         qs = _filter_leads_by_list_status(qs, "active", today)
 
+    value_min = _parse_money_value(value_min_raw) if value_min_raw else None
+    value_max = _parse_money_value(value_max_raw) if value_max_raw else None
+    if value_min is not None or value_max is not None:
+        qs = qs.filter(lead_budget_range_q(value_min, value_max))
+
     if sort == "old":
         qs = qs.order_by("created_date", "id")
     else:
         qs = qs.order_by("-created_date", "-id")
 
-    value_min = _parse_money_value(value_min_raw) if value_min_raw else None
-    value_max = _parse_money_value(value_max_raw) if value_max_raw else None
-    if value_min is not None or value_max is not None:
-        filtered = []
-        for lead in qs:
-            budget_value = _parse_money_value(getattr(lead, "budget", None))
-            if budget_value is None:
-                continue
-            if value_min is not None and budget_value < value_min:
-                continue
-            if value_max is not None and budget_value > value_max:
-                continue
-            filtered.append(lead)
-        qs = filtered
-
     if can_manage_leads:
         users = list(
             get_user_model().objects.select_related("employee_profile").filter(
@@ -1601,18 +1582,6 @@ def leads_list(request):
         user.canonical_name = display_user(user)
 
     def count_assignees(source):
-        if isinstance(source, list):
-            total = len(source)
-            counts = defaultdict(int)
-            unassigned = 0
-            for lead in source:
-                identity = resolve_lead_owner(lead, index=identity_index)
-                if identity["user_id"]:
-                    counts[identity["user_id"]] += 1
-                else:
-                    unassigned += 1
-            return total, dict(counts), unassigned
-
         total = source.count()
         counts = {}
         unassigned = 0
@@ -1687,29 +1656,13 @@ def leads_list(request):
         )
 
     if assigned_to_unassigned:
-        if isinstance(qs, list):
-            qs = [lead for lead in qs if resolve_lead_owner(lead, index=identity_index)["user_id"] is None]
-        else:
-            qs = qs.filter(assigned_to__isnull=True).exclude(known_employee_owner_q(index=identity_index))
+        qs = qs.filter(assigned_to__isnull=True).exclude(known_employee_owner_q(index=identity_index))
     elif assigned_to_id:
         selected_user = user_by_id.get(assigned_to_id)
-        if isinstance(qs, list):
-            qs = [
-                lead for lead in qs
-                if resolve_lead_owner(lead, index=identity_index)["user_id"] == assigned_to_id
-            ]
-        else:
-            qs = qs.filter(employee_lead_ownership_q(selected_user or assigned_to_id, index=identity_index))
+        qs = qs.filter(employee_lead_ownership_q(selected_user or assigned_to_id, index=identity_index))
     elif assigned_to:
         selected_user = next((user for user in users if (user.username or "").casefold() == assigned_to_key), None)
-        if isinstance(qs, list):
-            selected_user_id = getattr(selected_user, "pk", None)
-            qs = [
-                lead for lead in qs
-                if resolve_lead_owner(lead, index=identity_index)["user_id"] == selected_user_id
-            ]
-        else:
-            qs = qs.filter(employee_lead_ownership_q(selected_user, index=identity_index)) if selected_user else qs.none()
+        qs = qs.filter(employee_lead_ownership_q(selected_user, index=identity_index)) if selected_user else qs.none()
 
     paginator = Paginator(qs, per_page)
     page_number = request.GET.get("page") or 1
@@ -1798,6 +1751,19 @@ def lead_release(request, pk):
     return _lead_assignment_return(request, lead)
 
 
+def _refresh_bulk_updated_leads(lead_ids):
+    """
+    Queryset ``update()`` skips the Lead save signals, so re-index the touched
+    leads and mark their KPI days dirty the way a save would.
+    """
+    lead_ids = list(lead_ids)
+    if not lead_ids:
+        return
+    schedule_kpi_dirty(KPI_FAMILY_LEADS, date_queryset=Lead.objects.filter(pk__in=lead_ids).values("created_date"))
+    for lead in Lead.objects.filter(pk__in=lead_ids):
+        index_instance(lead)
+
+
 @require_POST
 def lead_bulk_update(request):
     lead_ids = request.POST.getlist("lead_ids")
@@ -1823,7 +1789,10 @@ def lead_bulk_update(request):
     elif action == "outbound_status":
         status = request.POST.get("outbound_status") or ""
         if status:
-            qs.filter(lead_type="outbound").update(outbound_status=status)
+            outbound = qs.filter(lead_type="outbound")
+            outbound_ids = list(outbound.values_list("pk", flat=True))
+            outbound.update(outbound_status=status)
+            _refresh_bulk_updated_leads(outbound_ids)
             messages.success(request, "Outbound status updated.")
         else:
             messages.error(request, "Choose an outbound status.")
@@ -1842,12 +1811,14 @@ def lead_bulk_update(request):
             messages.error(request, "You do not have permission to archive leads.")
         else:
             now = timezone.now()
+            archived_ids = list(qs.values_list("pk", flat=True))
             qs.update(
                 is_archived=True,
                 archived_at=now,
                 archived_by=request.user if request.user.is_authenticated else None,
             )
-            qs.filter(lead_type="outbound").update(outbound_status="Archived")
+            Lead.objects.filter(pk__in=archived_ids, lead_type="outbound").update(outbound_status="Archived")
+            _refresh_bulk_updated_leads(archived_ids)
             messages.success(request, "Selected leads archived.")
 
     else:
@@ -2824,35 +2795,6 @@ def _production_workflow_steps(current_status):
     return steps
 
 
-def _production_priority(order, percent_done, has_delay, late_shipment, shipment_pending, today, operational_status=None):
-    completed_statuses = _production_completed_statuses()
-    if operational_status == OPERATIONAL_STATUS_CANCELLED:
-        return {"key": "low", "label": "Low", "tone": "neutral", "reason": "Cancelled"}
-    if operational_status == OPERATIONAL_STATUS_SHIPPED:
-        return {"key": "low", "label": "Low", "tone": "good", "reason": "Completed"}
-    if not operational_status and order.status in completed_statuses:
-        return {"key": "low", "label": "Low", "tone": "good", "reason": "Completed"}
-
-    deadline = getattr(order, "bulk_deadline", None)
-    if has_delay or late_shipment:
-        return {"key": "urgent", "label": "Urgent", "tone": "risk", "reason": "Delayed"}
-    if operational_status == OPERATIONAL_STATUS_READY_TO_SHIP:
-        return {"key": "high", "label": "High", "tone": "warning", "reason": "Ready to ship"}
-    if operational_status == OPERATIONAL_STATUS_SAMPLE_SENT:
-        return {"key": "high", "label": "High", "tone": "warning", "reason": "Sample approval"}
-    if deadline and deadline <= today + timedelta(days=2):
-        return {"key": "urgent", "label": "Urgent", "tone": "risk", "reason": "Deadline close"}
-    if not operational_status and order.status == "hold":
-        return {"key": "high", "label": "High", "tone": "warning", "reason": "On hold"}
-    if shipment_pending:
-        return {"key": "high", "label": "High", "tone": "warning", "reason": "Shipment pending"}
-    if deadline and deadline <= today + timedelta(days=7):
-        return {"key": "high", "label": "High", "tone": "warning", "reason": "Due this week"}
-    if percent_done == 0 and (operational_status == OPERATIONAL_STATUS_PLANNING or order.status == "planning"):
-        return {"key": "normal", "label": "Normal", "tone": "neutral", "reason": "Planning"}
-    return {"key": "normal", "label": "Normal", "tone": "neutral", "reason": "On track"}
-
-
 def _production_activity_timeline(order, stages, shipments, lifecycle=None, comments=None):
     items = [
         SimpleNamespace(
@@ -3419,11 +3361,12 @@ def _lead_detail_impl(request, pk):
                 messages_for_model = [{"role": "system", "content": selected_agent.system_prompt}] + history
 
                 try:
-                    resp = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages_for_model,
+                    ai_text = chat_text(
+                        messages_for_model,
+                        feature="lead_ai_chat",
+                        user=request.user,
+                        cache_ttl=0,
                     )
-                    ai_text = resp.choices[0].message.content
                 except Exception as e:
                     ai_text = f"AI error: {e}"
 
@@ -3492,11 +3435,12 @@ def _lead_detail_impl(request, pk):
                 messages_for_model = [{"role": "system", "content": selected_agent.system_prompt}] + history
 
                 try:
-                    resp = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages_for_model,
+                    ai_text = chat_text(
+                        messages_for_model,
+                        feature="lead_ai_chat",
+                        user=request.user,
+                        cache_ttl=0,
                     )
-                    ai_text = resp.choices[0].message.content
                 except Exception as e:
                     ai_text = f"AI error: {e}"
 
@@ -4503,11 +4447,11 @@ def customer_ai_detail(request, pk):
     ]
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages_for_model,
+        ai_text = chat_text(
+            messages_for_model,
+            feature="customer_ai_detail",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content.strip()
 
         timestamp = timezone.now().strftime("%Y-%m-%d %H:%M")
         header = f"\n\n[AI {mode} {timestamp}]\n"
@@ -4771,17 +4715,17 @@ def customer_ai_focus(request):
         )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {
                     "role": "system",
                     "content": "You are an expert clothing factory account manager.",
                 },
                 {"role": "user", "content": user_prompt},
             ],
+            feature="customer_ai_focus",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -5032,15 +4976,14 @@ def customer_ai_overview(request):
             "Keep it short, friendly, and written as bullet style tips."
         )
 
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a practical sales coach."},
                 {"role": "user", "content": prompt},
             ],
+            feature="customer_ai_overview",
+            user=request.user,
         )
-
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
 
     except Exception as e:
@@ -5106,15 +5049,14 @@ def customer_ai_insight(request, pk):
             f"Customer account data: {info_text}"
         )
 
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a helpful account manager."},
                 {"role": "user", "content": prompt},
             ],
+            feature="customer_ai_insight",
+            user=request.user,
         )
-
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
 
     except Exception as e:
@@ -5332,9 +5274,8 @@ def product_ai_detail(request, pk):
         )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {
                     "role": "system",
                     "content": (
@@ -5344,8 +5285,9 @@ def product_ai_detail(request, pk):
                 },
                 {"role": "user", "content": user_prompt},
             ],
+            feature="product_ai_detail",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content or ""
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
 
@@ -5397,14 +5339,14 @@ def product_ai_suggest(request):
     )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a senior apparel product developer."},
                 {"role": "user", "content": prompt},
             ],
+            feature="product_ai_suggest",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -5446,16 +5388,15 @@ def fabric_ai_suggest(request):
     )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a textile expert."},
                 {"role": "user", "content": prompt},
             ],
+            feature="fabric_ai_suggest",
+            user=request.user,
         )
 
-        ai_text = resp.choices[0].message.content
-
         return JsonResponse({"ok": True, "suggestion": ai_text})
 
     except Exception as e:
@@ -5498,14 +5439,14 @@ def fabric_ai_focus(request, pk):
     )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a textile expert for a clothing factory."},
                 {"role": "user", "content": prompt},
             ],
+            feature="fabric_ai_focus",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -5686,14 +5627,14 @@ def fabric_ai_detail(request, pk):
     )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a textile expert for a clothing factory."},
                 {"role": "user", "content": prompt},
             ],
+            feature="fabric_ai_detail",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content or ""
     except Exception as e:
         return JsonResponse(
             {"ok": False, "error": f"AI error: {str(e)}"}
@@ -5780,14 +5721,14 @@ def accessory_ai_suggest(request):
     )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are an accessory expert."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            feature="accessory_ai_suggest",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
 
     except Exception as e:
@@ -6038,15 +5979,14 @@ def trim_ai_suggest(request):
     )
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {"role": "system", "content": "You are a trim and accessories expert."},
                 {"role": "user", "content": prompt},
             ],
+            feature="trim_ai_suggest",
+            user=request.user,
         )
-
-        ai_text = resp.choices[0].message.content
         return JsonResponse({"ok": True, "suggestion": ai_text})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -6625,14 +6565,17 @@ def inventory_detail(request, pk):
     }
     return render(request, "crm/inventory_detail.html", context)
 
+# Bump when an inventory or production PDF layout changes so cached copies are re-rendered.
+PDF_LAYOUT_VERSION = 1
+
+
 def inventory_detail_pdf(request, pk):
     item = get_object_or_404(InventoryItem, pk=pk)
     can_view_financials = _inventory_can_view_financials(request.user)
 
     # try to use reportlab for real PDF
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
+        import reportlab  # noqa: F401
     except ImportError:
         # Safe fallback so system does not break
         return HttpResponse(
@@ -6640,11 +6583,19 @@ def inventory_detail_pdf(request, pk):
             content_type="text/plain",
         )
 
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"inventory_{item.pk}.pdf"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    # Financial fields are only drawn for some users, so each variant is cached on its own.
+    kind = "inventory_financials" if can_view_financials else "inventory"
+    fingerprint = pdf_fingerprint(PDF_LAYOUT_VERSION, item.pk, item.updated_at, model_to_dict(item, exclude=["image"]))
+    data = cached_pdf(kind, item.pk, fingerprint, lambda: _render_inventory_detail_pdf(item, can_view_financials))
+    return pdf_response(data, f"inventory_{item.pk}.pdf")
+
 
-    p = canvas.Canvas(response, pagesize=letter)
+def _render_inventory_detail_pdf(item, can_view_financials):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
     y = height - 50
 
@@ -6700,7 +6651,7 @@ def inventory_detail_pdf(request, pk):
 
     p.showPage()
     p.save()
-    return response
+    return buffer.getvalue()
 
 @require_POST
 def inventory_delete(request, pk):
@@ -6762,17 +6713,17 @@ def inventory_ai_overview(request):
     )
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {
                     "role": "system",
                     "content": "You assist inventory decisions for a garment factory.",
                 },
                 {"role": "user", "content": prompt},
             ],
+            feature="inventory_ai_overview",
+            user=request.user,
         )
-        ai_text = response.choices[0].message.content
         return JsonResponse({"ok": True, "text": ai_text})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -6846,28 +6797,34 @@ def world_dashboard(request):
     }
 
     ai_fashion_update = "AI Trend Update unavailable right now."
-    if "_ai_client" in globals() and _ai_client:
-        try:
-            prompt = (
-                "Give a short daily update about global fashion and apparel trends. "
-                "Only key changes, risks, or chances for a clothing manufacturer in Bangladesh and Canada. "
-                "Max 6 lines. Simple English."
-            )
-            response = _ai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are the trend analyst for a clothing manufacturer."},
-                    {"role": "user", "content": prompt},
-                ],
-            )
-            ai_fashion_update = response.choices[0].message.content
-        except Exception:
-            pass
+    ai_fashion_update_poll_url = ""
+    if llm_available():
+        prompt = (
+            "Give a short daily update about global fashion and apparel trends. "
+            "Only key changes, risks, or chances for a clothing manufacturer in Bangladesh and Canada. "
+            "Max 6 lines. Simple English."
+        )
+        # Same prompt for everyone: one background call refreshes it every few hours.
+        result = submit_llm(
+            [
+                {"role": "system", "content": "You are the trend analyst for a clothing manufacturer."},
+                {"role": "user", "content": prompt},
+            ],
+            feature="world_dashboard",
+            user=request.user,
+            cache_ttl=6 * 60 * 60,
+        )
+        if result.ready:
+            ai_fashion_update = result.text
+        elif result.pending:
+            ai_fashion_update = "AI Trend Update is being prepared..."
+            ai_fashion_update_poll_url = reverse("ai_result_json", args=[result_token(result.key, request.user)])
 
     context = {
         "cities": cities,
         "currencies": currencies,
         "ai_fashion_update": ai_fashion_update,
+        "ai_fashion_update_poll_url": ai_fashion_update_poll_url,
         "trend_cards": trend_cards,
         "category_mix": category_mix,
         "region_signals": region_signals,
@@ -6880,7 +6837,7 @@ def world_dashboard(request):
 
 
 def world_ai_fashion_news(request):
-    ai_enabled = bool("_ai_client" in globals() and _ai_client)
+    ai_enabled = llm_available()
     if request.method != "POST":
         context = {
             "ai_enabled": ai_enabled,
@@ -6934,14 +6891,14 @@ def world_ai_fashion_news(request):
                 "Return 5 bullet points plus 2 quick actions. Simple English."
             )
 
-        response = _ai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        text = chat_text(
+            [
                 {"role": "system", "content": "You are an assistant for Iconic Apparel House. Keep it short and useful."},
                 {"role": "user", "content": prompt},
             ],
+            feature="world_ai_fashion_news",
+            user=request.user,
         )
-        text = response.choices[0].message.content
         return JsonResponse({"ok": True, "text": text})
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)})
@@ -6958,7 +6915,6 @@ import calendar as py_calendar
 from datetime import date, datetime, timedelta
 
 from django.conf import settings
-from django.core.mail import send_mail
 from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
@@ -6968,8 +6924,6 @@ from django.views.decorators.http import require_POST
 from .models import Event, EventReminderDismissal, Lead
 from .forms import EventForm
 
-# Optional OpenAI client (safe if package not installed)
-_ai_client = client
 
 
 def _calendar_user_name_values(user):
@@ -7007,53 +6961,6 @@ def _queue_calendar_email_after_commit(event, action):
     transaction.on_commit(lambda event_id=event.pk, action_name=action: queue_calendar_invite_email(event_id, action=action_name))
 
 
-# ==============================
-# EMAIL REMINDER HELPER
-# ==============================
-def send_due_event_reminders():
-    """
-    Send reminder emails for events that are close.
-    Uses reminder_minutes_before and assigned_to_email.
-    """
-    now = timezone.now()
-
-    qs = Event.objects.filter(
-        reminder_minutes_before__isnull=False,
-        reminder_sent=False,
-    ).exclude(
-        assigned_to_email__isnull=True
-    ).exclude(
-        assigned_to_email=""
-    )
-
-    for ev in qs:
-        if not ev.start_datetime:
-            continue
-
-        delta = ev.start_datetime - now
-        minutes_to_start = delta.total_seconds() / 60.0
-
-        if 0 <= minutes_to_start <= (ev.reminder_minutes_before or 0):
-            subject = f"Reminder: {ev.title}"
-            msg_note = ev.note or ""
-            message = f"Event starts at {timezone.localtime(ev.start_datetime)}.\n\nNote: {msg_note}"
-            recipient = [ev.assigned_to_email]
-
-            try:
-                send_mail(
-                    subject,
-                    message,
-                    getattr(settings, "DEFAULT_FROM_EMAIL", None),
-                    recipient,
-                    fail_silently=True,
-                )
-                ev.reminder_sent = True
-                ev.save(update_fields=["reminder_sent"])
-            except Exception:
-                # keep silent so calendar page never breaks
-                pass
-
-
 # ==============================
 # CALENDAR ADD
 # ==============================
@@ -7126,15 +7033,15 @@ def calendar_add(request):
                 _queue_calendar_email_after_commit(extra_event, "created")
 
             # AI note for first event only
-            if _ai_client and not event.ai_note:
+            if llm_available() and not event.ai_note:
                 try:
                     prompt = f"Create a short helpful follow up summary for this CRM event: {event.title}"
-                    resp = _ai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
+                    event.ai_note = chat_text(
+                        [{"role": "user", "content": prompt}],
+                        feature="calendar_add",
+                        user=request.user,
                         max_tokens=120,
                     )
-                    event.ai_note = (resp.choices[0].message.content or "").strip()
                     event.save(update_fields=["ai_note"])
                 except Exception:
                     pass
@@ -7168,15 +7075,15 @@ def calendar_edit(request, pk):
             if calendar_event_signature(event) != old_signature:
                 _queue_calendar_email_after_commit(event, "updated")
 
-            if _ai_client and event.status == "done" and not event.ai_note:
+            if llm_available() and event.status == "done" and not event.ai_note:
                 try:
                     prompt = f"Summarize completed CRM event in one short note: {event.title}"
-                    resp = _ai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
+                    event.ai_note = chat_text(
+                        [{"role": "user", "content": prompt}],
+                        feature="calendar_edit",
+                        user=request.user,
                         max_tokens=100,
                     )
-                    event.ai_note = (resp.choices[0].message.content or "").strip()
                     event.save(update_fields=["ai_note"])
                 except Exception:
                     pass
@@ -7222,7 +7129,7 @@ def calendar_event_detail(request, pk):
 # ==============================
 @require_POST
 def calendar_event_ai(request, pk):
-    if not _ai_client:
+    if not llm_available():
         return JsonResponse({"ok": False, "error": "AI is not configured."}, status=500)
 
     event = _get_calendar_event_for_user(request, pk)
@@ -7261,12 +7168,12 @@ def calendar_event_ai(request, pk):
         prompt = "You are a CRM assistant helping with one calendar event.\n\n" + context_text + "\n\nUser question: " + user_text
 
     try:
-        resp = _ai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+        text = chat_text(
+            [{"role": "user", "content": prompt}],
+            feature="calendar_event_ai",
+            user=request.user,
             max_tokens=220,
         )
-        text = (resp.choices[0].message.content or "").strip()
         return JsonResponse({"ok": True, "text": text})
     except Exception:
         return JsonResponse({"ok": False, "error": "AI error"}, status=500)
@@ -7278,10 +7185,8 @@ def calendar_event_ai(request, pk):
 def calendar_list(request):
     """
     Main calendar page with month, week, day view and filters.
+    Reminder emails are sent by the dispatch_event_reminders_task beat job.
     """
-    # send reminders without extra job
-    send_due_event_reminders()
-
     today = timezone.localdate()
     current_view = request.GET.get("view", "month")
 
@@ -8015,17 +7920,17 @@ def opportunity_ai_detail(request, pk):
 
     # call OpenAI
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_text = chat_text(
+            [
                 {
                     "role": "system",
                     "content": "You are an expert CRM assistant for a clothing factory.",
                 },
                 {"role": "user", "content": user_prompt},
             ],
+            feature="opportunity_ai_detail",
+            user=request.user,
         )
-        ai_text = resp.choices[0].message.content
     except Exception as e:
         logger.exception("AI opportunity helper failed")
         return JsonResponse({"ok": False, "error": str(e)})
@@ -8734,34 +8639,7 @@ def production_list(request):
     delayed_filter = (request.GET.get("delayed") or "all").strip().lower()
     shipment_filter = (request.GET.get("shipment") or "all").strip().lower()
 
-    orders = (
-        ProductionOrder.objects
-        .select_related(
-            "customer",
-            "product",
-            "opportunity",
-            "opportunity__lead",
-            "opportunity__lead__assigned_to",
-            "lead",
-            "lead__assigned_to",
-            "assigned_production_manager",
-            "created_by",
-        )
-        .annotate(
-            list_has_inventory_allocations=Exists(
-                ProductionOrderMaterial.objects.filter(order_id=OuterRef("pk"))
-            ),
-            list_has_invoices=Exists(
-                Invoice.objects.filter(order_id=OuterRef("pk"))
-            ),
-            list_has_accounting_records=Exists(
-                AccountingEntry.objects.filter(production_order_id=OuterRef("pk"))
-            ),
-        )
-        .prefetch_related("stages", "shipments", "order_lifecycles")
-        .order_by("-created_at")
-    )
-    orders = scope_production_orders(orders, request.user)
+    orders = scope_production_orders(ProductionOrder.objects.all(), request.user)
 
     if archive_filter == "archived":
         orders = orders.filter(is_archived=True)
@@ -8781,171 +8659,85 @@ def production_list(request):
             | Q(opportunity__product_category__icontains=search_query)
         )
 
-    orders_for_kpis = orders
-    production_kpi_rows = [
-        {
-            "order": order,
-            "operational_status": get_production_operational_status(order),
-        }
-        for order in orders_for_kpis
-    ]
-
-    orders_data_all = []
-
-    for order in orders:
-        operational_status = get_production_operational_status(order)
-        stages = get_sorted_stages(order)
-        shipments = list(order.shipments.all())
-
-        total_stages = len(stages)
-        done_count = len([s for s in stages if s.status == "done"])
-        percent_done = int((done_count / total_stages) * 100) if total_stages else 0
-
-        bulk_overdue = bool(
-            order.bulk_deadline
-            and today > order.bulk_deadline
-            and operational_status not in OPERATIONAL_FINISHED_STATUSES
-        )
-        stage_delay = any(s.status == "delay" or s.is_late for s in stages)
-        late_shipment = any(
-            s.ship_date
-            and s.ship_date < today
-            and s.status not in {"delivered", "cancelled"}
-            for s in shipments
-        )
-        has_delay = bulk_overdue or stage_delay
-        shipment_pending = (
-            not shipments
-            and operational_status in OPERATIONAL_ACTIVE_STATUSES
-            and (percent_done >= 80 or _production_any_stage_started(_production_stage_lookup(stages), ["shipping"]))
-        )
-        priority = _production_priority(
-            order,
-            percent_done,
-            has_delay,
-            late_shipment,
-            shipment_pending,
-            today,
-            operational_status,
-        )
-        lifecycle = None
-        try:
-            lifecycles = list(order.order_lifecycles.all())
-            lifecycle = lifecycles[0] if lifecycles else None
-        except (AttributeError, IndexError):
-            lifecycle = None
-
-        orders_data_all.append(
-            {
-                "order": order,
-                "stages": stages,
-                "shipments": shipments,
-                "percent_done": percent_done,
-                "has_delay": has_delay,
-                "bulk_overdue": bulk_overdue,
-                "late_shipment": late_shipment,
-                "shipment_pending": shipment_pending,
-                "priority": priority,
-                "operational_status": operational_status,
-                "operational_status_label": OPERATIONAL_STATUS_LABELS.get(
-                    operational_status,
-                    OPERATIONAL_STATUS_LABELS[OPERATIONAL_STATUS_PLANNING],
-                ),
-                "latest_shipment": shipments[0] if shipments else None,
-                "lifecycle": lifecycle,
-                "lifecycle_currency": lifecycle_currency(lifecycle) if lifecycle else "",
-                "can_hard_delete": not (
-                    shipments
-                    or order.list_has_inventory_allocations
-                    or order.list_has_invoices
-                    or order.list_has_accounting_records
-                ),
-            }
-        )
-
-    orders_data = []
-    for row in orders_data_all:
-        operational_status = row["operational_status"]
-        if status_filter == "active" and operational_status not in OPERATIONAL_ACTIVE_STATUSES:
-            continue
-        if status_filter == "sample_development" and operational_status != OPERATIONAL_STATUS_SAMPLE_DEVELOPMENT:
-            continue
-        if status_filter == "bulk_production" and (
-            row["order"].production_order_type != "bulk"
-            or operational_status not in OPERATIONAL_ACTIVE_STATUSES
-        ):
-            continue
-        if status_filter == "delayed" and not row["has_delay"]:
-            continue
-        if status_filter == "ready_to_ship" and operational_status != OPERATIONAL_STATUS_READY_TO_SHIP:
-            continue
-        if status_filter == "shipped" and (
-            operational_status != OPERATIONAL_STATUS_SHIPPED
-            or _production_row_is_completed(row)
-        ):
-            continue
-        if status_filter == "completed" and not _production_row_is_completed(row):
-            continue
-        if status_filter == "cancelled" and operational_status != OPERATIONAL_STATUS_CANCELLED:
-            continue
-        if status_filter == "archived" and not row["order"].is_archived:
-            continue
-        if status_filter not in {
-            "active",
-            "sample_development",
-            "bulk_production",
-            "delayed",
-            "ready_to_ship",
-            "shipped",
-            "completed",
-            "cancelled",
-            "archived",
-            "all",
-        } and operational_status not in OPERATIONAL_ACTIVE_STATUSES:
-            continue
-        if priority_filter != "all" and row["priority"]["key"] != priority_filter:
-            continue
-        if delayed_filter == "delayed" and not row["has_delay"]:
-            continue
-        if delayed_filter == "on_track" and row["has_delay"]:
-            continue
-        if shipment_filter == "pending" and not row["shipment_pending"]:
-            continue
-        if shipment_filter == "linked" and not row["shipments"]:
-            continue
-        if shipment_filter == "late" and not row["late_shipment"]:
-            continue
-        orders_data.append(row)
-    production_operational_counts = Counter(
-        row["operational_status"] for row in production_kpi_rows
-    )
-    production_kpi_active_rows = [
-        row for row in production_kpi_rows
-        if row["operational_status"] in OPERATIONAL_ACTIVE_STATUSES
-    ]
-    sample_development_rows = [
-        row for row in production_kpi_active_rows
-        if row["order"].production_order_type == "sampling"
-    ]
-    bulk_production_rows = [
-        row for row in production_kpi_active_rows
-        if row["order"].production_order_type == "bulk"
-    ]
-    total_active_orders_count = len(production_kpi_active_rows)
-    total_active_units_count = sum((row["order"].qty_total or 0) for row in production_kpi_active_rows)
+    # KPIs cover every order in scope; the list filters below only narrow the table.
+    orders_for_kpis = ProductionOrder.objects.filter(pk__in=orders.values("pk"))
+    list_related = (
+        "customer",
+        "product",
+        "opportunity",
+        "opportunity__lead",
+        "opportunity__lead__assigned_to",
+        "lead",
+        "lead__assigned_to",
+        "assigned_production_manager",
+        "created_by",
+    )
+
+    active_status_q = Q(operational_status__in=OPERATIONAL_ACTIVE_STATUSES)
+    if status_filter == "sample_development":
+        orders = orders.filter(operational_status=OPERATIONAL_STATUS_SAMPLE_DEVELOPMENT)
+    elif status_filter == "bulk_production":
+        orders = orders.filter(active_status_q, production_order_type="bulk")
+    elif status_filter == "delayed":
+        orders = orders.filter(has_delay=True)
+    elif status_filter == "ready_to_ship":
+        orders = orders.filter(operational_status=OPERATIONAL_STATUS_READY_TO_SHIP)
+    elif status_filter == "shipped":
+        orders = orders.filter(operational_status=OPERATIONAL_STATUS_SHIPPED, has_delivered_shipment=False)
+    elif status_filter == "completed":
+        orders = orders.filter(operational_status=OPERATIONAL_STATUS_SHIPPED, has_delivered_shipment=True)
+    elif status_filter == "cancelled":
+        orders = orders.filter(operational_status=OPERATIONAL_STATUS_CANCELLED)
+    elif status_filter == "archived":
+        orders = orders.filter(is_archived=True)
+    elif status_filter != "all":
+        orders = orders.filter(active_status_q)
+    if priority_filter != "all":
+        if priority_filter in PRIORITY_RANKS:
+            orders = orders.filter(priority_rank=PRIORITY_RANKS[priority_filter])
+        else:
+            orders = orders.none()
+    if delayed_filter == "delayed":
+        orders = orders.filter(has_delay=True)
+    elif delayed_filter == "on_track":
+        orders = orders.filter(has_delay=False)
+    if shipment_filter == "pending":
+        orders = orders.filter(shipment_pending=True)
+    elif shipment_filter == "linked":
+        orders = orders.filter(has_shipments=True)
+    elif shipment_filter == "late":
+        orders = orders.filter(has_late_shipment=True)
+
+    production_operational_counts = dict(
+        orders_for_kpis.order_by()
+        .values_list("operational_status")
+        .annotate(count=Count("pk"))
+    )
+    overdue_q = Q(bulk_deadline__lt=today) & ~Q(operational_status__in=OPERATIONAL_FINISHED_STATUSES)
+    sample_q = active_status_q & Q(production_order_type="sampling")
+    bulk_q = active_status_q & Q(production_order_type="bulk")
+    production_kpis = orders_for_kpis.aggregate(
+        active_count=Count("pk", filter=active_status_q),
+        active_units=Sum("qty_total", filter=active_status_q),
+        active_reject=Sum("qty_reject", filter=active_status_q),
+        sample_count=Count("pk", filter=sample_q),
+        sample_units=Sum("qty_total", filter=sample_q),
+        bulk_count=Count("pk", filter=bulk_q),
+        bulk_units=Sum("qty_total", filter=bulk_q),
+        overdue_count=Count("pk", filter=overdue_q),
+    )
+    total_active_orders_count = production_kpis["active_count"]
+    total_active_units_count = production_kpis["active_units"] or 0
     total_orders = total_active_orders_count
     active_orders = total_active_orders_count
     total_pieces = total_active_units_count
-    total_reject = sum((row["order"].qty_reject or 0) for row in production_kpi_active_rows)
+    total_reject = production_kpis["active_reject"] or 0
     reject_percent = int((total_reject / total_pieces) * 100) if total_pieces else 0
-    sample_development_orders_count = len(sample_development_rows)
-    sample_development_units_count = sum((row["order"].qty_total or 0) for row in sample_development_rows)
-    bulk_production_orders_count = len(bulk_production_rows)
-    bulk_production_units_count = sum((row["order"].qty_total or 0) for row in bulk_production_rows)
-    production_completed_count = len([
-        row for row in production_kpi_rows
-        if row["operational_status"] == OPERATIONAL_STATUS_SHIPPED
-    ])
+    sample_development_orders_count = production_kpis["sample_count"]
+    sample_development_units_count = production_kpis["sample_units"] or 0
+    bulk_production_orders_count = production_kpis["bulk_count"]
+    bulk_production_units_count = production_kpis["bulk_units"] or 0
+    production_completed_count = production_operational_counts.get(OPERATIONAL_STATUS_SHIPPED, 0)
     completed_orders = production_completed_count
     production_completion_denominator = total_active_orders_count + production_completed_count
     production_completion_percent = (
@@ -8953,21 +8745,10 @@ def production_list(request):
         if production_completion_denominator
         else 0
     )
-    ready_to_ship_operations_count = len([
-        row for row in production_kpi_rows
-        if row["operational_status"] == OPERATIONAL_STATUS_READY_TO_SHIP
-    ])
-    delayed_operations_count = len([
-        row for row in production_kpi_rows
-        if row["order"].bulk_deadline
-        and row["order"].bulk_deadline < today
-        and row["operational_status"] not in OPERATIONAL_FINISHED_STATUSES
-    ])
+    ready_to_ship_operations_count = production_operational_counts.get(OPERATIONAL_STATUS_READY_TO_SHIP, 0)
+    delayed_operations_count = production_kpis["overdue_count"]
     delayed_orders = delayed_operations_count
-    awaiting_approval_samples_count = len([
-        row for row in production_kpi_rows
-        if row["operational_status"] == OPERATIONAL_STATUS_SAMPLE_SENT
-    ])
+    awaiting_approval_samples_count = production_operational_counts.get(OPERATIONAL_STATUS_SAMPLE_SENT, 0)
 
     pipeline_statuses = [
         OPERATIONAL_STATUS_PLANNING,
@@ -8988,52 +8769,23 @@ def production_list(request):
         for status in pipeline_statuses
     ]
     pipeline_total_count = sum(item["count"] for item in pipeline_counts)
-    delayed_operation_rows = sorted(
-        [
-            {
-                "order": row["order"],
-                "operational_status": row["operational_status"],
-                "priority": SimpleNamespace(
-                    key="urgent",
-                    label="Urgent",
-                    reason="Delayed",
-                    tone="risk",
-                ),
-            }
-            for row in production_kpi_rows
-            if row["order"].bulk_deadline
-            and row["order"].bulk_deadline < today
-            and row["operational_status"] not in OPERATIONAL_FINISHED_STATUSES
-        ],
-        key=lambda row: (row["order"].bulk_deadline or date.max, row["order"].order_code or ""),
-    )
-    delayed_operation_ids = {row["order"].pk for row in delayed_operation_rows}
-    ready_to_ship_operation_rows = sorted(
-        [
-            {
-                "order": row["order"],
-                "operational_status": row["operational_status"],
-                "priority": SimpleNamespace(
-                    key="high",
-                    label="High",
-                    reason="Ready to ship",
-                    tone="warning",
-                ),
-            }
-            for row in production_kpi_rows
-            if row["operational_status"] == OPERATIONAL_STATUS_READY_TO_SHIP
-            and row["order"].pk not in delayed_operation_ids
-        ],
-        key=lambda row: (row["order"].bulk_deadline or date.max, row["order"].order_code or ""),
-    )
-    urgent_orders = sorted(
-        delayed_operation_rows + ready_to_ship_operation_rows,
-        key=lambda row: (
-            0 if row["priority"].key == "urgent" else 1,
-            row["order"].bulk_deadline or date.max,
-            row["order"].order_code or "",
-        ),
-    )[:10]
+    urgent_orders = [
+        {
+            "order": order,
+            "operational_status": order.operational_status,
+            "priority": (
+                SimpleNamespace(key="urgent", label="Urgent", reason="Delayed", tone="risk")
+                if order.list_overdue_rank == 0
+                else SimpleNamespace(key="high", label="High", reason="Ready to ship", tone="warning")
+            ),
+        }
+        for order in orders_for_kpis
+        .filter(overdue_q | Q(operational_status=OPERATIONAL_STATUS_READY_TO_SHIP))
+        .annotate(
+            list_overdue_rank=Case(When(overdue_q, then=0), default=1, output_field=IntegerField())
+        )
+        .order_by("list_overdue_rank", F("bulk_deadline").asc(nulls_last=True), "order_code")[:10]
+    ]
     factory_summary = {
         "active_orders": total_active_orders_count,
         "units_in_production": total_active_units_count,
@@ -9047,33 +8799,99 @@ def production_list(request):
     low_margin_orders = []
     high_profit_orders = []
     if can_view_profit:
-        profit_rows = [row for row in orders_data if row["lifecycle"]]
-        low_margin_orders = sorted(
-            [
-                row for row in profit_rows
-                if row["lifecycle"].estimated_revenue
-                and row["lifecycle"].estimated_cost > 0
-                and row["lifecycle"].estimated_margin < Decimal("15")
-            ],
-            key=lambda row: row["lifecycle"].estimated_margin,
-        )[:4]
-        high_profit_orders = sorted(
-            [
-                row for row in profit_rows
-                if row["lifecycle"].estimated_cost > 0
-                and row["lifecycle"].estimated_profit
-                and row["lifecycle"].estimated_profit > 0
-            ],
-            key=lambda row: row["lifecycle"].estimated_profit,
-            reverse=True,
-        )[:4]
+        latest_lifecycle = OrderLifecycle.objects.filter(
+            production_order_id=OuterRef("pk")
+        ).order_by("-updated_at", "-id")
+        profit_orders = orders.annotate(
+            list_lifecycle_id=Subquery(latest_lifecycle.values("pk")[:1]),
+            list_revenue=Subquery(latest_lifecycle.values("estimated_revenue")[:1]),
+            list_cost=Subquery(latest_lifecycle.values("estimated_cost")[:1]),
+            list_profit=Subquery(latest_lifecycle.values("estimated_profit")[:1]),
+            list_margin=Subquery(latest_lifecycle.values("estimated_margin")[:1]),
+        )
+        low_margin_order_list = list(
+            profit_orders.filter(list_cost__gt=0, list_margin__lt=Decimal("15"))
+            .exclude(list_revenue=0)
+            .order_by("list_margin")[:4]
+        )
+        high_profit_order_list = list(
+            profit_orders.filter(list_cost__gt=0, list_profit__gt=0).order_by("-list_profit")[:4]
+        )
+        profit_lifecycles = OrderLifecycle.objects.select_related("invoice", "quotation", "costing").in_bulk(
+            [order.list_lifecycle_id for order in low_margin_order_list + high_profit_order_list]
+        )
+
+        def profit_row(order):
+            lifecycle = profit_lifecycles[order.list_lifecycle_id]
+            return {
+                "order": order,
+                "lifecycle": lifecycle,
+                "lifecycle_currency": lifecycle_currency(lifecycle),
+            }
 
-    paginator = Paginator(orders_data, 25)
-    page_obj = paginator.get_page(request.GET.get("page"))
-    paginated_orders_data = list(page_obj.object_list)
-    attach_primary_reference_images_to_production_orders(
-        [row["order"] for row in paginated_orders_data]
+        low_margin_orders = [profit_row(order) for order in low_margin_order_list]
+        high_profit_orders = [profit_row(order) for order in high_profit_order_list]
+
+    orders = (
+        orders.select_related(*list_related)
+        .annotate(
+            list_has_inventory_allocations=Exists(
+                ProductionOrderMaterial.objects.filter(order_id=OuterRef("pk"))
+            ),
+            list_has_invoices=Exists(
+                Invoice.objects.filter(order_id=OuterRef("pk"))
+            ),
+            list_has_accounting_records=Exists(
+                AccountingEntry.objects.filter(production_order_id=OuterRef("pk"))
+            ),
+        )
+        .order_by("-created_at", "-pk")
     )
+    paginator = Paginator(orders, 25)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    page_orders = list(page_obj.object_list)
+    prefetch_related_objects(page_orders, "stages", "shipments", "order_lifecycles")
+
+    paginated_orders_data = []
+    for order in page_orders:
+        stages = get_sorted_stages(order)
+        shipments = list(order.shipments.all())
+        lifecycles = list(order.order_lifecycles.all())
+        lifecycle = lifecycles[0] if lifecycles else None
+        operational_status = order.operational_status
+        paginated_orders_data.append(
+            {
+                "order": order,
+                "stages": stages,
+                "shipments": shipments,
+                "percent_done": order.stages_percent_done,
+                "has_delay": order.has_delay,
+                "bulk_overdue": bool(
+                    order.bulk_deadline
+                    and today > order.bulk_deadline
+                    and operational_status not in OPERATIONAL_FINISHED_STATUSES
+                ),
+                "late_shipment": order.has_late_shipment,
+                "shipment_pending": order.shipment_pending,
+                "priority": stored_priority_badge(order),
+                "operational_status": operational_status,
+                "operational_status_label": OPERATIONAL_STATUS_LABELS.get(
+                    operational_status,
+                    OPERATIONAL_STATUS_LABELS[OPERATIONAL_STATUS_PLANNING],
+                ),
+                "latest_shipment": shipments[0] if shipments else None,
+                "lifecycle": lifecycle,
+                "lifecycle_currency": lifecycle_currency(lifecycle) if lifecycle else "",
+                "can_hard_delete": not (
+                    shipments
+                    or order.list_has_inventory_allocations
+                    or order.list_has_invoices
+                    or order.list_has_accounting_records
+                ),
+            }
+        )
+    page_obj.object_list = paginated_orders_data
+    attach_primary_reference_images_to_production_orders(page_orders)
     pagination_query = request.GET.copy()
     pagination_query.pop("page", None)
 
@@ -9480,7 +9298,7 @@ def production_detail(request, pk):
         and operational_status in OPERATIONAL_ACTIVE_STATUSES
         and (percent_done >= 80 or _production_any_stage_started(_production_stage_lookup(stages), ["shipping"]))
     )
-    priority_badge = _production_priority(
+    priority_badge = production_priority(
         order,
         percent_done,
         order_delayed,
@@ -10246,12 +10064,12 @@ Use four bullet points only.
     full_prompt = base_prompt + "\n\n" + task
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": full_prompt}],
+        text = chat_text(
+            [{"role": "user", "content": full_prompt}],
+            feature="production_ai_help",
+            user=request.user,
             max_tokens=400,
         )
-        text = response.choices[0].message.content.strip()
 
         if order.ai_note:
             order.ai_note += "\n\n---\n\n" + text
@@ -10313,9 +10131,50 @@ def production_dpr(request, pk):
     return redirect("production_detail", pk=pk)
 
 
+def _production_pdf_image_path(order, style_first=False):
+    product_image = order.product.image.path if order.product and order.product.image else ""
+    style_image = order.style_image.path if order.style_image else ""
+    if style_first:
+        return style_image or product_image
+    return product_image or style_image
+
+
+def _production_order_sheet_fingerprint(order, order_lines):
+    materials = [
+        (
+            line.pk,
+            line.quantity,
+            line.unit_type,
+            line.inventory_item.updated_at,
+            file_stamp(line.inventory_item.image.path if line.inventory_item.image else ""),
+        )
+        for line in order.materials.all()
+    ]
+    library = [
+        [(row.pk, getattr(row, code_field), row.name) for row in rows.all()]
+        for rows, code_field in (
+            (order.fabrics, "fabric_code"),
+            (order.accessories, "accessory_code"),
+            (order.trims, "trim_code"),
+            (order.threads, "thread_code"),
+        )
+    ]
+    return pdf_fingerprint(
+        PDF_LAYOUT_VERSION,
+        order.pk,
+        order.updated_at,
+        order.customer.account_brand if order.customer else "",
+        order.product.product_code if order.product else "",
+        file_stamp(_production_pdf_image_path(order)),
+        order_lines,
+        library,
+        materials,
+    )
+
+
 def production_order_sheet_pdf(request, pk):
     order = get_object_or_404(
-        ProductionOrder.objects.select_related("customer", "lead", "opportunity")
+        ProductionOrder.objects.select_related("customer", "lead", "opportunity", "product")
         .prefetch_related(
             "materials__inventory_item",
             "lines",
@@ -10328,20 +10187,30 @@ def production_order_sheet_pdf(request, pk):
     )
 
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-        from reportlab.pdfbase import pdfmetrics
+        import reportlab  # noqa: F401
     except ImportError:
         return HttpResponse(
             "ReportLab is not installed yet. Ask your dev to install 'reportlab' to enable PDF.",
             content_type="text/plain",
         )
 
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"production_order_sheet_{order.purchase_order_number or order.pk}.pdf"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    order_lines = _production_order_lines(order)
+    data = cached_pdf(
+        "production_order_sheet",
+        order.pk,
+        _production_order_sheet_fingerprint(order, order_lines),
+        lambda: _render_production_order_sheet_pdf(order, order_lines),
+    )
+    return pdf_response(data, f"production_order_sheet_{order.purchase_order_number or order.pk}.pdf")
 
-    p = canvas.Canvas(response, pagesize=letter)
+
+def _render_production_order_sheet_pdf(order, order_lines):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.pdfbase import pdfmetrics
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
     y = height - 50
 
@@ -10419,20 +10288,13 @@ def production_order_sheet_pdf(request, pk):
     y -= 24
 
     # product image (if any)
-    image_path = None
-    if order.product and order.product.image:
-        image_path = order.product.image.path
-    elif order.style_image:
-        image_path = order.style_image.path
-
-    if image_path:
+    image = image_reader(_production_pdf_image_path(order))
+    if image:
         try:
-            p.drawImage(image_path, width - 170, height - 140, width=110, height=110, preserveAspectRatio=True, mask="auto")
+            p.drawImage(image, width - 170, height - 140, width=110, height=110, preserveAspectRatio=True, mask="auto")
         except Exception:
             pass
 
-    order_lines = _production_order_lines(order)
-
     p.setFont("Helvetica", 11)
     header_lines = [
         f"Purchase Order Number: {order.purchase_order_number or order.pk}",
@@ -10510,7 +10372,7 @@ def production_order_sheet_pdf(request, pk):
 
     y = draw_materials_header(y)
 
-    materials = order.materials.select_related("inventory_item")
+    materials = order.materials.all()
     if not materials:
         p.drawString(50, y, "No materials selected yet.")
         y -= 16
@@ -10528,7 +10390,7 @@ def production_order_sheet_pdf(request, pk):
             text_x = 70
             if item.image:
                 try:
-                    p.drawImage(item.image.path, img_x, y - 8, width=14, height=14, preserveAspectRatio=True, mask="auto")
+                    p.drawImage(image_reader(item.image.path), img_x, y - 8, width=14, height=14, preserveAspectRatio=True, mask="auto")
                 except Exception:
                     text_x = 50
 
@@ -10547,32 +10409,50 @@ def production_order_sheet_pdf(request, pk):
 
     p.showPage()
     p.save()
-    return response
+    return buffer.getvalue()
 
 
 def production_packing_list_pdf(request, pk):
     order = get_object_or_404(
-        ProductionOrder.objects.select_related("customer", "lead", "opportunity"),
+        ProductionOrder.objects.select_related("customer", "lead", "opportunity", "product").prefetch_related("lines"),
         pk=pk,
     )
 
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle
-        from reportlab.lib.utils import ImageReader
+        import reportlab  # noqa: F401
     except ImportError:
         return HttpResponse(
             "ReportLab is not installed yet. Ask your dev to install 'reportlab' to enable PDF.",
             content_type="text/plain",
         )
 
-    response = HttpResponse(content_type="application/pdf")
-    filename = f"packing_list_{order.purchase_order_number or order.pk}.pdf"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    p = canvas.Canvas(response, pagesize=letter)
+    order_lines = _production_order_lines(order)
+    fingerprint = pdf_fingerprint(
+        PDF_LAYOUT_VERSION,
+        order.pk,
+        order.updated_at,
+        order.customer.account_brand if order.customer else "",
+        order.lead.account_brand if order.lead else "",
+        file_stamp(_production_pdf_image_path(order, style_first=True)),
+        order_lines,
+    )
+    data = cached_pdf(
+        "production_packing_list",
+        order.pk,
+        fingerprint,
+        lambda: _render_production_packing_list_pdf(order, order_lines),
+    )
+    return pdf_response(data, f"packing_list_{order.purchase_order_number or order.pk}.pdf")
+
+
+def _render_production_packing_list_pdf(order, order_lines):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
 
     def draw_header():
@@ -10590,15 +10470,9 @@ def production_packing_list_pdf(request, pk):
         y -= 10
 
         # image on the right
-        img_path = None
-        if getattr(order, "style_image", None) and getattr(order.style_image, "path", ""):
-            img_path = order.style_image.path
-        elif getattr(order, "product", None) and getattr(order.product, "image", None) and getattr(order.product.image, "path", ""):
-            img_path = order.product.image.path
-
-        if img_path and os.path.exists(img_path):
+        img = image_reader(_production_pdf_image_path(order, style_first=True))
+        if img:
             try:
-                img = ImageReader(img_path)
                 img_w, img_h = 110, 110
                 p.drawImage(img, width - 40 - img_w, height - 58 - img_h, width=img_w, height=img_h, preserveAspectRatio=True, mask="auto")
             except Exception:
@@ -10619,7 +10493,6 @@ def production_packing_list_pdf(request, pk):
     label_map = {"2XL": "XXL", "3XL": "XXXL"}
 
     table_data = [["Box / Style"] + size_labels + ["Total PCS"]]
-    order_lines = _production_order_lines(order)
     for idx, line in enumerate(order_lines, start=1):
         name = line.get("style_name") or f"Style {idx}"
         row = [f"Box {idx} - {name}"]
@@ -10668,7 +10541,11 @@ def production_packing_list_pdf(request, pk):
 
     p.showPage()
     p.save()
-    return response
+    return buffer.getvalue()
+
+
+# The full list is reachable through @-mention search.
+CHATTER_MENTION_DIRECTORY_LIMIT = 40
 
 
 def chatter_feed(request):
@@ -10679,14 +10556,6 @@ def chatter_feed(request):
     source_modules = {"lead": "leads", "opportunity": "opportunities", "production": "production"}
     if source in source_modules and not can_access_operations_module(request.user, source_modules[source]):
         return HttpResponseForbidden("You do not have access to this chatter module.")
-    comments_qs = visible_chatter_comments(request.user).order_by("-created_at")
-
-    if source == "lead":
-        comments_qs = comments_qs.filter(opportunity__isnull=True, production__isnull=True)
-    elif source == "opportunity":
-        comments_qs = comments_qs.filter(opportunity__isnull=False)
-    elif source == "production":
-        comments_qs = comments_qs.filter(production__isnull=False)
 
     if request.method == "POST":
         action = (request.POST.get("action") or "").strip()
@@ -10728,23 +10597,57 @@ def chatter_feed(request):
             return redirect("chatter_feed")
 
     User = get_user_model()
-    team_members = User.objects.filter(
+    team_members_qs = User.objects.filter(
         is_active=True,
         employee_profile__status__in=EmployeeProfile.MENTIONABLE_STATUSES,
-    ).select_related("employee_profile").order_by(
-        "employee_profile__display_name", "first_name", "username"
     )
+    team_members = list(
+        team_members_qs.select_related("employee_profile").order_by(
+            "employee_profile__display_name", "first_name", "username"
+        )[:CHATTER_MENTION_DIRECTORY_LIMIT]
+    )
+    team_members_more = 0
+    if len(team_members) == CHATTER_MENTION_DIRECTORY_LIMIT:
+        team_members_more = team_members_qs.count() - CHATTER_MENTION_DIRECTORY_LIMIT
+    page = chatter_feed_page(request.user, source)
 
     return render(
         request,
         "crm/chatter_feed.html",
         {
-            "comments": comments_qs,
+            "comments": page["comments"],
+            "next_cursor": page["next_cursor"],
             "source": source,
             "team_members": team_members,
+            "team_members_more": team_members_more,
         },
     )
 
+
+def chatter_feed_more(request):
+    """
+    Next page of the chatter feed as rendered items, for infinite scroll.
+    """
+    source = (request.GET.get("source") or "all").strip().lower()
+    source_modules = {"lead": "leads", "opportunity": "opportunities", "production": "production"}
+    if source in source_modules and not can_access_operations_module(request.user, source_modules[source]):
+        return JsonResponse({"error": "You do not have access to this chatter module."}, status=403)
+    cursor = request.GET.get("cursor") or ""
+    if not decode_chatter_cursor(cursor):
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+    page = chatter_feed_page(request.user, source, cursor)
+    return JsonResponse(
+        {
+            "html": render_to_string(
+                "crm/includes/chatter_feed_items.html",
+                {"comments": page["comments"]},
+                request=request,
+            ),
+            "count": len(page["comments"]),
+            "next_cursor": page["next_cursor"],
+        }
+    )
+
 # ==============================
 # SHIPPING VIEWS
 # ==============================
@@ -11562,13 +11465,30 @@ def _ceo_bar_rows(rows, keys):
     return rows
 
 
-def _ceo_aggregate(model, qs, **fields):
-    if model is None:
-        return {name: 0 for name in fields}
-    try:
-        return qs.aggregate(**fields)
-    except (OperationalError, ProgrammingError):
-        return {name: 0 for name in fields}
+_CEO_MARKETING_METRICS = {
+    "website": {
+        "visitors": "marketing.website_visitors",
+        "sessions": "marketing.website_sessions",
+        "page_views": "marketing.website_page_views",
+        "conversions": "marketing.website_conversions",
+    },
+    "search": {
+        "clicks": "marketing.search_clicks",
+        "impressions": "marketing.search_impressions",
+    },
+    "social": {
+        "engagement": "marketing.social_engagement",
+        "reach": "marketing.social_reach",
+        "views": "marketing.social_views",
+    },
+}
+
+
+def _ceo_marketing_totals(kpi_snapshot, group, start, end):
+    return {
+        name: kpi_snapshot.count(metric, start, end)
+        for name, metric in _CEO_MARKETING_METRICS[group].items()
+    }
 
 
 def _ceo_month_key(value):
@@ -11597,56 +11517,10 @@ QUICK_COSTING_KPI_VALUE_STATUSES = [
 ]
 
 
-def _active_lead_queryset():
-    return (
-        Lead.objects.filter(is_archived=False)
-        .annotate(
-            visibility_has_opportunity=Exists(
-                Opportunity.objects.filter(lead_id=OuterRef("pk"))
-            )
-        )
-        .exclude(
-            Q(lead_status__in=["Converted", "Lost", "Unqualified"])
-            | Q(outbound_status__in=_LEAD_LOST_OUTBOUND_STATUSES | _LEAD_CONVERTED_OUTBOUND_STATUSES)
-            | Q(visibility_has_opportunity=True)
-        )
-    )
-
-
-def _active_opportunity_queryset():
-    return _active_opportunity_list_queryset(Opportunity.objects.all())
-
-
 def _active_production_queryset():
     return ProductionOrder.objects.filter(is_archived=False)
 
 
-def _opportunity_has_production_subquery():
-    return ProductionOrder.objects.filter(opportunity_id=OuterRef("pk"), is_archived=False)
-
-
-def _with_opportunity_production_flag(qs, annotation_name="list_has_production"):
-    return qs.annotate(**{annotation_name: Exists(_opportunity_has_production_subquery())})
-
-
-def _active_opportunity_list_queryset(qs, production_flag="list_has_production"):
-    if production_flag not in getattr(qs, "query", SimpleNamespace(annotations={})).annotations:
-        qs = _with_opportunity_production_flag(qs, production_flag)
-    return (
-        open_pipeline_queryset(qs)
-        .filter(**{production_flag: False})
-        .exclude(stage="Production")
-    )
-
-
-def _production_row_has_delivered_shipment(row):
-    return any(getattr(shipment, "status", "") == "delivered" for shipment in row.get("shipments", []))
-
-
-def _production_row_is_completed(row):
-    return row["operational_status"] == OPERATIONAL_STATUS_SHIPPED and _production_row_has_delivered_shipment(row)
-
-
 def _sync_production_after_delivered_shipment(shipment):
     if getattr(shipment, "status", "") != "delivered":
         return None
@@ -11866,21 +11740,29 @@ def ceo_operations_dashboard(request):
     lead_kpi_qs = _active_lead_queryset()
     opportunity_kpi_qs = _active_opportunity_queryset()
     production_kpi_qs = _active_production_queryset()
+    ceo_month_keys = _ceo_month_keys(today)
+    # The month chart counts future-dated entries in the current month, so read to its end.
+    kpi_snapshot = KpiSnapshot(
+        KPI_FAMILIES,
+        min(previous_start, ceo_month_keys[0]),
+        _shift_month_start(ceo_month_keys[-1], 1) - timedelta(days=1),
+    )
 
-    leads_period = lead_kpi_qs.filter(created_date__range=(start_period, today)).count()
-    prev_leads_period = lead_kpi_qs.filter(created_date__range=(previous_start, previous_end)).count()
+    leads_period = kpi_snapshot.count(METRIC_ACTIVE_LEADS, start_period, today)
+    prev_leads_period = kpi_snapshot.count(METRIC_ACTIVE_LEADS, previous_start, previous_end)
     overdue_followups = lead_kpi_qs.filter(next_followup__lt=today).exclude(
         lead_status__in=["Converted", "Closed", "Disqualified", "Lost"]
     ).count()
     due_soon_followups = lead_kpi_qs.filter(
         next_followup__range=(today, today + timedelta(days=7))
     ).exclude(lead_status__in=["Converted", "Closed", "Disqualified", "Lost"]).count()
-    lead_source_rows = list(
-        lead_kpi_qs.filter(created_date__range=(start_period, today))
-        .values("source")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:6]
-    )
+    lead_source_rows = [
+        {"source": source, "count": int(count)}
+        for source, count in sorted(
+            kpi_snapshot.by_dimension(METRIC_ACTIVE_LEADS, start_period, today).items(),
+            key=lambda item: (-item[1], item[0]),
+        )[:6]
+    ]
     assignee_rows = lead_kpi_qs.filter(created_date__range=(start_period, today)).values(
         "assigned_to_id", "owner"
     ).annotate(count=Count("id"))
@@ -11898,9 +11780,8 @@ def ceo_operations_dashboard(request):
         for name, count in sorted(assignee_counts.items(), key=lambda item: (-item[1], item[0]))[:8]
     ]
 
-    opp_base = opportunity_kpi_qs.filter(created_date__range=(start_period, today))
-    opp_period = opp_base.count()
-    prev_opp_period = opportunity_kpi_qs.filter(created_date__range=(previous_start, previous_end)).count()
+    opp_period = kpi_snapshot.count(METRIC_ACTIVE_OPPORTUNITIES, start_period, today)
+    prev_opp_period = kpi_snapshot.count(METRIC_ACTIVE_OPPORTUNITIES, previous_start, previous_end)
     open_pipeline_qs = open_pipeline_queryset(opportunity_kpi_qs)
     open_opps = open_pipeline_qs.count()
     open_pipeline_values = _sum_opportunity_kpi_values_by_currency(open_pipeline_qs)
@@ -12004,34 +11885,14 @@ def ceo_operations_dashboard(request):
     )
 
     cad_to_bdt = _get_latest_cad_to_bdt_rate()
-    accounting_qs = AccountingEntry.objects.exclude(main_type="TRANSFER").exclude(status__iexact="CANCELLED")
-    if side:
-        accounting_qs = accounting_qs.filter(side=side)
-    period_entries = list(
-        accounting_qs.filter(date__range=(start_period, today)).only(
-            "date", "direction", "side", "currency", "main_type", "amount_original", "amount_cad", "rate_to_cad"
-        )
-    )
-    prev_entries = list(
-        accounting_qs.filter(date__range=(previous_start, previous_end)).only(
-            "date", "direction", "side", "currency", "main_type", "amount_original", "amount_cad", "rate_to_cad"
-        )
-    )
 
-    def _finance_totals(entries):
-        revenue = Decimal("0")
-        expenses = Decimal("0")
-        for entry in entries:
-            direction = (entry.direction or "").upper().strip()
-            amount = _ceo_amount_cad(entry, cad_to_bdt)
-            if direction == "IN":
-                revenue += amount
-            elif direction == "OUT":
-                expenses += amount
+    def _finance_totals(start, end):
+        revenue = kpi_snapshot.amount_cad(METRIC_ACCOUNTING_IN, start, end, side=side, cad_to_bdt=cad_to_bdt)
+        expenses = kpi_snapshot.amount_cad(METRIC_ACCOUNTING_OUT, start, end, side=side, cad_to_bdt=cad_to_bdt)
         return {"revenue": revenue, "expenses": expenses, "net": revenue - expenses}
 
-    finance_totals = _finance_totals(period_entries)
-    prev_finance_totals = _finance_totals(prev_entries)
+    finance_totals = _finance_totals(start_period, today)
+    prev_finance_totals = _finance_totals(previous_start, previous_end)
 
     invoice_qs = Invoice.objects.filter(is_archived=False).exclude(status="cancelled") if Invoice is not None else None
     if invoice_qs is not None and side:
@@ -12055,7 +11916,6 @@ def ceo_operations_dashboard(request):
             invoice_open_values = []
             overdue_invoice_count = 0
 
-    ceo_month_keys = _ceo_month_keys(today)
     revenue_overview = None
     invoice_month_labels = []
     invoice_month_values = []
@@ -12104,34 +11964,13 @@ def ceo_operations_dashboard(request):
             logger.exception("ceo_dashboard: invoice revenue overview unavailable")
             revenue_overview = None
 
-    WebsiteTrafficDaily = _ceo_optional_model("marketing", "WebsiteTrafficDaily")
     WebsitePageDaily = _ceo_optional_model("marketing", "WebsitePageDaily")
-    SeoQueryDaily = _ceo_optional_model("marketing", "SeoQueryDaily")
-    AccountMetricDaily = _ceo_optional_model("marketing", "AccountMetricDaily")
     Campaign = _ceo_optional_model("marketing", "Campaign")
     InsightItem = _ceo_optional_model("marketing", "InsightItem")
 
-    website_totals = _ceo_aggregate(
-        WebsiteTrafficDaily,
-        WebsiteTrafficDaily.objects.filter(date__range=(start_period, today)) if WebsiteTrafficDaily else None,
-        visitors=Sum("visitors"),
-        sessions=Sum("sessions"),
-        page_views=Sum("page_views"),
-        conversions=Sum("conversions"),
-    )
-    search_totals = _ceo_aggregate(
-        SeoQueryDaily,
-        SeoQueryDaily.objects.filter(date__range=(start_period, today)) if SeoQueryDaily else None,
-        clicks=Sum("clicks"),
-        impressions=Sum("impressions"),
-    )
-    social_totals = _ceo_aggregate(
-        AccountMetricDaily,
-        AccountMetricDaily.objects.filter(date__range=(start_period, today)) if AccountMetricDaily else None,
-        engagement=Sum("engagement_total"),
-        reach=Sum("reach"),
-        views=Sum("views"),
-    )
+    website_totals = _ceo_marketing_totals(kpi_snapshot, "website", start_period, today)
+    search_totals = _ceo_marketing_totals(kpi_snapshot, "search", start_period, today)
+    social_totals = _ceo_marketing_totals(kpi_snapshot, "social", start_period, today)
     active_campaigns = 0
     open_insights = 0
     top_pages = []
@@ -12154,43 +11993,22 @@ def ceo_operations_dashboard(request):
 
     month_rows = []
     month_keys = ceo_month_keys
-    lead_month_map = {
-        row["month"]: int(row["count"] or 0)
-        for row in lead_kpi_qs.filter(created_date__gte=month_keys[0])
-        .annotate(month=TruncMonth("created_date"))
-        .values("month")
-        .annotate(count=Count("id"))
-    }
-    opp_month_map = {
-        row["month"]: int(row["count"] or 0)
-        for row in opportunity_kpi_qs.filter(created_date__gte=month_keys[0])
-        .annotate(month=TruncMonth("created_date"))
-        .values("month")
-        .annotate(count=Count("id"))
-    }
-    revenue_month_map = defaultdict(lambda: Decimal("0"))
-    expense_month_map = defaultdict(lambda: Decimal("0"))
-    for entry in accounting_qs.filter(date__gte=month_keys[0]).only(
-        "date", "direction", "currency", "amount_original", "amount_cad", "rate_to_cad"
-    ).iterator():
-        if not entry.date:
-            continue
-        month_key = entry.date.replace(day=1)
-        if month_key not in month_keys:
-            continue
-        amount = _ceo_amount_cad(entry, cad_to_bdt)
-        if (entry.direction or "").upper().strip() == "IN":
-            revenue_month_map[month_key] += amount
-        elif (entry.direction or "").upper().strip() == "OUT":
-            expense_month_map[month_key] += amount
+    lead_month_map = kpi_snapshot.by_month(METRIC_ACTIVE_LEADS, month_keys[0])
+    opp_month_map = kpi_snapshot.by_month(METRIC_ACTIVE_OPPORTUNITIES, month_keys[0])
+    revenue_month_map = kpi_snapshot.amount_cad_by_month(
+        METRIC_ACCOUNTING_IN, month_keys[0], side=side, cad_to_bdt=cad_to_bdt
+    )
+    expense_month_map = kpi_snapshot.amount_cad_by_month(
+        METRIC_ACCOUNTING_OUT, month_keys[0], side=side, cad_to_bdt=cad_to_bdt
+    )
     for month_key in month_keys:
-        revenue = revenue_month_map[month_key]
-        expenses = expense_month_map[month_key]
+        revenue = revenue_month_map.get(month_key, Decimal("0"))
+        expenses = expense_month_map.get(month_key, Decimal("0"))
         month_rows.append(
             {
                 "label": month_key.strftime("%b"),
-                "leads": lead_month_map.get(month_key, 0),
-                "opportunities": opp_month_map.get(month_key, 0),
+                "leads": int(lead_month_map.get(month_key, 0)),
+                "opportunities": int(opp_month_map.get(month_key, 0)),
                 "revenue": revenue,
                 "expenses": expenses,
                 "net": revenue - expenses,
@@ -12573,7 +12391,7 @@ def ceo_operations_dashboard(request):
         executive_alert_cards.append(
             {"title": "Executive alerts clear", "detail": "No high-priority executive alerts are active for this period.", "tone": "good"}
         )
-    automation_context = automation_dashboard_context(request.user, sync=False)
+    automation_context = automation_dashboard_context(request.user)
 
     alerts = []
     if overdue_followups:
@@ -12852,8 +12670,9 @@ def ai_executive_advisor(request):
     previous_start = previous_end - timedelta(days=period_days - 1)
     period_label = f"Last {period_days} days"
 
-    leads_period = Lead.objects.filter(created_date__range=(start_period, today)).count()
-    prev_leads_period = Lead.objects.filter(created_date__range=(previous_start, previous_end)).count()
+    kpi_snapshot = KpiSnapshot(KPI_FAMILIES, previous_start, today)
+    leads_period = kpi_snapshot.count(METRIC_LEADS, start_period, today)
+    prev_leads_period = kpi_snapshot.count(METRIC_LEADS, previous_start, previous_end)
     overdue_followups = Lead.objects.filter(next_followup__lt=today).exclude(
         lead_status__in=["Converted", "Closed", "Disqualified", "Lost"]
     ).count()
@@ -12864,8 +12683,8 @@ def ai_executive_advisor(request):
         next_followup__range=(today, today + timedelta(days=7))
     ).exclude(lead_status__in=["Converted", "Closed", "Disqualified", "Lost"]).count()
 
-    opp_period = Opportunity.objects.filter(created_date__range=(start_period, today)).count()
-    prev_opp_period = Opportunity.objects.filter(created_date__range=(previous_start, previous_end)).count()
+    opp_period = kpi_snapshot.count(METRIC_OPPORTUNITIES, start_period, today)
+    prev_opp_period = kpi_snapshot.count(METRIC_OPPORTUNITIES, previous_start, previous_end)
     open_pipeline_qs = open_pipeline_queryset(Opportunity.objects.all())
     open_pipeline_summary = summarize_pipeline(open_pipeline_qs, apply_open_definition=False)
     open_opps = open_pipeline_summary["count"]
@@ -12949,39 +12768,15 @@ def ai_executive_advisor(request):
     accounting_qs = AccountingEntry.objects.exclude(main_type="TRANSFER").exclude(status__iexact="CANCELLED")
     if side:
         accounting_qs = accounting_qs.filter(side=side)
-    period_entries = list(
-        accounting_qs.filter(date__range=(start_period, today)).only(
-            "date", "direction", "side", "currency", "main_type", "amount_original", "amount_cad", "rate_to_cad"
-        )[:2500]
-    )
-    previous_entries = list(
-        accounting_qs.filter(date__range=(previous_start, previous_end)).only(
-            "date", "direction", "side", "currency", "main_type", "amount_original", "amount_cad", "rate_to_cad"
-        )[:2500]
-    )
 
-    def _period_finance(entries):
-        revenue = Decimal("0")
-        expenses = Decimal("0")
-        for entry in entries:
-            amount = _ceo_amount_cad(entry, cad_to_bdt)
-            if (entry.direction or "").upper().strip() == "IN":
-                revenue += amount
-            elif (entry.direction or "").upper().strip() == "OUT":
-                expenses += amount
+    def _period_finance(start, end):
+        revenue = kpi_snapshot.amount_cad(METRIC_ACCOUNTING_IN, start, end, side=side, cad_to_bdt=cad_to_bdt)
+        expenses = kpi_snapshot.amount_cad(METRIC_ACCOUNTING_OUT, start, end, side=side, cad_to_bdt=cad_to_bdt)
         return {"revenue": revenue, "expenses": expenses, "net": revenue - expenses}
 
-    finance = _period_finance(period_entries)
-    previous_finance = _period_finance(previous_entries)
-    current_cash = Decimal("0")
-    for entry in accounting_qs.filter(date__lte=today).only(
-        "date", "direction", "currency", "amount_original", "amount_cad", "rate_to_cad"
-    )[:3500]:
-        amount = _ceo_amount_cad(entry, cad_to_bdt)
-        if (entry.direction or "").upper().strip() == "IN":
-            current_cash += amount
-        elif (entry.direction or "").upper().strip() == "OUT":
-            current_cash -= amount
+    finance = _period_finance(start_period, today)
+    previous_finance = _period_finance(previous_start, previous_end)
+    current_cash = accounting_balance_cad(today, side=side, cad_to_bdt=cad_to_bdt)
 
     invoice_qs = Invoice.objects.filter(is_archived=False).exclude(status="cancelled") if Invoice is not None else None
     if invoice_qs is not None and side:
@@ -13042,30 +12837,11 @@ def ai_executive_advisor(request):
     ]
     forecast_rows = _ceo_bar_rows(forecast_rows, ["cash", "collections", "payments"])
 
-    WebsiteTrafficDaily = _ceo_optional_model("marketing", "WebsiteTrafficDaily")
-    SeoQueryDaily = _ceo_optional_model("marketing", "SeoQueryDaily")
-    AccountMetricDaily = _ceo_optional_model("marketing", "AccountMetricDaily")
     Campaign = _ceo_optional_model("marketing", "Campaign")
     InsightItem = _ceo_optional_model("marketing", "InsightItem")
-    website_totals = _ceo_aggregate(
-        WebsiteTrafficDaily,
-        WebsiteTrafficDaily.objects.filter(date__range=(start_period, today)) if WebsiteTrafficDaily else None,
-        visitors=Sum("visitors"),
-        page_views=Sum("page_views"),
-        conversions=Sum("conversions"),
-    )
-    search_totals = _ceo_aggregate(
-        SeoQueryDaily,
-        SeoQueryDaily.objects.filter(date__range=(start_period, today)) if SeoQueryDaily else None,
-        clicks=Sum("clicks"),
-        impressions=Sum("impressions"),
-    )
-    social_totals = _ceo_aggregate(
-        AccountMetricDaily,
-        AccountMetricDaily.objects.filter(date__range=(start_period, today)) if AccountMetricDaily else None,
-        engagement=Sum("engagement_total"),
-        reach=Sum("reach"),
-    )
+    website_totals = _ceo_marketing_totals(kpi_snapshot, "website", start_period, today)
+    search_totals = _ceo_marketing_totals(kpi_snapshot, "search", start_period, today)
+    social_totals = _ceo_marketing_totals(kpi_snapshot, "social", start_period, today)
     active_campaigns = 0
     open_insights = 0
     try:
@@ -13572,21 +13348,11 @@ def _build_daily_ceo_briefing_context(request):
     if side:
         accounting_qs = accounting_qs.filter(side=side)
 
-    period_revenue = Decimal("0")
-    period_expenses = Decimal("0")
-    current_cash = Decimal("0")
-    for entry in accounting_qs.filter(date__lte=today).only("date", "direction", "currency", "amount_original", "amount_cad", "rate_to_cad", "main_type")[:3500]:
-        amount = _ceo_amount_cad(entry, cad_to_bdt)
-        direction = (entry.direction or "").upper().strip()
-        if direction == "IN":
-            current_cash += amount
-        elif direction == "OUT":
-            current_cash -= amount
-        if date_from <= entry.date <= date_to:
-            if direction == "IN":
-                period_revenue += amount
-            elif direction == "OUT":
-                period_expenses += amount
+    kpi_snapshot = KpiSnapshot((KPI_FAMILY_ACCOUNTING, KPI_FAMILY_MARKETING), date_from, date_to)
+    period_end = min(date_to, today)
+    period_revenue = kpi_snapshot.amount_cad(METRIC_ACCOUNTING_IN, date_from, period_end, side=side, cad_to_bdt=cad_to_bdt)
+    period_expenses = kpi_snapshot.amount_cad(METRIC_ACCOUNTING_OUT, date_from, period_end, side=side, cad_to_bdt=cad_to_bdt)
+    current_cash = accounting_balance_cad(today, side=side, cad_to_bdt=cad_to_bdt)
     period_net_cash = period_revenue - period_expenses
 
     payable_entries_due = list(
@@ -13615,30 +13381,11 @@ def _build_daily_ceo_briefing_context(request):
         for row in top_customer_rows
     ]
 
-    WebsiteTrafficDaily = _ceo_optional_model("marketing", "WebsiteTrafficDaily")
-    SeoQueryDaily = _ceo_optional_model("marketing", "SeoQueryDaily")
-    AccountMetricDaily = _ceo_optional_model("marketing", "AccountMetricDaily")
     Campaign = _ceo_optional_model("marketing", "Campaign")
     InsightItem = _ceo_optional_model("marketing", "InsightItem")
-    website_totals = _ceo_aggregate(
-        WebsiteTrafficDaily,
-        WebsiteTrafficDaily.objects.filter(date__range=(date_from, date_to)) if WebsiteTrafficDaily else None,
-        visitors=Sum("visitors"),
-        page_views=Sum("page_views"),
-        conversions=Sum("conversions"),
-    )
-    search_totals = _ceo_aggregate(
-        SeoQueryDaily,
-        SeoQueryDaily.objects.filter(date__range=(date_from, date_to)) if SeoQueryDaily else None,
-        clicks=Sum("clicks"),
-        impressions=Sum("impressions"),
-    )
-    social_totals = _ceo_aggregate(
-        AccountMetricDaily,
-        AccountMetricDaily.objects.filter(date__range=(date_from, date_to)) if AccountMetricDaily else None,
-        engagement=Sum("engagement_total"),
-        reach=Sum("reach"),
-    )
+    website_totals = _ceo_marketing_totals(kpi_snapshot, "website", date_from, date_to)
+    search_totals = _ceo_marketing_totals(kpi_snapshot, "search", date_from, date_to)
+    social_totals = _ceo_marketing_totals(kpi_snapshot, "social", date_from, date_to)
     active_campaigns = 0
     open_insights = 0
     try:
@@ -14589,7 +14336,7 @@ def main_dashboard(request):
             "href": "#workflow-section",
         },
     ]
-    automation_context = automation_dashboard_context(request.user, sync=False)
+    automation_context = automation_dashboard_context(request.user)
     operations_context = operations_dashboard_context(request.user, today=today)
     if automation_context.get("automation_notification_cards"):
         dashboard_notification_items = automation_context["automation_notification_cards"]
@@ -1,6 +1,5 @@
 # crm/views_accounting.py (or wherever your accounting views live)
 
-import csv
 import io
 from datetime import date, timedelta
 from functools import wraps
@@ -21,7 +20,6 @@ from django.db.models.functions import Coalesce
 from django.shortcuts import render
 from .models import AccountingEntry
 from openpyxl import Workbook
-import csv
 from decimal import Decimal
 from django.http import HttpResponse
 from django.db.models import Q
@@ -73,6 +71,16 @@ from .forms import (
 from .permissions import can_view_internal_costing, get_access, operations_group_names, role_flag_decision
 from .services.operations_permissions import can_archive_invoices
 from .services.costing_currency import CurrencyConversionError, convert_currency
+from .services.exports import (
+    csv_response,
+    export_response,
+    needs_background_export,
+    queryset_rows,
+    queue_export_redirect,
+    with_headers,
+    xlsx_response,
+)
+from .services.ledger_balances import bucket_amount_cad, period_buckets
 from .services.local_sewing import summarize_production_business_models
 from .services.production_profit import build_production_profit_report
 
@@ -244,17 +252,21 @@ def _save_attachments(entry, request, user, field_name="attachments") -> int:
 # EXPORT HELPERS
 # --------------------
 def _entries_queryset_from_request(request, force_side=None):
+    return _entries_queryset(request.GET, force_side)
+
+
+def _entries_queryset(params, force_side=None):
     qs = AccountingEntry.objects.all().select_related(
         "customer", "opportunity", "production_order", "shipment", "created_by"
     )
 
-    side = (force_side or request.GET.get("side") or "").strip()
-    direction = (request.GET.get("direction") or "").strip()
-    status = (request.GET.get("status") or "").strip()
-    main_type = (request.GET.get("main_type") or "").strip()
+    side = (force_side or params.get("side") or "").strip()
+    direction = (params.get("direction") or "").strip()
+    status = (params.get("status") or "").strip()
+    main_type = (params.get("main_type") or "").strip()
 
-    year = _parse_int(request.GET.get("year"))
-    month = _parse_int(request.GET.get("month"))
+    year = _parse_int(params.get("year"))
+    month = _parse_int(params.get("month"))
 
     if side:
         qs = qs.filter(side=side)
@@ -269,7 +281,7 @@ def _entries_queryset_from_request(request, force_side=None):
     if month:
         qs = qs.filter(date__month=month)
 
-    q = (request.GET.get("q") or "").strip()
+    q = (params.get("q") or "").strip()
     if q:
         qs = qs.filter(
             Q(description__icontains=q)
@@ -333,24 +345,16 @@ def _entry_export_row(e: AccountingEntry):
     ]
 
 
-def _write_xlsx(qs, filename):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Entries"
-    ws.append(_export_headers())
-    for e in qs:
-        ws.append(_entry_export_row(e))
+def accounting_entries_export(params):
+    """Export builder for the entries list; also run by background export jobs."""
+    rows = queryset_rows(_entries_queryset(params), _entry_export_row)
+    return "accounting_entries", "Entries", _export_headers(), rows
 
-    bio = io.BytesIO()
-    wb.save(bio)
-    bio.seek(0)
 
-    resp = HttpResponse(
-        bio.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+def _entries_export(request, export_format):
+    if needs_background_export(_entries_queryset_from_request(request)):
+        return queue_export_redirect(request, "accounting_entries", export_format)
+    return export_response(export_format, *accounting_entries_export(request.GET))
 
 
 # --------------------
@@ -973,6 +977,9 @@ def _pl_side_label(side):
 def _pl_row(entry, cad_to_bdt=None):
     return {
         "entry": entry,
+        "month": date(entry.date.year, entry.date.month, 1) if entry.date else None,
+        "count": 1,
+        "direction": (entry.direction or "").upper().strip(),
         "amount": _pl_decimal(entry.amount_original),
         "amount_cad": _pl_amount_cad(entry, cad_to_bdt),
         "currency": (entry.currency or "Unknown").upper(),
@@ -985,6 +992,72 @@ def _pl_row(entry, cad_to_bdt=None):
     }
 
 
+def _pl_bucket_row(bucket, customers, cad_to_bdt):
+    """A ``_pl_row`` for one ledger period-balance bucket; it has no entry or product category."""
+    customer = customers.get(bucket["customer_id"])
+    return {
+        "entry": None,
+        "month": bucket["month"],
+        "count": bucket["entry_count"],
+        "direction": (bucket["direction"] or "").upper().strip(),
+        "amount": bucket["amount_original"],
+        "amount_cad": bucket_amount_cad(bucket, cad_to_bdt),
+        "currency": (bucket["currency"] or "Unknown").upper(),
+        "main_type": (bucket["main_type"] or "").upper().strip(),
+        "customer": _exec_customer_label(customer) if customer else "Unassigned customer",
+        "product_category": None,
+        "cost_category": (bucket["sub_type"] or "").strip() or (bucket["main_type"] or "").strip() or "Uncategorized",
+        "side": (bucket["side"] or "").upper().strip(),
+        "side_label": _pl_side_label(bucket["side"]),
+    }
+
+
+def _pl_needs_entries(filters):
+    # Customer and product category filters follow the production order's
+    # links, which the ledger period balances do not keep.
+    return bool(filters.get("customer_id") or filters.get("product_category"))
+
+
+def _pl_ledger_rows(filters, date_from, date_to, cad_to_bdt):
+    """Revenue and expense rows summed from the ledger period balances, or ``None`` if ``filters`` need entries."""
+    if _pl_needs_entries(filters):
+        return None
+    buckets = period_buckets(
+        date_from,
+        date_to,
+        side=filters.get("side") or "",
+        currency=filters.get("currency") or "",
+        exclude_transfer=True,
+    )
+    customers = Customer.objects.in_bulk({bucket["customer_id"] for bucket in buckets} - {None})
+    return [_pl_bucket_row(bucket, customers, cad_to_bdt) for bucket in buckets]
+
+
+def _pl_categorized_entries(qs):
+    """Entries linked to an order or opportunity, the only ones with a product category."""
+    return qs.filter(Q(production_order__isnull=False) | Q(opportunity__isnull=False))
+
+
+def _pl_category_options(rows):
+    """Product category filter choices: the catalogue's plus the ones on ``rows``."""
+    return sorted({
+        value.strip() for value in Product.objects.exclude(product_category="").values_list("product_category", flat=True).distinct()
+        if value and value.strip()
+    } | {
+        row["product_category"] for row in rows if row["product_category"] and row["product_category"] != "Uncategorized"
+    })
+
+
+def _pl_net_profit(rows):
+    profit = Decimal("0")
+    for row in rows:
+        if row["direction"] == AccountingEntry.DIR_IN and row["main_type"] == "INCOME":
+            profit += row["amount_cad"]
+        elif row["direction"] == AccountingEntry.DIR_OUT and (row["main_type"] == "COGS" or row["main_type"] in PL_OPEX_TYPES):
+            profit -= row["amount_cad"]
+    return profit
+
+
 def _pl_currency_totals(rows):
     totals = {}
     for row in rows:
@@ -1004,28 +1077,27 @@ def _pl_group(rows, key, amount_key="amount_cad", limit=20):
         if label not in grouped:
             grouped[label] = {"label": label, "amount": Decimal("0"), "count": 0}
         grouped[label]["amount"] += _pl_decimal(row.get(amount_key))
-        grouped[label]["count"] += 1
+        grouped[label]["count"] += row["count"]
     return sorted(grouped.values(), key=lambda item: item["amount"], reverse=True)[:limit]
 
 
 def _pl_monthly_rows(rows):
     monthly = {}
     for row in rows:
-        entry = row["entry"]
-        if not entry.date:
+        if not row["month"]:
             continue
-        key = entry.date.strftime("%Y-%m")
+        key = row["month"].strftime("%Y-%m")
         if key not in monthly:
             monthly[key] = {
                 "key": key,
-                "label": entry.date.strftime("%b %Y"),
+                "label": row["month"].strftime("%b %Y"),
                 "revenue": Decimal("0"),
                 "cogs": Decimal("0"),
                 "opex": Decimal("0"),
                 "net": Decimal("0"),
             }
         main_type = row["main_type"]
-        direction = (entry.direction or "").upper().strip()
+        direction = row["direction"]
         amount = row["amount_cad"]
         if direction == AccountingEntry.DIR_IN and main_type == "INCOME":
             monthly[key]["revenue"] += amount
@@ -1052,9 +1124,8 @@ def _pl_side_comparison(rows):
     }
     for row in rows:
         side = row["side"] if row["side"] in sides else "CA"
-        entry = row["entry"]
         main_type = row["main_type"]
-        direction = (entry.direction or "").upper().strip()
+        direction = row["direction"]
         amount = row["amount_cad"]
         if direction == AccountingEntry.DIR_IN and main_type == "INCOME":
             sides[side]["revenue"] += amount
@@ -1107,21 +1178,26 @@ def profit_loss_dashboard(request):
         qs = qs.filter(currency=filters["currency"])
 
     cad_to_bdt = _bs_latest_cad_to_bdt()
-    rows = [_pl_row(entry, cad_to_bdt) for entry in qs.order_by("date", "id").iterator()]
-    if filters["product_category"]:
-        rows = [row for row in rows if row["product_category"] == filters["product_category"]]
+    rows = _pl_ledger_rows(filters, filters["date_from"], filters["date_to"], cad_to_bdt)
+    if rows is None:
+        rows = [_pl_row(entry, cad_to_bdt) for entry in qs.order_by("date", "id").iterator()]
+        if filters["product_category"]:
+            rows = [row for row in rows if row["product_category"] == filters["product_category"]]
+        category_rows = rows
+    else:
+        category_rows = [_pl_row(entry, cad_to_bdt) for entry in _pl_categorized_entries(qs).order_by("date", "id").iterator()]
 
     revenue_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
+        if row["direction"] == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
     ]
     cogs_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT and row["main_type"] == "COGS"
+        if row["direction"] == AccountingEntry.DIR_OUT and row["main_type"] == "COGS"
     ]
     opex_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT and row["main_type"] in PL_OPEX_TYPES
+        if row["direction"] == AccountingEntry.DIR_OUT and row["main_type"] in PL_OPEX_TYPES
     ]
 
     total_revenue = sum((row["amount_cad"] for row in revenue_rows), Decimal("0"))
@@ -1131,14 +1207,26 @@ def profit_loss_dashboard(request):
     net_profit = gross_profit - operating_expenses
     gross_margin_percent = (gross_profit / total_revenue * Decimal("100")).quantize(Decimal("0.01")) if total_revenue > 0 else Decimal("0")
     net_margin_percent = (net_profit / total_revenue * Decimal("100")).quantize(Decimal("0.01")) if total_revenue > 0 else Decimal("0")
+    revenue_count = sum(row["count"] for row in revenue_rows)
+
+    category_revenue_rows = [
+        row for row in category_rows
+        if row["direction"] == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
+    ]
+    if category_rows is not rows:
+        # Revenue without an order or opportunity is the "Uncategorized" remainder.
+        uncategorized_count = revenue_count - len(category_revenue_rows)
+        if uncategorized_count:
+            category_revenue_rows.append(
+                {
+                    "product_category": "Uncategorized",
+                    "amount_cad": total_revenue - sum((row["amount_cad"] for row in category_revenue_rows), Decimal("0")),
+                    "count": uncategorized_count,
+                }
+            )
 
     customers = Customer.objects.filter(accounting_entries__isnull=False).distinct().order_by("account_brand", "contact_name")
-    product_categories = sorted({
-        value.strip() for value in Product.objects.exclude(product_category="").values_list("product_category", flat=True).distinct()
-        if value and value.strip()
-    } | {
-        row["product_category"] for row in rows if row["product_category"] and row["product_category"] != "Uncategorized"
-    })
+    product_categories = _pl_category_options(category_rows)
 
     return render(
         request,
@@ -1160,15 +1248,15 @@ def profit_loss_dashboard(request):
             "cogs_currency_totals": _pl_currency_totals(cogs_rows),
             "opex_currency_totals": _pl_currency_totals(opex_rows),
             "revenue_by_customer": _pl_group(revenue_rows, "customer"),
-            "revenue_by_product_category": _pl_group(revenue_rows, "product_category"),
+            "revenue_by_product_category": _pl_group(category_revenue_rows, "product_category"),
             "cost_by_category": _pl_group(cogs_rows, "cost_category"),
             "opex_by_category": _pl_group(opex_rows, "cost_category"),
             "monthly_rows": _pl_monthly_rows(rows),
             "side_rows": _pl_side_comparison(rows),
-            "entry_count": len(rows),
-            "revenue_count": len(revenue_rows),
-            "cogs_count": len(cogs_rows),
-            "opex_count": len(opex_rows),
+            "entry_count": sum(row["count"] for row in rows),
+            "revenue_count": revenue_count,
+            "cogs_count": sum(row["count"] for row in cogs_rows),
+            "opex_count": sum(row["count"] for row in opex_rows),
         },
     )
 
@@ -1795,17 +1883,12 @@ def balance_sheet_dashboard(request):
     total_assets = current_assets + fixed_assets
     total_liabilities = sum(liability_buckets.values(), Decimal("0"))
 
-    retained_entries = []
+    retained_earnings = Decimal("0")
     if filters["date_from"]:
-        retained_qs = AccountingEntry.objects.exclude(main_type="TRANSFER").exclude(status__iexact="CANCELLED").filter(date__lt=filters["date_from"])
-        if filters["side"]:
-            retained_qs = retained_qs.filter(side=filters["side"])
-        if filters["currency"]:
-            retained_qs = retained_qs.filter(currency=filters["currency"])
-        retained_entries = list(retained_qs.order_by("date", "id"))
+        retained_rows = _pl_ledger_rows(filters, None, filters["date_from"] - timedelta(days=1), cad_to_bdt)
+        retained_earnings = _pl_net_profit(retained_rows)
 
     owner_capital = _bs_owner_capital(non_transfer_entries, cad_to_bdt)
-    retained_earnings = _bs_profit_from_entries(retained_entries, cad_to_bdt)
     current_period_profit = _bs_profit_from_entries(non_transfer_entries, cad_to_bdt)
     total_equity = owner_capital + retained_earnings + current_period_profit
     equation_right = total_liabilities + total_equity
@@ -2006,8 +2089,14 @@ def cash_flow_dashboard(request):
     supplier_choices = sorted({_ap_supplier_label(entry) for entry in supplier_source})
 
     opening_entries = []
+    opening_buckets = []
     if filters["date_from"]:
-        opening_entries = list(base_qs.filter(date__lt=filters["date_from"]).order_by("date", "id"))
+        if filters["customer_id"] or filters["supplier"]:
+            opening_entries = list(base_qs.filter(date__lt=filters["date_from"]).order_by("date", "id"))
+        else:
+            opening_buckets = period_buckets(
+                None, filters["date_from"] - timedelta(days=1), side=filters["side"], currency=filters["currency"]
+            )
 
     period_qs = base_qs
     if filters["date_from"]:
@@ -2024,7 +2113,13 @@ def cash_flow_dashboard(request):
     outflow_entries = [entry for entry in period_entries if (entry.direction or "").upper().strip() == AccountingEntry.DIR_OUT]
     cad_to_bdt = _bs_latest_cad_to_bdt()
 
-    opening_cash_balance = sum((_cf_signed_amount(entry, cad_to_bdt) for entry in opening_entries), Decimal("0"))
+    opening_cash_balance = sum((_cf_signed_amount(entry, cad_to_bdt) for entry in opening_entries), Decimal("0")) + sum(
+        (
+            bucket_amount_cad(bucket, cad_to_bdt) if (bucket["direction"] or "").upper().strip() == AccountingEntry.DIR_IN else -bucket_amount_cad(bucket, cad_to_bdt)
+            for bucket in opening_buckets
+        ),
+        Decimal("0"),
+    )
     cash_received_from_customers = sum(
         (
             _pl_amount_cad(entry, cad_to_bdt)
@@ -2125,7 +2220,7 @@ def cash_flow_dashboard(request):
             "low_cash_label": low_cash_label,
             "low_cash_tone": low_cash_tone,
             "entry_count": len(period_entries),
-            "opening_entry_count": len(opening_entries),
+            "opening_entry_count": len(opening_entries) + sum(bucket["entry_count"] for bucket in opening_buckets),
         },
     )
 
@@ -2253,15 +2348,15 @@ def _bva_monthly_rows(rows, year, selected_month, config):
         for month in month_numbers
     }
     for row in rows:
-        entry = row["entry"]
-        if not entry.date or entry.date.year != year or entry.date.month not in monthly:
+        month = row["month"]
+        if not month or month.year != year or month.month not in monthly:
             continue
-        direction = (entry.direction or "").upper().strip()
+        direction = row["direction"]
         amount = row["amount_cad"]
         if direction == AccountingEntry.DIR_IN and row["main_type"] == "INCOME":
-            monthly[entry.date.month]["actual_revenue"] += amount
+            monthly[month.month]["actual_revenue"] += amount
         elif direction == AccountingEntry.DIR_OUT and row["main_type"] in BVA_EXPENSE_TYPES:
-            monthly[entry.date.month]["actual_expenses"] += amount
+            monthly[month.month]["actual_expenses"] += amount
     rows_by_month = [monthly[month] for month in month_numbers]
     max_value = max(
         [
@@ -2287,7 +2382,7 @@ def _bva_group_rows(rows, key, budget_section, metric, year, month, config):
         if label not in grouped:
             grouped[label] = {"label": label, "actual": Decimal("0"), "budget": Decimal("0"), "count": 0}
         grouped[label]["actual"] += row["amount_cad"]
-        grouped[label]["count"] += 1
+        grouped[label]["count"] += row["count"]
     for label, row in grouped.items():
         row["budget"] = _bva_named_budget(config, budget_section, label, metric, year, month)
         row["variance"], row["variance_percent"] = _bva_variance(row["actual"], row["budget"], metric)
@@ -2338,17 +2433,23 @@ def budget_vs_actual_dashboard(request):
     if filters["currency"]:
         qs = qs.filter(currency=filters["currency"])
 
-    rows = [_pl_row(entry) for entry in qs.order_by("date", "id").iterator()]
-    if filters["product_category"]:
-        rows = [row for row in rows if row["product_category"] == filters["product_category"]]
+    cad_to_bdt = _bs_latest_cad_to_bdt()
+    rows = _pl_ledger_rows(filters, start_date, end_date, cad_to_bdt)
+    if rows is None:
+        rows = [_pl_row(entry, cad_to_bdt) for entry in qs.order_by("date", "id").iterator()]
+        if filters["product_category"]:
+            rows = [row for row in rows if row["product_category"] == filters["product_category"]]
+        category_rows = rows
+    else:
+        category_rows = [{"product_category": _pl_product_category(entry)} for entry in _pl_categorized_entries(qs).iterator()]
 
     revenue_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
+        if row["direction"] == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
     ]
     expense_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT and row["main_type"] in BVA_EXPENSE_TYPES
+        if row["direction"] == AccountingEntry.DIR_OUT and row["main_type"] in BVA_EXPENSE_TYPES
     ]
 
     actual_revenue = sum((row["amount_cad"] for row in revenue_rows), Decimal("0"))
@@ -2371,9 +2472,9 @@ def budget_vs_actual_dashboard(request):
         department = _bva_department_for_row(row)
         if department not in department_map:
             department_map[department] = {"label": department, "actual_revenue": Decimal("0"), "actual_expenses": Decimal("0"), "budget_revenue": Decimal("0"), "budget_expenses": Decimal("0")}
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_IN and row["main_type"] == "INCOME":
+        if row["direction"] == AccountingEntry.DIR_IN and row["main_type"] == "INCOME":
             department_map[department]["actual_revenue"] += row["amount_cad"]
-        elif (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT and row["main_type"] in BVA_EXPENSE_TYPES:
+        elif row["direction"] == AccountingEntry.DIR_OUT and row["main_type"] in BVA_EXPENSE_TYPES:
             department_map[department]["actual_expenses"] += row["amount_cad"]
     for label, row in department_map.items():
         row["budget_revenue"] = _bva_named_budget(config, "departments", label, "revenue", selected_year, selected_month)
@@ -2419,12 +2520,7 @@ def budget_vs_actual_dashboard(request):
     favorable_rows = sorted([row for row in variance_rows if row["variance"] > 0], key=lambda row: row["variance"], reverse=True)[:10]
 
     customers = Customer.objects.filter(accounting_entries__isnull=False).distinct().order_by("account_brand", "contact_name")
-    product_categories = sorted({
-        value.strip() for value in Product.objects.exclude(product_category="").values_list("product_category", flat=True).distinct()
-        if value and value.strip()
-    } | {
-        row["product_category"] for row in rows if row["product_category"] and row["product_category"] != "Uncategorized"
-    })
+    product_categories = _pl_category_options(category_rows)
     year_values = sorted({selected_year, today.year} | {d.year for d in AccountingEntry.objects.dates("date", "year", order="DESC")})
 
     return render(
@@ -2457,7 +2553,7 @@ def budget_vs_actual_dashboard(request):
             "side_rows": side_rows,
             "unfavorable_rows": unfavorable_rows,
             "favorable_rows": favorable_rows,
-            "entry_count": len(rows),
+            "entry_count": sum(row["count"] for row in rows),
             "budget_source": "settings.ACCOUNTING_BUDGETS" if config else "Default zero budget",
         },
     )
@@ -2500,7 +2596,7 @@ def _kpi_date_range(request, today):
     return date_from, date_to
 
 
-def _kpi_base_entries(filters, date_from=None, date_to=None, cad_to_bdt=None):
+def _kpi_entry_queryset(filters, date_from=None, date_to=None):
     qs = (
         AccountingEntry.objects.exclude(main_type="TRANSFER")
         .exclude(status__iexact="CANCELLED")
@@ -2516,9 +2612,16 @@ def _kpi_base_entries(filters, date_from=None, date_to=None, cad_to_bdt=None):
         qs = qs.filter(side=filters["side"])
     if filters["currency"]:
         qs = qs.filter(currency=filters["currency"])
+    return qs
+
+
+def _kpi_base_entries(filters, date_from=None, date_to=None, cad_to_bdt=None):
     if cad_to_bdt is None:
         cad_to_bdt = _bs_latest_cad_to_bdt()
-    rows = [_pl_row(entry, cad_to_bdt) for entry in qs.order_by("date", "id").iterator()]
+    rows = _pl_ledger_rows(filters, date_from, date_to, cad_to_bdt)
+    if rows is not None:
+        return rows
+    rows = [_pl_row(entry, cad_to_bdt) for entry in _kpi_entry_queryset(filters, date_from, date_to).order_by("date", "id").iterator()]
     if filters["product_category"]:
         rows = [row for row in rows if row["product_category"] == filters["product_category"]]
     return rows
@@ -2527,15 +2630,15 @@ def _kpi_base_entries(filters, date_from=None, date_to=None, cad_to_bdt=None):
 def _kpi_row_totals(rows):
     revenue_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
+        if row["direction"] == AccountingEntry.DIR_IN and row["main_type"] == "INCOME"
     ]
     cogs_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT and row["main_type"] == "COGS"
+        if row["direction"] == AccountingEntry.DIR_OUT and row["main_type"] == "COGS"
     ]
     opex_rows = [
         row for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT and row["main_type"] in PL_OPEX_TYPES
+        if row["direction"] == AccountingEntry.DIR_OUT and row["main_type"] in PL_OPEX_TYPES
     ]
     revenue = sum((row["amount_cad"] for row in revenue_rows), Decimal("0"))
     cogs = sum((row["amount_cad"] for row in cogs_rows), Decimal("0"))
@@ -2596,11 +2699,19 @@ def _kpi_average_collection_days(filters, date_from, date_to):
     return Decimal(sum(days) / len(days)).quantize(Decimal("0.01")) if days else Decimal("0")
 
 
-def _kpi_ap_open(rows, today, cad_to_bdt):
+def _kpi_ap_open(filters, date_to, today, cad_to_bdt):
+    # Paid entries can never be open, so only the rest is loaded and converted.
+    entries = (
+        _kpi_entry_queryset(filters, None, date_to)
+        .filter(direction=AccountingEntry.DIR_OUT)
+        .exclude(status__iexact="PAID")
+        .select_related("shipment")
+        .order_by("date", "id")
+    )
     payable_rows = [
-        _ap_row(row["entry"], today)
-        for row in rows
-        if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_OUT
+        _ap_row(entry, today)
+        for entry in entries.iterator()
+        if not filters["product_category"] or _pl_product_category(entry) == filters["product_category"]
     ]
     open_rows = [row for row in payable_rows if row["status_key"] != "paid"]
     return open_rows, sum((_pl_amount_cad(row["entry"], cad_to_bdt) for row in open_rows), Decimal("0"))
@@ -2609,13 +2720,12 @@ def _kpi_ap_open(rows, today, cad_to_bdt):
 def _kpi_monthly_trends(rows):
     monthly = {}
     for row in rows:
-        entry = row["entry"]
-        if not entry.date:
+        if not row["month"]:
             continue
-        key = entry.date.strftime("%Y-%m")
+        key = row["month"].strftime("%Y-%m")
         if key not in monthly:
-            monthly[key] = {"key": key, "label": entry.date.strftime("%b %Y"), "revenue": Decimal("0"), "gross_profit": Decimal("0"), "net_profit": Decimal("0"), "expenses": Decimal("0")}
-        direction = (entry.direction or "").upper().strip()
+            monthly[key] = {"key": key, "label": row["month"].strftime("%b %Y"), "revenue": Decimal("0"), "gross_profit": Decimal("0"), "net_profit": Decimal("0"), "expenses": Decimal("0")}
+        direction = row["direction"]
         if direction == AccountingEntry.DIR_IN and row["main_type"] == "INCOME":
             monthly[key]["revenue"] += row["amount_cad"]
             monthly[key]["gross_profit"] += row["amount_cad"]
@@ -2677,13 +2787,10 @@ def kpi_scorecard_dashboard(request):
     as_of_totals = _kpi_row_totals(as_of_rows)
     ar_invoices, ar_outstanding = _kpi_ar_open(filters, date_to)
     average_collection_days = _kpi_average_collection_days(filters, date_from, date_to)
-    ap_rows, ap_outstanding = _kpi_ap_open(as_of_rows, today, cad_to_bdt)
+    ap_rows, ap_outstanding = _kpi_ap_open(filters, date_to, today, cad_to_bdt)
     inventory_value = _bs_inventory_value_cad(filters)
     cash_balance = sum(
-        (
-            _pl_amount_cad(row["entry"], cad_to_bdt) if (row["entry"].direction or "").upper().strip() == AccountingEntry.DIR_IN else -_pl_amount_cad(row["entry"], cad_to_bdt)
-            for row in as_of_rows
-        ),
+        (row["amount_cad"] if row["direction"] == AccountingEntry.DIR_IN else -row["amount_cad"] for row in as_of_rows),
         Decimal("0"),
     )
 
@@ -2730,12 +2837,14 @@ def kpi_scorecard_dashboard(request):
     ]
 
     customers = Customer.objects.filter(accounting_entries__isnull=False).distinct().order_by("account_brand", "contact_name")
-    product_categories = sorted({
-        value.strip() for value in Product.objects.exclude(product_category="").values_list("product_category", flat=True).distinct()
-        if value and value.strip()
-    } | {
-        row["product_category"] for row in period_rows if row["product_category"] and row["product_category"] != "Uncategorized"
-    })
+    if _pl_needs_entries(filters):
+        category_rows = period_rows
+    else:
+        category_rows = [
+            {"product_category": _pl_product_category(entry)}
+            for entry in _pl_categorized_entries(_kpi_entry_queryset(filters, date_from, date_to)).iterator()
+        ]
+    product_categories = _pl_category_options(category_rows)
 
     return render(
         request,
@@ -2771,7 +2880,7 @@ def kpi_scorecard_dashboard(request):
             "customer_concentration_percent": customer_concentration_percent,
             "top_three_concentration_percent": top_three_concentration_percent,
             "health_rows": health_rows,
-            "entry_count": len(period_rows),
+            "entry_count": sum(row["count"] for row in period_rows),
             "ar_invoice_count": len(ar_invoices),
             "ap_row_count": len(ap_rows),
         },
@@ -3304,7 +3413,6 @@ def accounting_ca_master(request):
 
     return render(request, "crm/accounting_ca_master.html", {"rate_row": rate_row, "send_form": send_form})
 from decimal import Decimal
-import csv
 
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
@@ -3385,27 +3493,16 @@ def accounting_ca_grid(request):
     )
 
     if export == "1":
-        resp = HttpResponse(content_type="text/csv")
-        resp["Content-Disposition"] = 'attachment; filename="ca_accounting_grid.csv"'
-        w = csv.writer(resp)
-        w.writerow(["Date", "Description", "Category", "Money Out CAD", "Money In CAD", "Currency", "Side"])
-
-        for r in rows:
-            w.writerow(
-                [
-                    r["date"],
-                    r["description"],
-                    r["category"],
-                    r["money_out"],
-                    r["money_in"],
-                    r["currency"],
-                    r["side"],
-                ]
-            )
-
-        w.writerow([])
-        w.writerow(["Totals", "", "", total_out, total_in, "", ""])
-        return resp
+        export_rows = [
+            [r["date"], r["description"], r["category"], r["money_out"], r["money_in"], r["currency"], r["side"]]
+            for r in rows
+        ]
+        export_rows += [[], ["Totals", "", "", total_out, total_in, "", ""]]
+        return csv_response(
+            "ca_accounting_grid.csv",
+            ["Date", "Description", "Category", "Money Out CAD", "Money In CAD", "Currency", "Side"],
+            export_rows,
+        )
 
     return render(
         request,
@@ -3643,20 +3740,12 @@ def accounting_entry_list(request):
 # --------------------
 @login_required
 def accounting_list_export_csv(request):
-    qs = _entries_queryset_from_request(request)
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = 'attachment; filename="accounting_entries.csv"'
-    w = csv.writer(resp)
-    w.writerow(_export_headers())
-    for e in qs:
-        w.writerow(_entry_export_row(e))
-    return resp
+    return _entries_export(request, "csv")
 
 
 @login_required
 def accounting_list_export_xlsx(request):
-    qs = _entries_queryset_from_request(request)
-    return _write_xlsx(qs, "accounting_entries.xlsx")
+    return _entries_export(request, "xlsx")
 
 
 # --------------------
@@ -4336,7 +4425,6 @@ def accounting_ai_suggest(request):
         }
     )
 
-import csv
 from decimal import Decimal
 
 from django.contrib.auth.decorators import login_required
@@ -4345,62 +4433,32 @@ from django.http import HttpResponse
 from .models import AccountingEntry
 
 
-@login_required
-def accounting_bd_grid_export_csv(request):
-    qs = AccountingEntry.objects.filter(side="BD").order_by("-date", "-id")
+BD_GRID_EXPORT_HEADERS = ["Date", "Description", "Main Type", "Sub Type", "Direction", "Amount Original", "Currency"]
 
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = 'attachment; filename="bd_accounting_grid.csv"'
-    w = csv.writer(resp)
 
-    w.writerow(["Date", "Description", "Main Type", "Sub Type", "Direction", "Amount Original", "Currency"])
+def _bd_grid_export_row(e):
+    return [
+        e.date,
+        (e.description or "").strip(),
+        (e.main_type or "").strip(),
+        (e.sub_type or "").strip(),
+        (e.direction or "").strip(),
+        e.amount_original or Decimal("0"),
+        (e.currency or "").strip(),
+    ]
 
-    for e in qs:
-        w.writerow([
-            e.date,
-            (e.description or "").strip(),
-            (e.main_type or "").strip(),
-            (e.sub_type or "").strip(),
-            (e.direction or "").strip(),
-            e.amount_original or Decimal("0"),
-            (e.currency or "").strip(),
-        ])
 
-    return resp
+@login_required
+def accounting_bd_grid_export_csv(request):
+    qs = AccountingEntry.objects.filter(side="BD").order_by("-date", "-id")
+    return csv_response("bd_accounting_grid.csv", BD_GRID_EXPORT_HEADERS, queryset_rows(qs, _bd_grid_export_row))
 
 
 @login_required
 def accounting_bd_grid_export_xlsx(request):
-    try:
-        from openpyxl import Workbook
-    except Exception:
-        return HttpResponse("openpyxl is not installed", status=500)
-
     qs = AccountingEntry.objects.filter(side="BD").order_by("-date", "-id")
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "BD Grid"
-
-    ws.append(["Date", "Description", "Main Type", "Sub Type", "Direction", "Amount Original", "Currency"])
-
-    for e in qs:
-        ws.append([
-            e.date,
-            (e.description or "").strip(),
-            (e.main_type or "").strip(),
-            (e.sub_type or "").strip(),
-            (e.direction or "").strip(),
-            float(e.amount_original or Decimal("0")),
-            (e.currency or "").strip(),
-        ])
-
-    resp = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    resp["Content-Disposition"] = 'attachment; filename="bd_accounting_grid.xlsx"'
-    wb.save(resp)
-    return resp
+    rows = with_headers(BD_GRID_EXPORT_HEADERS, queryset_rows(qs, _bd_grid_export_row))
+    return xlsx_response("bd_accounting_grid.xlsx", [("BD Grid", rows)])
 
 @login_required
 def bd_staff_list(request):
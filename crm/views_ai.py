@@ -17,6 +17,7 @@ try:
 except Exception:
     OpenAI = None
 
+from crm.ai.gateway import result_for_token
 from crm.ai.health import build_health_checks, run_and_store
 from crm.ai.openai_client import (
     ask_openai,
@@ -374,6 +375,22 @@ def ai_system_status(request):
 # SUGGESTION ENDPOINTS
 # -------------------------
 
+@login_required
+def ai_result_json(request, token):
+    """Poll target for answers queued with crm.ai.gateway.submit; the token is issued per user."""
+    result = result_for_token(token, request.user)
+    if result is None:
+        return JsonResponse({"ok": False, "status": "missing", "error": "Unknown AI request."}, status=404)
+    return JsonResponse(
+        {
+            "ok": result.status != "failed",
+            "status": result.status,
+            "text": result.text if result.ready else "",
+            "error": result.error,
+        }
+    )
+
+
 @require_POST
 @login_required
 @user_passes_test(can_ai_user)
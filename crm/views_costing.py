@@ -6,7 +6,7 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.contrib import messages
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import transaction
 from django.db.models import Q
 from django.http import HttpResponse, HttpResponseForbidden
@@ -38,7 +38,8 @@ from .services.costing_currency import (
     format_finance_money,
     normalize_costing_currency,
 )
-from .services.costing_engine import compute_costing, validate_costing
+from .services.costing_engine import compute_costing, costing_summaries, validate_costing
+from .services.exports import spool_xlsx, xlsx_file_response
 from .services.costing_workflow import (
     CostingWorkflowError,
     approve_quick_costing,
@@ -1110,34 +1111,33 @@ def cost_sheet_list(request):
 
     rows = []
     advanced_rows = []
-    for sheet in qs:
-        calc = compute_costing(sheet.id)
-        if calc:
-            margin_percent = calc.get("margin_percent") or Decimal("0")
-            cost_available = (calc.get("total_cost_order") or Decimal("0")) > Decimal("0")
-            if not cost_available:
-                margin_tone = "neutral"
-            elif margin_percent >= Decimal("20"):
-                margin_tone = "good"
-            elif margin_percent >= Decimal("5"):
-                margin_tone = "watch"
-            else:
-                margin_tone = "risk"
-            row = {
-                "id": sheet.id,
-                "sheet": sheet,
-                "quick": None,
-                "calc": calc,
-                "margin_tone": margin_tone,
-                "cost_available": cost_available,
-                "costing_type": "advanced",
-                "type_label": "Advanced",
-                "currency_label": sheet.currency,
-                "created_at": sheet.created_at,
-                "updated_at": sheet.updated_at,
-            }
-            rows.append(row)
-            advanced_rows.append(row)
+    for calc in costing_summaries(qs):
+        sheet = calc["costing"]
+        margin_percent = calc.get("margin_percent") or Decimal("0")
+        cost_available = (calc.get("total_cost_order") or Decimal("0")) > Decimal("0")
+        if not cost_available:
+            margin_tone = "neutral"
+        elif margin_percent >= Decimal("20"):
+            margin_tone = "good"
+        elif margin_percent >= Decimal("5"):
+            margin_tone = "watch"
+        else:
+            margin_tone = "risk"
+        row = {
+            "id": sheet.id,
+            "sheet": sheet,
+            "quick": None,
+            "calc": calc,
+            "margin_tone": margin_tone,
+            "cost_available": cost_available,
+            "costing_type": "advanced",
+            "type_label": "Advanced",
+            "currency_label": sheet.currency,
+            "created_at": sheet.created_at,
+            "updated_at": sheet.updated_at,
+        }
+        rows.append(row)
+        advanced_rows.append(row)
 
     for quick in quick_qs:
         calc = _quick_costing_calc(quick)
@@ -1718,16 +1718,13 @@ def quick_costing_export_excel(request, pk):
         pk=pk,
     )
     try:
-        from openpyxl import Workbook
+        import openpyxl  # noqa: F401
     except Exception:
         messages.error(request, "Excel export is unavailable. Please install openpyxl.")
         return redirect("quick_costing_detail", pk=pk)
 
     try:
         calc = _quick_costing_calc(quick_costing)
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Quick Costing"
         rows = [
             ("Buyer Name", quick_costing.buyer_name),
             ("Project Name", quick_costing.project_name),
@@ -1772,22 +1769,13 @@ def quick_costing_export_excel(request, pk):
             ("Approved By", _display_user(quick_costing.approved_by)),
             ("Approved Date", quick_costing.approved_at.strftime("%Y-%m-%d %H:%M") if quick_costing.approved_at else ""),
         ])
-        for label, value in rows:
-            ws.append([label, value])
-
-        output = io.BytesIO()
-        wb.save(output)
-        data = output.getvalue()
+        handle = spool_xlsx([("Quick Costing", rows)])
     except Exception:
         logger.exception("Failed to generate quick costing Excel", extra={"quick_costing": quick_costing.pk})
         messages.error(request, "Could not generate the Excel file. Please try again.")
         return redirect("quick_costing_detail", pk=pk)
 
-    filename = f"quick_costing_{quick_costing.pk}.xlsx"
-    resp = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    resp.write(data)
-    return resp
+    return xlsx_file_response(handle, f"quick_costing_{quick_costing.pk}.xlsx")
 
 
 def quick_costing_export_pdf(request, pk):
@@ -2735,7 +2723,7 @@ def _save_export_document(costing, filename, data, doc_type, user):
         OpportunityDocument.objects.create(
             opportunity=costing.opportunity,
             costing_header=costing,
-            file=ContentFile(data, name=filename),
+            file=data if isinstance(data, File) else ContentFile(data, name=filename),
             original_name=filename,
             doc_type=doc_type,
             uploaded_by=user if user and user.is_authenticated else None,
@@ -3015,41 +3003,39 @@ def cost_sheet_export_excel(request, pk):
     )
 
     try:
-        from openpyxl import Workbook
+        import openpyxl  # noqa: F401
     except Exception:
         messages.error(request, "Excel export is unavailable. Please install openpyxl.")
         return redirect("cost_sheet_detail", pk=pk)
 
     try:
         calc = compute_costing(costing.id)
-        wb = Workbook()
-        ws_summary = wb.active
-        ws_summary.title = "Summary"
-
-        ws_summary.append(["Customer", (costing.customer.account_brand if costing.customer else "") or "Not set"])
-        ws_summary.append(["Opportunity", costing.opportunity.opportunity_id])
-        ws_summary.append(["Style name", costing.style_name or "-"])
-        ws_summary.append(["Style code", costing.style_code or "-"])
-        ws_summary.append(["Product type", costing.get_product_type_display()])
-        ws_summary.append(["Quantity", costing.order_quantity])
-        ws_summary.append(["Factory location", costing.get_factory_location_display()])
-        ws_summary.append(["Status", costing.get_status_display()])
-        ws_summary.append(["Currency", costing.currency])
+        summary_rows = []
+
+        summary_rows.append(["Customer", (costing.customer.account_brand if costing.customer else "") or "Not set"])
+        summary_rows.append(["Opportunity", costing.opportunity.opportunity_id])
+        summary_rows.append(["Style name", costing.style_name or "-"])
+        summary_rows.append(["Style code", costing.style_code or "-"])
+        summary_rows.append(["Product type", costing.get_product_type_display()])
+        summary_rows.append(["Quantity", costing.order_quantity])
+        summary_rows.append(["Factory location", costing.get_factory_location_display()])
+        summary_rows.append(["Status", costing.get_status_display()])
+        summary_rows.append(["Currency", costing.currency])
         exchange_rate_label = f"Per 1 {_costing_currency(costing)}" if _costing_currency(costing) != "BDT" else ""
-        ws_summary.append(["Exchange rate", costing.exchange_rate or "", exchange_rate_label])
-
-        ws_summary.append([])
-        ws_summary.append(["Total cost per piece", _format_costing_money(costing, calc["display"]["total_cost_per_piece"])])
-        ws_summary.append(["FOB per piece", _format_costing_money(costing, calc["display"]["fob_per_piece"])])
-        ws_summary.append(["Profit per piece", _format_costing_money(costing, calc["display"]["profit_per_piece"])])
-        ws_summary.append(["Margin %", float(calc["display"]["margin_percent"])])
-        ws_summary.append(["Total cost order", _format_costing_money(costing, calc["display"]["total_cost_order"])])
-        ws_summary.append(["Total sales order", _format_costing_money(costing, calc["display"]["total_sales_order"])])
-        ws_summary.append(["Total profit order", _format_costing_money(costing, calc["display"]["total_profit_order"])])
-
-        ws_lines = wb.create_sheet("Line items")
+        summary_rows.append(["Exchange rate", costing.exchange_rate or "", exchange_rate_label])
+
+        summary_rows.append([])
+        summary_rows.append(["Total cost per piece", _format_costing_money(costing, calc["display"]["total_cost_per_piece"])])
+        summary_rows.append(["FOB per piece", _format_costing_money(costing, calc["display"]["fob_per_piece"])])
+        summary_rows.append(["Profit per piece", _format_costing_money(costing, calc["display"]["profit_per_piece"])])
+        summary_rows.append(["Margin %", float(calc["display"]["margin_percent"])])
+        summary_rows.append(["Total cost order", _format_costing_money(costing, calc["display"]["total_cost_order"])])
+        summary_rows.append(["Total sales order", _format_costing_money(costing, calc["display"]["total_sales_order"])])
+        summary_rows.append(["Total profit order", _format_costing_money(costing, calc["display"]["total_profit_order"])])
+
+        item_rows = []
         currency = _costing_currency(costing)
-        ws_lines.append([
+        item_rows.append([
             "Category",
             "Item",
             "UOM",
@@ -3061,7 +3047,7 @@ def cost_sheet_export_excel(request, pk):
             f"Cost per piece ({currency})",
         ])
         for row in calc["line_rows"]:
-            ws_lines.append([
+            item_rows.append([
                 row["category"],
                 row["item_name"],
                 row["uom"],
@@ -3073,23 +3059,16 @@ def cost_sheet_export_excel(request, pk):
                 float(row["cost_per_piece"]),
             ])
 
-        output = io.BytesIO()
-        wb.save(output)
-        data = output.getvalue()
+        handle = spool_xlsx([("Summary", summary_rows), ("Line items", item_rows)])
     except Exception:
         logger.exception("Failed to generate costing Excel", extra={"costing_header": costing.pk})
         messages.error(request, "Could not generate the Excel file. Please try again.")
         return redirect("cost_sheet_detail", pk=pk)
 
     filename = f"costing_{costing.opportunity.opportunity_id}.xlsx"
-    _save_export_document(costing, filename, data, "costing_excel", request.user)
-
-    resp = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    resp.write(data)
-    return resp
+    _save_export_document(costing, filename, File(handle, name=filename), "costing_excel", request.user)
+    handle.seek(0)
+    return xlsx_file_response(handle, filename)
 
 
 def cost_sheet_dashboard(request):
@@ -3122,11 +3101,7 @@ def cost_sheet_dashboard(request):
     if end_date:
         qs = qs.filter(updated_at__date__lte=end_date)
 
-    rows = []
-    for cost in qs:
-        calc = compute_costing(cost.id)
-        if calc:
-            rows.append(calc)
+    rows = costing_summaries(qs)
 
     top_profit = sorted(rows, key=lambda r: r["total_profit_order"], reverse=True)[:10]
     lowest_margin = sorted(
@@ -3210,11 +3185,7 @@ def cost_sheet_reports(request):
     qs = CostingHeader.objects.select_related("customer", "opportunity").order_by("-updated_at")
     export = (request.GET.get("export") or "").strip()
 
-    rows = []
-    for cost in qs:
-        calc = compute_costing(cost.id)
-        if calc:
-            rows.append(calc)
+    rows = costing_summaries(qs)
 
     if export:
         output = io.StringIO()
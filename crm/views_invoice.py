@@ -1,6 +1,7 @@
 # crm/views_invoice.py
 
 import io
+import logging
 from collections import defaultdict
 from datetime import timedelta
 from decimal import Decimal, ROUND_HALF_UP
@@ -10,6 +11,7 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.staticfiles import finders
 from django.db import transaction
 from django.db.models import F, Q, Sum
+from django.forms.models import model_to_dict
 from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
@@ -37,6 +39,7 @@ from .forms import InvoiceForm, InvoicePaymentForm, InvoiceSettingsForm
 from .permissions import can_view_internal_costing, get_access
 from .services.costing_currency import CurrencyConversionError, convert_currency, format_finance_money
 from .services.costing_workflow import CostingWorkflowError, create_or_link_production_order_from_invoice, get_costing_quote_amounts
+from .services.pdf_cache import cached_pdf, file_stamp, image_reader, pdf_fingerprint, pdf_response
 from .services.order_lifecycle import build_lifecycle_profit_breakdown, create_lifecycle_from_invoice
 from .services.workflow_visibility import build_workflow_visibility_context
 from .services.operations_permissions import (
@@ -52,6 +55,8 @@ from .services.operations_permissions import (
 from .services.local_sewing import calculate_local_sewing, is_bangladesh_local_sewing
 
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_INVOICE_TERMS = """For bulk orders, 50% advance confirms the order and 50% is due before shipment.
 
 For samples, 100% payment is required before development begins.
@@ -2436,6 +2441,10 @@ def invoice_client_view(request, pk):
     return render(request, _invoice_client_template(inv), _invoice_client_context(inv, request.user))
 
 
+# Bump when the invoice PDF layout changes so cached copies are re-rendered.
+INVOICE_PDF_LAYOUT_VERSION = 1
+
+
 def _pdf_money(currency: str, amount) -> str:
     return f"{currency} {_d(amount):,.2f}" if currency else f"{_d(amount):,.2f}"
 
@@ -2460,6 +2469,54 @@ def _pdf_text_lines(pdf, text: str, max_width: int, font_name: str, font_size: i
     return lines
 
 
+INVOICE_PDF_CUSTOMER_FIELDS = (
+    "account_brand",
+    "contact_name",
+    "email",
+    "phone",
+    "address_line1",
+    "address_line2",
+    "city",
+    "state",
+    "province",
+    "postal_code",
+    "country",
+)
+
+
+def _invoice_pdf_fingerprint(inv: Invoice, context: dict) -> str:
+    drawn = {key: value for key, value in context.items() if key not in {"invoice", "can_approve_invoice"}}
+    company = context["company"]
+    payment_info = context["payment_info"]
+    images = [finders.find(company["logo_path"]) if company.get("logo_path") else ""] + [
+        payment_info.get(key) or "" for key in ("paypal_qr_file", "bkash_qr_file", "nagad_qr_file", "rocket_qr_file")
+    ]
+    return pdf_fingerprint(
+        INVOICE_PDF_LAYOUT_VERSION,
+        inv.pk,
+        inv.updated_at,
+        model_to_dict(inv),
+        {field: getattr(inv.customer, field, "") for field in INVOICE_PDF_CUSTOMER_FIELDS} if inv.customer else None,
+        drawn,
+        [file_stamp(path) for path in images],
+    )
+
+
+def invoice_pdf_bytes(inv: Invoice, user=None) -> bytes:
+    """The client invoice PDF, served from the PDF cache while the invoice is unchanged."""
+    context = _invoice_client_context(inv, user)
+    return cached_pdf("invoice", inv.pk, _invoice_pdf_fingerprint(inv, context), lambda: _render_invoice_pdf(inv, context))
+
+
+def _queue_invoice_pdf_prerender(invoice_id: int) -> None:
+    try:
+        from .tasks import prerender_invoice_pdf_task
+
+        prerender_invoice_pdf_task.apply_async(args=[invoice_id], retry=False)
+    except Exception:
+        logger.exception("Invoice PDF pre-render queue failed", extra={"invoice_id": invoice_id})
+
+
 @login_required
 @user_passes_test(superuser_only)
 def invoice_pdf(request, pk):
@@ -2475,15 +2532,19 @@ def invoice_pdf(request, pk):
     )
 
     try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.utils import ImageReader
-        from reportlab.pdfgen import canvas
+        import reportlab  # noqa: F401
     except ImportError:
         messages.error(request, "PDF export is unavailable. Please install ReportLab.")
         return redirect("invoice_client_view", pk=pk)
 
-    context = _invoice_client_context(inv, request.user)
+    return pdf_response(invoice_pdf_bytes(inv, request.user), f"invoice_{inv.invoice_number or inv.pk}.pdf")
+
+
+def _render_invoice_pdf(inv: Invoice, context: dict) -> bytes:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
     company = context["company"]
     payment_status = context["payment_status"]
     line_items = context["line_items"]
@@ -2516,7 +2577,7 @@ def invoice_pdf(request, pk):
     logo_file = finders.find(logo_path) if logo_path else ""
     if logo_file:
         try:
-            pdf.drawImage(ImageReader(logo_file), left, height - 92, width=54, height=54, preserveAspectRatio=True, mask="auto")
+            pdf.drawImage(image_reader(logo_file), left, height - 92, width=54, height=54, preserveAspectRatio=True, mask="auto")
         except Exception:
             logo_file = ""
 
@@ -2785,7 +2846,7 @@ def invoice_pdf(request, pk):
         qr_y = y - 92
         for qr_file in qr_files[:3]:
             try:
-                pdf.drawImage(ImageReader(qr_file), qr_x, qr_y, width=82, height=82, preserveAspectRatio=True, mask="auto")
+                pdf.drawImage(image_reader(qr_file), qr_x, qr_y, width=82, height=82, preserveAspectRatio=True, mask="auto")
                 qr_x += 96
             except Exception:
                 continue
@@ -2854,10 +2915,7 @@ def invoice_pdf(request, pk):
     pdf.showPage()
     pdf.save()
 
-    filename = f"invoice_{inv.invoice_number or inv.pk}.pdf"
-    response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    return buffer.getvalue()
 
 
 @login_required
@@ -2990,6 +3048,7 @@ def invoice_approve(request, pk):
     inv.save(update_fields=["status", "approved_at", "approved_by", "updated_at"])
     _audit_invoice_status_change(inv, request.user, previous_status, inv.status)
     create_lifecycle_from_invoice(inv, user=request.user)
+    transaction.on_commit(lambda: _queue_invoice_pdf_prerender(inv.pk))
     messages.success(request, "Invoice sent.")
     return redirect("invoice_view", pk=inv.pk)
 
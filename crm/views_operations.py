@@ -1,35 +1,41 @@
-import csv
 from datetime import timedelta
-from io import BytesIO
 from urllib.parse import urlsplit
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group, Permission
-from django.core.cache import cache
 from django.db.models import F
-from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_POST
-from openpyxl import Workbook
 
 from crm.models import (
     AutomationNotification,
     CostingHeader,
     CRMAuditLog,
     EmployeeProfile,
+    ExportJob,
     Invoice,
     ProductionOrder,
     RecentSearch,
     RecentlyViewedRecord,
 )
 from crm.services.costing_currency import format_finance_money
+from crm.services.exports import (
+    XLSX_CONTENT_TYPE,
+    export_file_path,
+    export_response,
+    needs_background_export,
+    queryset_rows,
+    queue_export_redirect,
+)
 from crm.services.operations_notifications import (
+    HEADER_CACHE,
     filter_notifications_by_search,
     notification_priority_order,
     prepare_notification_display,
@@ -200,7 +206,7 @@ def notification_open(request, pk):
         notification.is_read = True
         notification.read_at = timezone.now()
         notification.save(update_fields=["is_read", "read_at", "updated_at"])
-        cache.delete(f"crm-header-unread:{request.user.pk}")
+        HEADER_CACHE.invalidate(scope=request.user.pk)
     return redirect(target_url)
 
 
@@ -212,7 +218,7 @@ def notification_mark_read(request, pk):
         notification.is_read = True
         notification.read_at = timezone.now()
         notification.save(update_fields=["is_read", "read_at", "updated_at"])
-        cache.delete(f"crm-header-unread:{request.user.pk}")
+        HEADER_CACHE.invalidate(scope=request.user.pk)
     return redirect(_safe_next_url(request, "notification_list"))
 
 
@@ -223,7 +229,7 @@ def notification_mark_all_read(request):
         is_read=True,
         read_at=timezone.now(),
     )
-    cache.delete(f"crm-header-unread:{request.user.pk}")
+    HEADER_CACHE.invalidate(scope=request.user.pk)
     messages.success(request, f"Marked {updated} notification(s) as read.")
     return redirect(_safe_next_url(request, "notification_list"))
 
@@ -239,7 +245,7 @@ def notification_mark_selected_read(request):
         is_read=True,
         read_at=timezone.now(),
     )
-    cache.delete(f"crm-header-unread:{request.user.pk}")
+    HEADER_CACHE.invalidate(scope=request.user.pk)
     messages.success(request, f"Marked {updated} selected notification(s) as read.")
     return redirect(_safe_next_url(request, "notification_list"))
 
@@ -254,7 +260,7 @@ def notification_delete_read(request):
     queryset = visible_notifications(request.user).filter(pk__in=selected_ids, is_read=True)
     deleted_count = queryset.count()
     queryset.delete()
-    cache.delete(f"crm-header-unread:{request.user.pk}")
+    HEADER_CACHE.invalidate(scope=request.user.pk)
     messages.success(request, f"Deleted {deleted_count} read notification(s).")
     return redirect(_safe_next_url(request, "notification_list"))
 
@@ -330,15 +336,15 @@ def global_search_suggestions(request):
     return JsonResponse({"query": query, "groups": payload})
 
 
-def _filtered_audit_queryset(request):
+def _filtered_audit_queryset(params):
     queryset = CRMAuditLog.objects.select_related("actor", "actor__employee_profile")
     filters = {
-        "user": (request.GET.get("user") or "").strip(),
-        "module": (request.GET.get("module") or "").strip(),
-        "action": (request.GET.get("action") or "").strip(),
-        "record_id": (request.GET.get("record_id") or "").strip(),
-        "date_from": parse_date((request.GET.get("date_from") or "").strip()),
-        "date_to": parse_date((request.GET.get("date_to") or "").strip()),
+        "user": (params.get("user") or "").strip(),
+        "module": (params.get("module") or "").strip(),
+        "action": (params.get("action") or "").strip(),
+        "record_id": (params.get("record_id") or "").strip(),
+        "date_from": parse_date((params.get("date_from") or "").strip()),
+        "date_to": parse_date((params.get("date_to") or "").strip()),
     }
     if filters["user"].isdigit():
         queryset = queryset.filter(actor_id=int(filters["user"]))
@@ -370,42 +376,26 @@ def _audit_export_values(row):
     ]
 
 
-def _export_audit_csv(queryset):
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="crm-audit-log.csv"'
-    writer = csv.writer(response)
-    writer.writerow(["Date", "User", "Module", "Record", "Action", "Field", "Old Value", "New Value", "Link"])
-    for row in queryset[:5000]:
-        writer.writerow(_audit_export_values(row))
-    return response
-
-
-def _export_audit_excel(queryset):
-    workbook = Workbook(write_only=True)
-    sheet = workbook.create_sheet("CRM Audit Log")
-    sheet.append(["Date", "User", "Module", "Record", "Action", "Field", "Old Value", "New Value", "Link"])
-    for row in queryset[:5000]:
-        sheet.append(_audit_export_values(row))
-    output = BytesIO()
-    workbook.save(output)
-    response = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = 'attachment; filename="crm-audit-log.xlsx"'
-    return response
+AUDIT_EXPORT_HEADERS = ["Date", "User", "Module", "Record", "Action", "Field", "Old Value", "New Value", "Link"]
+
+
+def audit_log_export(params):
+    """Export builder for the audit log; also run by background export jobs."""
+    queryset, _filters = _filtered_audit_queryset(params)
+    return "crm-audit-log", "CRM Audit Log", AUDIT_EXPORT_HEADERS, queryset_rows(queryset, _audit_export_values)
 
 
 @login_required
 def audit_log(request):
     if not _can_view_audit(request.user):
         return HttpResponseForbidden("Audit Log is restricted to CEO and administrators.")
-    queryset, filters = _filtered_audit_queryset(request)
+    queryset, filters = _filtered_audit_queryset(request.GET)
     export_format = (request.GET.get("export") or "").strip().lower()
-    if export_format == "csv":
-        return _export_audit_csv(queryset)
-    if export_format == "excel":
-        return _export_audit_excel(queryset)
+    if export_format in {"csv", "excel"}:
+        file_format = "xlsx" if export_format == "excel" else "csv"
+        if needs_background_export(queryset):
+            return queue_export_redirect(request, "audit_log", file_format)
+        return export_response(file_format, *audit_log_export(request.GET))
 
     User = get_user_model()
     return render(
@@ -421,6 +411,37 @@ def audit_log(request):
     )
 
 
+def _export_job_for(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not request.user.is_superuser and job.created_by_id != request.user.pk:
+        raise Http404("Export not found.")
+    return job
+
+
+@login_required
+def export_job_detail(request, pk):
+    job = _export_job_for(request, pk)
+    return render(
+        request,
+        "crm/operations/export_job.html",
+        {
+            "job": job,
+            "is_pending": job.status in {"queued", "processing"},
+            "file_ready": job.status == "done" and export_file_path(job) is not None,
+        },
+    )
+
+
+@login_required
+def export_job_download(request, pk):
+    job = _export_job_for(request, pk)
+    path = export_file_path(job) if job.status == "done" else None
+    if path is None:
+        raise Http404("Export file is not available.")
+    content_type = XLSX_CONTENT_TYPE if job.export_format == "xlsx" else "text/csv"
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name.split("-", 1)[-1], content_type=content_type)
+
+
 @login_required
 def operations_queue(request, queue_key):
     today = timezone.localdate()
@@ -4,7 +4,6 @@ from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group
-from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.models import Q
@@ -29,7 +28,7 @@ from crm.services.employee_profiles import (
     group_names,
     set_employee_roles,
 )
-from crm.services.employee_identity import employee_profile_ids_matching
+from crm.services.employee_identity import EMPLOYEE_DISPLAY_CACHE, employee_profile_ids_matching
 from crm.services.operations_permissions import (
     ROLE_ADMIN,
     ROLE_CEO,
@@ -74,7 +73,7 @@ def _apply_profile_form(profile, form):
     ):
         setattr(profile, field_name, getattr(draft, field_name))
     profile.save()
-    cache.delete(f"crm-employee-display:{profile.user_id}")
+    EMPLOYEE_DISPLAY_CACHE.invalidate(scope=profile.user_id)
     return profile
 
 
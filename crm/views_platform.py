@@ -43,6 +43,8 @@ from crm.services.platform_tools import (
     set_record_archived,
     toggle_favorite,
 )
+from crm.services.request_profiling import request_profile_summary
+from crm.services.shared_cache import namespace_stats
 
 
 FILTER_MODULE_ROUTES = {
@@ -59,6 +61,10 @@ def _can_manage_settings(user):
     return bool(user.is_superuser or has_operations_role(user, ROLE_CEO, ROLE_ADMIN))
 
 
+def _can_view_system_health(user):
+    return bool(user.is_superuser or has_operations_role(user, ROLE_CEO))
+
+
 def _safe_query_params(post):
     ignored = {"csrfmiddlewaretoken", "name", "module", "next"}
     return {
@@ -148,7 +154,7 @@ def _database_size():
 
 @login_required
 def system_health(request):
-    if not (request.user.is_superuser or has_operations_role(request.user, ROLE_CEO)):
+    if not _can_view_system_health(request.user):
         return HttpResponseForbidden("CEO access required.")
     context = {
         "employee_count": EmployeeProfile.objects.filter(is_archived=False).exclude(status=EmployeeProfile.STATUS_RESIGNED).count(),
@@ -167,6 +173,44 @@ def system_health(request):
     return render(request, "crm/platform/system_health.html", context)
 
 
+def _profile_hours(request):
+    try:
+        hours = int(request.GET.get("hours") or 24)
+    except (TypeError, ValueError):
+        hours = 24
+    return min(max(hours, 1), 168)
+
+
+@login_required
+def request_performance(request):
+    if not _can_view_system_health(request.user):
+        return HttpResponseForbidden("CEO access required.")
+    hours = _profile_hours(request)
+    return render(
+        request,
+        "crm/platform/request_performance.html",
+        {
+            "hours": hours,
+            "hour_options": (1, 6, 24, 72),
+            "profile": request_profile_summary(hours=hours),
+            "cache_namespaces": namespace_stats(),
+        },
+    )
+
+
+@login_required
+def request_performance_json(request):
+    if not _can_view_system_health(request.user):
+        return JsonResponse({"error": "CEO access required."}, status=403)
+    try:
+        limit = min(max(int(request.GET.get("limit") or 20), 1), 100)
+    except (TypeError, ValueError):
+        limit = 20
+    summary = request_profile_summary(hours=_profile_hours(request), limit=limit)
+    summary["cache_namespaces"] = namespace_stats()
+    return JsonResponse(summary)
+
+
 @login_required
 def crm_settings(request):
     if not _can_manage_settings(request.user):
@@ -13,17 +13,19 @@ from datetime import datetime, time, timedelta
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, FileResponse, Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 
 from crm.models import Lead, Event
 from crm.models_whatsapp import (
+    WhatsAppChangeSequence,
     WhatsAppThread,
     WhatsAppMessage,
     WhatsAppWebhookEvent,
@@ -730,6 +732,7 @@ def _wa_error_response(request, message: str, *, status: int = 400, thread: What
 def wa_inbox(request):
     if not _whatsapp_enabled():
         return _wa_disabled_html(request)
+    change_cursor = WhatsAppChangeSequence.current()
     threads = WhatsAppThread.objects.select_related("lead").order_by("-last_message_at", "-id")[:200]
     selected_id = request.GET.get("thread")
     selected_thread = None
@@ -799,6 +802,7 @@ def wa_inbox(request):
 
     context = {
         "threads": threads,
+        "wa_change_cursor": change_cursor,
         "wa_provider": _wa_provider(),
         "wa_ready": _wa_api_ready(),
         "wa_web_enabled": _wa_web_enabled() and _wa_provider() != "infobip",
@@ -988,7 +992,51 @@ def wa_thread(request, pk):
     return redirect(f"{reverse('wa_api_inbox')}?thread={pk}")
 
 
+WA_CHANGES_PAGE_SIZE = 200
+
+
+def _wa_inbox_etag(request, *args, **kwargs):
+    # Any thread or message write bumps the sequence, so it versions every inbox JSON view.
+    return f"wa-{WhatsAppChangeSequence.current()}"
+
+
+def _thread_payload(t: WhatsAppThread) -> dict:
+    return {
+        "id": t.pk,
+        "name": t.wa_name or "Unknown",
+        "phone": t.wa_phone or "",
+        "display_phone": t.display_phone,
+        "last_message_at": timezone.localtime(t.last_message_at).strftime("%Y-%m-%d %H:%M") if t.last_message_at else "",
+        "last_message_time": timezone.localtime(t.last_message_at).strftime("%-I:%M %p") if t.last_message_at else "",
+        "needs_human": bool(getattr(t, "needs_human", False)),
+        "ai_enabled": bool(getattr(t, "ai_enabled", True)),
+        "lead_name": t.lead.account_brand if t.lead_id else "",
+    }
+
+
+def _message_payload(msg: WhatsAppMessage) -> dict:
+    media_url = msg.media_url or ""
+    download_url = media_url
+    if msg.media_path:
+        media_url = reverse("wa_api_media", args=[msg.pk])
+        download_url = f"{media_url}?download=1"
+    return {
+        "id": msg.pk,
+        "direction": msg.direction,
+        "body": msg.body,
+        "created_at": timezone.localtime(msg.created_at).strftime("%Y-%m-%d %H:%M"),
+        "status": msg.status,
+        "status_display": msg.get_status_display(),
+        "media_url": media_url,
+        "download_url": download_url,
+        "media_type": msg.media_type,
+        "media_filename": msg.media_filename,
+        "is_image": (msg.media_type or "").startswith("image"),
+    }
+
+
 @login_required
+@condition(etag_func=_wa_inbox_etag)
 def wa_thread_messages_json(request, pk):
     if not _whatsapp_enabled():
         return _wa_disabled_json()
@@ -1029,28 +1077,7 @@ def wa_thread_messages_json(request, pk):
         items = list(qs[:limit])
         recent_mode = False
 
-    msgs = []
-    for msg in items:
-        media_url = msg.media_url or ""
-        download_url = media_url
-        if msg.media_path:
-            media_url = reverse("wa_api_media", args=[msg.pk])
-            download_url = f"{media_url}?download=1"
-        msgs.append(
-            {
-                "id": msg.pk,
-                "direction": msg.direction,
-                "body": msg.body,
-                "created_at": timezone.localtime(msg.created_at).strftime("%Y-%m-%d %H:%M"),
-                "status": msg.status,
-                "status_display": msg.get_status_display(),
-                "media_url": media_url,
-                "download_url": download_url,
-                "media_type": msg.media_type,
-                "media_filename": msg.media_filename,
-                "is_image": (msg.media_type or "").startswith("image"),
-            }
-        )
+    msgs = [_message_payload(msg) for msg in items]
     if items:
         oldest_id = items[0].id
 
@@ -1058,6 +1085,7 @@ def wa_thread_messages_json(request, pk):
 
 
 @login_required
+@condition(etag_func=_wa_inbox_etag)
 def wa_threads_json(request):
     if not _whatsapp_enabled():
         return _wa_disabled_json()
@@ -1065,22 +1093,64 @@ def wa_threads_json(request):
         WhatsAppThread.objects.select_related("lead")
         .order_by("-last_message_at", "-id")[:200]
     )
-    data = []
-    for t in threads:
-        data.append(
-            {
-                "id": t.pk,
-                "name": t.wa_name or "Unknown",
-                "phone": t.wa_phone or "",
-                "display_phone": t.display_phone,
-                "last_message_at": timezone.localtime(t.last_message_at).strftime("%Y-%m-%d %H:%M") if t.last_message_at else "",
-                "last_message_time": timezone.localtime(t.last_message_at).strftime("%-I:%M %p") if t.last_message_at else "",
-                "needs_human": bool(getattr(t, "needs_human", False)),
-                "ai_enabled": bool(getattr(t, "ai_enabled", True)),
-                "lead_name": t.lead.account_brand if t.lead_id else "",
-            }
+    return JsonResponse({"ok": True, "threads": [_thread_payload(t) for t in threads]})
+
+
+def _changes_page(queryset, since, upto, limit):
+    """
+    Rows stamped after ``since`` and up to ``upto``, oldest change first, about
+    ``limit`` of them. Returns ``(rows, covered)``: every row stamped at or
+    below ``covered`` is included, so a cursor moved there skips nothing.
+    """
+    rows = list(queryset.filter(change_seq__gt=since, change_seq__lte=upto).order_by("change_seq", "id")[: limit + 1])
+    if len(rows) <= limit:
+        return rows, upto
+    covered = rows[limit].change_seq - 1
+    if covered < rows[0].change_seq:
+        # One stamp covers more than a page of rows; send all of them.
+        covered = rows[0].change_seq
+        return list(queryset.filter(change_seq=covered).order_by("id")), covered
+    return [row for row in rows if row.change_seq <= covered], covered
+
+
+@login_required
+def wa_changes(request):
+    """
+    Inbox changes after the client's ``since`` cursor.
+
+    Changed threads are always included; messages only for the ``thread`` the
+    client has open. Large deltas come a page at a time: ``cursor`` moves only
+    past what was returned and ``has_more`` tells the client to ask again now.
+    """
+    if not _whatsapp_enabled():
+        return _wa_disabled_json()
+    try:
+        since = max(int(request.GET.get("since") or 0), 0)
+    except ValueError:
+        since = 0
+    thread_raw = (request.GET.get("thread") or "").strip()
+    thread_id = int(thread_raw) if thread_raw.isdigit() else None
+
+    latest = WhatsAppChangeSequence.current()
+    if latest <= since:
+        return JsonResponse({"ok": True, "cursor": latest, "has_more": False, "threads": [], "messages": []})
+
+    threads, cursor = _changes_page(WhatsAppThread.objects.select_related("lead"), since, latest, WA_CHANGES_PAGE_SIZE)
+    messages_changed = []
+    if thread_id:
+        messages_changed, cursor = _changes_page(
+            WhatsAppMessage.objects.filter(thread_id=thread_id), since, cursor, WA_CHANGES_PAGE_SIZE
         )
-    return JsonResponse({"ok": True, "threads": data})
+        threads = [thread for thread in threads if thread.change_seq <= cursor]
+    return JsonResponse(
+        {
+            "ok": True,
+            "cursor": cursor,
+            "has_more": cursor < latest,
+            "threads": [_thread_payload(t) for t in threads],
+            "messages": [_message_payload(msg) for msg in messages_changed],
+        }
+    )
 
 
 @login_required
@@ -1546,7 +1616,11 @@ def _process_infobip_payload(payload: dict) -> int:
             msg_id = item.get("messageId") or item.get("message_id") or item.get("id") or ""
             if msg_id:
                 status_val = _infobip_status_to_local(status_obj)
-                WhatsAppMessage.objects.filter(meta_id=msg_id).update(status=status_val)
+                with transaction.atomic():
+                    WhatsAppMessage.objects.filter(meta_id=msg_id).update(
+                        status=status_val,
+                        change_seq=WhatsAppChangeSequence.next_value(),
+                    )
                 processed += 1
             continue
 
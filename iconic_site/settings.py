@@ -2,8 +2,11 @@
 import os
 import json
 from pathlib import Path
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
+from iconic_site.sqlite_tuning import sqlite_options
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
 
@@ -109,6 +112,18 @@ DATABASES = {
     }
 }
 
+# Web, Celery and cron processes share the file; see iconic_site/sqlite_tuning.py.
+# `manage.py sqlite_contention_benchmark` compares these settings with the defaults.
+if os.getenv("SQLITE_TUNING_ENABLED", "1") == "1":
+    DATABASES["default"]["OPTIONS"] = sqlite_options(
+        journal_mode=os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        synchronous=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "20000")),
+        mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        cache_size_kib=int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536")),
+        transaction_mode=os.getenv("SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+    )
+
 # ======================
 # Password validation
 # ======================
@@ -144,8 +159,48 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Rendered PDFs are kept outside MEDIA_ROOT so nginx never serves them directly.
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", str(BASE_DIR / "pdf_cache")))
+# Decoded logo/product images kept per process for PDF rendering (least recently used dropped first).
+PDF_IMAGE_READER_CACHE_SIZE = int(os.getenv("PDF_IMAGE_READER_CACHE_SIZE", "64"))
+# Background CSV/XLSX exports are written here and served through the export job page.
+EXPORT_DIR = Path(os.getenv("EXPORT_DIR", str(BASE_DIR / "exports")))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# ======================
+# Cache
+# ======================
+
+# Shared by every gunicorn and Celery process: Redis when configured, else a
+# file cache on the local disk. crm.services.shared_cache keeps a short-lived
+# per-process copy in front of it.
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "").strip()
+CACHE_DIR = os.getenv("CACHE_DIR", str(BASE_DIR / "var" / "cache"))
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": "iconic",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "5000"))},
+        }
+    }
+CRM_CACHE_L1_SECONDS = float(os.getenv("CRM_CACHE_L1_SECONDS", "5"))
+# How long a process trusts its copy of a namespace version; another process's
+# invalidation shows up here within this window.
+CRM_CACHE_VERSION_L1_SECONDS = float(os.getenv("CRM_CACHE_VERSION_L1_SECONDS", "1"))
+# The test runner swaps CACHES for a per-process memory cache, so a test run
+# never touches the file cache or a live Redis.
+TEST_RUNNER = "iconic_site.test_runner.IsolatedCacheTestRunner"
+
 # ======================
 # Celery / Redis
 # ======================
@@ -166,6 +221,89 @@ LEADBRAIN_CELERY_FANOUT = int(os.getenv("LEADBRAIN_CELERY_FANOUT", "4"))
 LEADBRAIN_PARSE_BATCH_SIZE = int(os.getenv("LEADBRAIN_PARSE_BATCH_SIZE", "500"))
 LEADBRAIN_PROCESS_BATCH_SIZE = int(os.getenv("LEADBRAIN_PROCESS_BATCH_SIZE", "20"))
 LEADBRAIN_STALE_MINUTES = int(os.getenv("LEADBRAIN_STALE_MINUTES", "10"))
+LEADBRAIN_RESEARCH_WORKERS = int(os.getenv("LEADBRAIN_RESEARCH_WORKERS", "8"))
+LEADBRAIN_RESEARCH_PER_HOST_LIMIT = int(os.getenv("LEADBRAIN_RESEARCH_PER_HOST_LIMIT", "2"))
+LEADBRAIN_RESEARCH_COMPANY_TIMEOUT = float(os.getenv("LEADBRAIN_RESEARCH_COMPANY_TIMEOUT", "20"))
+LEADBRAIN_HTTP_CACHE_ENABLED = os.getenv("LEADBRAIN_HTTP_CACHE_ENABLED", "1") == "1"
+LEADBRAIN_HTTP_CACHE_DIR = os.getenv("LEADBRAIN_HTTP_CACHE_DIR", str(BASE_DIR / "var" / "leadbrain_http_cache"))
+LEADBRAIN_HTTP_CACHE_MAX_BYTES = int(os.getenv("LEADBRAIN_HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "crm-automation-dirty-records": {
+        "task": "crm.tasks.process_automation_dirty_records_task",
+        "schedule": float(os.getenv("CRM_AUTOMATION_DIRTY_INTERVAL_SECONDS", "60")),
+    },
+    "crm-automation-nightly-sweep": {
+        "task": "crm.tasks.automation_nightly_sweep_task",
+        "schedule": crontab(hour=2, minute=15),
+    },
+    "crm-calendar-reminders": {
+        "task": "crm.tasks.dispatch_event_reminders_task",
+        "schedule": float(os.getenv("CALENDAR_REMINDER_INTERVAL_SECONDS", "60")),
+    },
+    "crm-kpi-rollups-refresh": {
+        "task": "crm.tasks.refresh_kpi_rollups_task",
+        "schedule": float(os.getenv("CRM_KPI_ROLLUP_INTERVAL_SECONDS", "3600")),
+    },
+    "crm-kpi-rollups-nightly": {
+        "task": "crm.tasks.kpi_rollups_nightly_task",
+        "schedule": crontab(hour=2, minute=45),
+    },
+    "crm-accounting-balances-nightly": {
+        "task": "crm.tasks.accounting_balances_nightly_task",
+        "schedule": crontab(hour=3, minute=5),
+    },
+    "crm-export-retention-nightly": {
+        "task": "crm.tasks.purge_old_exports_task",
+        "schedule": crontab(hour=3, minute=35),
+    },
+    "crm-production-list-values-nightly": {
+        "task": "crm.tasks.refresh_production_list_values_task",
+        "schedule": crontab(hour=0, minute=10),
+    },
+    "leadbrain-upload-progress-reconcile": {
+        "task": "leadbrain.tasks.reconcile_upload_progress_task",
+        "schedule": float(os.getenv("LEADBRAIN_PROGRESS_RECONCILE_SECONDS", "300")),
+    },
+}
+
+# ======================
+# CRM KPI rollups
+# ======================
+# Daily totals behind the CEO dashboard, briefing and advisor. The hourly pass
+# refreshes dirty days plus the trailing window; the nightly pass rebuilds enough
+# history for the longest dashboard comparison (180 days + previous 180 days).
+CRM_KPI_ROLLUP_RECENT_DAYS = int(os.getenv("CRM_KPI_ROLLUP_RECENT_DAYS", "3"))
+CRM_KPI_ROLLUP_NIGHTLY_DAYS = int(os.getenv("CRM_KPI_ROLLUP_NIGHTLY_DAYS", "400"))
+
+# ======================
+# CRM exports
+# ======================
+# Accounting and audit exports above this many rows are written by a Celery job
+# and downloaded from the job page instead of streaming in the request (0 = never).
+CRM_EXPORT_BACKGROUND_ROWS = int(os.getenv("CRM_EXPORT_BACKGROUND_ROWS", "20000"))
+# Finished export jobs and their files in EXPORT_DIR are deleted after this many days.
+CRM_EXPORT_RETENTION_DAYS = int(os.getenv("CRM_EXPORT_RETENTION_DAYS", "7"))
+
+# ======================
+# CRM audit log
+# ======================
+# Audit diffs use the field values captured when a record was loaded. Enable this
+# to fall back to a SELECT for instances saved without a captured snapshot.
+CRM_AUDIT_FALLBACK_QUERY = os.getenv("CRM_AUDIT_FALLBACK_QUERY", "0") == "1"
+
+# ======================
+# CRM request profiling
+# ======================
+# Each worker aggregates per-view latency and query counts in memory and writes
+# its own rows every flush interval. A query shape run REPEAT_THRESHOLD times in
+# one request is reported as a likely N+1.
+CRM_REQUEST_PROFILING_ENABLED = os.getenv("CRM_REQUEST_PROFILING_ENABLED", "1") == "1"
+CRM_REQUEST_PROFILING_FLUSH_SECONDS = float(os.getenv("CRM_REQUEST_PROFILING_FLUSH_SECONDS", "60"))
+CRM_REQUEST_PROFILING_WINDOW_MINUTES = int(os.getenv("CRM_REQUEST_PROFILING_WINDOW_MINUTES", "60"))
+CRM_REQUEST_PROFILING_REPEAT_THRESHOLD = int(os.getenv("CRM_REQUEST_PROFILING_REPEAT_THRESHOLD", "5"))
+CRM_REQUEST_PROFILING_RETENTION_HOURS = int(os.getenv("CRM_REQUEST_PROFILING_RETENTION_HOURS", "72"))
 
 # ======================
 # Auth redirects
@@ -191,6 +329,14 @@ CA_ACCOUNTING_GROUP = "CA_ACCOUNTING"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
 
+# All CRM LLM calls go through crm.ai.gateway; "stub" answers locally without a network call.
+CRM_LLM_BACKEND = os.getenv("CRM_LLM_BACKEND", "openai")
+CRM_LLM_MODEL = os.getenv("CRM_LLM_MODEL", "gpt-4o-mini")
+CRM_LLM_TIMEOUT_SECONDS = float(os.getenv("CRM_LLM_TIMEOUT_SECONDS", "60"))
+CRM_LLM_CACHE_TTL_SECONDS = int(os.getenv("CRM_LLM_CACHE_TTL_SECONDS", "3600"))
+CRM_LLM_CACHE_MAX_ENTRIES = int(os.getenv("CRM_LLM_CACHE_MAX_ENTRIES", "2000"))
+CRM_LLM_PENDING_TIMEOUT_SECONDS = int(os.getenv("CRM_LLM_PENDING_TIMEOUT_SECONDS", "300"))
+
 # ======================
 # Marketing feature flags
 # ======================
@@ -206,8 +352,12 @@ MARKETING_ENABLED = _flag("MARKETING_ENABLED", default=DEBUG)
 MARKETING_SEO_ENABLED = _flag("MARKETING_SEO_ENABLED", default=False)
 MARKETING_SOCIAL_ENABLED = _flag("MARKETING_SOCIAL_ENABLED", default=False)
 MARKETING_OUTREACH_ENABLED = _flag("MARKETING_OUTREACH_ENABLED", default=False)
+MARKETING_OUTREACH_ACCOUNT_PER_MINUTE = int(os.getenv("MARKETING_OUTREACH_ACCOUNT_PER_MINUTE", "20"))
+MARKETING_OUTREACH_ACCOUNT_BURST = int(os.getenv("MARKETING_OUTREACH_ACCOUNT_BURST", "5"))
 MARKETING_ADS_ENABLED = _flag("MARKETING_ADS_ENABLED", default=False)
 MARKETING_AI_ENABLED = _flag("MARKETING_AI_ENABLED", default=False)
+MARKETING_UPSERT_BATCH_SIZE = int(os.getenv("MARKETING_UPSERT_BATCH_SIZE", "500"))
+MARKETING_UPSERT_SKIP_UNCHANGED = _flag("MARKETING_UPSERT_SKIP_UNCHANGED", default=True)
 
 SITE_BASE_URL = os.getenv("SITE_BASE_URL", "https://femline.ca")
 
@@ -364,6 +514,10 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
+# Calendar reminders are sent by a beat task: up to BATCH_SIZE per SMTP connection.
+# A claim older than CLAIM_TIMEOUT (crashed worker) can be picked up again.
+CALENDAR_REMINDER_BATCH_SIZE = int(os.getenv("CALENDAR_REMINDER_BATCH_SIZE", "50"))
+CALENDAR_REMINDER_CLAIM_TIMEOUT_SECONDS = int(os.getenv("CALENDAR_REMINDER_CLAIM_TIMEOUT_SECONDS", "600"))
 
 # ======================
 # Email sync config (IMAP)
@@ -393,6 +547,11 @@ EMAIL_SYNC_PASSWORDS = {
     "info": os.getenv("INFO_EMAIL_PASS", ""),
 }
 
+# Messages per UID FETCH round-trip, and the byte cap on each fetched message.
+CRM_IMAP_FETCH_BATCH_SIZE = int(os.getenv("CRM_IMAP_FETCH_BATCH_SIZE", "25"))
+CRM_IMAP_MAX_MESSAGE_BYTES = int(os.getenv("CRM_IMAP_MAX_MESSAGE_BYTES", "1000000"))
+CRM_IMAP_TIMEOUT_SECONDS = int(os.getenv("CRM_IMAP_TIMEOUT_SECONDS", "60"))
+
 # ======================
 # Email monitor rules
 # ======================
@@ -0,0 +1,48 @@
+"""
+SQLite connection settings for several processes writing one database file.
+
+Gunicorn workers, Celery workers, the WhatsApp queue worker and cron
+commands all write to ``db.sqlite3``. With the default rollback journal a
+writer blocks every reader, and a deferred transaction that reads before
+it writes fails with "database is locked" when another process holds the
+write lock, without waiting on busy_timeout. WAL lets readers and one
+writer run together. BEGIN IMMEDIATE takes the write lock up front, so
+waiting writers queue on busy_timeout instead of failing.
+"""
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+TRANSACTION_MODES = {"DEFERRED", "IMMEDIATE", "EXCLUSIVE"}
+
+
+def sqlite_pragmas(*, journal_mode="WAL", synchronous="NORMAL", busy_timeout_ms=20000, mmap_size=0, cache_size_kib=0):
+    """PRAGMA statements run on every new connection."""
+    journal_mode = journal_mode.upper()
+    synchronous = synchronous.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLite journal mode: {journal_mode}")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unsupported SQLite synchronous mode: {synchronous}")
+    pragmas = [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(busy_timeout_ms)}",
+    ]
+    if mmap_size:
+        pragmas.append(f"PRAGMA mmap_size={int(mmap_size)}")
+    if cache_size_kib:
+        # A negative cache_size is read by SQLite as KiB rather than pages.
+        pragmas.append(f"PRAGMA cache_size=-{int(cache_size_kib)}")
+    return pragmas
+
+
+def sqlite_options(*, transaction_mode="IMMEDIATE", busy_timeout_ms=20000, **pragma_options):
+    """``DATABASES[...]["OPTIONS"]`` for django.db.backends.sqlite3."""
+    transaction_mode = transaction_mode.upper()
+    if transaction_mode not in TRANSACTION_MODES:
+        raise ValueError(f"Unsupported SQLite transaction mode: {transaction_mode}")
+    return {
+        "init_command": ";".join(sqlite_pragmas(busy_timeout_ms=busy_timeout_ms, **pragma_options)),
+        "timeout": busy_timeout_ms / 1000,
+        "transaction_mode": transaction_mode,
+    }
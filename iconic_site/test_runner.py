@@ -0,0 +1,25 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "iconic-tests",
+        # The same headroom as the file cache, so entries are not culled mid-suite.
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+}
+
+
+class IsolatedCacheTestRunner(DiscoverRunner):
+    """Runs the suite against an empty in-memory cache instead of the configured one."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_override = override_settings(CACHES=TEST_CACHES)
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        super().teardown_test_environment(**kwargs)
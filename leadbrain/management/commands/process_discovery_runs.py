@@ -9,6 +9,7 @@ from django.utils import timezone
 
 from leadbrain.models import LeadBrainWorker
 from leadbrain.services.discovery_service import DISCOVERY_DEFAULT_BATCH_SIZE, process_discovery_runs
+from leadbrain.services.http_cache import http_cache_summary
 
 
 ACTIVE_WORKER_STATUSES = [
@@ -88,6 +89,7 @@ class Command(BaseCommand):
                 processed_rows=processed_rows,
                 clear_pid=True,
             )
+            self.stdout.write(http_cache_summary())
 
     def _acquire_worker(self, worker_name: str, *, stale_seconds: int) -> LeadBrainWorker | None:
         now = timezone.now()
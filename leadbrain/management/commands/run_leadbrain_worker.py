@@ -8,6 +8,7 @@ from django.db import transaction
 from django.utils import timezone
 
 from leadbrain.models import LeadBrainWorker
+from leadbrain.services.http_cache import http_cache_summary
 from leadbrain.services.processing_service import process_upload_batch, select_next_upload, update_worker_heartbeat
 
 
@@ -72,6 +73,7 @@ class Command(BaseCommand):
                 current_upload=None,
                 pid=None,
             )
+            self.stdout.write(http_cache_summary())
 
     def _acquire_worker(self, worker_name: str, *, stale_seconds: int) -> LeadBrainWorker | None:
         now = timezone.now()
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _website_key(value):
+    website = _text(value).lower()
+    if not website:
+        return ""
+    for prefix in ("https://", "http://"):
+        if website.startswith(prefix):
+            website = website[len(prefix) :]
+            break
+    if website.startswith("www."):
+        website = website[4:]
+    return website.rstrip("/")[:255]
+
+
+def _lower_key(value):
+    return _text(value).lower()[:255]
+
+
+def backfill_company_identity_keys(apps, schema_editor):
+    LeadBrainCompany = apps.get_model("leadbrain", "LeadBrainCompany")
+    pending = []
+    updated = 0
+    for company in LeadBrainCompany.objects.only("id", "website", "email", "company_name").iterator(chunk_size=500):
+        company.website_key = _website_key(company.website)
+        company.email_key = _lower_key(company.email)
+        company.company_name_key = _lower_key(company.company_name)
+        if not (company.website_key or company.email_key or company.company_name_key):
+            continue
+        pending.append(company)
+        if len(pending) >= 500:
+            LeadBrainCompany.objects.bulk_update(pending, ["website_key", "email_key", "company_name_key"])
+            updated += len(pending)
+            pending = []
+    if pending:
+        LeadBrainCompany.objects.bulk_update(pending, ["website_key", "email_key", "company_name_key"])
+        updated += len(pending)
+    print(f"Lead Brain company identity key backfill: {updated} companies updated.")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leadbrain', '0018_alter_leadbraindiscoveryjob_country_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leadbraincompany',
+            name='company_name_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='leadbraincompany',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='leadbraincompany',
+            name='website_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_company_identity_keys, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,13 @@
 from datetime import datetime, time, timedelta
 
 from django.conf import settings
-from django.db.models import Count, Q
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest, Least
 from django.db import models
 from django.utils import timezone
 
+from crm.services import identity_keys
+
 
 class LeadBrainUpload(models.Model):
     STATUS_QUEUED = "queued"
@@ -72,9 +75,91 @@ class LeadBrainUpload(models.Model):
             )
         ]
 
+    PROGRESS_FIELDS = [
+        "total_rows",
+        "pending_rows",
+        "processing_rows",
+        "completed_rows",
+        "failed_rows",
+        "progress_percent",
+        "status",
+        "updated_at",
+    ]
+
     def __str__(self):
         return self.file_name or f"Upload {self.id}"
 
+    @staticmethod
+    def counter_field(research_status):
+        return {
+            LeadBrainCompany.STATUS_PENDING: "pending_rows",
+            LeadBrainCompany.STATUS_PROCESSING: "processing_rows",
+            LeadBrainCompany.STATUS_COMPLETE: "completed_rows",
+            LeadBrainCompany.STATUS_FAILED: "failed_rows",
+        }[research_status]
+
+    @classmethod
+    def derived_progress(cls):
+        """
+        SQL expressions for progress_percent and status computed from the stored
+        counters, following the same rules as ``refresh_progress``.
+        """
+        processed = F("completed_rows") + F("failed_rows")
+        return {
+            "progress_percent": Case(
+                When(total_rows=0, then=Value(0)),
+                default=Least(Value(100), processed * 100 / F("total_rows")),
+                output_field=models.PositiveSmallIntegerField(),
+            ),
+            "status": Case(
+                When(status=cls.STATUS_CANCELLED, then=Value(cls.STATUS_CANCELLED)),
+                When(total_rows=0, status__in=[cls.STATUS_QUEUED, cls.STATUS_PARSING], then=F("status")),
+                When(total_rows=0, then=Value(cls.STATUS_FAILED)),
+                When(completed_rows=F("total_rows"), failed_rows=0, then=Value(cls.STATUS_COMPLETE)),
+                When(failed_rows=F("total_rows"), completed_rows=0, then=Value(cls.STATUS_FAILED)),
+                When(
+                    Q(total_rows=processed, completed_rows__gt=0, failed_rows__gt=0),
+                    then=Value(cls.STATUS_PARTIAL),
+                ),
+                When(
+                    Q(pending_rows__gt=0) | Q(processing_rows__gt=0) | Q(completed_rows__gt=0) | Q(failed_rows__gt=0),
+                    then=Value(cls.STATUS_PROCESSING),
+                ),
+                default=Value(cls.STATUS_QUEUED),
+                output_field=models.CharField(),
+            ),
+        }
+
+    def shift_progress(self, moves):
+        """
+        Record rows moving between research statuses without recounting them.
+
+        ``moves`` maps ``(from_status, to_status)`` to a row count. Counters are
+        adjusted with F() expressions and status is then re-derived from the
+        stored counters, each in one UPDATE, so concurrent batch workers never
+        overwrite each other's progress. Drift is fixed by ``refresh_progress``.
+        """
+        deltas = {}
+        for (from_status, to_status), rows in moves.items():
+            if not rows or from_status == to_status:
+                continue
+            from_field = self.counter_field(from_status)
+            to_field = self.counter_field(to_status)
+            deltas[from_field] = deltas.get(from_field, 0) - rows
+            deltas[to_field] = deltas.get(to_field, 0) + rows
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return self
+
+        uploads = LeadBrainUpload.objects.filter(pk=self.pk)
+        uploads.update(
+            updated_at=timezone.now(),
+            **{field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()},
+        )
+        uploads.update(**self.derived_progress())
+        self.refresh_from_db(fields=self.PROGRESS_FIELDS)
+        return self
+
     def refresh_progress(self, *, save=True):
         stats = self.companies.aggregate(
             total=Count("id"),
@@ -559,15 +644,36 @@ class LeadBrainCompany(models.Model):
         on_delete=models.SET_NULL,
         related_name="discovered_companies",
     )
+    # Normalized duplicate-matching keys; set by save() and sync_identity_keys() for bulk writes.
+    website_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    email_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    company_name_key = models.CharField(max_length=255, blank=True, default="", db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    IDENTITY_KEY_SOURCES = {
+        "website_key": ("website", identity_keys.website_key),
+        "email_key": ("email", identity_keys.email_key),
+        "company_name_key": ("company_name", identity_keys.company_name_key),
+    }
+    IDENTITY_KEY_FIELDS = list(IDENTITY_KEY_SOURCES)
+
     class Meta:
         ordering = ["-fit_score", "company_name", "id"]
 
     def __str__(self):
         return self.company_name or f"Company {self.id}"
 
+    def sync_identity_keys(self):
+        return identity_keys.apply_identity_keys(self, self.IDENTITY_KEY_SOURCES)
+
+    def save(self, *args, **kwargs):
+        keys_changed = self.sync_identity_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and keys_changed:
+            kwargs["update_fields"] = list(dict.fromkeys([*update_fields, *keys_changed]))
+        super().save(*args, **kwargs)
+
     @property
     def is_discovery_source(self):
         if self.discovery_run_id or self.discovery_job_id or self.source_type:
@@ -10,6 +10,7 @@ from django.db import IntegrityError, transaction
 from django.db.models import Count, Q
 from django.utils import timezone
 
+from crm.services.identity_keys import website_key as _website_key
 from leadbrain.models import (
     LeadBrainCompany,
     LeadBrainDiscoveryCandidate,
@@ -18,7 +19,12 @@ from leadbrain.models import (
     LeadBrainUpload,
 )
 from leadbrain.services.classification_service import classify_company
-from leadbrain.services.matching import find_matching_lead
+from leadbrain.services.matching import (
+    find_matching_companies,
+    find_matching_company,
+    find_matching_lead,
+    find_matching_leads,
+)
 from leadbrain.services.research_service import research_company, search_query_results
 from leadbrain.services.shopify_directory import (
     SHOPIFY_DIRECTORY_SOURCE,
@@ -112,23 +118,6 @@ def _text(value):
     return str(value).strip()
 
 
-def _website_key(value):
-    website = _text(value).lower()
-    if not website:
-        return ""
-    for prefix in ("https://", "http://"):
-        if website.startswith(prefix):
-            website = website[len(prefix) :]
-            break
-    if website.startswith("www."):
-        website = website[4:]
-    return website.rstrip("/")
-
-
-def _company_name_key(value):
-    return _text(value).lower()
-
-
 def _niche_label(niche: str) -> str:
     return NICHE_LABELS.get(niche, _text(niche).replace("_", " "))
 
@@ -184,34 +173,6 @@ def get_due_discovery_jobs(*, now=None):
     ).order_by("next_run_at", "id")
 
 
-def _find_matching_company(*, website="", email="", company_name=""):
-    website_key = _website_key(website)
-    email_key = _text(email).lower()
-    company_name_key = _company_name_key(company_name)
-    filters = Q()
-    if website_key:
-        filters |= Q(website__icontains=website_key)
-    if email_key:
-        filters |= Q(email__iexact=email_key)
-    if not filters:
-        return None, ""
-
-    queryset = LeadBrainCompany.objects.filter(is_active=True).filter(filters).order_by("id")
-    for record in queryset:
-        record_website_key = _website_key(record.website)
-        record_email_key = _text(record.email).lower()
-        record_company_name_key = _company_name_key(record.company_name)
-        if website_key and record_website_key == website_key:
-            return record, "website exact match"
-        if email_key and record_email_key == email_key:
-            return record, "email exact match"
-        if company_name_key and website_key and record_company_name_key == company_name_key and record_website_key == website_key:
-            return record, "company name plus website"
-        if company_name_key and email_key and record_company_name_key == company_name_key and record_email_key == email_key:
-            return record, "company name plus email"
-    return None, ""
-
-
 def _discovery_band(score: int) -> str:
     if score >= DISCOVERY_STRONG_MIN_SCORE:
         return "strong_fit"
@@ -632,6 +593,7 @@ def initialize_discovery_run(run: LeadBrainDiscoveryRun) -> LeadBrainDiscoveryRu
     candidate_budget = run.job.effective_max_results_per_run
     seen_urls = set()
     candidates = []
+    unmatched = []
     duplicate_examples = []
     sample_results = []
     error_messages = []
@@ -690,36 +652,18 @@ def initialize_discovery_run(run: LeadBrainDiscoveryRun) -> LeadBrainDiscoveryRu
                 continue
 
             seen_urls.add(website_key)
-            existing_company, company_rule = _find_matching_company(
-                website=candidate_website,
+            candidate = LeadBrainDiscoveryCandidate(
+                run=run,
                 company_name=company_name,
+                website=candidate_website,
+                source_type=source_type,
+                source_url=source_url,
+                country=query_spec["country"],
+                niche=query_spec["niche"],
+                discovery_status=LeadBrainDiscoveryCandidate.STATUS_QUEUED,
             )
-            duplicate_lead, lead_rule = find_matching_lead(website=candidate_website)
-
-            discovery_status = LeadBrainDiscoveryCandidate.STATUS_QUEUED
-            skip_reason = ""
-            if existing_company:
-                discovery_status = LeadBrainDiscoveryCandidate.STATUS_DUPLICATE
-                skip_reason = f"Skipped by existing Lead Brain {company_rule}."
-            elif duplicate_lead:
-                discovery_status = LeadBrainDiscoveryCandidate.STATUS_DUPLICATE
-                skip_reason = f"Skipped by existing Lead {lead_rule}."
-
-            candidates.append(
-                LeadBrainDiscoveryCandidate(
-                    run=run,
-                    company_name=company_name,
-                    website=candidate_website,
-                    source_type=source_type,
-                    source_url=source_url,
-                    country=query_spec["country"],
-                    niche=query_spec["niche"],
-                    discovery_status=discovery_status,
-                    skip_reason=skip_reason[:255],
-                )
-            )
-            if skip_reason and len(duplicate_examples) < 5:
-                duplicate_examples.append(f"{company_name or source_url} {skip_reason}")
+            candidates.append(candidate)
+            unmatched.append(candidate)
             if len(sample_results) < 5:
                 sample_results.append(
                     {
@@ -732,6 +676,22 @@ def initialize_discovery_run(run: LeadBrainDiscoveryRun) -> LeadBrainDiscoveryRu
                     }
                 )
 
+    # Existing-record dedupe for the whole run is resolved with one indexed lookup per model.
+    lookups = [{"website": candidate.website} for candidate in unmatched]
+    for candidate, (existing_company, company_rule), (duplicate_lead, lead_rule) in zip(
+        unmatched, find_matching_companies(lookups), find_matching_leads(lookups)
+    ):
+        if existing_company:
+            skip_reason = f"Skipped by existing Lead Brain {company_rule}."
+        elif duplicate_lead:
+            skip_reason = f"Skipped by existing Lead {lead_rule}."
+        else:
+            continue
+        candidate.discovery_status = LeadBrainDiscoveryCandidate.STATUS_DUPLICATE
+        candidate.skip_reason = skip_reason[:255]
+        if len(duplicate_examples) < 5:
+            duplicate_examples.append(f"{candidate.company_name or candidate.source_url} {skip_reason}")
+
     if candidates:
         LeadBrainDiscoveryCandidate.objects.bulk_create(candidates, batch_size=100)
 
@@ -989,13 +949,10 @@ def process_discovery_run_batch(run: LeadBrainDiscoveryRun, *, batch_size=DISCOV
         finalize_discovery_run(run)
         return 0
 
-    for candidate in candidates:
+    lookups = [{"website": candidate.website} for candidate in candidates]
+    prechecks = zip(find_matching_companies(lookups), find_matching_leads(lookups))
+    for candidate, ((existing_company, company_rule), (duplicate_lead, lead_rule)) in zip(candidates, prechecks):
         try:
-            existing_company, company_rule = _find_matching_company(
-                website=candidate.website,
-                company_name=candidate.company_name,
-            )
-            duplicate_lead, lead_rule = find_matching_lead(website=candidate.website)
             if existing_company:
                 _mark_candidate(
                     candidate,
@@ -1052,11 +1009,8 @@ def process_discovery_run_batch(run: LeadBrainDiscoveryRun, *, batch_size=DISCOV
                 )
                 continue
 
-            existing_company, company_rule = _find_matching_company(
-                website=website,
-                email=email,
-                company_name=candidate.company_name,
-            )
+            # Re-check with the researched website/email; rows saved earlier in this batch count too.
+            existing_company, company_rule = find_matching_company(website=website, email=email)
             duplicate_lead, lead_rule = find_matching_lead(website=website, email=email)
             if existing_company:
                 _mark_candidate(
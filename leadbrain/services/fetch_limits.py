@@ -0,0 +1,59 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class ResearchBudgetExceeded(TimeoutError):
+    pass
+
+
+class HostLimiter:
+    """Caps how many requests may be in flight to the same host at once."""
+
+    def __init__(self, per_host_limit: int):
+        self.per_host_limit = max(1, int(per_host_limit))
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url: str) -> threading.BoundedSemaphore:
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            semaphore = self._slots.get(host)
+            if semaphore is None:
+                semaphore = self._slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return semaphore
+
+
+_fetch_context = threading.local()
+
+
+@contextmanager
+def research_fetch_scope(limiter: HostLimiter, *, timeout_seconds: float):
+    """Run the fetches made by one company's research under ``limiter`` and a shared time budget."""
+    previous = getattr(_fetch_context, "scope", None)
+    _fetch_context.scope = (limiter, time.monotonic() + max(0.1, float(timeout_seconds)))
+    try:
+        yield
+    finally:
+        _fetch_context.scope = previous
+
+
+@contextmanager
+def research_fetch_slot(url: str, timeout: float):
+    """Yield the socket timeout to use for ``url``; a no-op outside ``research_fetch_scope``."""
+    scope = getattr(_fetch_context, "scope", None)
+    if scope is None:
+        yield timeout
+        return
+    limiter, deadline = scope
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise ResearchBudgetExceeded("research time budget exhausted")
+    semaphore = limiter.slot(url)
+    if not semaphore.acquire(timeout=remaining):
+        raise ResearchBudgetExceeded("research time budget exhausted waiting for host")
+    try:
+        yield min(timeout, max(0.1, deadline - time.monotonic()))
+    finally:
+        semaphore.release()
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+
+from leadbrain.services.fetch_limits import research_fetch_slot
+
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_ROBOTS = "robots"
+RESOURCE_SITEMAP = "sitemap"
+RESOURCE_SEARCH = "search"
+RESOURCE_PAGE = "page"
+
+DEFAULT_TTL_SECONDS = {
+    RESOURCE_ROBOTS: 7 * 24 * 3600,
+    RESOURCE_SITEMAP: 3 * 24 * 3600,
+    RESOURCE_SEARCH: 6 * 3600,
+    RESOURCE_PAGE: 24 * 3600,
+}
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+SEARCH_HOSTS = ("duckduckgo.com",)
+# Eviction trims the cache to this share of the cap so it is not re-run on every write.
+EVICTION_TARGET_RATIO = 0.9
+
+
+def normalize_cache_url(url: str) -> str:
+    parts = urlsplit((url or "").strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def resource_type(url: str) -> str:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    path = parts.path.lower()
+    if any(host == search_host or host.endswith(f".{search_host}") for search_host in SEARCH_HOSTS):
+        return RESOURCE_SEARCH
+    if path.endswith("/robots.txt"):
+        return RESOURCE_ROBOTS
+    if "sitemap" in path and path.endswith(".xml"):
+        return RESOURCE_SITEMAP
+    return RESOURCE_PAGE
+
+
+class HttpResponseCache:
+    """On-disk response cache: bodies stored by content hash, one JSON entry per normalized URL."""
+
+    def __init__(self, root, *, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttls = {**DEFAULT_TTL_SECONDS, **(ttls or {})}
+        self.entries_dir = self.root / "entries"
+        self.bodies_dir = self.root / "bodies"
+        self._lock = threading.Lock()
+        self._size = None
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def _entry_path(self, key_url):
+        digest = hashlib.sha256(key_url.encode("utf-8")).hexdigest()
+        return self.entries_dir / digest[:2] / f"{digest}.json"
+
+    def _body_path(self, body_hash):
+        return self.bodies_dir / body_hash[:2] / body_hash
+
+    def _write_atomic(self, path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_name, path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def lookup(self, url: str):
+        path = self._entry_path(normalize_cache_url(url))
+        try:
+            entry = json.loads(path.read_text("utf-8"))
+            body = self._body_path(entry["body_hash"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            # Entry mtime doubles as the last-access time for LRU eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        entry["body"] = body
+        return entry
+
+    def store(self, url: str, *, final_url, status_code, content_type, body: bytes, etag="", last_modified="", truncated=False):
+        key_url = normalize_cache_url(url)
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(body_hash)
+        added = 0
+        if not body_path.exists():
+            self._write_atomic(body_path, body)
+            added += len(body)
+        now = time.time()
+        entry = {
+            "url": key_url,
+            "final_url": final_url,
+            "status_code": status_code,
+            "content_type": content_type,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "truncated": truncated,
+            "fetched_at": now,
+            "expires_at": now + self.ttls[resource_type(key_url)],
+        }
+        payload = json.dumps(entry).encode("utf-8")
+        self._write_atomic(self._entry_path(key_url), payload)
+        self._count("stores")
+        self._grow(added + len(payload))
+
+    def refresh(self, url: str, entry: dict):
+        key_url = normalize_cache_url(url)
+        now = time.time()
+        entry = {key: value for key, value in entry.items() if key != "body"}
+        entry["fetched_at"] = now
+        entry["expires_at"] = now + self.ttls[resource_type(key_url)]
+        self._write_atomic(self._entry_path(key_url), json.dumps(entry).encode("utf-8"))
+
+    def _disk_usage(self):
+        total = 0
+        for directory in (self.entries_dir, self.bodies_dir):
+            if directory.exists():
+                total += sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+        return total
+
+    def _grow(self, added):
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += added
+            over_cap = self.max_bytes and self._size > self.max_bytes
+        if over_cap:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache is under its size cap."""
+        with self._lock:
+            entries = []
+            references = {}
+            if self.entries_dir.exists():
+                for path in self.entries_dir.rglob("*.json"):
+                    try:
+                        body_hash = json.loads(path.read_text("utf-8"))["body_hash"]
+                        entries.append((path.stat().st_mtime, path, body_hash))
+                    except (OSError, ValueError, KeyError):
+                        continue
+                    references[body_hash] = references.get(body_hash, 0) + 1
+            entries.sort()
+            total = self._disk_usage()
+            target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+            evicted = 0
+            while entries and total > target:
+                _mtime, path, body_hash = entries.pop(0)
+                try:
+                    total -= path.stat().st_size
+                    path.unlink()
+                except OSError:
+                    continue
+                evicted += 1
+                references[body_hash] -= 1
+                if not references[body_hash]:
+                    body_path = self._body_path(body_hash)
+                    try:
+                        total -= body_path.stat().st_size
+                        body_path.unlink()
+                    except OSError:
+                        pass
+            self._size = total
+            self.counters["evictions"] += evicted
+        return evicted
+
+    def fetch(self, url, *, headers, timeout, max_bytes, context_factory):
+        """Return ``{"url", "status_code", "content_type", "text"}`` from cache or the network."""
+        entry = self.lookup(url)
+        usable = entry is not None and not (entry.get("truncated") and len(entry["body"]) < max_bytes)
+        if usable and entry["expires_at"] > time.time():
+            self._count("hits")
+            return _response_from_entry(entry, max_bytes)
+
+        request_headers = dict(headers)
+        if usable:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        request = Request(url, headers=request_headers)
+        try:
+            with research_fetch_slot(url, timeout) as timeout, urlopen(
+                request, timeout=timeout, context=context_factory()
+            ) as response:
+                raw = response.read(max_bytes + 1)
+                final_url = response.geturl()
+                status_code = getattr(response, "status", 200)
+                content_type = response.headers.get("Content-Type", "")
+                etag = response.headers.get("ETag", "")
+                last_modified = response.headers.get("Last-Modified", "")
+        except HTTPError as exc:
+            if exc.code == 304 and usable:
+                self._count("revalidated")
+                self.refresh(url, entry)
+                return _response_from_entry(entry, max_bytes)
+            raise
+
+        self._count("misses")
+        truncated = len(raw) > max_bytes
+        raw = raw[:max_bytes]
+        try:
+            self.store(
+                url,
+                final_url=final_url,
+                status_code=status_code,
+                content_type=content_type,
+                body=raw,
+                etag=etag,
+                last_modified=last_modified,
+                truncated=truncated,
+            )
+        except OSError:
+            logger.warning("leadbrain http cache write failed for %s", url, exc_info=True)
+        return {
+            "url": final_url,
+            "status_code": status_code,
+            "content_type": content_type,
+            "text": raw.decode("utf-8", errors="ignore"),
+        }
+
+
+def _response_from_entry(entry, max_bytes):
+    return {
+        "url": entry["final_url"],
+        "status_code": entry["status_code"],
+        "content_type": entry["content_type"],
+        "text": entry["body"][:max_bytes].decode("utf-8", errors="ignore"),
+    }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_http_cache():
+    """The configured cache, or ``None`` when LEADBRAIN_HTTP_CACHE_ENABLED is off."""
+    if not getattr(settings, "LEADBRAIN_HTTP_CACHE_ENABLED", True):
+        return None
+    root = str(getattr(settings, "LEADBRAIN_HTTP_CACHE_DIR", "") or Path(settings.BASE_DIR) / "var" / "leadbrain_http_cache")
+    max_bytes = int(getattr(settings, "LEADBRAIN_HTTP_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    ttls = getattr(settings, "LEADBRAIN_HTTP_CACHE_TTLS", None) or {}
+    key = (root, max_bytes, tuple(sorted(ttls.items())))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = HttpResponseCache(root, max_bytes=max_bytes, ttls=ttls)
+        return cache
+
+
+def cached_http_get(url, *, headers, timeout, max_bytes, context_factory):
+    cache = get_http_cache()
+    if cache is not None:
+        return cache.fetch(url, headers=headers, timeout=timeout, max_bytes=max_bytes, context_factory=context_factory)
+    request = Request(url, headers=headers)
+    with research_fetch_slot(url, timeout) as timeout, urlopen(request, timeout=timeout, context=context_factory()) as response:
+        raw = response.read(max_bytes)
+        return {
+            "url": response.geturl(),
+            "status_code": getattr(response, "status", 200),
+            "content_type": response.headers.get("Content-Type", ""),
+            "text": raw.decode("utf-8", errors="ignore"),
+        }
+
+
+def http_cache_stats() -> dict:
+    """This process's cache counters since it started; empty when the cache is off."""
+    cache = get_http_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def http_cache_summary() -> str:
+    """One-line counter summary for worker output and logs."""
+    stats = http_cache_stats()
+    if not stats:
+        return "HTTP cache disabled"
+    lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+    hit_rate = f"{(stats['hits'] + stats['revalidated']) * 100 / lookups:.0f}%" if lookups else "n/a"
+    return (
+        f"HTTP cache: {stats['hits']} hit(s), {stats['revalidated']} revalidated, {stats['misses']} miss(es) "
+        f"({hit_rate} served from cache), {stats['stores']} stored, {stats['evictions']} evicted"
+    )
@@ -1,6 +1,6 @@
 from django.db.models import Q
-from django.db.models.functions import Lower
 
+from crm.services.identity_keys import company_name_key, email_key, website_key
 from leadbrain.models import LeadBrainCompany
 
 
@@ -8,6 +8,15 @@ def _key_text(value) -> str:
     return str(value or "").strip().lower()
 
 
+def _row_keys(row) -> tuple[str, str, str]:
+    """Normalized ``(company_name, website, email)`` keys, matching the persisted LeadBrainCompany keys."""
+    return (
+        company_name_key(row.get("company_name", "")),
+        website_key(row.get("website", "")),
+        email_key(row.get("email", "")),
+    )
+
+
 def _row_identity(company_name: str, website: str, email: str) -> set[str]:
     keys = set()
     if website:
@@ -22,8 +31,9 @@ def _row_identity(company_name: str, website: str, email: str) -> set[str]:
 
 
 def _existing_identity_maps(rows):
-    websites = {_key_text(row.get("website", "")) for row in rows if _key_text(row.get("website", ""))}
-    emails = {_key_text(row.get("email", "")) for row in rows if _key_text(row.get("email", ""))}
+    row_keys = [_row_keys(row) for row in rows]
+    websites = {website for _name, website, _email in row_keys if website}
+    emails = {email for _name, _website, email in row_keys if email}
 
     if not (websites or emails):
         return {
@@ -33,13 +43,7 @@ def _existing_identity_maps(rows):
             "name_email": {},
         }
 
-    queryset = LeadBrainCompany.objects.annotate(
-        company_name_key=Lower("company_name"),
-        website_key=Lower("website"),
-        email_key=Lower("email"),
-    ).filter(
-        Q(website_key__in=websites) | Q(email_key__in=emails)
-    )
+    queryset = LeadBrainCompany.objects.filter(Q(website_key__in=websites) | Q(email_key__in=emails)).order_by("id")
 
     maps = {
         "website": {},
@@ -73,9 +77,7 @@ def _invalid_row_reason(row) -> str:
 
 
 def _match_duplicate_reason(row, *, existing_maps, seen_maps):
-    company_name = _key_text(row.get("company_name", ""))
-    website = _key_text(row.get("website", ""))
-    email = _key_text(row.get("email", ""))
+    company_name, website, email = _row_keys(row)
 
     if website and website in existing_maps["website"]:
         return {
@@ -129,9 +131,7 @@ def _match_duplicate_reason(row, *, existing_maps, seen_maps):
 
 
 def _remember_row_identity(row, seen_maps):
-    company_name = _key_text(row.get("company_name", ""))
-    website = _key_text(row.get("website", ""))
-    email = _key_text(row.get("email", ""))
+    company_name, website, email = _row_keys(row)
     if website:
         seen_maps["website"][website] = row
     if email:
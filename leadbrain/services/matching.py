@@ -1,48 +1,92 @@
 from django.db.models import Q
 
 from crm.models import Lead
+from crm.services.identity_keys import email_key as _email_key
+from crm.services.identity_keys import website_key as _website_key
+from leadbrain.models import LeadBrainCompany
 
 
-def _text(value):
-    if value is None:
-        return ""
-    return str(value).strip()
+RULE_WEBSITE = "website exact match"
+RULE_EMAIL = "email exact match"
 
 
-def _norm_text(value):
-    return _text(value).lower()
+def _candidate_keys(candidates):
+    keys = [(_website_key(item.get("website", "")), _email_key(item.get("email", ""))) for item in candidates]
+    websites = {website for website, _email in keys if website}
+    emails = {email for _website, email in keys if email}
+    return keys, websites, emails
 
 
-def _website_key(value):
-    website = _norm_text(value)
-    if not website:
-        return ""
-    for prefix in ("https://", "http://"):
-        if website.startswith(prefix):
-            website = website[len(prefix) :]
-            break
-    if website.startswith("www."):
-        website = website[4:]
-    return website.rstrip("/")
+def _index_records(queryset, *, website_fields, websites, emails):
+    """Resolve a whole batch with one ``IN`` query; returns lowest-id records per website/email key."""
+    filters = Q()
+    if websites:
+        for field in website_fields:
+            filters |= Q(**{f"{field}__in": websites})
+    if emails:
+        filters |= Q(email_key__in=emails)
+    by_website = {}
+    by_email = {}
+    if not filters:
+        return by_website, by_email
+    for record in queryset.filter(filters).order_by("id"):
+        for field in website_fields:
+            key = getattr(record, field)
+            if key in websites:
+                by_website.setdefault(key, record)
+        if record.email_key in emails:
+            by_email.setdefault(record.email_key, record)
+    return by_website, by_email
 
 
-def find_matching_lead(*, website="", email="", exclude_lead_id=None):
+def find_matching_leads(candidates, *, exclude_lead_id=None):
+    """Match ``[{"website": ..., "email": ...}]`` against leads; returns ``[(lead, rule)]`` in order."""
+    keys, websites, emails = _candidate_keys(candidates)
     queryset = Lead.objects.all()
     if exclude_lead_id:
         queryset = queryset.exclude(pk=exclude_lead_id)
+    by_website, by_email = _index_records(
+        queryset,
+        website_fields=("website_key", "company_website_key"),
+        websites=websites,
+        emails=emails,
+    )
+    matches = []
+    for website, email in keys:
+        if email and email in by_email:
+            matches.append((by_email[email], RULE_EMAIL))
+        elif website and website in by_website:
+            matches.append((by_website[website], RULE_WEBSITE))
+        else:
+            matches.append((None, ""))
+    return matches
+
+
+def find_matching_lead(*, website="", email="", exclude_lead_id=None):
+    return find_matching_leads([{"website": website, "email": email}], exclude_lead_id=exclude_lead_id)[0]
+
+
+def find_matching_companies(candidates):
+    """Match candidates against active Lead Brain companies; the oldest matching record wins."""
+    keys, websites, emails = _candidate_keys(candidates)
+    by_website, by_email = _index_records(
+        LeadBrainCompany.objects.filter(is_active=True),
+        website_fields=("website_key",),
+        websites=websites,
+        emails=emails,
+    )
+    matches = []
+    for website, email in keys:
+        website_match = by_website.get(website) if website else None
+        email_match = by_email.get(email) if email else None
+        if website_match and (not email_match or website_match.pk <= email_match.pk):
+            matches.append((website_match, RULE_WEBSITE))
+        elif email_match:
+            matches.append((email_match, RULE_EMAIL))
+        else:
+            matches.append((None, ""))
+    return matches
+
 
-    email_key = _norm_text(email)
-    if email_key:
-        record = queryset.filter(email__iexact=email_key).order_by("id").first()
-        if record:
-            return record, "email exact match"
-
-    website_key = _website_key(website)
-    if website_key:
-        record = queryset.filter(
-            Q(website__icontains=website_key) | Q(company_website__icontains=website_key)
-        ).order_by("id").first()
-        if record:
-            return record, "website exact match"
-
-    return None, ""
+def find_matching_company(*, website="", email=""):
+    return find_matching_companies([{"website": website, "email": email}])[0]
@@ -1,19 +1,23 @@
 import logging
+from collections import Counter
 from uuid import uuid4
 from datetime import timedelta
 
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
 
 from leadbrain.models import LeadBrainCompany, LeadBrainUpload, LeadBrainWorker
+from leadbrain.services.background_runner import queue_processing_batches
 from leadbrain.services.classification_service import classify_company
+from leadbrain.services.research_pool import research_companies
 from leadbrain.services.research_service import research_company
 
 
 logger = logging.getLogger(__name__)
 STALE_PROCESSING_MINUTES = 30
 CLAIM_ATTEMPTS = 3
+COUNTER_FIELDS = ["total_rows", "pending_rows", "processing_rows", "completed_rows", "failed_rows"]
 
 
 def truncate_url(value: str) -> str:
@@ -67,37 +71,37 @@ def mark_stale_batch_rows_pending(upload: LeadBrainUpload) -> None:
         research_status=LeadBrainCompany.STATUS_PROCESSING,
     ).filter(Q(research_claimed_at__lt=stale_cutoff) | Q(research_claimed_at__isnull=True, updated_at__lt=stale_cutoff))
     if stale_rows.exists():
-        stale_rows.update(
+        released = stale_rows.update(
             research_status=LeadBrainCompany.STATUS_PENDING,
             research_claim_token="",
             research_claimed_at=None,
             research_error="Research was restarted after an interrupted batch.",
         )
+        upload.shift_progress({(LeadBrainCompany.STATUS_PROCESSING, LeadBrainCompany.STATUS_PENDING): released})
 
 
-def select_batch_ids(upload: LeadBrainUpload, batch_size: int) -> list[int]:
+def select_batch_rows(upload: LeadBrainUpload, batch_size: int) -> dict[int, str]:
+    """Next rows to research as ``{id: research_status}``, in row order."""
     mark_stale_batch_rows_pending(upload)
     if upload.status == LeadBrainUpload.STATUS_CANCELLED:
-        return []
-    return list(
+        return {}
+    return dict(
         upload.companies.filter(
             research_status__in=[LeadBrainCompany.STATUS_PENDING, LeadBrainCompany.STATUS_FAILED]
         )
         .order_by("row_number", "id")
-        .values_list("id", flat=True)[:batch_size]
+        .values_list("id", "research_status")[:batch_size]
     )
 
 
 def claim_batch(upload: LeadBrainUpload, batch_size: int, worker: LeadBrainWorker | None = None) -> list[int]:
     if upload.status == LeadBrainUpload.STATUS_CANCELLED:
-        upload.refresh_progress()
         update_upload_note(upload)
         update_worker_heartbeat(worker, status=LeadBrainWorker.STATUS_IDLE, current_upload=None)
         return []
     for _attempt in range(CLAIM_ATTEMPTS):
-        batch_ids = select_batch_ids(upload, batch_size)
-        if not batch_ids:
-            upload.refresh_progress()
+        batch_rows = select_batch_rows(upload, batch_size)
+        if not batch_rows:
             update_upload_note(upload)
             update_worker_heartbeat(worker, status=LeadBrainWorker.STATUS_IDLE, current_upload=None)
             return []
@@ -106,7 +110,7 @@ def claim_batch(upload: LeadBrainUpload, batch_size: int, worker: LeadBrainWorke
         claimed_at = timezone.now()
         with transaction.atomic():
             LeadBrainCompany.objects.filter(
-                id__in=batch_ids,
+                id__in=list(batch_rows),
                 research_status__in=[LeadBrainCompany.STATUS_PENDING, LeadBrainCompany.STATUS_FAILED],
             ).update(
                 research_status=LeadBrainCompany.STATUS_PROCESSING,
@@ -121,7 +125,9 @@ def claim_batch(upload: LeadBrainUpload, batch_size: int, worker: LeadBrainWorke
             .values_list("id", flat=True)
         )
         if claimed_ids:
-            upload.refresh_progress()
+            upload.shift_progress(
+                Counter((batch_rows[company_id], LeadBrainCompany.STATUS_PROCESSING) for company_id in claimed_ids)
+            )
             update_upload_note(upload)
             update_worker_heartbeat(
                 worker,
@@ -131,66 +137,117 @@ def claim_batch(upload: LeadBrainUpload, batch_size: int, worker: LeadBrainWorke
             )
             return claimed_ids
 
-    upload.refresh_progress()
     update_upload_note(upload)
     update_worker_heartbeat(worker, status=LeadBrainWorker.STATUS_IDLE, current_upload=None)
     return []
 
 
+RESEARCH_RESULT_FIELDS = [
+    "website",
+    "email",
+    "phone",
+    "linkedin_url",
+    "best_contact_name",
+    "best_contact_title",
+    "business_type",
+    "fit_label",
+    "fit_score",
+    "ai_summary",
+    "fit_reason",
+    "suggested_action",
+    "research_json",
+    "research_status",
+    "research_claim_token",
+    "research_claimed_at",
+    "research_error",
+    "processed_at",
+    "updated_at",
+    *LeadBrainCompany.IDENTITY_KEY_FIELDS,
+]
+
+
+def apply_research_result(company: LeadBrainCompany, research_data: dict) -> None:
+    classification = classify_company(company, research_data)
+
+    company.website = truncate_url(company.website or research_data.get("official_website_found", ""))
+    company.email = company.email or research_data.get("public_email_found", "")
+    company.phone = company.phone or research_data.get("public_phone_found", "")
+    company.linkedin_url = truncate_url(research_data.get("linkedin_url_found", ""))
+    company.best_contact_name = research_data.get("possible_contact_name", "")
+    company.best_contact_title = classification.get("best_contact_title", "")
+    company.business_type = classification.get("business_type", "")
+    company.fit_label = classification.get("fit_label", "")
+    company.fit_score = classification.get("fit_score", 0)
+    company.ai_summary = classification.get("ai_summary", "")
+    company.fit_reason = classification.get("fit_reason", "")
+    company.suggested_action = classification.get("suggested_action", "")
+    company.research_json = research_data
+    company.research_status = LeadBrainCompany.STATUS_COMPLETE
+    company.research_claim_token = ""
+    company.research_claimed_at = None
+    company.research_error = ""
+    company.processed_at = timezone.now()
+    company.sync_identity_keys()
+
+
+def apply_research_failure(company: LeadBrainCompany, exc: Exception) -> None:
+    company.research_status = LeadBrainCompany.STATUS_FAILED
+    company.research_claim_token = ""
+    company.research_claimed_at = None
+    company.research_error = str(exc)[:2000]
+    company.processed_at = timezone.now()
+    company.fit_label = ""
+    company.fit_score = 0
+    company.ai_summary = "Research could not be completed for this row."
+    company.fit_reason = "Partial data was saved, but the row needs manual review."
+    company.suggested_action = "Run Research"
+    company.research_json = {
+        "website_status": "failed",
+        "official_website_found": "",
+        "linkedin_url_found": "",
+        "public_email_found": "",
+        "public_phone_found": "",
+        "business_description": "",
+        "apparel_signals": [],
+        "search_summary": "",
+        "possible_contact_name": "",
+        "possible_contact_title": "",
+        "confidence_notes": f"Row processing error: {exc}",
+    }
+
+
 def process_company(company: LeadBrainCompany) -> bool:
     try:
-        research_data = research_company(company)
-        classification = classify_company(company, research_data)
-
-        company.website = truncate_url(company.website or research_data.get("official_website_found", ""))
-        company.email = company.email or research_data.get("public_email_found", "")
-        company.phone = company.phone or research_data.get("public_phone_found", "")
-        company.linkedin_url = truncate_url(research_data.get("linkedin_url_found", ""))
-        company.best_contact_name = research_data.get("possible_contact_name", "")
-        company.best_contact_title = classification.get("best_contact_title", "")
-        company.business_type = classification.get("business_type", "")
-        company.fit_label = classification.get("fit_label", "")
-        company.fit_score = classification.get("fit_score", 0)
-        company.ai_summary = classification.get("ai_summary", "")
-        company.fit_reason = classification.get("fit_reason", "")
-        company.suggested_action = classification.get("suggested_action", "")
-        company.research_json = research_data
-        company.research_status = LeadBrainCompany.STATUS_COMPLETE
-        company.research_claim_token = ""
-        company.research_claimed_at = None
-        company.research_error = ""
-        company.processed_at = timezone.now()
+        apply_research_result(company, research_company(company))
         company.save()
         return True
     except Exception as exc:
         logger.exception("leadbrain research failed for company %s", company.pk)
-        company.research_status = LeadBrainCompany.STATUS_FAILED
-        company.research_claim_token = ""
-        company.research_claimed_at = None
-        company.research_error = str(exc)[:2000]
-        company.processed_at = timezone.now()
-        company.fit_label = ""
-        company.fit_score = 0
-        company.ai_summary = "Research could not be completed for this row."
-        company.fit_reason = "Partial data was saved, but the row needs manual review."
-        company.suggested_action = "Run Research"
-        company.research_json = {
-            "website_status": "failed",
-            "official_website_found": "",
-            "linkedin_url_found": "",
-            "public_email_found": "",
-            "public_phone_found": "",
-            "business_description": "",
-            "apparel_signals": [],
-            "search_summary": "",
-            "possible_contact_name": "",
-            "possible_contact_title": "",
-            "confidence_notes": f"Row processing error: {exc}",
-        }
+        apply_research_failure(company, exc)
         company.save()
         return False
 
 
+def process_companies(companies: list[LeadBrainCompany]) -> int:
+    """Research ``companies`` concurrently and write every row back with one bulk update."""
+    results = research_companies(companies)
+    processed_at = timezone.now()
+    for company in companies:
+        research_data, error = results[company.pk]
+        if error is None:
+            try:
+                apply_research_result(company, research_data)
+            except Exception as exc:
+                logger.exception("leadbrain classification failed for company %s", company.pk)
+                error = exc
+        if error is not None:
+            apply_research_failure(company, error)
+        company.processed_at = processed_at
+        company.updated_at = processed_at
+    LeadBrainCompany.objects.bulk_update(companies, RESEARCH_RESULT_FIELDS, batch_size=500)
+    return len(companies)
+
+
 def process_upload_batch(
     upload: LeadBrainUpload,
     *,
@@ -198,19 +255,18 @@ def process_upload_batch(
     worker: LeadBrainWorker | None = None,
 ) -> int:
     if upload.status == LeadBrainUpload.STATUS_CANCELLED:
-        upload.refresh_progress()
         update_upload_note(upload)
         return 0
     batch_ids = claim_batch(upload, batch_size, worker=worker)
     if not batch_ids:
         return 0
 
-    processed_rows = 0
-    for company in LeadBrainCompany.objects.filter(id__in=batch_ids).order_by("row_number", "id"):
-        process_company(company)
-        processed_rows += 1
+    companies = list(LeadBrainCompany.objects.filter(id__in=batch_ids).order_by("row_number", "id"))
+    previous_statuses = [company.research_status for company in companies]
+    processed_rows = process_companies(companies)
 
-    upload.refresh_progress()
+    moves = Counter(zip(previous_statuses, (company.research_status for company in companies)))
+    upload.shift_progress(moves)
     update_upload_note(upload)
     if worker:
         update_worker_heartbeat(
@@ -223,6 +279,60 @@ def process_upload_batch(
     return processed_rows
 
 
+def reconcile_upload_progress() -> dict:
+    """
+    Recount the research rows of processing uploads and fix any whose stored
+    counters have drifted, e.g. after a worker died between a row update and
+    its counter update. Discovery uploads track candidates, not rows, and are
+    left alone.
+
+    The batch chain stops once the counters show nothing left to research, so
+    an upload whose corrected counters show pending rows again is re-queued.
+    """
+    uploads = {
+        upload.pk: upload
+        for upload in LeadBrainUpload.objects.filter(
+            status=LeadBrainUpload.STATUS_PROCESSING,
+            discovery_runs__isnull=True,
+        )
+    }
+    counts = {
+        row["upload_id"]: row
+        for row in LeadBrainCompany.objects.filter(upload_id__in=uploads)
+        .values("upload_id")
+        .annotate(
+            total_rows=Count("id"),
+            pending_rows=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_PENDING)),
+            processing_rows=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_PROCESSING)),
+            completed_rows=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_COMPLETE)),
+            failed_rows=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_FAILED)),
+        )
+        .order_by()
+    }
+    fixed = []
+    requeued = []
+    for upload_id, upload in uploads.items():
+        actual = counts.get(upload_id)
+        if actual is None:
+            continue
+        if all(getattr(upload, field) == actual[field] for field in COUNTER_FIELDS):
+            continue
+        chain_stopped = not (upload.pending_rows or upload.failed_rows)
+        upload.refresh_progress()
+        update_upload_note(upload)
+        fixed.append(upload_id)
+        if (
+            chain_stopped
+            and (upload.pending_rows or upload.failed_rows)
+            and upload.status not in [LeadBrainUpload.STATUS_FAILED, LeadBrainUpload.STATUS_CANCELLED]
+        ):
+            queue_processing_batches(upload_id)
+            requeued.append(upload_id)
+    if fixed:
+        logger.info("leadbrain upload progress reconciled for uploads %s; re-queued %s", fixed, requeued)
+    return {"checked": len(uploads), "fixed": fixed, "requeued": requeued}
+
+
 def select_next_upload(upload_id: int | None = None) -> LeadBrainUpload | None:
     uploads = candidate_upload_queryset()
     if upload_id:
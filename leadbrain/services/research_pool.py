@@ -0,0 +1,61 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from leadbrain.services.fetch_limits import HostLimiter, research_fetch_scope
+from leadbrain.services.research_service import research_company
+
+
+logger = logging.getLogger(__name__)
+DEFAULT_RESEARCH_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 2
+DEFAULT_COMPANY_TIMEOUT_SECONDS = 20
+
+
+def research_pool_settings() -> dict:
+    return {
+        "max_workers": max(1, int(getattr(settings, "LEADBRAIN_RESEARCH_WORKERS", DEFAULT_RESEARCH_WORKERS))),
+        "per_host_limit": max(1, int(getattr(settings, "LEADBRAIN_RESEARCH_PER_HOST_LIMIT", DEFAULT_PER_HOST_LIMIT))),
+        "company_timeout": max(
+            1.0,
+            float(getattr(settings, "LEADBRAIN_RESEARCH_COMPANY_TIMEOUT", DEFAULT_COMPANY_TIMEOUT_SECONDS)),
+        ),
+    }
+
+
+def research_companies(
+    companies,
+    *,
+    research=None,
+    max_workers: int | None = None,
+    per_host_limit: int | None = None,
+    company_timeout: float | None = None,
+) -> dict:
+    """Research ``companies`` in parallel; returns ``{company.pk: (research_data, error)}``.
+
+    Workers only read the already-loaded company rows and make HTTP requests, so
+    no database connection is opened from the pool threads.
+    """
+    companies = list(companies)
+    if not companies:
+        return {}
+    research = research or research_company
+    config = research_pool_settings()
+    max_workers = max(1, min(max_workers or config["max_workers"], len(companies)))
+    limiter = HostLimiter(per_host_limit or config["per_host_limit"])
+    company_timeout = company_timeout or config["company_timeout"]
+
+    def run(company):
+        try:
+            with research_fetch_scope(limiter, timeout_seconds=company_timeout):
+                return research(company), None
+        except Exception as exc:
+            logger.exception("leadbrain research failed for company %s", company.pk)
+            return None, exc
+
+    if max_workers == 1:
+        return {company.pk: run(company) for company in companies}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="leadbrain-research") as executor:
+        results = executor.map(run, companies)
+        return {company.pk: result for company, result in zip(companies, results)}
@@ -4,8 +4,8 @@ import re
 import ssl
 from urllib.error import HTTPError, URLError
 from urllib.parse import parse_qs, quote, unquote, urlparse
-from urllib.request import Request, urlopen
 
+from leadbrain.services.http_cache import cached_http_get
 from leadbrain.services.shopify_directory import SHOPIFY_DIRECTORY_SOURCE, enrich_shopify_research
 
 try:
@@ -69,24 +69,16 @@ def _normalize_url(url):
 
 
 def _http_get(url, timeout=WEBSITE_TIMEOUT):
-    request = Request(
+    return cached_http_get(
         url,
         headers={
             "User-Agent": USER_AGENT,
             "Accept-Language": "en-US,en;q=0.9",
         },
+        timeout=timeout,
+        max_bytes=MAX_RESPONSE_BYTES,
+        context_factory=_ssl_context,
     )
-    context = _ssl_context()
-    with urlopen(request, timeout=timeout, context=context) as response:
-        raw = response.read(MAX_RESPONSE_BYTES)
-        content_type = response.headers.get("Content-Type", "")
-        text = raw.decode("utf-8", errors="ignore")
-        return {
-            "url": response.geturl(),
-            "status_code": getattr(response, "status", 200),
-            "content_type": content_type,
-            "text": text,
-        }
 
 
 def _safe_http_get(url, timeout=WEBSITE_TIMEOUT):
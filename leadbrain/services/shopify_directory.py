@@ -3,9 +3,10 @@ import re
 import ssl
 from urllib.error import HTTPError, URLError
 from urllib.parse import quote, unquote, urljoin, urlparse
-from urllib.request import Request, urlopen
 from urllib.robotparser import RobotFileParser
 
+from leadbrain.services.http_cache import cached_http_get
+
 try:
     import certifi
 except Exception:  # pragma: no cover - optional dependency fallback
@@ -303,22 +304,21 @@ def enrich_shopify_research(*, website: str, homepage_html: str = "", homepage_s
 
 
 def _http_get(url, timeout=REQUEST_TIMEOUT):
-    request = Request(
+    response = cached_http_get(
         url,
         headers={
             "User-Agent": USER_AGENT,
             "Accept-Language": "en-US,en;q=0.9",
         },
+        timeout=timeout,
+        max_bytes=MAX_RESPONSE_BYTES,
+        context_factory=_ssl_context,
     )
-    context = _ssl_context()
-    with urlopen(request, timeout=timeout, context=context) as response:
-        raw = response.read(MAX_RESPONSE_BYTES)
-        text = raw.decode("utf-8", errors="ignore")
-        return {
-            "url": response.geturl(),
-            "status_code": getattr(response, "status", 200),
-            "text": text,
-        }
+    return {
+        "url": response["url"],
+        "status_code": response["status_code"],
+        "text": response["text"],
+    }
 
 
 def _safe_http_get(url, timeout=REQUEST_TIMEOUT):
@@ -15,8 +15,9 @@ from leadbrain.services.discovery_service import (
     schedule_due_discovery_runs,
 )
 from leadbrain.services.file_parser import parse_uploaded_file_report
+from leadbrain.services.http_cache import http_cache_summary
 from leadbrain.services.import_service import prepare_import_rows
-from leadbrain.services.processing_service import process_upload_batch, update_upload_note
+from leadbrain.services.processing_service import process_upload_batch, reconcile_upload_progress, update_upload_note
 from leadbrain.services.upload_state import ACTIVE_UPLOAD_STATUSES, find_active_duplicate_upload
 
 
@@ -165,6 +166,8 @@ def parse_upload_job(self, upload_id: int):
                 )
                 for row in batch_rows
             ]
+            for company in companies:
+                company.sync_identity_keys()
             LeadBrainCompany.objects.bulk_create(companies, batch_size=batch_size)
 
         upload.row_count = imported_rows
@@ -262,14 +265,13 @@ def process_upload_batch_job(self, upload_id: int):
 
     batch_size = max(1, int(getattr(settings, "LEADBRAIN_PROCESS_BATCH_SIZE", 20)))
     processed_rows = process_upload_batch(upload, batch_size=batch_size)
+    logger.info("leadbrain upload %s batch processed %s row(s); %s", upload.pk, processed_rows, http_cache_summary())
     upload.refresh_from_db()
 
     if upload.status == LeadBrainUpload.STATUS_CANCELLED:
         return processed_rows
 
-    pending_exists = upload.companies.filter(
-        research_status__in=[LeadBrainCompany.STATUS_PENDING, LeadBrainCompany.STATUS_FAILED]
-    ).exists()
+    pending_exists = bool(upload.pending_rows or upload.failed_rows)
 
     if pending_exists and upload.status not in [LeadBrainUpload.STATUS_FAILED, LeadBrainUpload.STATUS_CANCELLED]:
         process_upload_batch_job.delay(upload.pk)
@@ -280,6 +282,15 @@ def process_upload_batch_job(self, upload_id: int):
     return processed_rows
 
 
+@shared_task(
+    bind=True,
+    queue="leadbrain",
+)
+def reconcile_upload_progress_task(self):
+    close_old_connections()
+    return reconcile_upload_progress()
+
+
 @shared_task(
     bind=True,
     autoretry_for=(OperationalError,),
@@ -339,6 +350,7 @@ def process_discovery_runs_task(self, run_id: int | None = None, batch_size: int
     close_old_connections()
     batch_size = max(1, int(batch_size or DISCOVERY_DEFAULT_BATCH_SIZE))
     processed = process_discovery_runs(limit=1, batch_size=batch_size, run_id=run_id)
+    logger.info("leadbrain discovery batch processed %s item(s); %s", processed, http_cache_summary())
 
     if run_id:
         run = LeadBrainDiscoveryRun.objects.filter(pk=run_id).first()
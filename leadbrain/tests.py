@@ -6,7 +6,9 @@ from unittest.mock import patch
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
+from django.db import connection
 from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -34,7 +36,7 @@ from leadbrain.services.discovery_service import (
 from leadbrain.services.file_parser import parse_uploaded_file, parse_uploaded_file_report
 from leadbrain.services.import_service import prepare_import_rows
 from leadbrain.services.lead_export import create_lead_from_company
-from leadbrain.services.processing_service import claim_batch
+from leadbrain.services.processing_service import claim_batch, process_upload_batch, reconcile_upload_progress
 from leadbrain.services.research_service import research_company
 from leadbrain.services.upload_state import compute_uploaded_file_hash
 from leadbrain.views import UPLOAD_PREVIEW_SESSION_KEY
@@ -1265,6 +1267,97 @@ class LeadBrainUploadFlowTests(TestCase):
         self.assertTrue(all(status == LeadBrainCompany.STATUS_PROCESSING for status, _ in statuses))
         self.assertTrue(all(token for _, token in statuses))
 
+    def _pending_upload(self, file_name, rows):
+        upload = LeadBrainUpload.objects.create(
+            file=f"leadbrain/uploads/{file_name}",
+            file_name=file_name,
+            uploaded_by=self.user,
+            status=LeadBrainUpload.STATUS_PROCESSING,
+            row_count=rows,
+            total_rows=rows,
+            pending_rows=rows,
+        )
+        LeadBrainCompany.objects.bulk_create(
+            LeadBrainCompany(
+                upload=upload,
+                row_number=index,
+                company_name=f"Company {index}",
+                raw_row_json={"Company Name": f"Company {index}"},
+                research_status=LeadBrainCompany.STATUS_PENDING,
+            )
+            for index in range(1, rows + 1)
+        )
+        return upload
+
+    def test_claim_batch_moves_progress_counters_without_recounting_rows(self):
+        small = self._pending_upload("small.csv", 3)
+        large = self._pending_upload("large.csv", 60)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            claim_batch(small, batch_size=2)
+        with CaptureQueriesContext(connection) as large_queries:
+            claim_batch(large, batch_size=2)
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertFalse(any("COUNT(" in query["sql"] for query in large_queries.captured_queries))
+        large.refresh_from_db()
+        self.assertEqual(
+            (large.pending_rows, large.processing_rows, large.completed_rows, large.failed_rows, large.status),
+            (58, 2, 0, 0, LeadBrainUpload.STATUS_PROCESSING),
+        )
+
+    def test_process_upload_batch_counts_completed_and_failed_rows(self):
+        upload = self._pending_upload("finish.csv", 2)
+        first, second = upload.companies.order_by("row_number")
+        classification_payload = {
+            "business_type": "Brand",
+            "fit_label": LeadBrainCompany.FIT_GOOD,
+            "fit_score": 80,
+            "fit_reason": "Apparel brand.",
+            "ai_summary": "Good target.",
+            "suggested_action": "Good for Custom Pitch",
+            "best_contact_title": "Buyer",
+        }
+
+        with patch(
+            "leadbrain.services.processing_service.research_companies",
+            return_value={first.pk: ({"website_status": "live"}, None), second.pk: (None, ValueError("offline"))},
+        ), patch("leadbrain.services.processing_service.classify_company", return_value=classification_payload):
+            process_upload_batch(upload, batch_size=5)
+
+        upload.refresh_from_db()
+        self.assertEqual(
+            (upload.pending_rows, upload.processing_rows, upload.completed_rows, upload.failed_rows),
+            (0, 0, 1, 1),
+        )
+        self.assertEqual((upload.progress_percent, upload.status), (100, LeadBrainUpload.STATUS_PARTIAL))
+        self.assertEqual(upload.status_note, "Background research finished with some failed rows.")
+
+    def test_reconcile_upload_progress_fixes_drifted_counters_only(self):
+        drifted = self._pending_upload("drifted.csv", 2)
+        steady = self._pending_upload("steady.csv", 2)
+        drifted.companies.filter(row_number=1).update(research_status=LeadBrainCompany.STATUS_COMPLETE)
+
+        result = reconcile_upload_progress()
+
+        self.assertEqual(result, {"checked": 2, "fixed": [drifted.pk], "requeued": []})
+        drifted.refresh_from_db()
+        self.assertEqual((drifted.pending_rows, drifted.completed_rows, drifted.progress_percent), (1, 1, 50))
+        steady.refresh_from_db()
+        self.assertEqual(steady.pending_rows, 2)
+
+    def test_reconcile_upload_progress_requeues_a_stopped_upload_with_pending_rows(self):
+        stalled = self._pending_upload("stalled.csv", 2)
+        LeadBrainUpload.objects.filter(pk=stalled.pk).update(pending_rows=0, completed_rows=2)
+
+        with patch("leadbrain.tasks.process_upload_batch_job.delay") as delay:
+            result = reconcile_upload_progress()
+
+        self.assertEqual(result, {"checked": 1, "fixed": [stalled.pk], "requeued": [stalled.pk]})
+        delay.assert_called_once_with(stalled.pk)
+        stalled.refresh_from_db()
+        self.assertEqual(stalled.pending_rows, 2)
+
     def test_run_worker_command_processes_upload_and_tracks_worker(self):
         upload = LeadBrainUpload.objects.create(
             file="leadbrain/uploads/test.csv",
@@ -0,0 +1,132 @@
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from leadbrain.services.http_cache import (
+    RESOURCE_PAGE,
+    RESOURCE_ROBOTS,
+    RESOURCE_SEARCH,
+    RESOURCE_SITEMAP,
+    HttpResponseCache,
+    http_cache_summary,
+    normalize_cache_url,
+    resource_type,
+)
+from leadbrain.services.research_service import _http_get
+from leadbrain.services.shopify_directory import _http_get as shopify_http_get
+
+
+class _EtagHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match", "")))
+        etag = f'"{self.path}-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = f"<title>{self.path}</title>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+def _fetch(cache, url):
+    return cache.fetch(
+        url,
+        headers={"User-Agent": "test"},
+        timeout=2,
+        max_bytes=10000,
+        context_factory=lambda: None,
+    )
+
+
+class LeadBrainHttpCacheTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _EtagHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_urls_are_normalized_and_typed(self):
+        self.assertEqual(
+            normalize_cache_url("HTTPS://Example.COM:443/shop?b=2&a=1#top"),
+            "https://example.com/shop?a=1&b=2",
+        )
+        self.assertEqual(resource_type("https://example.com/robots.txt"), RESOURCE_ROBOTS)
+        self.assertEqual(resource_type("https://example.com/sitemap_products_1.xml"), RESOURCE_SITEMAP)
+        self.assertEqual(resource_type("https://html.duckduckgo.com/html/?q=brand"), RESOURCE_SEARCH)
+        self.assertEqual(resource_type("https://example.com/collections/all"), RESOURCE_PAGE)
+
+    def test_fresh_entries_are_served_without_network(self):
+        cache = HttpResponseCache(self.cache_dir.name)
+
+        first = _fetch(cache, f"{self.base_url}/home")
+        second = _fetch(cache, f"{self.base_url}/home#fragment")
+
+        self.assertEqual(first["text"], second["text"])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_expired_entries_are_revalidated_with_etag(self):
+        cache = HttpResponseCache(self.cache_dir.name, ttls={RESOURCE_PAGE: -1})
+
+        _fetch(cache, f"{self.base_url}/home")
+        revalidated = _fetch(cache, f"{self.base_url}/home")
+
+        self.assertEqual(revalidated["text"], "<title>/home</title>")
+        self.assertEqual(self.server.requests, [("/home", ""), ("/home", '"/home-v1"')])
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+    def test_size_cap_evicts_least_recently_used_entries(self):
+        cache = HttpResponseCache(self.cache_dir.name, max_bytes=1400)
+        for name in ("one", "two", "three"):
+            _fetch(cache, f"{self.base_url}/{name}")
+            time.sleep(0.01)
+        # Touch "one" so "two" becomes the least recently used entry.
+        _fetch(cache, f"{self.base_url}/one")
+        for name in ("four", "five", "six"):
+            _fetch(cache, f"{self.base_url}/{name}")
+            time.sleep(0.01)
+
+        self.assertGreater(cache.stats()["evictions"], 0)
+        self.assertIsNone(cache.lookup(f"{self.base_url}/two"))
+        self.assertIsNotNone(cache.lookup(f"{self.base_url}/six"))
+        remaining_bodies = {
+            json.loads(path.read_text())["body_hash"] for path in cache.entries_dir.rglob("*.json")
+        }
+        self.assertEqual({path.name for path in cache.bodies_dir.rglob("*") if path.is_file()}, remaining_bodies)
+
+    def test_research_and_shopify_fetchers_share_the_configured_cache(self):
+        with override_settings(LEADBRAIN_HTTP_CACHE_DIR=self.cache_dir.name):
+            _http_get(f"{self.base_url}/robots.txt")
+            response = shopify_http_get(f"{self.base_url}/robots.txt")
+            summary = http_cache_summary()
+
+        self.assertEqual(response["text"], "<title>/robots.txt</title>")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIn("1 hit(s)", summary)
+        self.assertIn("1 miss(es) (50% served from cache)", summary)
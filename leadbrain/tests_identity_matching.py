@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from crm.models import Lead
+from leadbrain.models import LeadBrainCompany, LeadBrainUpload
+from leadbrain.services.import_service import prepare_import_rows
+from leadbrain.services.matching import find_matching_companies, find_matching_lead, find_matching_leads
+
+
+class LeadBrainIdentityMatchingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("identity-user", password="pass")
+        cls.upload = LeadBrainUpload.objects.create(
+            file="leadbrain/uploads/identity.csv",
+            file_name="identity.csv",
+            uploaded_by=cls.user,
+            status=LeadBrainUpload.STATUS_COMPLETE,
+        )
+        cls.lead = Lead.objects.create(
+            account_brand="North Thread",
+            website="https://www.NorthThread.com/",
+            email="Buyer@NorthThread.com",
+        )
+        cls.company = LeadBrainCompany.objects.create(
+            upload=cls.upload,
+            row_number=1,
+            company_name="Harbor Knit",
+            website="http://harborknit.com",
+            email="hello@harborknit.com",
+        )
+
+    def test_save_persists_normalized_keys(self):
+        self.assertEqual(self.lead.website_key, "norththread.com")
+        self.assertEqual(self.lead.company_website_key, "norththread.com")
+        self.assertEqual(self.lead.email_key, "buyer@norththread.com")
+        self.assertEqual(self.company.website_key, "harborknit.com")
+        self.assertEqual(self.company.company_name_key, "harbor knit")
+
+        self.company.website = "https://www.harbor-knit.ca/"
+        self.company.save(update_fields=["website"])
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.website_key, "harbor-knit.ca")
+
+    def test_batch_lead_matching_uses_one_query(self):
+        with self.assertNumQueries(1):
+            matches = find_matching_leads(
+                [
+                    {"website": "norththread.com"},
+                    {"website": "unknown.example.com", "email": "BUYER@norththread.com"},
+                    {"website": "unknown.example.com"},
+                ]
+            )
+
+        self.assertEqual(matches[0], (self.lead, "website exact match"))
+        self.assertEqual(matches[1], (self.lead, "email exact match"))
+        self.assertEqual(matches[2], (None, ""))
+        self.assertEqual(find_matching_lead(website="norththread.com", exclude_lead_id=self.lead.pk), (None, ""))
+
+    def test_batch_company_matching_ignores_inactive_rows(self):
+        inactive = LeadBrainCompany.objects.create(
+            upload=self.upload,
+            row_number=2,
+            company_name="Old Mill",
+            website="https://oldmill.example.com",
+            is_active=False,
+        )
+
+        with self.assertNumQueries(1):
+            matches = find_matching_companies(
+                [{"website": "https://www.harborknit.com/"}, {"website": inactive.website}]
+            )
+
+        self.assertEqual(matches, [(self.company, "website exact match"), (None, "")])
+
+    def test_import_rows_match_existing_companies_by_normalized_website(self):
+        report = prepare_import_rows(
+            [
+                {"row_number": 1, "company_name": "Harbor Knit", "website": "https://www.harborknit.com/"},
+                {"row_number": 2, "company_name": "Fresh Brand", "website": "freshbrand.example.com"},
+            ]
+        )
+
+        self.assertEqual(report["imported_rows"], 1)
+        self.assertEqual(report["skipped_duplicate_rows"], 1)
+        self.assertEqual(report["rows"][0]["company_name"], "Fresh Brand")
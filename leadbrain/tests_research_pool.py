@@ -0,0 +1,174 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from leadbrain.models import LeadBrainCompany, LeadBrainUpload
+from leadbrain.services.processing_service import process_upload_batch
+from leadbrain.services.research_pool import research_companies
+from leadbrain.services.research_service import _safe_http_get
+
+
+class _StubSiteHandler(BaseHTTPRequestHandler):
+    delay_seconds = 0.2
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(self.delay_seconds)
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = (
+                f"<title>Stub {self.path}</title>"
+                "<meta name='description' content='Private label apparel and streetwear brand'>"
+                "<p>hello@stub-apparel.test</p>"
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up because its research budget ran out.
+            return
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        return
+
+
+class _StubSiteMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubSiteHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.in_flight = 0
+        cls.server.max_in_flight = 0
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        # Let requests abandoned by an earlier test finish before counting again.
+        deadline = time.monotonic() + 2
+        while self.server.in_flight and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.server.max_in_flight = 0
+
+
+class _Row:
+    def __init__(self, pk, website):
+        self.pk = pk
+        self.website = website
+
+
+@override_settings(LEADBRAIN_HTTP_CACHE_ENABLED=False)
+class LeadBrainResearchPoolTests(_StubSiteMixin, SimpleTestCase):
+    def test_pool_fetches_in_parallel_within_per_host_limit(self):
+        rows = [_Row(index, f"{self.base_url}/shop-{index}") for index in range(6)]
+
+        started = time.monotonic()
+        results = research_companies(
+            rows,
+            research=lambda row: _safe_http_get(row.website)[0]["status_code"],
+            max_workers=6,
+            per_host_limit=2,
+        )
+        elapsed = time.monotonic() - started
+
+        self.assertEqual({pk: result for pk, (result, _error) in results.items()}, {pk: 200 for pk in range(6)})
+        self.assertEqual(self.server.max_in_flight, 2)
+        # Six 0.2s requests, two at a time: about 0.6s instead of 1.2s sequentially.
+        self.assertLess(elapsed, 1.1)
+
+    def test_shared_company_budget_stops_remaining_fetches(self):
+        def research(row):
+            first, _ = _safe_http_get(f"{row.website}/a")
+            second, error = _safe_http_get(f"{row.website}/b")
+            return {"first": bool(first), "second": bool(second), "error": error}
+
+        started = time.monotonic()
+        results = research_companies([_Row(1, self.base_url)], research=research, company_timeout=0.3)
+        elapsed = time.monotonic() - started
+
+        research_data, error = results[1]
+        self.assertIsNone(error)
+        self.assertTrue(research_data["first"])
+        self.assertFalse(research_data["second"])
+        self.assertTrue(research_data["error"])
+        self.assertLess(elapsed, 0.5)
+
+    def test_errors_are_returned_per_company(self):
+        def research(row):
+            if row.pk == 2:
+                raise ValueError("bad row")
+            return "ok"
+
+        results = research_companies([_Row(1, ""), _Row(2, "")], research=research)
+
+        self.assertEqual(results[1], ("ok", None))
+        self.assertIsInstance(results[2][1], ValueError)
+
+
+@override_settings(LEADBRAIN_HTTP_CACHE_ENABLED=False)
+class LeadBrainConcurrentBatchTests(_StubSiteMixin, TestCase):
+    def test_process_upload_batch_researches_batch_and_bulk_updates_results(self):
+        user = get_user_model().objects.create_user("pool-user", password="pass")
+        upload = LeadBrainUpload.objects.create(
+            file="leadbrain/uploads/pool.csv",
+            file_name="pool.csv",
+            uploaded_by=user,
+            status=LeadBrainUpload.STATUS_PROCESSING,
+            row_count=4,
+            total_rows=4,
+            pending_rows=4,
+        )
+        paths = ["brand-1", "brand-2", "brand-3", "missing"]
+        for index, path in enumerate(paths, start=1):
+            LeadBrainCompany.objects.create(
+                upload=upload,
+                row_number=index,
+                company_name=f"Pool Apparel {index}",
+                website=f"{self.base_url}/{path}",
+                raw_row_json={"Company Name": f"Pool Apparel {index}"},
+                research_status=LeadBrainCompany.STATUS_PENDING,
+            )
+
+        with patch(
+            "leadbrain.services.research_service.search_business_online",
+            return_value={"search_summary": "Apparel brand", "search_results": [], "apparel_signals": ["apparel"]},
+        ), CaptureQueriesContext(connection) as ctx:
+            processed = process_upload_batch(upload, batch_size=10)
+
+        self.assertEqual(processed, 4)
+        company_table = LeadBrainCompany._meta.db_table
+        company_updates = [q for q in ctx.captured_queries if q["sql"].startswith(f'UPDATE "{company_table}"')]
+        # One claim update plus one bulk update for the research results.
+        self.assertEqual(len(company_updates), 2)
+        companies = {company.website.rsplit("/", 1)[-1]: company for company in upload.companies.all()}
+        self.assertEqual(companies["brand-1"].research_status, LeadBrainCompany.STATUS_COMPLETE)
+        self.assertEqual(companies["brand-1"].email, "hello@stub-apparel.test")
+        self.assertEqual(companies["brand-1"].research_json["website_status"], "live")
+        self.assertEqual(companies["missing"].research_json["website_status"], "failed")
+        self.assertEqual(companies["missing"].research_claim_token, "")
+        self.assertTrue(all(company.processed_at for company in companies.values()))
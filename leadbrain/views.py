@@ -385,11 +385,12 @@ class LeadBrainStartAnalysisView(LoginRequiredMixin, View):
                 messages.info(request, "There are no pending or failed Lead Brain rows left to process.")
                 return redirect(f"{reverse_lazy('leadbrain_results')}?upload={upload.pk}")
 
-            upload.companies.filter(research_status=LeadBrainCompany.STATUS_FAILED).update(
+            requeued = upload.companies.filter(research_status=LeadBrainCompany.STATUS_FAILED).update(
                 research_status=LeadBrainCompany.STATUS_PENDING,
                 research_error="",
                 updated_at=timezone.now(),
             )
+            upload.shift_progress({(LeadBrainCompany.STATUS_FAILED, LeadBrainCompany.STATUS_PENDING): requeued})
             upload.status = LeadBrainUpload.STATUS_PROCESSING
             upload.status_note = "Background research and scoring are running."
             upload.save(update_fields=["status", "status_note", "updated_at"])
@@ -479,13 +480,13 @@ class LeadBrainUploadCancelView(LoginRequiredMixin, LeadBrainStaffOnlyMixin, Vie
         upload.status = LeadBrainUpload.STATUS_CANCELLED
         upload.status_note = "This upload was cancelled."
         upload.save(update_fields=["status", "status_note", "updated_at"])
-        upload.companies.filter(research_status=LeadBrainCompany.STATUS_PENDING).update(
+        cancelled_rows = upload.companies.filter(research_status=LeadBrainCompany.STATUS_PENDING).update(
             research_status=LeadBrainCompany.STATUS_FAILED,
             research_error="Cancelled by user.",
             processed_at=timezone.now(),
             updated_at=timezone.now(),
         )
-        upload.refresh_progress()
+        upload.shift_progress({(LeadBrainCompany.STATUS_PENDING, LeadBrainCompany.STATUS_FAILED): cancelled_rows})
         messages.success(request, f"{upload.file_name or f'Upload #{upload.pk}'} was cancelled.")
         return _redirect_to_results_next(request)
 
@@ -648,10 +649,16 @@ class LeadBrainResultsView(LoginRequiredMixin, TemplateView):
         paginator = Paginator(queryset, 50)
         page_obj = paginator.get_page(self.request.GET.get("page"))
 
-        processing_count = queryset.filter(research_status=LeadBrainCompany.STATUS_PROCESSING).count()
-        pending_count = queryset.filter(research_status=LeadBrainCompany.STATUS_PENDING).count()
-        complete_count = queryset.filter(research_status=LeadBrainCompany.STATUS_COMPLETE).count()
-        failed_count = queryset.filter(research_status=LeadBrainCompany.STATUS_FAILED).count()
+        counts = queryset.aggregate(
+            total=Count("id"),
+            good_fit=Count("id", filter=Q(fit_label=LeadBrainCompany.FIT_GOOD)),
+            possible_fit=Count("id", filter=Q(fit_label=LeadBrainCompany.FIT_POSSIBLE)),
+            weak_fit=Count("id", filter=Q(fit_label=LeadBrainCompany.FIT_WEAK)),
+            pending=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_PENDING)),
+            processing=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_PROCESSING)),
+            complete=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_COMPLETE)),
+            failed=Count("id", filter=Q(research_status=LeadBrainCompany.STATUS_FAILED)),
+        )
         selected_upload = None
         if upload_id.isdigit():
             selected_upload = LeadBrainUpload.objects.filter(pk=int(upload_id)).first()
@@ -675,14 +682,14 @@ class LeadBrainResultsView(LoginRequiredMixin, TemplateView):
                 "has_linkedin": has_linkedin,
                 "country_options": LeadBrainCompany.objects.exclude(country="").order_by("country").values_list("country", flat=True).distinct(),
                 "upload_options": LeadBrainUpload.objects.only("id", "file_name").order_by("-uploaded_at")[:30],
-                "total_count": queryset.count(),
-                "good_fit_count": queryset.filter(fit_label=LeadBrainCompany.FIT_GOOD).count(),
-                "possible_fit_count": queryset.filter(fit_label=LeadBrainCompany.FIT_POSSIBLE).count(),
-                "weak_fit_count": queryset.filter(fit_label=LeadBrainCompany.FIT_WEAK).count(),
-                "pending_count": pending_count,
-                "processing_count": processing_count,
-                "complete_count": complete_count,
-                "failed_count": failed_count,
+                "total_count": counts["total"],
+                "good_fit_count": counts["good_fit"],
+                "possible_fit_count": counts["possible_fit"],
+                "weak_fit_count": counts["weak_fit"],
+                "pending_count": counts["pending"],
+                "processing_count": counts["processing"],
+                "complete_count": counts["complete"],
+                "failed_count": counts["failed"],
                 "selected_upload": selected_upload,
                 "auto_refresh": bool(
                     selected_upload
@@ -387,7 +387,9 @@ def generate_ads_insights(days: int = 30):
 
 
 def generate_llm_insights():
-    if not getattr(settings, "OPENAI_API_KEY", ""):
+    from crm.ai.gateway import LLMError, chat_text, llm_available
+
+    if not llm_available():
         return
     if not getattr(settings, "MARKETING_AI_ENABLED", False):
         return
@@ -398,16 +400,13 @@ def generate_llm_insights():
     )
 
     try:
-        from crm.ai_client import get_openai_client
-
-        client = get_openai_client()
-        response = client.chat.completions.create(
+        content = chat_text(
+            [{"role": "user", "content": prompt}],
+            feature="marketing_weekly_plan",
             model=getattr(settings, "OPENAI_MODEL", "gpt-4.1-mini"),
-            messages=[{"role": "user", "content": prompt}],
             temperature=0.4,
         )
-        content = response.choices[0].message.content.strip()
-    except Exception:
+    except LLMError:
         return
 
     if content:
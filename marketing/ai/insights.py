@@ -109,17 +109,16 @@ def generate_rule_based_insights(days: int = 14):
 
 
 def generate_llm_insights(prompt: str) -> str:
-    api_key = getattr(settings, "OPENAI_API_KEY", "")
-    if not api_key:
+    from crm.ai.gateway import LLMError, chat_text, llm_available
+
+    if not llm_available():
         return ""
     try:
-        from crm.ai_client import get_openai_client
-        client = get_openai_client()
-        response = client.chat.completions.create(
+        return chat_text(
+            [{"role": "user", "content": prompt}],
+            feature="marketing_insights",
             model=getattr(settings, "OPENAI_MODEL", "gpt-4.1-mini"),
-            messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
         )
-        return response.choices[0].message.content.strip()
-    except Exception:
+    except LLMError:
         return ""
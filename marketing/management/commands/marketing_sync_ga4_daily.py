@@ -6,7 +6,7 @@ from django.utils import timezone
 
 from marketing.services.ga4 import fetch_ga4_daily
 from marketing.services.ga4_default import ga4_reporting_queryset, get_default_ga4_property
-from marketing.services.upsert import upsert_website_traffic_daily, upsert_website_page_daily
+from marketing.services.upsert import WEBSITE_PAGE_DAILY, WEBSITE_TRAFFIC_DAILY, UpsertReport
 from marketing.services.errors import MarketingServiceError
 from marketing.services.google_oauth import get_google_credential, get_valid_access_token
 from marketing.utils.activity import log_marketing_sync_failure
@@ -43,6 +43,7 @@ class Command(BaseCommand):
         if default_property:
             self.stdout.write(f"Using default GA4 property {default_property.ga4_property_id} - {default_property.name}.")
 
+        report = UpsertReport()
         for prop in ga4_reporting_queryset():
             if not prop.ga4_property_id:
                 continue
@@ -63,10 +64,8 @@ class Command(BaseCommand):
                 )
                 traffic_rows = sync_payload.get("traffic_rows", []) if isinstance(sync_payload, dict) else sync_payload
                 page_rows = sync_payload.get("page_rows", []) if isinstance(sync_payload, dict) else []
-                for row in traffic_rows or []:
-                    upsert_website_traffic_daily(property_obj=prop, payload=row)
-                for row in page_rows or []:
-                    upsert_website_page_daily(property_obj=prop, payload=row)
+                report.upsert(WEBSITE_TRAFFIC_DAILY, prop, traffic_rows)
+                report.upsert(WEBSITE_PAGE_DAILY, prop, page_rows)
 
                 synced_at = timezone.now()
                 prop.last_sync_at = synced_at
@@ -91,4 +90,6 @@ class Command(BaseCommand):
         creds.last_error = ""
         creds.save(update_fields=["last_synced_at", "last_sync_status", "last_error", "updated_at"])
 
+        for line in report.lines():
+            self.stdout.write(line)
         self.stdout.write(self.style.SUCCESS("GA4 sync complete."))
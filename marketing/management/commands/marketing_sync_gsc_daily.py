@@ -6,7 +6,7 @@ from django.utils import timezone
 
 from marketing.models import SeoProperty
 from marketing.services.gsc import fetch_gsc_query_daily, fetch_gsc_page_daily
-from marketing.services.upsert import upsert_seo_query_daily, upsert_seo_page_daily
+from marketing.services.upsert import SEO_PAGE_DAILY, SEO_QUERY_DAILY, UpsertReport
 from marketing.services.errors import MarketingServiceError
 from marketing.services.google_oauth import get_google_credential, get_valid_access_token
 from marketing.utils.activity import log_marketing_sync_failure
@@ -39,6 +39,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(str(exc)))
             return
 
+        report = UpsertReport()
         for prop in SeoProperty.objects.filter(is_active=True):
             if not prop.gsc_site_url:
                 continue
@@ -57,8 +58,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for row in query_rows:
-                    upsert_seo_query_daily(property_obj=prop, payload=row)
+                report.upsert(SEO_QUERY_DAILY, prop, query_rows)
 
                 page_rows = fetch_gsc_page_daily(
                     access_token=token,
@@ -66,8 +66,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for row in page_rows:
-                    upsert_seo_page_daily(property_obj=prop, payload=row)
+                report.upsert(SEO_PAGE_DAILY, prop, page_rows)
 
                 synced_at = timezone.now()
                 prop.last_sync_at = synced_at
@@ -92,4 +91,6 @@ class Command(BaseCommand):
         creds.last_error = ""
         creds.save(update_fields=["last_synced_at", "last_sync_status", "last_error", "updated_at"])
 
+        for line in report.lines():
+            self.stdout.write(line)
         self.stdout.write(self.style.SUCCESS("GSC sync complete."))
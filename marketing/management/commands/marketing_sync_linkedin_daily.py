@@ -13,9 +13,10 @@ from marketing.services.linkedin import (
     fetch_linkedin_audience,
 )
 from marketing.services.upsert import (
-    upsert_social_metric_daily,
-    upsert_account_metric_daily,
-    upsert_social_audience_daily,
+    ACCOUNT_METRIC_DAILY,
+    SOCIAL_AUDIENCE_DAILY,
+    SOCIAL_METRIC_DAILY,
+    UpsertReport,
 )
 from marketing.services.errors import MarketingServiceError
 from marketing.services.oauth_connections import token_for_social_account
@@ -46,6 +47,7 @@ class Command(BaseCommand):
 
         synced_count = 0
         error_count = 0
+        report = UpsertReport()
         for acct in accounts:
             try:
                 token = self._token_for_account(acct)
@@ -79,7 +81,7 @@ class Command(BaseCommand):
                         },
                     )
                     if row.get("metric_payload"):
-                        upsert_social_metric_daily(content_obj=content, payload=row["metric_payload"])
+                        report.upsert(SOCIAL_METRIC_DAILY, content, [row["metric_payload"]])
 
                     metric_rows = fetch_linkedin_post_metrics(
                         access_token=token,
@@ -95,9 +97,7 @@ class Command(BaseCommand):
                             start_date=start,
                             end_date=end,
                         )
-                    for metric in metric_rows:
-                        if metric:
-                            upsert_social_metric_daily(content_obj=content, payload=metric)
+                    report.upsert(SOCIAL_METRIC_DAILY, content, metric_rows)
 
                 account_metric_rows = fetch_linkedin_account_metrics(
                     access_token=token,
@@ -105,8 +105,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for metric in account_metric_rows:
-                    upsert_account_metric_daily(account_obj=acct, payload=metric)
+                report.upsert(ACCOUNT_METRIC_DAILY, acct, account_metric_rows)
 
                 audience_rows = fetch_linkedin_audience(
                     access_token=token,
@@ -114,8 +113,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for row in audience_rows:
-                    upsert_social_audience_daily(account_obj=acct, payload=row)
+                report.upsert(SOCIAL_AUDIENCE_DAILY, acct, audience_rows)
 
                 synced_at = timezone.now()
                 acct.last_sync_at = synced_at
@@ -133,4 +131,6 @@ class Command(BaseCommand):
                 error_count += 1
                 self.stdout.write(self.style.ERROR(f"{acct.display_name or acct.external_account_id} LinkedIn sync failed: {exc}"))
 
+        for line in report.lines():
+            self.stdout.write(line)
         self.stdout.write(self.style.SUCCESS(f"LinkedIn sync complete. synced={synced_count} errors={error_count}"))
@@ -15,10 +15,11 @@ from marketing.services.meta import (
     fetch_meta_ad_insights,
 )
 from marketing.services.upsert import (
-    upsert_social_metric_daily,
-    upsert_account_metric_daily,
-    upsert_social_audience_daily,
-    upsert_ad_metric_daily,
+    ACCOUNT_METRIC_DAILY,
+    AD_METRIC_DAILY,
+    SOCIAL_AUDIENCE_DAILY,
+    SOCIAL_METRIC_DAILY,
+    UpsertReport,
 )
 from marketing.services.errors import MarketingServiceError
 from marketing.services.oauth_connections import get_valid_oauth_access_token
@@ -42,7 +43,7 @@ class Command(BaseCommand):
         cred = OAuthCredential.objects.filter(platform="meta").first()
         return get_valid_oauth_access_token(cred) if cred else ""
 
-    def _sync_meta_ads(self, *, access_token: str, start, end):
+    def _sync_meta_ads(self, *, access_token: str, start, end, report):
         synced = 0
         ad_account_count = 0
         campaign_count = 0
@@ -82,14 +83,17 @@ class Command(BaseCommand):
                         "objective": campaign_row.get("objective") or "",
                     },
                 )
+            metrics_by_campaign = {}
             for metric in fetch_meta_ad_insights(access_token=access_token, ad_account_id=ad_account_id, start_date=start, end_date=end):
+                metrics_by_campaign.setdefault(metric.get("external_campaign_id") or "unknown", []).append(metric)
+            for external_campaign_id, metrics in metrics_by_campaign.items():
                 campaign, _ = AdCampaign.objects.update_or_create(
                     ad_account=ad_account,
-                    external_campaign_id=metric.get("external_campaign_id") or "unknown",
-                    defaults={"name": metric.get("campaign_name") or "", "status": "", "objective": ""},
+                    external_campaign_id=external_campaign_id,
+                    defaults={"name": metrics[-1].get("campaign_name") or "", "status": "", "objective": ""},
                 )
-                upsert_ad_metric_daily(ad_campaign_obj=campaign, payload=metric)
-                synced += 1
+                report.upsert(AD_METRIC_DAILY, campaign, metrics)
+                synced += len(metrics)
 
             synced_at = timezone.now()
             platform_account.last_sync_at = synced_at
@@ -137,6 +141,7 @@ class Command(BaseCommand):
         if not accounts.exists() and platform != "meta_ads":
             self.stdout.write("No matching Meta accounts found.")
 
+        report = UpsertReport()
         for acct in accounts:
             try:
                 token = self._token_for_account(acct)
@@ -170,7 +175,7 @@ class Command(BaseCommand):
                         },
                     )
                     if row.get("metric_payload"):
-                        upsert_social_metric_daily(content_obj=content, payload=row["metric_payload"])
+                        report.upsert(SOCIAL_METRIC_DAILY, content, [row["metric_payload"]])
 
                     try:
                         metric_rows = fetch_meta_metrics(
@@ -182,9 +187,7 @@ class Command(BaseCommand):
                         )
                     except MarketingServiceError:
                         metric_rows = []
-                    for metric in metric_rows:
-                        if metric:
-                            upsert_social_metric_daily(content_obj=content, payload=metric)
+                    report.upsert(SOCIAL_METRIC_DAILY, content, metric_rows)
 
                 account_metric_rows = fetch_meta_account_metrics(
                     access_token=token,
@@ -196,7 +199,7 @@ class Command(BaseCommand):
                 media_count = 0
                 for metric in account_metric_rows:
                     media_count = max(media_count, int(metric.get("media_count") or 0))
-                    upsert_account_metric_daily(account_obj=acct, payload=metric)
+                report.upsert(ACCOUNT_METRIC_DAILY, acct, account_metric_rows)
 
                 audience_rows = fetch_meta_audience(
                     access_token=token,
@@ -204,8 +207,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for row in audience_rows:
-                    upsert_social_audience_daily(account_obj=acct, payload=row)
+                report.upsert(SOCIAL_AUDIENCE_DAILY, acct, audience_rows)
 
                 synced_at = timezone.now()
                 acct.last_sync_at = synced_at
@@ -222,7 +224,7 @@ class Command(BaseCommand):
 
         if platform in {"", "meta_ads"} and meta_token:
             try:
-                meta_ads_result = self._sync_meta_ads(access_token=meta_token, start=start, end=end)
+                meta_ads_result = self._sync_meta_ads(access_token=meta_token, start=start, end=end, report=report)
                 if meta_credential:
                     meta_credential.last_sync_status = "ok"
                     meta_credential.last_error = ""
@@ -241,4 +243,6 @@ class Command(BaseCommand):
                     meta_credential.save(update_fields=["last_sync_status", "last_error", "updated_at"])
                 self.stderr.write(f"Meta Ads sync failed: {exc}")
 
+        for line in report.lines():
+            self.stdout.write(line)
         self.stdout.write(self.style.SUCCESS("Meta sync complete."))
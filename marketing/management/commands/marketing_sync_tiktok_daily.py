@@ -12,9 +12,10 @@ from marketing.services.tiktok import (
     fetch_tiktok_audience,
 )
 from marketing.services.upsert import (
-    upsert_social_metric_daily,
-    upsert_account_metric_daily,
-    upsert_social_audience_daily,
+    ACCOUNT_METRIC_DAILY,
+    SOCIAL_AUDIENCE_DAILY,
+    SOCIAL_METRIC_DAILY,
+    UpsertReport,
 )
 from marketing.services.errors import MarketingServiceError
 from marketing.services.oauth_connections import get_valid_oauth_access_token
@@ -52,6 +53,7 @@ class Command(BaseCommand):
         content_count = 0
         content_metric_count = 0
         account_metric_count = 0
+        report = UpsertReport()
         for acct in accounts:
             try:
                 token = self._token_for_account(acct)
@@ -87,7 +89,7 @@ class Command(BaseCommand):
                         },
                     )
                     if row.get("metric_payload"):
-                        upsert_social_metric_daily(content_obj=content, payload=row["metric_payload"])
+                        report.upsert(SOCIAL_METRIC_DAILY, content, [row["metric_payload"]])
                         content_metric_count += 1
                     content_count += 1
 
@@ -97,10 +99,8 @@ class Command(BaseCommand):
                         start_date=start,
                         end_date=end,
                     )
-                    for metric in metric_rows:
-                        if metric:
-                            upsert_social_metric_daily(content_obj=content, payload=metric)
-                            content_metric_count += 1
+                    report.upsert(SOCIAL_METRIC_DAILY, content, metric_rows)
+                    content_metric_count += sum(1 for metric in metric_rows if metric)
 
                 account_metric_rows = fetch_tiktok_account_metrics(
                     access_token=token,
@@ -108,9 +108,8 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for metric in account_metric_rows:
-                    upsert_account_metric_daily(account_obj=acct, payload=metric)
-                    account_metric_count += 1
+                report.upsert(ACCOUNT_METRIC_DAILY, acct, account_metric_rows)
+                account_metric_count += len(account_metric_rows)
 
                 audience_rows = fetch_tiktok_audience(
                     access_token=token,
@@ -118,8 +117,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for row in audience_rows:
-                    upsert_social_audience_daily(account_obj=acct, payload=row)
+                report.upsert(SOCIAL_AUDIENCE_DAILY, acct, audience_rows)
 
                 synced_at = timezone.now()
                 acct.last_sync_at = synced_at
@@ -137,6 +135,8 @@ class Command(BaseCommand):
                 error_count += 1
                 self.stdout.write(self.style.ERROR(f"{acct.display_name or acct.external_account_id} TikTok sync failed: {exc}"))
 
+        for line in report.lines():
+            self.stdout.write(line)
         self.stdout.write(
             self.style.SUCCESS(
                 "TikTok sync complete. "
@@ -12,9 +12,10 @@ from marketing.services.youtube import (
     fetch_youtube_audience,
 )
 from marketing.services.upsert import (
-    upsert_social_metric_daily,
-    upsert_account_metric_daily,
-    upsert_social_audience_daily,
+    ACCOUNT_METRIC_DAILY,
+    SOCIAL_AUDIENCE_DAILY,
+    SOCIAL_METRIC_DAILY,
+    UpsertReport,
 )
 from marketing.services.errors import MarketingServiceError
 from marketing.services.oauth_connections import token_for_social_account
@@ -43,6 +44,7 @@ class Command(BaseCommand):
             self.stdout.write("No matching YouTube accounts found.")
             return
 
+        report = UpsertReport()
         for acct in accounts:
             try:
                 token = self._token_for_account(acct)
@@ -80,8 +82,7 @@ class Command(BaseCommand):
                         start_date=start,
                         end_date=end,
                     )
-                    for metric in metric_rows:
-                        upsert_social_metric_daily(content_obj=content, payload=metric)
+                    report.upsert(SOCIAL_METRIC_DAILY, content, metric_rows)
 
                 account_metric_rows = fetch_youtube_account_metrics(
                     access_token=token,
@@ -89,8 +90,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for metric in account_metric_rows:
-                    upsert_account_metric_daily(account_obj=acct, payload=metric)
+                report.upsert(ACCOUNT_METRIC_DAILY, acct, account_metric_rows)
 
                 audience_rows = fetch_youtube_audience(
                     access_token=token,
@@ -98,8 +98,7 @@ class Command(BaseCommand):
                     start_date=start,
                     end_date=end,
                 )
-                for row in audience_rows:
-                    upsert_social_audience_daily(account_obj=acct, payload=row)
+                report.upsert(SOCIAL_AUDIENCE_DAILY, acct, audience_rows)
 
                 synced_at = timezone.now()
                 acct.last_sync_at = synced_at
@@ -114,4 +113,6 @@ class Command(BaseCommand):
                 acct.save(update_fields=["last_sync_status", "last_sync_message"])
                 update_connection_sync_state(acct, status="error", error=str(exc))
 
+        for line in report.lines():
+            self.stdout.write(line)
         self.stdout.write(self.style.SUCCESS("YouTube sync complete."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0011_marketing_operations_center'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outreachsendlog',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('bounced', 'Bounced'), ('unsubscribed', 'Unsubscribed'), ('replied', 'Replied'), ('stopped', 'Stopped')], default='queued', max_length=20),
+        ),
+    ]
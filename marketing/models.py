@@ -594,6 +594,7 @@ class OutreachSendLog(models.Model):
 
     STATUS_CHOICES = [
         ("queued", "Queued"),
+        ("sending", "Sending"),
         ("sent", "Sent"),
         ("failed", "Failed"),
         ("bounced", "Bounced"),
@@ -0,0 +1,232 @@
+import time
+from smtplib import SMTPServerDisconnected
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+
+from marketing.models import Contact, OutreachCampaign, OutreachMessageTemplate, OutreachSendLog
+from marketing.utils.outreach import allowed_daily_limit, build_email_body, can_send_to_contact, within_send_window
+
+
+TEMPLATE_INDEX = {"initial": 0, "followup1": 1, "followup2": 2}
+
+
+@dataclass
+class SendReport:
+    sent: int = 0
+    failed: int = 0
+    stopped: int = 0
+
+
+class TokenBucket:
+    """Refills ``rate_per_minute`` tokens a minute up to ``burst``; ``take`` waits for one."""
+
+    def __init__(self, rate_per_minute: float, burst: int, *, clock=time.monotonic, sleep=time.sleep):
+        self.rate = max(float(rate_per_minute), 0.001) / 60.0
+        self.capacity = max(int(burst), 1)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        self._refill()
+        if self.tokens < 1:
+            self.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens = max(self.tokens - 1, 0.0)
+
+
+class OutreachSender:
+    """
+    Sends queued outreach email campaign by campaign.
+
+    Each sending account gets one SMTP connection, kept open for the life of
+    the sender, and a token bucket so a worker loop cannot burst past the
+    provider's rate. A campaign's batch is claimed as ``sending`` before any
+    message goes out and the results are written back together once the batch
+    is done, so a crashed worker never sends a message twice; logs left in
+    ``sending`` need a manual look.
+    """
+
+    def __init__(self, *, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.connections = {}
+        self.buckets = {}
+
+    def close(self):
+        for connection in self.connections.values():
+            try:
+                connection.close()
+            except Exception:
+                pass
+        self.connections = {}
+
+    def _connection(self, account):
+        connection = self.connections.get(account)
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self.connections[account] = connection
+        return connection
+
+    def _drop_connection(self, account):
+        connection = self.connections.pop(account, None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _bucket(self, account):
+        bucket = self.buckets.get(account)
+        if bucket is None:
+            bucket = TokenBucket(
+                getattr(settings, "MARKETING_OUTREACH_ACCOUNT_PER_MINUTE", 20),
+                getattr(settings, "MARKETING_OUTREACH_ACCOUNT_BURST", 5),
+                clock=self.clock,
+                sleep=self.sleep,
+            )
+            self.buckets[account] = bucket
+        return bucket
+
+    def run_once(self) -> SendReport:
+        report = SendReport()
+        now = timezone.now()
+        day_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        hour_ago = now - timedelta(hours=1)
+        campaigns = list(
+            OutreachCampaign.objects.filter(status="active", channel="email").prefetch_related(
+                Prefetch("templates", queryset=OutreachMessageTemplate.objects.order_by("id"))
+            )
+        )
+        sent_counts = {
+            row["campaign"]: row
+            for row in OutreachSendLog.objects.filter(
+                campaign__in=campaigns,
+                status="sent",
+                sent_at__gte=min(day_start, hour_ago),
+            )
+            .values("campaign")
+            .annotate(
+                today=Count("id", filter=Q(sent_at__gte=day_start)),
+                hour=Count("id", filter=Q(sent_at__gte=hour_ago)),
+            )
+        }
+        for campaign in campaigns:
+            if not within_send_window(campaign):
+                continue
+            counts = sent_counts.get(campaign.pk, {"today": 0, "hour": 0})
+            daily_limit = allowed_daily_limit(campaign)
+            hourly_limit = campaign.hourly_limit or daily_limit
+            remaining = min(daily_limit - counts["today"], hourly_limit - counts["hour"])
+            if remaining > 0:
+                self.send_campaign(campaign, remaining, report)
+        return report
+
+    def send_campaign(self, campaign, limit, report):
+        templates = list(campaign.templates.all())
+        if not templates:
+            return
+        logs = list(
+            OutreachSendLog.objects.filter(campaign=campaign, status="queued")
+            .select_related("contact")
+            .order_by("queued_at", "id")[:limit]
+        )
+        if not logs:
+            return
+        replied = set(
+            OutreachSendLog.objects.filter(
+                campaign=campaign,
+                status="replied",
+                contact_id__in={log.contact_id for log in logs},
+            ).values_list("contact_id", flat=True)
+        )
+
+        account = campaign.sending_account or getattr(settings, "DEFAULT_FROM_EMAIL", "")
+        outbox = []
+        for log in logs:
+            contact = log.contact
+            if not can_send_to_contact(contact):
+                log.status, log.error_text = "stopped", "Do not contact"
+                report.stopped += 1
+                outbox.append((log, None))
+            elif contact.pk in replied:
+                log.status, log.error_text = "stopped", "Contact replied"
+                report.stopped += 1
+                outbox.append((log, None))
+            else:
+                index = TEMPLATE_INDEX.get(log.send_type, 0)
+                template = templates[index] if index < len(templates) else templates[0]
+                message = EmailMessage(
+                    subject=template.subject_template.replace("{first_name}", contact.first_name or "there"),
+                    body=build_email_body(contact=contact, template_text=template.body_template),
+                    from_email=account,
+                    to=[contact.email],
+                )
+                outbox.append((log, message))
+
+        # One conditional update claims the batch; the row lock keeps a second
+        # worker from claiming the same logs between the read and the update.
+        with transaction.atomic():
+            claimed_ids = set(
+                OutreachSendLog.objects.select_for_update()
+                .filter(pk__in=[log.pk for log, message in outbox if message is not None], status="queued")
+                .values_list("pk", flat=True)
+            )
+            if claimed_ids:
+                OutreachSendLog.objects.filter(pk__in=claimed_ids).update(status="sending")
+
+        finished = []
+        contacted_ids = []
+        for log, message in outbox:
+            if message is None:
+                finished.append(log)
+                continue
+            if log.pk not in claimed_ids:
+                continue
+            if self._send(account, message):
+                log.status, log.sent_at, log.error_text = "sent", timezone.now(), ""
+                contacted_ids.append(log.contact_id)
+                report.sent += 1
+            else:
+                log.status, log.error_text = "failed", "Send failed"
+                report.failed += 1
+            finished.append(log)
+        if finished:
+            OutreachSendLog.objects.bulk_update(finished, ["status", "sent_at", "error_text"])
+        if contacted_ids:
+            Contact.objects.filter(pk__in=contacted_ids).update(last_contacted_at=timezone.now())
+
+    def _send(self, account, message) -> bool:
+        if not message.to or not message.to[0]:
+            return False
+        self._bucket(account).take()
+        pooled = account in self.connections
+        try:
+            return bool(self._connection(account).send_messages([message]))
+        except (SMTPServerDisconnected, ConnectionError):
+            self._drop_connection(account)
+            if not pooled:
+                return False
+        except Exception:
+            # The next message reconnects instead of reusing a broken session.
+            self._drop_connection(account)
+            return False
+        # The server closed the idle pooled session; reconnect and try once more.
+        try:
+            return bool(self._connection(account).send_messages([message]))
+        except Exception:
+            self._drop_connection(account)
+            return False
@@ -1,3 +1,11 @@
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable
+
+from django.conf import settings
+from django.db import models, transaction
+
 from marketing.models import (
     SeoQueryDaily,
     SeoPageDaily,
@@ -10,137 +18,301 @@ from marketing.models import (
 )
 
 
+def _seo_query_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "query": payload.get("query", ""),
+        "page": payload.get("page", ""),
+        "country": payload.get("country", ""),
+        "device": payload.get("device", ""),
+        "clicks": payload.get("clicks", 0),
+        "impressions": payload.get("impressions", 0),
+        "ctr": payload.get("ctr", 0) or 0,
+        "position": payload.get("position", 0) or 0,
+    }
+
+
+def _seo_page_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "page": payload.get("page", ""),
+        "clicks": payload.get("clicks", 0),
+        "impressions": payload.get("impressions", 0),
+        "ctr": payload.get("ctr", 0) or 0,
+        "position": payload.get("position", 0) or 0,
+    }
+
+
+def _website_traffic_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "channel": payload.get("channel", ""),
+        "source": payload.get("source", ""),
+        "medium": payload.get("medium", ""),
+        "campaign": payload.get("campaign", ""),
+        "visitors": payload.get("visitors", 0),
+        "sessions": payload.get("sessions", 0),
+        "engaged_sessions": payload.get("engaged_sessions", 0),
+        "page_views": payload.get("page_views", 0),
+        "events": payload.get("events", 0),
+        "conversions": payload.get("conversions", 0),
+        "engagement_rate": payload.get("engagement_rate", 0) or 0,
+        "avg_engagement_seconds": payload.get("avg_engagement_seconds", 0),
+    }
+
+
+def _website_page_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "page_path": payload.get("page_path") or payload.get("page") or "",
+        "page_title": payload.get("page_title", "") or "",
+        "visitors": payload.get("visitors", 0),
+        "sessions": payload.get("sessions", 0),
+        "page_views": payload.get("page_views", 0),
+        "entrances": payload.get("entrances", 0),
+        "exits": payload.get("exits", 0),
+        "conversions": payload.get("conversions", 0),
+        "avg_engagement_seconds": payload.get("avg_engagement_seconds", 0),
+    }
+
+
+def _social_metric_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "impressions": payload.get("impressions", 0),
+        "reach": payload.get("reach", 0),
+        "views": payload.get("views", 0),
+        "likes": payload.get("likes", 0),
+        "comments": payload.get("comments", 0),
+        "shares": payload.get("shares", 0),
+        "saves": payload.get("saves", 0),
+        "clicks": payload.get("clicks", 0),
+        "watch_time_seconds": payload.get("watch_time_seconds", 0),
+        "avg_view_duration_seconds": payload.get("avg_view_duration_seconds", 0),
+        "profile_visits": payload.get("profile_visits", 0),
+        "follows": payload.get("follows", 0),
+    }
+
+
+def _social_audience_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "country_json": payload.get("country_json", {}) or {},
+        "city_json": payload.get("city_json", {}) or {},
+        "gender_age_json": payload.get("gender_age_json", {}) or {},
+        "language_json": payload.get("language_json", {}) or {},
+    }
+
+
+def _account_metric_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "followers_total": payload.get("followers_total", 0),
+        "followers_change": payload.get("followers_change", 0),
+        "impressions": payload.get("impressions", 0),
+        "reach": payload.get("reach", 0),
+        "views": payload.get("views", 0),
+        "clicks": payload.get("clicks", 0),
+        "engagement_total": payload.get("engagement_total", 0),
+    }
+
+
+def _ad_metric_row(payload: dict) -> dict:
+    return {
+        "date": payload.get("date"),
+        "spend": payload.get("spend", 0) or 0,
+        "impressions": payload.get("impressions", 0),
+        "clicks": payload.get("clicks", 0),
+        "cpc": payload.get("cpc", 0) or 0,
+        "cpm": payload.get("cpm", 0) or 0,
+        "conversions": payload.get("conversions", 0),
+        "cost_per_conversion": payload.get("cost_per_conversion", 0) or 0,
+    }
+
+
+@dataclass(frozen=True)
+class UpsertTable:
+    """A daily metric table: ``parent_field`` + ``key_fields`` match its unique constraint."""
+
+    model: type
+    parent_field: str
+    key_fields: tuple
+    build_row: Callable[[dict], dict]
+
+    @property
+    def label(self) -> str:
+        return self.model.__name__
+
+    @property
+    def conflict_fields(self) -> list:
+        return [self.parent_field, *self.key_fields]
+
+    @property
+    def value_fields(self) -> tuple:
+        return tuple(name for name in self.build_row({}) if name not in self.key_fields)
+
+
+SEO_QUERY_DAILY = UpsertTable(SeoQueryDaily, "property", ("date", "query", "page", "country", "device"), _seo_query_row)
+SEO_PAGE_DAILY = UpsertTable(SeoPageDaily, "property", ("date", "page"), _seo_page_row)
+WEBSITE_TRAFFIC_DAILY = UpsertTable(
+    WebsiteTrafficDaily,
+    "property",
+    ("date", "channel", "source", "medium", "campaign"),
+    _website_traffic_row,
+)
+WEBSITE_PAGE_DAILY = UpsertTable(WebsitePageDaily, "property", ("date", "page_path"), _website_page_row)
+SOCIAL_METRIC_DAILY = UpsertTable(SocialMetricDaily, "content", ("date",), _social_metric_row)
+SOCIAL_AUDIENCE_DAILY = UpsertTable(SocialAudienceDaily, "account", ("date",), _social_audience_row)
+ACCOUNT_METRIC_DAILY = UpsertTable(AccountMetricDaily, "account", ("date",), _account_metric_row)
+AD_METRIC_DAILY = UpsertTable(AdMetricDaily, "ad_campaign", ("date",), _ad_metric_row)
+
+
+def _update_or_create(table: UpsertTable, parent, payload: dict):
+    row = table.build_row(payload)
+    lookup = {name: row[name] for name in table.key_fields}
+    defaults = {name: row[name] for name in table.value_fields}
+    return table.model.objects.update_or_create(**{table.parent_field: parent}, **lookup, defaults=defaults)
+
+
 def upsert_seo_query_daily(*, property_obj, payload: dict):
-    return SeoQueryDaily.objects.update_or_create(
-        property=property_obj,
-        date=payload.get("date"),
-        query=payload.get("query", ""),
-        page=payload.get("page", ""),
-        country=payload.get("country", ""),
-        device=payload.get("device", ""),
-        defaults={
-            "clicks": payload.get("clicks", 0),
-            "impressions": payload.get("impressions", 0),
-            "ctr": payload.get("ctr", 0) or 0,
-            "position": payload.get("position", 0) or 0,
-        },
-    )
+    return _update_or_create(SEO_QUERY_DAILY, property_obj, payload)
 
 
 def upsert_seo_page_daily(*, property_obj, payload: dict):
-    return SeoPageDaily.objects.update_or_create(
-        property=property_obj,
-        date=payload.get("date"),
-        page=payload.get("page", ""),
-        defaults={
-            "clicks": payload.get("clicks", 0),
-            "impressions": payload.get("impressions", 0),
-            "ctr": payload.get("ctr", 0) or 0,
-            "position": payload.get("position", 0) or 0,
-        },
-    )
+    return _update_or_create(SEO_PAGE_DAILY, property_obj, payload)
 
 
 def upsert_website_traffic_daily(*, property_obj, payload: dict):
-    return WebsiteTrafficDaily.objects.update_or_create(
-        property=property_obj,
-        date=payload.get("date"),
-        channel=payload.get("channel", ""),
-        source=payload.get("source", ""),
-        medium=payload.get("medium", ""),
-        campaign=payload.get("campaign", ""),
-        defaults={
-            "visitors": payload.get("visitors", 0),
-            "sessions": payload.get("sessions", 0),
-            "engaged_sessions": payload.get("engaged_sessions", 0),
-            "page_views": payload.get("page_views", 0),
-            "events": payload.get("events", 0),
-            "conversions": payload.get("conversions", 0),
-            "engagement_rate": payload.get("engagement_rate", 0) or 0,
-            "avg_engagement_seconds": payload.get("avg_engagement_seconds", 0),
-        },
-    )
+    return _update_or_create(WEBSITE_TRAFFIC_DAILY, property_obj, payload)
 
 
 def upsert_website_page_daily(*, property_obj, payload: dict):
-    return WebsitePageDaily.objects.update_or_create(
-        property=property_obj,
-        date=payload.get("date"),
-        page_path=payload.get("page_path") or payload.get("page") or "",
-        defaults={
-            "page_title": payload.get("page_title", "") or "",
-            "visitors": payload.get("visitors", 0),
-            "sessions": payload.get("sessions", 0),
-            "page_views": payload.get("page_views", 0),
-            "entrances": payload.get("entrances", 0),
-            "exits": payload.get("exits", 0),
-            "conversions": payload.get("conversions", 0),
-            "avg_engagement_seconds": payload.get("avg_engagement_seconds", 0),
-        },
-    )
+    return _update_or_create(WEBSITE_PAGE_DAILY, property_obj, payload)
 
 
 def upsert_social_metric_daily(*, content_obj, payload: dict):
-    return SocialMetricDaily.objects.update_or_create(
-        content=content_obj,
-        date=payload.get("date"),
-        defaults={
-            "impressions": payload.get("impressions", 0),
-            "reach": payload.get("reach", 0),
-            "views": payload.get("views", 0),
-            "likes": payload.get("likes", 0),
-            "comments": payload.get("comments", 0),
-            "shares": payload.get("shares", 0),
-            "saves": payload.get("saves", 0),
-            "clicks": payload.get("clicks", 0),
-            "watch_time_seconds": payload.get("watch_time_seconds", 0),
-            "avg_view_duration_seconds": payload.get("avg_view_duration_seconds", 0),
-            "profile_visits": payload.get("profile_visits", 0),
-            "follows": payload.get("follows", 0),
-        },
-    )
+    return _update_or_create(SOCIAL_METRIC_DAILY, content_obj, payload)
 
 
 def upsert_social_audience_daily(*, account_obj, payload: dict):
-    return SocialAudienceDaily.objects.update_or_create(
-        account=account_obj,
-        date=payload.get("date"),
-        defaults={
-            "country_json": payload.get("country_json", {}) or {},
-            "city_json": payload.get("city_json", {}) or {},
-            "gender_age_json": payload.get("gender_age_json", {}) or {},
-            "language_json": payload.get("language_json", {}) or {},
-        },
-    )
+    return _update_or_create(SOCIAL_AUDIENCE_DAILY, account_obj, payload)
 
 
 def upsert_account_metric_daily(*, account_obj, payload: dict):
-    return AccountMetricDaily.objects.update_or_create(
-        account=account_obj,
-        date=payload.get("date"),
-        defaults={
-            "followers_total": payload.get("followers_total", 0),
-            "followers_change": payload.get("followers_change", 0),
-            "impressions": payload.get("impressions", 0),
-            "reach": payload.get("reach", 0),
-            "views": payload.get("views", 0),
-            "clicks": payload.get("clicks", 0),
-            "engagement_total": payload.get("engagement_total", 0),
-        },
-    )
+    return _update_or_create(ACCOUNT_METRIC_DAILY, account_obj, payload)
 
 
 def upsert_ad_metric_daily(*, ad_campaign_obj, payload: dict):
-    return AdMetricDaily.objects.update_or_create(
-        ad_campaign=ad_campaign_obj,
-        date=payload.get("date"),
-        defaults={
-            "spend": payload.get("spend", 0) or 0,
-            "impressions": payload.get("impressions", 0),
-            "clicks": payload.get("clicks", 0),
-            "cpc": payload.get("cpc", 0) or 0,
-            "cpm": payload.get("cpm", 0) or 0,
-            "conversions": payload.get("conversions", 0),
-            "cost_per_conversion": payload.get("cost_per_conversion", 0) or 0,
-        },
-    )
+    return _update_or_create(AD_METRIC_DAILY, ad_campaign_obj, payload)
+
+
+@dataclass
+class UpsertStats:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.skipped
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else float(self.total)
+
+    def merge(self, other: "UpsertStats"):
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.seconds += other.seconds
+
+    def summary(self) -> str:
+        return (
+            f"{self.inserted} inserted, {self.updated} updated, {self.skipped} skipped "
+            f"in {self.seconds:.2f}s ({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+def _normalize(field, value):
+    # Compare in the shape the database hands back, so re-synced rows diff as unchanged.
+    value = field.to_python(value)
+    if isinstance(field, models.DecimalField) and value is not None:
+        value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def _normalized_row(table: UpsertTable, payload: dict) -> dict:
+    opts = table.model._meta
+    return {name: _normalize(opts.get_field(name), value) for name, value in table.build_row(payload).items()}
+
+
+def _existing_rows(table: UpsertTable, parent, rows: dict, *, with_values: bool) -> dict:
+    dates = [row["date"] for row in rows.values() if row["date"] is not None]
+    if not dates:
+        return {}
+    fields = table.key_fields + (table.value_fields if with_values else ())
+    size = len(table.key_fields)
+    queryset = table.model.objects.filter(**{table.parent_field: parent}, date__range=(min(dates), max(dates)))
+    return {values[:size]: values[size:] for values in queryset.order_by().values_list(*fields)}
+
+
+def bulk_upsert(table: UpsertTable, parent, payloads, *, batch_size=None, skip_unchanged=None) -> UpsertStats:
+    """Insert or update many daily rows for one parent with chunked ``INSERT ... ON CONFLICT``.
+
+    With ``skip_unchanged`` (default ``MARKETING_UPSERT_SKIP_UNCHANGED``) rows identical to what is
+    stored are not written at all.
+    """
+    started = time.monotonic()
+    batch_size = max(1, int(batch_size or getattr(settings, "MARKETING_UPSERT_BATCH_SIZE", 500)))
+    if skip_unchanged is None:
+        skip_unchanged = getattr(settings, "MARKETING_UPSERT_SKIP_UNCHANGED", True)
+    stats = UpsertStats()
+
+    rows = {}
+    for payload in payloads or []:
+        if not payload:
+            continue
+        row = _normalized_row(table, payload)
+        # A later payload for the same key wins, as with repeated update_or_create calls.
+        rows[tuple(row[name] for name in table.key_fields)] = row
+
+    existing = _existing_rows(table, parent, rows, with_values=skip_unchanged) if rows else {}
+    pending = []
+    for key, row in rows.items():
+        if key not in existing:
+            stats.inserted += 1
+        elif skip_unchanged and existing[key] == tuple(row[name] for name in table.value_fields):
+            stats.skipped += 1
+            continue
+        else:
+            stats.updated += 1
+        pending.append(table.model(**{table.parent_field: parent}, **row))
+
+    if pending:
+        with transaction.atomic():
+            for start in range(0, len(pending), batch_size):
+                table.model.objects.bulk_create(
+                    pending[start : start + batch_size],
+                    update_conflicts=True,
+                    unique_fields=table.conflict_fields,
+                    update_fields=list(table.value_fields),
+                )
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+class UpsertReport:
+    """Per-table totals for a sync command run."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.tables = {}
+
+    def upsert(self, table: UpsertTable, parent, payloads) -> UpsertStats:
+        stats = bulk_upsert(table, parent, payloads, **self.options)
+        self.tables.setdefault(table.label, UpsertStats()).merge(stats)
+        return stats
+
+    def lines(self) -> list:
+        return [f"{label}: {stats.summary()}" for label, stats in self.tables.items()]
@@ -1,14 +1,23 @@
 from datetime import date
+from smtplib import SMTPServerDisconnected
 from decimal import Decimal
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from crm.models_access import UserAccess
 from marketing.models import (
     Contact,
+    OutreachCampaign,
+    OutreachMessageTemplate,
+    OutreachSendLog,
     SeoProperty,
     SocialAccount,
     SocialContent,
@@ -17,8 +26,17 @@ from marketing.models import (
     OAuthCredential,
     InsightItem,
 )
-from marketing.services.upsert import upsert_seo_query_daily, upsert_social_metric_daily, upsert_account_metric_daily
+from marketing.services.upsert import (
+    ACCOUNT_METRIC_DAILY,
+    SEO_QUERY_DAILY,
+    UpsertReport,
+    bulk_upsert,
+    upsert_seo_query_daily,
+    upsert_social_metric_daily,
+    upsert_account_metric_daily,
+)
 from marketing.ai.engine import generate_insights
+from marketing.services.outreach_sender import OutreachSender, TokenBucket
 from marketing.utils.outreach import can_send_to_contact
 
 
@@ -64,6 +82,50 @@ class MarketingUpsertTests(TestCase):
         self.assertEqual(AccountMetricDaily.objects.count(), 1)
         self.assertEqual(AccountMetricDaily.objects.first().followers_change, 8)
 
+    def test_bulk_upsert_inserts_updates_and_skips_unchanged_rows(self):
+        prop = SeoProperty.objects.create(name="Bulk", gsc_site_url="https://example.com")
+        rows = [
+            {
+                "date": "2024-05-01",
+                "query": f"query {index}",
+                "page": "https://example.com/",
+                "clicks": index,
+                "impressions": 100,
+                "ctr": 0.1,
+                "position": 2.5,
+            }
+            for index in range(5)
+        ]
+
+        with self.assertNumQueries(5):
+            # Existing-row lookup, then savepoint, two INSERT ... ON CONFLICT chunks, release.
+            first = bulk_upsert(SEO_QUERY_DAILY, prop, rows, batch_size=3)
+        self.assertEqual((first.inserted, first.updated, first.skipped), (5, 0, 0))
+
+        rows[0]["clicks"] = 50
+        second = bulk_upsert(SEO_QUERY_DAILY, prop, rows, batch_size=3)
+
+        self.assertEqual((second.inserted, second.updated, second.skipped), (0, 1, 4))
+        self.assertEqual(prop.query_days.count(), 5)
+        self.assertEqual(prop.query_days.get(query="query 0").clicks, 50)
+        self.assertEqual(prop.query_days.get(query="query 1").ctr, Decimal("0.1000"))
+
+        rewritten = bulk_upsert(SEO_QUERY_DAILY, prop, rows, skip_unchanged=False)
+        self.assertEqual((rewritten.inserted, rewritten.updated, rewritten.skipped), (0, 5, 0))
+
+    def test_bulk_upsert_keeps_last_payload_for_duplicate_keys(self):
+        account = SocialAccount.objects.create(platform="youtube", external_account_id="3", display_name="Test")
+        report = UpsertReport()
+        report.upsert(
+            ACCOUNT_METRIC_DAILY,
+            account,
+            [{"date": date(2024, 5, 1), "followers_total": 10}, None, {"date": date(2024, 5, 1), "followers_total": 12}],
+        )
+
+        self.assertEqual(AccountMetricDaily.objects.get(account=account).followers_total, 12)
+        self.assertEqual(report.tables["AccountMetricDaily"].inserted, 1)
+        self.assertIn("AccountMetricDaily: 1 inserted, 0 updated, 0 skipped", report.lines()[0])
+
 
 class OutreachSafetyTests(TestCase):
     def test_can_send_to_contact(self):
@@ -71,6 +133,139 @@ class OutreachSafetyTests(TestCase):
         self.assertFalse(can_send_to_contact(contact))
 
 
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    MARKETING_OUTREACH_ACCOUNT_PER_MINUTE=60,
+    MARKETING_OUTREACH_ACCOUNT_BURST=1,
+)
+class OutreachSenderTests(TestCase):
+    def setUp(self):
+        self.campaign = OutreachCampaign.objects.create(
+            name="Spring",
+            status="active",
+            sending_account="sales@example.com",
+            daily_limit=30,
+            hourly_limit=10,
+            schedule_window_json={"start": "00:00", "end": "23:59"},
+        )
+        OutreachMessageTemplate.objects.create(
+            campaign=self.campaign,
+            subject_template="Hi {first_name}",
+            body_template="Hello {first_name} at {company}",
+        )
+
+    def _queue(self, email, **contact_fields):
+        contact = Contact.objects.create(email=email, **contact_fields)
+        return OutreachSendLog.objects.create(
+            campaign=self.campaign, contact=contact, status="queued", queued_at=timezone.now()
+        )
+
+    def test_sends_over_one_connection_and_skips_stopped_contacts(self):
+        sent_log = self._queue("ana@example.com", first_name="Ana", company="Acme")
+        second_log = self._queue("bo@example.com", first_name="Bo")
+        dnc_log = self._queue("dnc@example.com", do_not_contact=True)
+        replied_log = self._queue("replied@example.com")
+        OutreachSendLog.objects.create(
+            campaign=self.campaign, contact=replied_log.contact, send_type="followup1", status="replied"
+        )
+        sender = OutreachSender(sleep=lambda seconds: None)
+
+        with patch("marketing.services.outreach_sender.get_connection", wraps=get_connection) as connect:
+            report = sender.run_once()
+        sender.close()
+
+        self.assertEqual((report.sent, report.failed, report.stopped), (2, 0, 2))
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, "Hi Ana")
+        self.assertIn("Hello Ana at Acme", mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].from_email, "sales@example.com")
+        for log in (sent_log, second_log, dnc_log, replied_log):
+            log.refresh_from_db()
+        self.assertEqual(sent_log.status, "sent")
+        self.assertIsNotNone(Contact.objects.get(pk=sent_log.contact_id).last_contacted_at)
+        self.assertEqual((dnc_log.status, dnc_log.error_text), ("stopped", "Do not contact"))
+        self.assertEqual((replied_log.status, replied_log.error_text), ("stopped", "Contact replied"))
+
+    def test_batch_is_claimed_and_written_back_with_constant_updates(self):
+        logs = [self._queue(f"contact{index}@example.com") for index in range(4)]
+        sender = OutreachSender(sleep=lambda seconds: None)
+
+        with CaptureQueriesContext(connection) as queries:
+            report = sender.run_once()
+
+        self.assertEqual(report.sent, 4)
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(
+            set(OutreachSendLog.objects.filter(pk__in=[log.pk for log in logs]).values_list("status", flat=True)),
+            {"sent"},
+        )
+        self.assertFalse(Contact.objects.filter(last_contacted_at__isnull=True).exists())
+
+    def test_reconnects_once_when_the_pooled_session_was_closed(self):
+        first_log = self._queue("ana@example.com")
+        second_log = self._queue("bo@example.com")
+        claimed = []
+
+        class ClosingConnection:
+            def __init__(self, fail_after):
+                self.sends = 0
+                self.fail_after = fail_after
+
+            def open(self):
+                pass
+
+            def close(self):
+                pass
+
+            def send_messages(self, messages):
+                claimed.append(OutreachSendLog.objects.get(contact__email=messages[0].to[0]).status)
+                self.sends += 1
+                if self.sends > self.fail_after:
+                    raise SMTPServerDisconnected("Connection unexpectedly closed")
+                return len(messages)
+
+        connections = [ClosingConnection(fail_after=1), ClosingConnection(fail_after=5)]
+        sender = OutreachSender(sleep=lambda seconds: None)
+
+        with patch("marketing.services.outreach_sender.get_connection", side_effect=connections):
+            report = sender.run_once()
+
+        self.assertEqual((report.sent, report.failed), (2, 0))
+        self.assertEqual(claimed, ["sending", "sending", "sending"])
+        self.assertEqual([connection.sends for connection in connections], [2, 1])
+        first_log.refresh_from_db()
+        second_log.refresh_from_db()
+        self.assertEqual((first_log.status, second_log.status), ("sent", "sent"))
+
+    def test_hourly_limit_counts_messages_already_sent(self):
+        self.campaign.hourly_limit = 1
+        self.campaign.save(update_fields=["hourly_limit"])
+        earlier = self._queue("earlier@example.com")
+        OutreachSendLog.objects.filter(pk=earlier.pk).update(status="sent", sent_at=timezone.now())
+        self._queue("waiting@example.com")
+
+        report = OutreachSender(sleep=lambda seconds: None).run_once()
+
+        self.assertEqual(report.sent, 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_token_bucket_waits_once_burst_is_spent(self):
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(30, 2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            bucket.take()
+
+        self.assertEqual(waits, [2.0])
+
+
 class MarketingUnsubscribeTests(TestCase):
     def test_unsubscribe(self):
         contact = Contact.objects.create(email="unsub@example.com")
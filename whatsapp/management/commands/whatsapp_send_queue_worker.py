@@ -1,26 +1,33 @@
 import random
 import time
+from collections import Counter
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Min
 from django.utils import timezone
 
-from whatsapp.models import WhatsAppSendQueue, WhatsAppMessage, WhatsAppEventLog
+from whatsapp.models import SEND_QUEUE_WAKE_CACHE_KEY, WhatsAppAccount, WhatsAppSendQueue, WhatsAppMessage, WhatsAppEventLog
 from whatsapp.services import client as wa_client
-from whatsapp.utils.limits import (
-    is_dnc,
-    contact_daily_count,
-    account_daily_count,
-    account_hourly_count,
-)
+from whatsapp.utils.limits import DncPhones, SendCounters, reserved_send_counts
 
 
 class Command(BaseCommand):
     help = "Process WhatsApp outbound send queue."
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dnc = DncPhones()
+        self.counters = SendCounters()
+        # Accounts at their daily or hourly limit as of the last pass.
+        self.capped_accounts = set()
+
     def add_arguments(self, parser):
         parser.add_argument("--loop", action="store_true", help="Run continuously")
         parser.add_argument("--limit", type=int, default=50, help="Max items per run")
+        parser.add_argument("--idle-seconds", type=int, default=60, help="Longest wait for new items in loop mode")
 
     def handle(self, *args, **options):
         if not getattr(settings, "WHATSAPP_ENABLED", False):
@@ -32,57 +39,151 @@ class Command(BaseCommand):
 
         loop = options["loop"]
         limit = options["limit"]
+        idle_seconds = max(1, options["idle_seconds"])
 
         while True:
             processed = self._process_once(limit)
             if not loop:
                 break
-            time.sleep(10 if processed else 20)
+            if not processed:
+                self._wait_for_work(idle_seconds)
+
+    def _wait_for_work(self, idle_seconds: int):
+        """
+        Sleep until an item is enqueued, a scheduled item falls due, or
+        ``idle_seconds`` pass. Enqueueing bumps a cache key, so with a shared
+        cache the worker picks new items up within a second. Items of capped
+        accounts are not waited for; ``idle_seconds`` bounds how late the
+        worker notices a limit window reopening.
+        """
+        wake = cache.get(SEND_QUEUE_WAKE_CACHE_KEY)
+        next_due = (
+            WhatsAppSendQueue.objects.filter(status="queued")
+            .exclude(account_id__in=self.capped_accounts)
+            .aggregate(at=Min("scheduled_at"))["at"]
+        )
+        deadline = time.monotonic() + idle_seconds
+        if next_due is not None:
+            deadline = min(deadline, time.monotonic() + max((next_due - timezone.now()).total_seconds(), 0))
+        while time.monotonic() < deadline:
+            if cache.get(SEND_QUEUE_WAKE_CACHE_KEY) != wake:
+                return
+            time.sleep(min(1.0, max(deadline - time.monotonic(), 0)))
+
+    def _settle(self, item, status: str, error: str) -> bool:
+        """Close out a queued item unless another worker claimed it first."""
+        return bool(
+            WhatsAppSendQueue.objects.filter(pk=item.pk, status="queued").update(
+                status=status,
+                last_error=error,
+                updated_at=timezone.now(),
+            )
+        )
+
+    def _claim_account(self, account_id, items, limits) -> set:
+        """
+        Mark as many of one account's queued items processing as its limits allow.
+
+        Runs once per account per pass: the account row is locked while the
+        sent and in-flight counts are read, the room left is handed out to
+        ``items`` in order, and the winners are claimed with one update, so
+        workers sharing an account cannot pass its limits together. Returns
+        the claimed item ids.
+        """
+        daily_limit, hourly_limit, contact_limit = limits
+        with transaction.atomic():
+            WhatsAppAccount.objects.select_for_update().get(pk=account_id)
+            reserved = reserved_send_counts(account_id)
+            room = min(daily_limit - reserved["today"], hourly_limit - reserved["hour"])
+            if room <= 0:
+                self.capped_accounts.add(account_id)
+                return set()
+            thread_used = Counter(reserved["threads"])
+            item_ids = []
+            for item in items:
+                if len(item_ids) >= room:
+                    break
+                if thread_used[item.thread_id] >= contact_limit:
+                    continue
+                thread_used[item.thread_id] += 1
+                item_ids.append(item.pk)
+            if not item_ids:
+                return set()
+            stamp = timezone.now()
+            claimed = WhatsAppSendQueue.objects.filter(pk__in=item_ids, status="queued").update(
+                status="processing",
+                attempts=F("attempts") + 1,
+                updated_at=stamp,
+            )
+            if claimed < len(item_ids):
+                # Some items were settled elsewhere since the pass read them.
+                item_ids = WhatsAppSendQueue.objects.filter(
+                    pk__in=item_ids, status="processing", updated_at=stamp
+                ).values_list("pk", flat=True)
+        return set(item_ids)
 
     def _process_once(self, limit: int) -> int:
         now = timezone.now()
         daily_limit = getattr(settings, "WHATSAPP_DAILY_LIMIT", 120)
         hourly_limit = getattr(settings, "WHATSAPP_HOURLY_LIMIT", 20)
         contact_limit = getattr(settings, "WHATSAPP_CONTACT_DAILY_LIMIT", 3)
-
-        items = (
+        limits = (daily_limit, hourly_limit, contact_limit)
+
+        counters = self.counters.seed(now)
+        self.capped_accounts = {
+            account_id
+            for account_id in counters.account_today.keys() | counters.account_hour.keys()
+            if counters.account_today[account_id] >= daily_limit or counters.account_hour[account_id] >= hourly_limit
+        }
+        # Capped accounts' items stay queued without holding up other accounts' items behind them.
+        items = list(
             WhatsAppSendQueue.objects.select_related("thread", "account")
             .filter(status="queued", scheduled_at__lte=now)
+            .exclude(account_id__in=self.capped_accounts)
             .order_by("scheduled_at", "id")[:limit]
         )
+        if not items:
+            return 0
+        dnc = self.dnc.refresh()
 
+        claimed = {}
         count = 0
-        for item in items:
+        for index, item in enumerate(items):
             thread = item.thread
             account = item.account
 
-            if is_dnc(thread.contact_phone):
-                item.status = "canceled"
-                item.last_error = "Do Not Contact"
-                item.save(update_fields=["status", "last_error", "updated_at"])
+            if thread.contact_phone in dnc:
+                self._settle(item, "canceled", "Do Not Contact")
                 continue
 
-            if contact_daily_count(thread) >= contact_limit:
-                item.status = "canceled"
-                item.last_error = "Contact daily limit reached"
-                item.save(update_fields=["status", "last_error", "updated_at"])
+            if counters.thread_today[thread.pk] >= contact_limit:
+                self._settle(item, "canceled", "Contact daily limit reached")
                 continue
 
-            if account_daily_count(account) >= daily_limit:
-                break
+            if account.pk in self.capped_accounts:
+                continue
 
-            if account_hourly_count(account) >= hourly_limit:
-                break
+            if counters.account_today[account.pk] >= daily_limit or counters.account_hour[account.pk] >= hourly_limit:
+                self.capped_accounts.add(account.pk)
+                continue
 
             if item.attempts >= 3:
-                item.status = "failed"
-                item.last_error = "Max attempts"
-                item.save(update_fields=["status", "last_error", "updated_at"])
+                self._settle(item, "failed", "Max attempts")
                 continue
 
+            if account.pk not in claimed:
+                candidates = [
+                    candidate
+                    for candidate in items[index:]
+                    if candidate.account_id == account.pk
+                    and candidate.attempts < 3
+                    and candidate.thread.contact_phone not in dnc
+                ]
+                claimed[account.pk] = self._claim_account(account.pk, candidates, limits)
+            if item.pk not in claimed[account.pk]:
+                continue
             item.status = "processing"
             item.attempts += 1
-            item.save(update_fields=["status", "attempts", "updated_at"])
 
             payload = {
                 "chat_id": thread.wa_chat_id,
@@ -102,6 +203,7 @@ class Command(BaseCommand):
                         "sent_at": timezone.now(),
                     },
                 )
+                counters.record(account.pk, thread.pk)
                 thread.last_message_at = timezone.now()
                 thread.save(update_fields=["last_message_at", "updated_at"])
 
@@ -1,8 +1,15 @@
+import time
+
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 
 
+# Bumped whenever a queue item is saved so an idle send worker wakes up early.
+SEND_QUEUE_WAKE_CACHE_KEY = "whatsapp-send-queue-wake:v1"
+
+
 class WhatsAppAccount(models.Model):
     STATUS_CHOICES = [
         ("disconnected", "Disconnected"),
@@ -159,6 +166,11 @@ class WhatsAppSendQueue(models.Model):
             models.Index(fields=["status", "scheduled_at"]),
         ]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.status == "queued":
+            cache.set(SEND_QUEUE_WAKE_CACHE_KEY, time.time(), None)
+
 
 class DoNotContactPhone(models.Model):
     phone = models.CharField(max_length=30, unique=True)
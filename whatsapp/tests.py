@@ -1,10 +1,25 @@
 import json
+from datetime import timedelta
+from unittest import mock
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from crm.models import Lead
-from whatsapp.models import WhatsAppThread, WhatsAppMessage
+from whatsapp.management.commands.whatsapp_send_queue_worker import Command
+from whatsapp.models import (
+    SEND_QUEUE_WAKE_CACHE_KEY,
+    DoNotContactPhone,
+    WhatsAppAccount,
+    WhatsAppMessage,
+    WhatsAppSendQueue,
+    WhatsAppThread,
+)
+from whatsapp.services import client as wa_client
 
 
 class WhatsAppWebhookTests(TestCase):
@@ -47,3 +62,188 @@ class WhatsAppWebhookTests(TestCase):
         thread = WhatsAppThread.objects.first()
         self.assertEqual(thread.contact_phone, "16045551234")
         self.assertEqual(thread.linked_lead, lead)
+
+
+@override_settings(WHATSAPP_CONTACT_DAILY_LIMIT=1, WHATSAPP_DAILY_LIMIT=5, WHATSAPP_HOURLY_LIMIT=5)
+class WhatsAppSendQueueWorkerTests(TestCase):
+    def setUp(self):
+        self.account = WhatsAppAccount.objects.create(phone_number="16045550000")
+        self.thread = WhatsAppThread.objects.create(
+            account=self.account,
+            wa_chat_id="16045551111@c.us",
+            contact_phone="16045551111",
+        )
+        self.worker = Command()
+
+    def _process(self, limit=50):
+        with mock.patch.object(wa_client, "send_message", return_value={"ok": True}) as send, mock.patch(
+            "whatsapp.management.commands.whatsapp_send_queue_worker.time.sleep"
+        ):
+            processed = self.worker._process_once(limit)
+        return processed, send
+
+    def test_contact_limit_uses_counters_recorded_during_the_pass(self):
+        first = WhatsAppSendQueue.objects.create(account=self.account, thread=self.thread, message_body="One")
+        second = WhatsAppSendQueue.objects.create(account=self.account, thread=self.thread, message_body="Two")
+
+        with CaptureQueriesContext(connection) as queries:
+            processed, send = self._process()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(processed, 1)
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual((first.status, first.attempts), ("sent", 1))
+        self.assertEqual((second.status, second.last_error), ("canceled", "Contact daily limit reached"))
+        message_counts = [
+            query["sql"] for query in queries if "COUNT(" in query["sql"] and "whatsapp_whatsappmessage" in query["sql"]
+        ]
+        # The pass seeds its counters once; the claim re-reads only the claimed account.
+        self.assertEqual(len(message_counts), 2)
+
+    def test_dnc_set_reloads_when_the_list_changes(self):
+        item = WhatsAppSendQueue.objects.create(account=self.account, thread=self.thread, message_body="Hi")
+        self.worker.dnc.refresh()
+        DoNotContactPhone.objects.create(phone=self.thread.contact_phone)
+
+        processed, send = self._process()
+
+        item.refresh_from_db()
+        self.assertEqual(processed, 0)
+        send.assert_not_called()
+        self.assertEqual((item.status, item.last_error), ("canceled", "Do Not Contact"))
+
+    def test_item_claimed_by_another_worker_is_skipped(self):
+        item = WhatsAppSendQueue.objects.create(account=self.account, thread=self.thread, message_body="Hi")
+        claim = self.worker._claim_account
+
+        def claimed_elsewhere(account_id, queued, limits):
+            WhatsAppSendQueue.objects.filter(pk__in=[candidate.pk for candidate in queued]).update(status="processing")
+            return claim(account_id, queued, limits)
+
+        with mock.patch.object(self.worker, "_claim_account", side_effect=claimed_elsewhere):
+            processed, send = self._process()
+
+        item.refresh_from_db()
+        self.assertEqual(processed, 0)
+        send.assert_not_called()
+        self.assertEqual((item.status, item.attempts), ("processing", 0))
+
+    def test_claim_counts_items_other_workers_are_sending(self):
+        other_thread = WhatsAppThread.objects.create(
+            account=self.account, wa_chat_id="16045552222@c.us", contact_phone="16045552222"
+        )
+        for index in range(4):
+            WhatsAppSendQueue.objects.create(
+                account=self.account, thread=other_thread, message_body=f"Busy {index}", status="processing"
+            )
+        WhatsAppMessage.objects.create(
+            thread=other_thread, wa_message_id="sent-1", direction="outbound", body="Sent", sent_at=timezone.now()
+        )
+        item = WhatsAppSendQueue.objects.create(account=self.account, thread=self.thread, message_body="Hi")
+
+        processed, send = self._process()
+
+        item.refresh_from_db()
+        self.assertEqual(processed, 0)
+        send.assert_not_called()
+        self.assertEqual((item.status, item.attempts), ("queued", 0))
+        self.assertEqual(self.worker.capped_accounts, {self.account.pk})
+
+    def test_account_is_locked_and_claimed_once_per_pass(self):
+        threads = [self.thread] + [
+            WhatsAppThread.objects.create(
+                account=self.account, wa_chat_id=f"1604555{index}000@c.us", contact_phone=f"1604555{index}000"
+            )
+            for index in range(2, 5)
+        ]
+        items = [
+            WhatsAppSendQueue.objects.create(account=self.account, thread=thread, message_body=f"Hi {index}")
+            for index, thread in enumerate(threads)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            processed, send = self._process()
+
+        self.assertEqual(processed, 4)
+        self.assertEqual(send.call_count, 4)
+        self.assertEqual(
+            set(WhatsAppSendQueue.objects.filter(pk__in=[item.pk for item in items]).values_list("status", flat=True)),
+            {"sent"},
+        )
+        claims = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("UPDATE")
+            and "whatsapp_whatsappsendqueue" in query["sql"]
+            and "processing" in query["sql"]
+        ]
+        self.assertEqual(len(claims), 1)
+
+    def test_claim_stops_at_the_room_left_on_the_account(self):
+        threads = [self.thread] + [
+            WhatsAppThread.objects.create(
+                account=self.account, wa_chat_id=f"1604556{index}000@c.us", contact_phone=f"1604556{index}000"
+            )
+            for index in range(2, 8)
+        ]
+        for index, thread in enumerate(threads):
+            WhatsAppSendQueue.objects.create(account=self.account, thread=thread, message_body=f"Hi {index}")
+
+        processed, send = self._process()
+
+        self.assertEqual(processed, 5)
+        self.assertEqual(WhatsAppSendQueue.objects.filter(status="queued").count(), 2)
+        self.assertEqual(self.worker.capped_accounts, {self.account.pk})
+
+    def test_idle_worker_does_not_wait_on_capped_accounts(self):
+        WhatsAppMessage.objects.bulk_create(
+            WhatsAppMessage(
+                thread=self.thread,
+                wa_message_id=f"sent-{index}",
+                direction="outbound",
+                body="Sent",
+                sent_at=timezone.now(),
+            )
+            for index in range(5)
+        )
+        WhatsAppSendQueue.objects.create(account=self.account, thread=self.thread, message_body="Capped")
+        cache.delete(SEND_QUEUE_WAKE_CACHE_KEY)
+        naps = []
+
+        def nap_until_woken(seconds):
+            naps.append(seconds)
+            cache.set(SEND_QUEUE_WAKE_CACHE_KEY, "woken")
+
+        processed, send = self._process()
+        with mock.patch(
+            "whatsapp.management.commands.whatsapp_send_queue_worker.time.sleep", side_effect=nap_until_woken
+        ):
+            self.worker._wait_for_work(60)
+
+        self.assertEqual(processed, 0)
+        send.assert_not_called()
+        self.assertEqual(len(naps), 1)
+        self.assertEqual(naps[0], 1.0)
+
+    def test_enqueue_wakes_an_idle_worker(self):
+        cache.delete(SEND_QUEUE_WAKE_CACHE_KEY)
+        naps = []
+
+        def enqueue_while_sleeping(seconds):
+            naps.append(seconds)
+            WhatsAppSendQueue.objects.create(
+                account=self.account,
+                thread=self.thread,
+                message_body="Later",
+                scheduled_at=timezone.now() + timedelta(hours=1),
+            )
+
+        with mock.patch(
+            "whatsapp.management.commands.whatsapp_send_queue_worker.time.sleep",
+            side_effect=enqueue_while_sleeping,
+        ):
+            self.worker._wait_for_work(60)
+
+        self.assertEqual(len(naps), 1)
+        self.assertLessEqual(naps[0], 1.0)
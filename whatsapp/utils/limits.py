@@ -1,7 +1,18 @@
-from datetime import timedelta
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Max, Q
 from django.utils import timezone
 
-from whatsapp.models import WhatsAppMessage, DoNotContactPhone
+from whatsapp.models import WhatsAppMessage, WhatsAppSendQueue, DoNotContactPhone
+
+# A processing item older than this is treated as abandoned and stops holding a send slot.
+IN_FLIGHT_MINUTES = 10
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
 
 
 def is_dnc(phone: str) -> bool:
@@ -9,20 +20,22 @@ def is_dnc(phone: str) -> bool:
 
 
 def contact_daily_count(thread, day=None) -> int:
-    day = day or timezone.localdate()
+    start, end = _day_range(day or timezone.localdate())
     return WhatsAppMessage.objects.filter(
         thread=thread,
         direction="outbound",
-        sent_at__date=day,
+        sent_at__gte=start,
+        sent_at__lt=end,
     ).count()
 
 
 def account_daily_count(account, day=None) -> int:
-    day = day or timezone.localdate()
+    start, end = _day_range(day or timezone.localdate())
     return WhatsAppMessage.objects.filter(
         thread__account=account,
         direction="outbound",
-        sent_at__date=day,
+        sent_at__gte=start,
+        sent_at__lt=end,
     ).count()
 
 
@@ -33,3 +46,110 @@ def account_hourly_count(account) -> int:
         direction="outbound",
         sent_at__gte=since,
     ).count()
+
+
+class DncPhones:
+    """
+    The do-not-contact list held in memory by a long-running worker.
+
+    ``refresh`` costs one aggregate query and reloads the phones only when
+    rows were added or removed since the last load.
+    """
+
+    def __init__(self):
+        self.phones = frozenset()
+        self.signature = None
+
+    def refresh(self):
+        signature = tuple(DoNotContactPhone.objects.aggregate(rows=Count("id"), last=Max("id")).values())
+        if signature != self.signature:
+            self.phones = frozenset(DoNotContactPhone.objects.values_list("phone", flat=True))
+            self.signature = signature
+        return self
+
+    def __contains__(self, phone):
+        return phone in self.phones
+
+
+class SendCounters:
+    """
+    Outbound message counts per account and per thread for today and the last hour.
+
+    ``seed`` loads them with one grouped query; ``record`` keeps them current
+    as the worker sends, so checking a queue item costs no query.
+    """
+
+    def __init__(self):
+        self.account_today = Counter()
+        self.account_hour = Counter()
+        self.thread_today = Counter()
+
+    def seed(self, now=None):
+        now = now or timezone.now()
+        day_start, _ = _day_range(timezone.localdate(now))
+        hour_ago = now - timedelta(hours=1)
+        self.account_today.clear()
+        self.account_hour.clear()
+        self.thread_today.clear()
+        rows = (
+            WhatsAppMessage.objects.filter(direction="outbound", sent_at__gte=min(day_start, hour_ago))
+            .values("thread__account_id", "thread_id")
+            .annotate(
+                today=Count("id", filter=Q(sent_at__gte=day_start)),
+                hour=Count("id", filter=Q(sent_at__gte=hour_ago)),
+            )
+        )
+        for row in rows:
+            account_id = row["thread__account_id"]
+            self.account_today[account_id] += row["today"]
+            self.account_hour[account_id] += row["hour"]
+            self.thread_today[row["thread_id"]] += row["today"]
+        return self
+
+    def record(self, account_id, thread_id):
+        self.account_today[account_id] += 1
+        self.account_hour[account_id] += 1
+        self.thread_today[thread_id] += 1
+
+
+def reserved_send_counts(account_id, now=None) -> dict:
+    """
+    Outbound sends for one account that count against the limits: messages
+    already sent plus queue items another worker is sending now, with the
+    per-thread split for today under ``threads``. Read by the worker's claim,
+    inside the transaction holding the account lock.
+    """
+    now = now or timezone.now()
+    day_start, _ = _day_range(timezone.localdate(now))
+    hour_ago = now - timedelta(hours=1)
+    reserved = {"today": 0, "hour": 0, "threads": Counter()}
+    sent = (
+        WhatsAppMessage.objects.filter(
+            thread__account_id=account_id,
+            direction="outbound",
+            sent_at__gte=min(day_start, hour_ago),
+        )
+        .values("thread_id")
+        .annotate(
+            today=Count("id", filter=Q(sent_at__gte=day_start)),
+            hour=Count("id", filter=Q(sent_at__gte=hour_ago)),
+        )
+    )
+    for row in sent:
+        reserved["today"] += row["today"]
+        reserved["hour"] += row["hour"]
+        reserved["threads"][row["thread_id"]] += row["today"]
+    in_flight = (
+        WhatsAppSendQueue.objects.filter(
+            account_id=account_id,
+            status="processing",
+            updated_at__gte=now - timedelta(minutes=IN_FLIGHT_MINUTES),
+        )
+        .values("thread_id")
+        .annotate(count=Count("id"))
+    )
+    for row in in_flight:
+        reserved["today"] += row["count"]
+        reserved["hour"] += row["count"]
+        reserved["threads"][row["thread_id"]] += row["count"]
+    return reserved